@@ -10,31 +10,32 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from . import settings, state
+from . import runner_bridge, settings, state, upload_outbox
 from .logger import log
-from .processing import start_recovery_thread, stl_queue_worker
+from .processing import start_recovery_thread, stl_queue_worker, stl_upload_worker
 from .rhino_pool import refresh_rhino_pool
 from .routes_api import router as api_router
 from .routes_basic import router as basic_router
 
 
-async def _queue_worker_watchdog() -> None:
+async def _queue_worker_watchdog(worker_id: int = 0) -> None:
     """stl_queue_worker 태스크를 감시하고 죽으면 자동 재시작한다.
     CancelledError나 예외로 워커가 종료되면 큐에 STL이 쌓여도 처리가 안 되어 먹통이 됨.
+    워커마다 watchdog을 하나씩 두어 한 워커의 재시작이 다른 워커에 영향을 주지 않게 한다.
     """
     while True:
         try:
-            task = asyncio.create_task(stl_queue_worker())
-            log("[watchdog] stl_queue_worker started")
+            task = asyncio.create_task(stl_queue_worker(worker_id))
+            log(f"[watchdog] stl_queue_worker#{worker_id} started")
             await task
             # 정상 종료(CancelledError로 break)는 서버 종료 시만 발생
-            log("[watchdog] stl_queue_worker exited normally, not restarting")
+            log(f"[watchdog] stl_queue_worker#{worker_id} exited normally, not restarting")
             break
         except asyncio.CancelledError:
-            log("[watchdog] watchdog cancelled, stopping")
+            log(f"[watchdog] watchdog#{worker_id} cancelled, stopping")
             break
         except Exception as e:
-            log(f"[watchdog] stl_queue_worker crashed: {e}, restarting in 5s")
+            log(f"[watchdog] stl_queue_worker#{worker_id} crashed: {e}, restarting in 5s")
             await asyncio.sleep(5)
 
 
@@ -88,6 +89,10 @@ async def _health_heartbeat() -> None:
             cur_name = state.current_processing_name
             cur_started = state.current_processing_started_ts
             cur_dur = (now - cur_started) if cur_started else None
+            try:
+                active_snapshot = dict(state.active_jobs)
+            except Exception:
+                active_snapshot = {}
 
             line = (
                 "[heartbeat] "
@@ -108,16 +113,19 @@ async def _health_heartbeat() -> None:
                 f"last_subproc_done={_fmt_age(state.last_rhino_subprocess_done_ts)} "
                 f"current={cur_name or '-'}"
                 + (f" cur_dur={cur_dur:.0f}s" if cur_dur is not None else "")
+                + f" active={len(active_snapshot)}/{settings.MAX_RHINO_CONCURRENCY}"
             )
             log(line)
 
-            # stuck 감지: 처리 중 작업이 임계치 이상 같은 상태라면 경보 로그
-            if cur_started and (now - cur_started) > stuck_warn_sec:
-                log(
-                    f"[heartbeat][STUCK] '{cur_name}' processing for "
-                    f"{(now - cur_started):.0f}s (>{stuck_warn_sec:.0f}s). "
-                    "Rhino script may be hung. Check Rhino UI / RhinoCode pipe."
-                )
+            # stuck 감지: 처리 중 작업이 임계치 이상 같은 상태라면 경보 로그 (워커별)
+            for wid, job in sorted(active_snapshot.items()):
+                started = job.get("startedTs")
+                if started and (now - started) > stuck_warn_sec:
+                    log(
+                        f"[heartbeat][STUCK] worker#{wid} '{job.get('name')}' processing for "
+                        f"{(now - started):.0f}s (>{stuck_warn_sec:.0f}s). "
+                        "Rhino script may be hung. Check Rhino UI / RhinoCode pipe."
+                    )
             # subprocess 시작했는데 done_ts가 stale + 처리 중이면 경보
             if (
                 state.last_rhino_subprocess_started_ts
@@ -138,7 +146,7 @@ async def _health_heartbeat() -> None:
                 if (
                     state.last_enqueue_ts > state.last_dequeue_ts
                     and (now - state.last_enqueue_ts) > stuck_warn_sec
-                    and not cur_name
+                    and not active_snapshot
                 ):
                     log(
                         f"[heartbeat][STUCK] queue={qsize} but worker idle for "
@@ -193,11 +201,15 @@ def create_app():
         path = request.url.path
         if path == "/api/rhino/internal/job-callback":
             return await call_next(request)
+        # 상주 러너 long-poll: Rhino 내부에서 호출하므로 secret 대신 loopback + 러너 토큰으로 검사(라우트)
+        if path.startswith("/api/rhino/internal/runner/"):
+            return await call_next(request)
         is_protected = (
             path.startswith("/api/rhino/")
             or path.startswith("/control/")
             or path.startswith("/history/")
             or path.startswith("/health/diag")
+            or path == "/metrics"
         )
 
         if not is_protected:
@@ -247,6 +259,8 @@ def create_app():
     app.include_router(api_router)
 
     sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+    # 실행 중 Rhino 작업 로그(core/job_log.py)를 rhino_log 이벤트로 내보낼 때 쓴다
+    state.sio = sio
 
     @sio.event
     async def connect(sid, environ):
@@ -279,6 +293,30 @@ def create_app():
             return {"ok": True}
         return {"ok": False, "error": "unknown token"}
 
+    @app.get("/api/rhino/internal/runner/next")
+    async def runner_next(
+        request: Request,
+        runnerId: str,
+        generation: int = -1,
+        pid: int | None = None,
+        timeout: float = settings.RHINO_RUNNER_POLL_SEC,
+    ):
+        client_host = request.client.host if request.client else ""
+        if client_host not in ("127.0.0.1", "::1", "localhost"):
+            return JSONResponse(
+                status_code=403, content={"ok": False, "error": "forbidden"}
+            )
+        if not runner_bridge.check_runner_token(
+            runnerId, request.headers.get("X-Runner-Token")
+        ):
+            return JSONResponse(
+                status_code=403, content={"ok": False, "error": "invalid runner token"}
+            )
+        timeout = min(max(0.0, float(timeout)), settings.RHINO_RUNNER_POLL_SEC)
+        return await runner_bridge.next_runner_message(
+            runnerId, generation, pid, timeout
+        )
+
     @app.on_event("startup")
     def on_startup() -> None:
         state.set_main_loop(asyncio.get_event_loop())
@@ -301,9 +339,16 @@ def create_app():
             settings.purge_old_storage(days=15)
         except Exception:
             pass
-        # FIFO STL 큐 워커 시작 - 한 번에 하나씩 순차 처리를 보장한다.
+        # FIFO STL 큐 워커 시작 - RHINO_MAX_CONCURRENCY 개수만큼 띄운다(기본 1 = 순차 처리).
         # watchdog이 워커 태스크를 관리하므로 직접 create_task하지 않는다.
-        asyncio.create_task(_queue_worker_watchdog())
+        for worker_id in range(settings.MAX_RHINO_CONCURRENCY):
+            asyncio.create_task(_queue_worker_watchdog(worker_id))
+        # 업로드 단계 워커: Rhino 이후 메타데이터 계산/업로드를 Rhino 워커와 분리한다
+        if settings.STL_PIPELINE_ASYNC_UPLOAD:
+            for worker_id in range(settings.STL_UPLOAD_WORKERS):
+                asyncio.create_task(stl_upload_worker(worker_id))
+        # 업로드 outbox 재시도 루프: 첫 스캔에서 재시작 전에 못 올린 출력을 이어서 올린다
+        asyncio.create_task(upload_outbox.outbox_retry_loop())
         # [fix] 주기적 Rhino pool 재스캔 - Rhino 재시작/크래시로 pipeId가 바뀌어도
         # 요청이 올 때까지 기다리지 않고 선제적으로 갱신한다. 하루 누적되는 stale pipeId로
         # 인한 지연/실패를 예방.
@@ -0,0 +1,281 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/core/processing.py
+# - bg/pc1/rhino-server/compute/core/stl_metadata.py
+# - web/backend/controllers/bg/bg.controller.js
+"""백엔드(/bg/*)·presigned S3 호출용 공용 HTTP 클라이언트.
+
+- 프로세스 전체가 하나의 requests.Session(keep-alive 커넥션 풀)을 공유한다.
+- 엔드포인트별 타임아웃(settings.BACKEND_HTTP_ENDPOINT_TIMEOUTS, 기본 BACKEND_HTTP_TIMEOUT_SEC).
+- 일시 오류(연결 실패, 429/502/503/504)는 지수 backoff + full jitter로 재시도한다.
+  POST는 요청이 처리됐을 수 있는 read timeout / 연결 끊김 / 502·503·504에서는 재시도하지 않고
+  429와 전송 전 연결 실패(ConnectTimeout, NewConnectionError)만 재시도한다
+  (register-file, presign-upload 등 부작용이 있는 호출이 중복 적용되지 않도록).
+  멱등인 POST는 호출자가 idempotent=True로 opt-in한다.
+- 엔드포인트별 지연 히스토그램을 state.backend_http_stats에 쌓고 /health/diag에 노출한다.
+
+async 코드(process_single_stl 등)는 arequest()로 호출해 이벤트 루프를 막지 않는다.
+복구 스레드 등 sync 경로는 request()를 그대로 쓴다.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from . import settings, state
+from .logger import log
+
+# 지연 히스토그램 버킷 상한(초). 마지막 버킷은 +Inf.
+LATENCY_BUCKETS_SEC = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RETRY_STATUSES = (429, 502, 503, 504)
+# 서버가 요청을 처리하기 전에 거절했음이 보장되는 상태(비멱등 요청도 재시도 가능)
+RETRY_STATUSES_NON_IDEMPOTENT = (429,)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+# 429 등의 Retry-After를 따를 때 한 번에 기다리는 최대 시간(초)
+RETRY_AFTER_MAX_SEC = 30.0
+
+_session_lock = threading.Lock()
+_session: requests.Session | None = None
+
+
+def _get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=settings.BACKEND_HTTP_POOL_SIZE,
+                max_retries=0,
+            )
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _session = s
+        return _session
+
+
+def backend_base() -> str:
+    return os.getenv("BACKEND_BASE", "").rstrip("/")
+
+
+def endpoint_timeout(endpoint: str) -> float:
+    return float(
+        settings.BACKEND_HTTP_ENDPOINT_TIMEOUTS.get(
+            endpoint, settings.BACKEND_HTTP_TIMEOUT_SEC
+        )
+    )
+
+
+def worst_case_sec(endpoint: str, retries: int | None = None) -> float:
+    """request()가 endpoint 호출에 쓸 수 있는 최대 시간 추정(초).
+
+    시도마다 타임아웃 + 재시도 사이 최대 대기(backoff 상한과 Retry-After 상한 중 큰 값).
+    호출을 기다리는 쪽(프리페치 대기 등)이 정상적으로 느린 호출을 먼저 끊지 않도록 쓴다.
+    """
+    max_retries = settings.BACKEND_HTTP_MAX_RETRIES if retries is None else int(retries)
+    total = endpoint_timeout(endpoint) * (1 + max_retries)
+    for attempt in range(max_retries):
+        total += max(settings.BACKEND_HTTP_BACKOFF_SEC * (2**attempt), RETRY_AFTER_MAX_SEC)
+    return total
+
+
+def _observe(endpoint: str, elapsed: float, status: int | None, retried: bool) -> None:
+    with state.backend_http_stats_lock:
+        st = state.backend_http_stats.get(endpoint)
+        if st is None:
+            st = {
+                "count": 0,
+                "errors": 0,
+                "retries": 0,
+                "sumSec": 0.0,
+                "maxSec": 0.0,
+                "buckets": [0] * (len(LATENCY_BUCKETS_SEC) + 1),
+                "lastStatus": None,
+            }
+            state.backend_http_stats[endpoint] = st
+        if retried:
+            st["retries"] += 1
+            return
+        st["count"] += 1
+        st["sumSec"] += elapsed
+        st["maxSec"] = max(st["maxSec"], elapsed)
+        idx = len(LATENCY_BUCKETS_SEC)
+        for i, upper in enumerate(LATENCY_BUCKETS_SEC):
+            if elapsed <= upper:
+                idx = i
+                break
+        st["buckets"][idx] += 1
+        st["lastStatus"] = status
+        if status is None or status >= 500:
+            st["errors"] += 1
+
+
+def _backoff_sec(attempt: int) -> float:
+    # full jitter: [0, base * 2^attempt]
+    return random.uniform(0.0, settings.BACKEND_HTTP_BACKOFF_SEC * (2**attempt))
+
+
+def _failed_before_send(exc: BaseException) -> bool:
+    """요청 본문을 보내기 전에 실패했음이 확실한 예외인지(연결 수립 실패/연결 timeout).
+
+    requests.ConnectionError는 본문 전송 후 끊긴 경우("Connection aborted", RemoteDisconnected)도
+    포함하므로, 원인 체인에 urllib3 NewConnectionError가 있을 때만 전송 전 실패로 본다.
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.ConnectionError):
+        return False
+    seen = set()
+    stack = [exc]
+    while stack:
+        cur = stack.pop()
+        if cur is None or id(cur) in seen:
+            continue
+        seen.add(id(cur))
+        if isinstance(cur, NewConnectionError):
+            return True
+        stack.append(getattr(cur, "reason", None))
+        stack.append(cur.__cause__)
+        stack.append(cur.__context__)
+        stack.extend(a for a in getattr(cur, "args", ()) if isinstance(a, BaseException))
+    return False
+
+
+def request(
+    method: str,
+    endpoint: str,
+    *,
+    url: str | None = None,
+    params: dict | None = None,
+    json: dict | None = None,
+    data=None,
+    headers: dict | None = None,
+    timeout: float | None = None,
+    retries: int | None = None,
+    bridge_auth: bool = True,
+    idempotent: bool | None = None,
+) -> requests.Response:
+    """백엔드 호출. endpoint는 '/bg/...' 경로(히스토그램 라벨 겸용).
+
+    url을 주면 BACKEND_BASE 대신 그 주소로 보낸다(presigned PUT 등).
+    재시도할 수 있도록 data는 bytes로 넘긴다(파일 객체 X).
+    idempotent: None이면 메서드로 판단(GET/PUT 등). 5xx/read timeout/연결 끊김 재시도는 멱등 요청만 한다.
+    마지막 시도의 예외는 그대로 올리므로 호출자는 기존처럼 try/except로 감싼다.
+    """
+    method = method.upper()
+    if url is None:
+        base = backend_base()
+        if not base:
+            raise RuntimeError("BACKEND_BASE not configured")
+        url = f"{base}{endpoint}"
+    req_headers = dict(settings.bridge_headers()) if bridge_auth else {}
+    if headers:
+        req_headers.update(headers)
+    timeout = endpoint_timeout(endpoint) if timeout is None else float(timeout)
+    max_retries = settings.BACKEND_HTTP_MAX_RETRIES if retries is None else int(retries)
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    retry_statuses = RETRY_STATUSES if idempotent else RETRY_STATUSES_NON_IDEMPOTENT
+
+    session = _get_session()
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            resp = session.request(
+                method,
+                url,
+                params=params,
+                json=json,
+                data=data,
+                headers=req_headers,
+                timeout=timeout,
+            )
+        except requests.RequestException as e:
+            elapsed = time.perf_counter() - started
+            if idempotent:
+                retryable = isinstance(e, (requests.ConnectionError, requests.Timeout))
+            else:
+                retryable = _failed_before_send(e)
+            if retryable and attempt < max_retries:
+                _observe(endpoint, elapsed, None, True)
+                wait = _backoff_sec(attempt)
+                log(
+                    f"[backend-http] {method} {endpoint} retry {attempt + 1}/{max_retries} "
+                    f"in {wait:.2f}s: {e}"
+                )
+                time.sleep(wait)
+                attempt += 1
+                continue
+            _observe(endpoint, elapsed, None, False)
+            raise
+
+        elapsed = time.perf_counter() - started
+        if resp.status_code in retry_statuses and attempt < max_retries:
+            _observe(endpoint, elapsed, resp.status_code, True)
+            wait = _backoff_sec(attempt)
+            retry_after = resp.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    wait = max(wait, min(RETRY_AFTER_MAX_SEC, float(retry_after)))
+                except Exception:
+                    pass
+            log(
+                f"[backend-http] {method} {endpoint} status={resp.status_code} "
+                f"retry {attempt + 1}/{max_retries} in {wait:.2f}s"
+            )
+            resp.close()
+            time.sleep(wait)
+            attempt += 1
+            continue
+        _observe(endpoint, elapsed, resp.status_code, False)
+        return resp
+
+
+def get(endpoint: str, **kwargs) -> requests.Response:
+    return request("GET", endpoint, **kwargs)
+
+
+def post(endpoint: str, **kwargs) -> requests.Response:
+    return request("POST", endpoint, **kwargs)
+
+
+def put(endpoint: str, **kwargs) -> requests.Response:
+    return request("PUT", endpoint, **kwargs)
+
+
+async def arequest(method: str, endpoint: str, **kwargs) -> requests.Response:
+    """request()를 스레드에서 실행한다. 풀/재시도/히스토그램은 sync 경로와 공유한다."""
+    return await asyncio.to_thread(request, method, endpoint, **kwargs)
+
+
+def latency_snapshot() -> dict:
+    """엔드포인트별 호출 수/에러/재시도와 누적 히스토그램(le=버킷 상한)."""
+    out = {}
+    with state.backend_http_stats_lock:
+        items = [
+            (k, dict(v, buckets=list(v["buckets"])))
+            for k, v in state.backend_http_stats.items()
+        ]
+    for endpoint, st in sorted(items):
+        count = st["count"]
+        cumulative = []
+        acc = 0
+        for upper, n in zip(list(LATENCY_BUCKETS_SEC) + ["+Inf"], st["buckets"]):
+            acc += n
+            cumulative.append({"le": upper, "count": acc})
+        out[endpoint] = {
+            "count": count,
+            "errors": st["errors"],
+            "retries": st["retries"],
+            "avgMs": round(st["sumSec"] / count * 1000.0, 1) if count else None,
+            "maxMs": round(st["maxSec"] * 1000.0, 1),
+            "lastStatus": st["lastStatus"],
+            "histogram": cumulative,
+        }
+    return out
@@ -0,0 +1,269 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/core/processing.py
+# - bg/pc1/rhino-server/compute/core/routes_api.py
+# - web/backend/controllers/bg/bg.controller.js
+"""STL 일괄 접수(/api/rhino/process-batch, 재시작 복구 공용).
+
+- 항목 검증, 배치 내 중복 제거, in_flight/큐/outbox 중복 확인을 한 번의 스냅샷으로 처리한다.
+- 로컬 캐시에 없는 원본은 BATCH_DOWNLOAD_CONCURRENCY개까지 동시에 내려받는다
+  (backend_client 커넥션 풀 공유).
+- 접수된 항목은 기존 enqueue_stl_job으로 큐에 넣는다. 재시작 복구(recovery/resume)는 backfill,
+  API 접수는 항목의 priority(기본 normal)로 넣고 tenant가 없으면 접수 경로를 fair-share 단위로 쓴다.
+- 배치 id로 항목별 상태와 집계 진행률을 조회한다. 최근 BATCH_HISTORY_MAX개만 보관한다.
+
+접수 상태(항목별 status):
+  enqueued | upgraded | in_flight | queued_already | upload_pending | duplicate | invalid | not_found
+진행 상태(조회 시 enqueued/upgraded 항목의 state):
+  queued | processing | upload_pending | completed | failed | done
+  (done = 큐/처리/outbox 어디에도 없지만 결과가 기록되지 않은 항목. 예: 기존 출력 재업로드)
+"""
+import asyncio
+import time
+import uuid
+
+from . import job_queue, job_store, settings, state, upload_outbox
+from .logger import log
+
+# 진행률 계산에서 끝난 것으로 보는 상태
+FINISHED_STATES = ("completed", "failed", "done")
+# 큐에 들어간(새로 넣었거나 대기 항목에 force/priority를 합친) 항목 = 진행률 추적 대상
+TRACKED_STATUSES = ("enqueued", "upgraded")
+# 백엔드 주도 재처리 경로는 사람이 기다리는 작업 뒤로 보낸다
+BACKFILL_SOURCES = ("recovery", "resume")
+
+
+def _queued_names() -> set[str]:
+    return state.stl_job_queue.names()
+
+
+def _normalize_item(raw: dict, source: str) -> dict:
+    # resume 항목은 job_store에 저장된 priority를 그대로 쓰고, 없을 때만 backfill로 둔다
+    name = str(raw.get("filePath") or raw.get("fileName") or "").strip()
+    default_priority = "backfill" if source in BACKFILL_SOURCES else job_queue.DEFAULT_PRIORITY
+    return {
+        "filePath": name,
+        "fileName": settings.sanitize_filename(name) if name else None,
+        "requestId": str(raw.get("requestId") or "").strip() or None,
+        "force": bool(raw.get("force") or False),
+        "priority": job_queue.normalize_priority(raw.get("priority"), default_priority),
+        "tenant": str(raw.get("tenant") or "").strip() or source,
+        "status": None,
+    }
+
+
+async def _download_missing(entries: list[dict]) -> None:
+    """로컬에 없는 원본을 제한된 동시성으로 내려받는다. 실패 항목은 not_found."""
+    from .processing import download_original_to_input
+
+    missing = [e for e in entries if not (settings.STORE_IN_DIR / e["fileName"]).exists()]
+    if not missing:
+        return
+    slots = asyncio.Semaphore(settings.BATCH_DOWNLOAD_CONCURRENCY)
+
+    async def _fetch(entry: dict) -> None:
+        job_store.upsert(
+            entry["fileName"],
+            "downloading",
+            request_id=entry["requestId"],
+            force=entry["force"],
+            priority=entry["priority"],
+        )
+        async with slots:
+            try:
+                ok = await asyncio.to_thread(
+                    download_original_to_input,
+                    {"filePath": entry["filePath"], "requestId": entry["requestId"]},
+                )
+            except Exception as e:
+                log(f"[batch] download error {entry['fileName']}: {e}")
+                ok = False
+        if not ok or not (settings.STORE_IN_DIR / entry["fileName"]).exists():
+            entry["status"] = "not_found"
+            entry["message"] = "File not found locally or on backend"
+            job_store.mark(entry["fileName"], "failed", "original not found")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_fetch(e) for e in missing))
+    failed = sum(1 for e in missing if e["status"] == "not_found")
+    log(
+        f"[batch] downloaded {len(missing) - failed}/{len(missing)} originals "
+        f"in {time.perf_counter() - started:.2f}s "
+        f"(concurrency={settings.BATCH_DOWNLOAD_CONCURRENCY})"
+    )
+
+
+def _register_batch(batch_id: str, source: str, entries: list[dict]) -> None:
+    with state.batch_lock:
+        state.batches[batch_id] = {
+            "batchId": batch_id,
+            "source": source,
+            "createdAt": time.time(),
+            "items": entries,
+        }
+        for entry in entries:
+            if entry["status"] in TRACKED_STATUSES:
+                state.batch_file_index[entry["fileName"]] = batch_id
+        while len(state.batches) > settings.BATCH_HISTORY_MAX:
+            old_id = next(iter(state.batches))
+            old = state.batches.pop(old_id)
+            for entry in old["items"]:
+                if state.batch_file_index.get(entry.get("fileName")) == old_id:
+                    state.batch_file_index.pop(entry["fileName"], None)
+
+
+async def ingest_batch(items: list[dict], source: str = "api") -> dict:
+    """여러 STL을 한 번에 검증/다운로드/큐 등록한다. 반환: 배치 id + 항목별 접수 상태."""
+    from .processing import enqueue_stl_job
+
+    started = time.perf_counter()
+    batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+    entries = [_normalize_item(raw or {}, source) for raw in items]
+
+    # 중복 확인은 스냅샷 한 번으로 처리한다(항목마다 큐/outbox를 다시 훑지 않는다)
+    with state.in_flight_lock:
+        in_flight = set(state.in_flight)
+    queued = _queued_names()
+    outbox_pending = await asyncio.to_thread(upload_outbox.pending_file_names)
+
+    seen: dict[str, dict] = {}
+    accepted: list[dict] = []
+    for entry in entries:
+        name = entry["fileName"]
+        if not name:
+            entry["status"] = "invalid"
+            entry["message"] = "filePath or fileName is required"
+            continue
+        first = seen.get(name)
+        if first is not None:
+            # 같은 배치 안의 중복: 하나라도 force면 첫 항목을 force로 올린다
+            first["force"] = first["force"] or entry["force"]
+            entry["status"] = "duplicate"
+            continue
+        seen[name] = entry
+        accepted.append(entry)
+
+    for entry in accepted:
+        name = entry["fileName"]
+        if entry["force"]:
+            continue
+        if name in in_flight:
+            entry["status"] = "in_flight"
+        elif name in queued:
+            # 대기 중인 항목은 enqueue_stl_job이 합친다(priority 상향 등). 다운로드는 필요 없다.
+            continue
+        elif name in outbox_pending:
+            # Rhino 결과가 outbox에 남아 있으면 재처리하지 않고 outbox 재시도에 맡긴다
+            entry["status"] = "upload_pending"
+
+    await _download_missing(
+        [e for e in accepted if e["status"] is None and e["fileName"] not in queued]
+    )
+
+    for entry in accepted:
+        if entry["status"] is not None:
+            continue
+        p = settings.STORE_IN_DIR / entry["fileName"]
+        entry["status"] = enqueue_stl_job(
+            p,
+            entry["force"],
+            request_id=entry["requestId"],
+            priority=entry["priority"],
+            tenant=entry["tenant"],
+        )
+
+    _register_batch(batch_id, source, entries)
+    counts = _count(e["status"] for e in entries)
+    elapsed_ms = round((time.perf_counter() - started) * 1000.0, 1)
+    log(f"[batch] {batch_id} source={source} items={len(entries)} {counts} ({elapsed_ms}ms)")
+    return {
+        "batchId": batch_id,
+        "total": len(entries),
+        "counts": counts,
+        "items": [_public_item(e) for e in entries],
+        "queueSize": state.stl_job_queue.qsize(),
+        "elapsedMs": elapsed_ms,
+    }
+
+
+def record_outcome(file_name: str | None, status: str, error: str | None = None) -> None:
+    """처리 결과(completed/failed)를 해당 파일이 속한 배치 항목에 기록한다. 배치 밖 파일은 무시."""
+    if not file_name:
+        return
+    with state.batch_lock:
+        batch_id = state.batch_file_index.get(file_name)
+        batch = state.batches.get(batch_id) if batch_id else None
+        if batch is None:
+            return
+        for entry in batch["items"]:
+            if entry.get("fileName") == file_name and entry["status"] in TRACKED_STATUSES:
+                entry["outcome"] = status
+                entry["finishedAt"] = time.time()
+                if error:
+                    entry["error"] = error
+        if status in ("completed", "failed"):
+            state.batch_file_index.pop(file_name, None)
+
+
+def _live_state(entry: dict, in_flight: set, queued: set, outbox_pending: set) -> str:
+    if entry.get("outcome"):
+        return entry["outcome"]
+    name = entry["fileName"]
+    if name in in_flight:
+        return "processing"
+    if name in queued:
+        return "queued"
+    if name in outbox_pending:
+        return "upload_pending"
+    return "done"
+
+
+def _count(values) -> dict:
+    out: dict[str, int] = {}
+    for v in values:
+        out[v] = out.get(v, 0) + 1
+    return out
+
+
+def _public_item(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if v is not None}
+
+
+def batch_progress(batch_id: str) -> dict | None:
+    """배치 항목별 현재 상태와 집계 진행률. 없는(오래돼 정리된) 배치면 None."""
+    with state.batch_lock:
+        batch = state.batches.get(batch_id)
+        if batch is None:
+            return None
+        entries = [dict(e) for e in batch["items"]]
+        created_at = batch["createdAt"]
+        source = batch["source"]
+
+    with state.in_flight_lock:
+        in_flight = set(state.in_flight)
+    queued = _queued_names()
+    outbox_pending = upload_outbox.pending_file_names()
+
+    tracked = 0
+    finished = 0
+    for entry in entries:
+        if entry["status"] not in TRACKED_STATUSES:
+            continue
+        entry["state"] = _live_state(entry, in_flight, queued, outbox_pending)
+        tracked += 1
+        if entry["state"] in FINISHED_STATES:
+            finished += 1
+
+    return {
+        "batchId": batch_id,
+        "source": source,
+        "ageSec": round(time.time() - created_at, 1),
+        "total": len(entries),
+        "counts": _count(e["status"] for e in entries),
+        "states": _count(e["state"] for e in entries if "state" in e),
+        "enqueued": tracked,
+        "finished": finished,
+        "progress": round(finished / tracked, 4) if tracked else 1.0,
+        "done": finished >= tracked,
+        "items": [_public_item(e) for e in entries],
+    }
@@ -0,0 +1,249 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/core/rhino_runner.py
+# - bg/pc1/rhino-server/compute/scripts/process_abutment_stl.py
+"""실행 중 Rhino 작업 로그의 실시간 tail + stall watchdog.
+
+- 작업 로그 파일(log_<token>.txt 또는 ABUTS_LOG_PATH)은 RHINO_LOG_TAIL_POLL_SEC마다 늘어난 부분만 읽는다.
+  subprocess 경로의 stdout/stderr도 communicate()로 모으지 않고 줄 단위로 읽어 같은 버퍼에 넣는다.
+- 작업별로 최근 RHINO_LOG_RING_BYTES만 남긴다(ring buffer, 오래된 줄부터 버림).
+- 새 줄은 서버 로그([rhino-live])와 socket.io `rhino_log` 이벤트로 바로 내보낸다(RHINO_LOG_FORWARD).
+- 새 줄이 RHINO_STALL_TIMEOUT_SEC 동안 없으면 작업 future에 예외를 넣어 hard timeout을 기다리지 않고 끊는다.
+  subprocess 경로는 _spawn_and_wait가 프로세스를 kill하고, 러너 경로는 러너가 다시 poll할 때까지
+  그 pipe를 임대하지 않는다(RhinoJobStalled).
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from . import settings, state
+from .logger import log
+
+# process_abutment_stl.log()는 같은 줄을 stdout과 로그 파일에 모두 쓰므로 stdout 쪽은 내보내지 않는다
+_FILE_LOG_MARK = "][abuts-rhino] "
+# 줄바꿈 없이 너무 길게 이어지는 출력은 이 길이에서 끊어 한 줄로 본다
+_MAX_LINE_BYTES = 64 * 1024
+# emit task가 끝나기 전에 GC되지 않도록 잡아 둔다
+_emit_tasks: set = set()
+
+
+class RhinoJobStalled(RuntimeError):
+    """stall watchdog이 작업 future에 넣는 예외. Rhino는 아직 그 작업을 실행 중일 수 있다."""
+
+
+def _new_entry(token: str, input_name: str) -> dict:
+    now = time.time()
+    return {
+        "token": token,
+        "inputName": input_name,
+        "startedTs": now,
+        "lastLineTs": now,
+        "lastLine": "",
+        "ring": deque(),
+        "bytes": 0,
+        "lines": 0,
+        "droppedLines": 0,
+        "stalled": False,
+    }
+
+
+def _emit(entry: dict, lines: list[str]) -> None:
+    sio = state.sio
+    if sio is None:
+        return
+    try:
+        task = asyncio.get_running_loop().create_task(
+            sio.emit(
+                "rhino_log",
+                {"token": entry["token"], "inputName": entry["inputName"], "lines": lines},
+            )
+        )
+        _emit_tasks.add(task)
+        task.add_done_callback(_emit_tasks.discard)
+    except Exception:
+        pass
+
+
+def append_lines(token: str, lines: list[str], source: str = "file") -> None:
+    """새 줄을 ring buffer에 넣고 stall 시계를 되돌린다. 메인 이벤트 루프에서 호출한다."""
+    entry = state.job_log_tails.get(token)
+    if entry is None:
+        return
+    cap = settings.RHINO_LOG_RING_BYTES
+    ring = entry["ring"]
+    forward = []
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if not line:
+            continue
+        entry["lastLineTs"] = time.time()
+        if source != "file":
+            if _FILE_LOG_MARK in line:
+                continue
+            line = f"[{source}] {line}"
+        size = len(line.encode("utf-8", errors="ignore")) + 1
+        ring.append((line, size))
+        entry["bytes"] += size
+        entry["lines"] += 1
+        while entry["bytes"] > cap and len(ring) > 1:
+            _, dropped = ring.popleft()
+            entry["bytes"] -= dropped
+            entry["droppedLines"] += 1
+        entry["lastLine"] = line[-300:]
+        forward.append(line)
+    if forward and settings.RHINO_LOG_FORWARD:
+        for line in forward:
+            log(f"[rhino-live] {entry['inputName']}: {line}")
+        _emit(entry, forward)
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except Exception:
+        return 0
+
+
+def _read_new(path: Path, offset: int) -> tuple[bytes, int, int]:
+    """offset 이후 늘어난 바이트. ring보다 많이 밀려 있으면 앞부분은 건너뛴다(건너뛴 바이트 수 반환)."""
+    size = _file_size(path)
+    if size < offset:
+        # 파일이 새로 만들어졌거나 잘렸다
+        offset = 0
+    if size == offset:
+        return b"", offset, 0
+    skipped = max(0, (size - offset) - settings.RHINO_LOG_RING_BYTES)
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset + skipped)
+            data = f.read(size - offset - skipped)
+    except Exception:
+        return b"", offset, 0
+    return data, offset + skipped + len(data), skipped
+
+
+def _check_stall(entry: dict, future: "asyncio.Future") -> None:
+    timeout = settings.RHINO_STALL_TIMEOUT_SEC
+    if timeout <= 0 or future.done() or entry["stalled"]:
+        return
+    idle = time.time() - entry["lastLineTs"]
+    if idle <= timeout:
+        return
+    entry["stalled"] = True
+    state.total_jobs_stalled += 1
+    log(
+        f"[watchdog] Rhino log stalled {idle:.0f}s (limit {timeout:.0f}s): "
+        f"{entry['inputName']} last={entry['lastLine']!r}"
+    )
+    future.set_exception(
+        RhinoJobStalled(
+            f"Rhino 작업 로그가 {idle:.0f}s 동안 멈춰 중단합니다 "
+            f"(RHINO_STALL_TIMEOUT_SEC={timeout:.0f}) last={entry['lastLine']}"
+        )
+    )
+
+
+async def _tail_file(entry: dict, path: Path, future: "asyncio.Future", stop: asyncio.Event) -> None:
+    token = entry["token"]
+    # ABUTS_LOG_PATH처럼 여러 작업이 이어 쓰는 파일이면 이번 작업 시작 시점부터만 본다
+    offset = await asyncio.to_thread(_file_size, path)
+    partial = b""
+    while True:
+        stopping = stop.is_set()
+        if not stopping:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.RHINO_LOG_TAIL_POLL_SEC)
+                stopping = True
+            except asyncio.TimeoutError:
+                pass
+        data, offset, skipped = await asyncio.to_thread(_read_new, path, offset)
+        if skipped:
+            partial = b""
+            entry["droppedLines"] += 1
+            entry["lastLineTs"] = time.time()
+        if data:
+            partial += data
+            *complete, partial = partial.split(b"\n")
+            if len(partial) > _MAX_LINE_BYTES:
+                complete.append(partial)
+                partial = b""
+            if complete:
+                append_lines(token, [c.decode("utf-8", errors="ignore") for c in complete])
+        if stopping:
+            if partial:
+                append_lines(token, [partial.decode("utf-8", errors="ignore")])
+            return
+        _check_stall(entry, future)
+
+
+async def pump_stream(token: str, stream, source: str) -> None:
+    """subprocess stdout/stderr를 EOF까지 줄 단위로 읽는다(메모리에 전부 모으지 않음)."""
+    if stream is None:
+        return
+    while True:
+        try:
+            chunk = await stream.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            # 줄이 StreamReader limit보다 길다: 있는 만큼 읽어 한 줄로 본다
+            chunk = await stream.read(_MAX_LINE_BYTES)
+        if not chunk:
+            return
+        append_lines(token, [chunk.decode("utf-8", errors="ignore")], source)
+
+
+@asynccontextmanager
+async def track(token: str, input_name: str, log_path: Path, future: "asyncio.Future"):
+    """작업 실행 구간 동안 로그 파일을 tail하고 stall watchdog을 돌린다. 작업 entry를 내준다."""
+    entry = _new_entry(token, input_name)
+    state.job_log_tails[token] = entry
+    stop = asyncio.Event()
+    task = asyncio.create_task(_tail_file(entry, Path(log_path), future, stop))
+    try:
+        yield entry
+    finally:
+        stop.set()
+        try:
+            await asyncio.wait_for(task, timeout=2.0)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            pass
+        except Exception as e:
+            log(f"[rhino-live] tail failed for {input_name}: {e}")
+        state.job_log_tails.pop(token, None)
+
+
+def tail_text(entry: dict | None, max_lines: int = 40) -> str:
+    if not entry:
+        return ""
+    ring = entry["ring"]
+    return "\n".join(line for line, _ in list(ring)[-max_lines:])
+
+
+def find(key: str) -> dict | None:
+    """token 또는 입력 파일명으로 실행 중 작업을 찾는다."""
+    entry = state.job_log_tails.get(key)
+    if entry is not None:
+        return entry
+    for entry in list(state.job_log_tails.values()):
+        if entry["inputName"] == key:
+            return entry
+    return None
+
+
+def snapshot() -> list[dict]:
+    now = time.time()
+    return [
+        {
+            "token": entry["token"],
+            "inputName": entry["inputName"],
+            "runningSec": round(now - entry["startedTs"], 1),
+            "lastLineAgeSec": round(now - entry["lastLineTs"], 1),
+            "lastLine": entry["lastLine"],
+            "lines": entry["lines"],
+            "droppedLines": entry["droppedLines"],
+            "bytes": entry["bytes"],
+            "stalled": entry["stalled"],
+        }
+        for entry in list(state.job_log_tails.values())
+    ]
@@ -0,0 +1,194 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/core/processing.py
+# - bg/pc1/rhino-server/compute/core/state.py
+"""STL 작업 큐: 우선순위 클래스 + aging + 요청자별 fair-share.
+
+asyncio.Queue의 _init/_put/_get만 바꾼 것이라 get/put_nowait/qsize/task_done은 그대로 쓴다.
+꺼낼 때마다 대기 항목 중 점수가 가장 낮은 것을 고른다.
+
+  점수 = 클래스 순위 * STL_QUEUE_AGING_SEC - (현재 시각 - fairTs)
+
+- interactive(0) < normal(1) < backfill(2). 한 단계 낮은 클래스도 STL_QUEUE_AGING_SEC를 더 기다리면
+  앞 클래스와 같은 점수가 되므로 backfill이 무한히 밀리지 않는다(aging).
+- fairTs는 넣을 때 정한다: max(도착 시각, 같은 tenant 직전 항목의 fairTs + STL_QUEUE_FAIR_SHARE_SEC).
+  tenant(요청자/치과, 없으면 접수 경로)가 수백 건을 한꺼번에 넣어도 뒤 항목일수록 늦게 들어온 것으로
+  보므로 다른 tenant 작업이 사이사이 끼어든다(start-time fair queueing). 한동안 조용하던 tenant는
+  도착 시각부터 다시 시작한다.
+- 점수가 같으면 먼저 들어온 항목(FIFO).
+
+중복 확인은 입력 파일명 → 대기 항목 인덱스로 O(1)에 한다. offer()는 같은 파일이 이미 대기 중이면
+새 항목을 넣지 않고 기존 항목을 올린다(force, 더 높은 priority, 빠진 requestId).
+put/offer/get은 메인 이벤트 루프 스레드에서만 호출한다(다른 스레드는 processing.enqueue_stl_job 경유).
+names()/find()/snapshot()은 어느 스레드에서나 읽을 수 있다.
+
+  python -m core.job_queue [N] [--skip-legacy]   # 중복 확인 + 적재 micro-benchmark (기본 N=10000)
+"""
+import asyncio
+import heapq
+import sys
+import threading
+import time
+
+from . import settings
+
+PRIORITY_CLASSES = {"interactive": 0, "normal": 1, "backfill": 2}
+DEFAULT_PRIORITY = "normal"
+
+
+def normalize_priority(value: str | None, default: str = DEFAULT_PRIORITY) -> str:
+    v = str(value or "").strip().lower()
+    return v if v in PRIORITY_CLASSES else default
+
+
+def _scores(items: list[dict], now: float) -> list[float]:
+    aging = settings.STL_QUEUE_AGING_SEC
+    scores = []
+    for item in items:
+        rank = PRIORITY_CLASSES.get(item.get("priority"), PRIORITY_CLASSES[DEFAULT_PRIORITY])
+        waited = now - float(item.get("fairTs") or item.get("enqueuedTs") or now)
+        scores.append(rank * aging - waited)
+    return scores
+
+
+def dispatch_order(items: list[dict], now: float | None = None) -> list[dict]:
+    """현재 시각 기준으로 꺼내질 순서. 도착 순서(items)는 바꾸지 않는다."""
+    now = time.time() if now is None else now
+    scores = _scores(items, now)
+    order = sorted(range(len(items)), key=lambda i: (scores[i], i))
+    return [items[i] for i in order]
+
+
+class StlJobQueue(asyncio.Queue):
+    """_queue는 도착 순서 list. 꺼낼 때만 점수로 고른다(대기열 길이 N에 대해 O(N))."""
+
+    def _init(self, maxsize):
+        self._queue = []
+        # 입력 파일명 → 대기 항목. _index_lock은 다른 스레드의 읽기(names/find/snapshot)용
+        self._index: dict[str, dict] = {}
+        self._index_lock = threading.Lock()
+        # tenant별 마지막으로 배정한 fairTs
+        self._tenant_fair_ts: dict[str, float] = {}
+
+    def _put(self, item):
+        item.setdefault("priority", DEFAULT_PRIORITY)
+        arrived = item.setdefault("enqueuedTs", time.time())
+        tenant = item.get("tenant") or ""
+        last = self._tenant_fair_ts.get(tenant)
+        fair_ts = arrived if last is None else max(arrived, last + settings.STL_QUEUE_FAIR_SHARE_SEC)
+        item["fairTs"] = fair_ts
+        self._tenant_fair_ts[tenant] = fair_ts
+        if len(self._tenant_fair_ts) > 4096:
+            # 오래전 tenant 기록 정리(이미 도착 시각이 더 큰 항목에는 영향 없음)
+            cutoff = time.time() - settings.STL_QUEUE_FAIR_SHARE_SEC
+            self._tenant_fair_ts = {
+                t: ts for t, ts in self._tenant_fair_ts.items() if ts >= cutoff
+            }
+        with self._index_lock:
+            self._queue.append(item)
+            self._index[item["path"].name] = item
+
+    def _get(self):
+        scores = _scores(self._queue, time.time())
+        best = min(range(len(scores)), key=lambda i: (scores[i], i))
+        with self._index_lock:
+            item = self._queue.pop(best)
+            if self._index.get(item["path"].name) is item:
+                del self._index[item["path"].name]
+        return item
+
+    def offer(self, item: dict) -> str:
+        """대기 중이 아니면 넣고 'enqueued'. 이미 대기 중이면 기존 항목에 합친다.
+
+        합칠 때 force나 priority가 올라가면 'upgraded', 바뀐 게 없으면 'queued_already'.
+        """
+        existing = self._index.get(item["path"].name)
+        if existing is None:
+            self.put_nowait(item)
+            return "enqueued"
+        upgraded = False
+        if item.get("force") and not existing.get("force"):
+            existing["force"] = True
+            upgraded = True
+        new_rank = PRIORITY_CLASSES.get(item.get("priority"), PRIORITY_CLASSES[DEFAULT_PRIORITY])
+        old_rank = PRIORITY_CLASSES.get(existing.get("priority"), PRIORITY_CLASSES[DEFAULT_PRIORITY])
+        if new_rank < old_rank:
+            existing["priority"] = item["priority"]
+            upgraded = True
+        if item.get("requestId") and not existing.get("requestId"):
+            existing["requestId"] = item["requestId"]
+        return "upgraded" if upgraded else "queued_already"
+
+    def find(self, name: str) -> dict | None:
+        return self._index.get(name)
+
+    def names(self) -> set[str]:
+        with self._index_lock:
+            return set(self._index)
+
+    def snapshot(self, limit: int | None = None) -> list[dict]:
+        """꺼내질 순서대로 정렬한 대기 항목 사본. limit이 있으면 앞쪽 limit개만(heap 선택)."""
+        with self._index_lock:
+            items = list(self._queue)
+        if limit is None:
+            return dispatch_order(items)
+        scores = _scores(items, time.time())
+        top = heapq.nsmallest(limit, range(len(items)), key=lambda i: (scores[i], i))
+        return [items[i] for i in top]
+
+
+def _legacy_offer(queue: asyncio.Queue, item: dict) -> str:
+    """이전 enqueue_stl_job의 중복 확인: 매번 대기열 전체에서 이름 집합을 만든다."""
+    queued_names = {q["path"].name for q in list(queue._queue)}
+    if item["path"].name in queued_names:
+        return "queued_already"
+    queue.put_nowait(item)
+    return "enqueued"
+
+
+def _benchmark(n: int, skip_legacy: bool = False) -> None:
+    from pathlib import Path
+
+    def _items(round_no: int):
+        return [
+            {
+                "path": Path(f"bench_{i}.stl"),
+                "force": round_no > 0 and i % 2 == 0,
+                "requestId": f"REQ-{i}",
+                "priority": "backfill",
+                "tenant": f"t{i % 7}",
+            }
+            for i in range(n)
+        ]
+
+    async def _run(label: str, make_queue, offer) -> None:
+        queue = make_queue()
+        results: dict[str, int] = {}
+        timings = []
+        for round_no in range(2):
+            # 1회차: 새 항목 N개 적재, 2회차: 같은 N개 재접수(중복 확인/병합)
+            batch = _items(round_no)
+            t0 = time.perf_counter()
+            for item in batch:
+                r = offer(queue, item)
+                results[r] = results.get(r, 0) + 1
+            timings.append(time.perf_counter() - t0)
+        per_us = [t / n * 1e6 for t in timings]
+        print(
+            f"{label:8s} enqueue {n}: {timings[0] * 1000:9.1f}ms ({per_us[0]:7.2f}us/item)  "
+            f"re-offer {n}: {timings[1] * 1000:9.1f}ms ({per_us[1]:7.2f}us/item)  "
+            f"qsize={queue.qsize()} {results}"
+        )
+
+    async def _main() -> None:
+        if not skip_legacy:
+            # 대기열 길이에 비례하는 스캔이라 N=10000이면 수십 초 걸린다
+            await _run("legacy", asyncio.Queue, _legacy_offer)
+        await _run("indexed", StlJobQueue, lambda q, item: q.offer(item))
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    _benchmark(int(args[0]) if args else 10000, skip_legacy="--skip-legacy" in sys.argv)
@@ -0,0 +1,205 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/core/processing.py
+# - bg/pc1/rhino-server/compute/core/batch_ingest.py
+"""STL 작업 상태 영속 저장소 (SQLite WAL).
+
+stl_job_queue(asyncio.Queue)와 state.jobs는 메모리에만 있어서 크래시/재시작 시 대기 작업이
+사라진다. 여기서는 입력 파일명(p.name)을 키로 작업 상태를 디스크에 기록하고, 재시작 직후
+끝나지 않은 작업을 백엔드 pending-stl 조회를 기다리지 않고 다시 큐에 넣는다.
+
+상태: queued | downloading | running | uploading | done | failed
+- 같은 키로 다시 접수하면 행을 갱신한다(멱등). 끝난(done/failed) 행을 다시 접수하면 카운터를 초기화한다.
+- running 중에 죽은 작업은 재개할 때마다 resumes가 1 늘고, JOB_STORE_MAX_RESUMES를 넘으면
+  failed로 처리한다(서버를 죽이는 입력이 재시작마다 반복되지 않게).
+- uploading 행은 outbox에 출력이 남아 있으면 outbox 재시도에 맡기고, 없으면 다시 처리한다.
+- 큐 우선순위(priority)도 함께 저장해 재개할 때 그대로 복원한다(없던 행은 backfill).
+- DB 오류는 로그만 남기고 처리 흐름을 막지 않는다.
+"""
+import sqlite3
+import threading
+import time
+
+from . import settings
+from .logger import log
+
+ACTIVE_STATES = ("queued", "downloading", "running", "uploading")
+FINISHED_STATES = ("done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    request_id TEXT,
+    force INTEGER NOT NULL DEFAULT 0,
+    priority TEXT,
+    state TEXT NOT NULL,
+    runs INTEGER NOT NULL DEFAULT 0,
+    resumes INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state_idx ON jobs (state, updated_at);
+"""
+
+# 이전 스키마 DB에 나중에 추가된 컬럼 (컬럼명, 정의)
+_ADDED_COLUMNS = (("priority", "TEXT"),)
+
+_lock = threading.Lock()
+_conn: sqlite3.Connection | None = None
+_open_failed = False
+
+
+def _connection() -> sqlite3.Connection | None:
+    """호출 전 _lock을 잡고 있어야 한다. 비활성/열기 실패 시 None."""
+    global _conn, _open_failed
+    if _conn is not None or _open_failed or not settings.JOB_STORE_ENABLED:
+        return _conn
+    try:
+        path = settings.JOB_STORE_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.executescript(_SCHEMA)
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for name, decl in _ADDED_COLUMNS:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {decl}")
+        _conn = conn
+        log(f"[job-store] opened: {path}")
+    except Exception as e:
+        _open_failed = True
+        log(f"[job-store] open failed, persistence disabled: {e}")
+    return _conn
+
+
+def _execute(sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+    with _lock:
+        conn = _connection()
+        if conn is None:
+            return []
+        try:
+            return conn.execute(sql, params).fetchall()
+        except Exception as e:
+            log(f"[job-store] query failed: {e}")
+            return []
+
+
+def upsert(
+    key: str,
+    job_state: str,
+    request_id: str | None = None,
+    force: bool = False,
+    priority: str | None = None,
+) -> None:
+    """작업을 접수 상태로 기록한다. 같은 키가 있으면 상태를 갱신한다(멱등).
+
+    priority는 큐에 실제로 들어간(합쳐진) 우선순위. None이면 기존 값을 유지한다.
+    """
+    if not key:
+        return
+    now = time.time()
+    _execute(
+        """
+        INSERT INTO jobs (key, request_id, force, priority, state, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET
+            request_id = COALESCE(excluded.request_id, jobs.request_id),
+            priority = COALESCE(excluded.priority, jobs.priority),
+            force = CASE WHEN jobs.state IN ('done', 'failed') THEN excluded.force
+                         ELSE MAX(jobs.force, excluded.force) END,
+            runs = CASE WHEN jobs.state IN ('done', 'failed') THEN 0 ELSE jobs.runs END,
+            resumes = CASE WHEN jobs.state IN ('done', 'failed') THEN 0 ELSE jobs.resumes END,
+            created_at = CASE WHEN jobs.state IN ('done', 'failed') THEN excluded.created_at
+                              ELSE jobs.created_at END,
+            last_error = CASE WHEN jobs.state IN ('done', 'failed') THEN NULL
+                              ELSE jobs.last_error END,
+            state = excluded.state,
+            updated_at = excluded.updated_at
+        """,
+        (key, request_id, 1 if force else 0, priority, job_state, now, now),
+    )
+
+
+def mark(key: str | None, job_state: str, error: str | None = None) -> None:
+    """기존 행의 상태를 바꾼다. running으로 바뀔 때마다 runs가 1 는다."""
+    if not key:
+        return
+    _execute(
+        """
+        UPDATE jobs SET
+            state = ?,
+            runs = runs + ?,
+            last_error = COALESCE(?, last_error),
+            updated_at = ?
+        WHERE key = ?
+        """,
+        (job_state, 1 if job_state == "running" else 0, error, time.time(), key),
+    )
+
+
+def claim_resumable() -> list[dict]:
+    """재시작 직후 다시 큐에 넣을 작업 목록. 오래된 완료 행 정리와 크래시 반복 차단도 여기서 한다."""
+    now = time.time()
+    retention = settings.JOB_STORE_RETENTION_DAYS * 86400.0
+    _execute(
+        "DELETE FROM jobs WHERE state IN ('done', 'failed') AND updated_at < ?",
+        (now - retention,),
+    )
+    # 처리 중(running)에 끝난 작업 = 서버가 그 작업 도중 죽었다
+    _execute(
+        "UPDATE jobs SET resumes = resumes + 1, updated_at = ? WHERE state = 'running'",
+        (now,),
+    )
+    crashed = _execute(
+        "SELECT key, resumes FROM jobs WHERE state = 'running' AND resumes > ?",
+        (settings.JOB_STORE_MAX_RESUMES,),
+    )
+    for row in crashed:
+        log(f"[job-store] giving up on {row['key']}: interrupted {row['resumes']} times")
+        mark(row["key"], "failed", f"interrupted {row['resumes']} times while running")
+    rows = _execute(
+        f"""
+        SELECT key, request_id, force, priority, state, runs, resumes, created_at
+        FROM jobs WHERE state IN ({",".join("?" for _ in ACTIVE_STATES)})
+        ORDER BY created_at
+        """,
+        ACTIVE_STATES,
+    )
+    return [
+        {
+            "fileName": row["key"],
+            "requestId": row["request_id"],
+            "force": bool(row["force"]),
+            "priority": row["priority"],
+            "state": row["state"],
+            "runs": row["runs"],
+            "resumes": row["resumes"],
+            "createdAt": row["created_at"],
+        }
+        for row in rows
+    ]
+
+
+def get(key: str) -> dict | None:
+    rows = _execute("SELECT * FROM jobs WHERE key = ?", (key,))
+    return dict(rows[0]) if rows else None
+
+
+def stats() -> dict:
+    rows = _execute("SELECT state, COUNT(*) AS n, MIN(created_at) AS oldest FROM jobs GROUP BY state")
+    counts = {row["state"]: row["n"] for row in rows}
+    oldest_active = min(
+        (row["oldest"] for row in rows if row["state"] in ACTIVE_STATES and row["oldest"]),
+        default=None,
+    )
+    return {
+        "enabled": settings.JOB_STORE_ENABLED and not _open_failed,
+        "path": str(settings.JOB_STORE_PATH),
+        "counts": counts,
+        "active": sum(counts.get(s, 0) for s in ACTIVE_STATES),
+        "oldestActiveAgeSec": round(time.time() - oldest_active, 1) if oldest_active else None,
+    }
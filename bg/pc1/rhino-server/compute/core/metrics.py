@@ -0,0 +1,211 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/core/processing.py
+# - bg/pc1/rhino-server/compute/core/rhino_runner.py
+# - bg/pc1/rhino-server/compute/scripts/process_abutment_stl.py
+"""STL 작업 단계별 소요 시간 히스토그램 + Prometheus 텍스트 노출(/metrics).
+
+scope=server: rhino-server가 직접 잰 단계
+  queue_wait, download, meta_fetch, rhino_wait(pipe 임대 대기), rhino_run, stl_metadata,
+  upload(presigned PUT), register(register-file), process(Rhino 워커가 작업 하나에 쓴 시간)
+scope=rhino: process_abutment_stl.main의 _perf_mark 구간(job-callback payload의 perf)
+  import_align, finishline_detect, ..., export, total
+
+- 버킷은 누적 히스토그램으로 내보내므로 Prometheus에서 histogram_quantile로 p50/p95를 본다.
+- /health/diag용으로 최근 METRICS_RECENT_SAMPLES개 표본의 p50/p95도 같이 계산한다.
+- 백엔드 HTTP 지연(backend_client), 큐/처리 카운터도 같은 엔드포인트로 내보낸다.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from . import settings, state
+
+# 단계 소요 시간 버킷 상한(초). 마지막 버킷은 +Inf.
+PHASE_BUCKETS_SEC = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+_lock = threading.Lock()
+
+
+def observe_phase(phase: str, seconds: float, scope: str = "server") -> None:
+    try:
+        sec = max(0.0, float(seconds))
+    except Exception:
+        return
+    key = (scope, phase)
+    with _lock:
+        st = state.phase_stats.get(key)
+        if st is None:
+            st = {
+                "count": 0,
+                "sumSec": 0.0,
+                "maxSec": 0.0,
+                "buckets": [0] * (len(PHASE_BUCKETS_SEC) + 1),
+                "recent": deque(maxlen=settings.METRICS_RECENT_SAMPLES),
+            }
+            state.phase_stats[key] = st
+        st["count"] += 1
+        st["sumSec"] += sec
+        st["maxSec"] = max(st["maxSec"], sec)
+        idx = len(PHASE_BUCKETS_SEC)
+        for i, upper in enumerate(PHASE_BUCKETS_SEC):
+            if sec <= upper:
+                idx = i
+                break
+        st["buckets"][idx] += 1
+        st["recent"].append(sec)
+
+
+def observe_phases(phases: dict | None, scope: str) -> None:
+    """{phase: sec} 묶음(Rhino 콜백의 perf 등)을 한 번에 기록한다. 음수(측정 실패)는 건너뛴다."""
+    if not isinstance(phases, dict):
+        return
+    for phase, sec in phases.items():
+        try:
+            if float(sec) >= 0:
+                observe_phase(str(phase), float(sec), scope=scope)
+        except Exception:
+            continue
+
+
+@contextmanager
+def phase_timer(phase: str, scope: str = "server"):
+    """with 블록 소요 시간을 기록한다(예외가 나도 기록). async 함수 안에서도 그대로 쓴다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(phase, time.perf_counter() - started, scope=scope)
+
+
+def _quantile(sorted_samples: list[float], q: float) -> float | None:
+    if not sorted_samples:
+        return None
+    idx = min(len(sorted_samples) - 1, max(0, int(round(q * (len(sorted_samples) - 1)))))
+    return sorted_samples[idx]
+
+
+def phase_snapshot() -> dict:
+    """/health/diag용: scope별 단계 count/avg/max와 최근 표본 p50/p95(초)."""
+    with _lock:
+        items = [
+            (scope, phase, st["count"], st["sumSec"], st["maxSec"], sorted(st["recent"]))
+            for (scope, phase), st in state.phase_stats.items()
+        ]
+    out: dict[str, dict] = {}
+    for scope, phase, count, sum_sec, max_sec, recent in sorted(items):
+        p50 = _quantile(recent, 0.5)
+        p95 = _quantile(recent, 0.95)
+        out.setdefault(scope, {})[phase] = {
+            "count": count,
+            "avgSec": round(sum_sec / count, 3) if count else None,
+            "maxSec": round(max_sec, 3),
+            "p50Sec": round(p50, 3) if p50 is not None else None,
+            "p95Sec": round(p95, 3) if p95 is not None else None,
+        }
+    return out
+
+
+def _label_value(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_le(upper) -> str:
+    return "+Inf" if upper == "+Inf" else repr(float(upper))
+
+
+def _histogram_lines(name: str, labels: dict, bounds, buckets, sum_sec: float, count: int) -> list[str]:
+    base = ",".join(f'{k}="{_label_value(v)}"' for k, v in labels.items())
+    sep = "," if base else ""
+    lines = []
+    acc = 0
+    for upper, n in zip(list(bounds) + ["+Inf"], buckets):
+        acc += n
+        lines.append(f'{name}_bucket{{{base}{sep}le="{_fmt_le(upper)}"}} {acc}')
+    lines.append(f"{name}_sum{{{base}}} {sum_sec:.6f}")
+    lines.append(f"{name}_count{{{base}}} {count}")
+    return lines
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition format(0.0.4)."""
+    from . import backend_client, upload_outbox
+
+    lines: list[str] = []
+
+    lines.append("# HELP abuts_stl_phase_seconds STL job phase duration in seconds.")
+    lines.append("# TYPE abuts_stl_phase_seconds histogram")
+    with _lock:
+        phases = [
+            (scope, phase, list(st["buckets"]), st["sumSec"], st["count"])
+            for (scope, phase), st in state.phase_stats.items()
+        ]
+    for scope, phase, buckets, sum_sec, count in sorted(phases):
+        lines.extend(
+            _histogram_lines(
+                "abuts_stl_phase_seconds",
+                {"scope": scope, "phase": phase},
+                PHASE_BUCKETS_SEC,
+                buckets,
+                sum_sec,
+                count,
+            )
+        )
+
+    lines.append("# HELP abuts_backend_http_seconds Backend/S3 HTTP call latency in seconds.")
+    lines.append("# TYPE abuts_backend_http_seconds histogram")
+    with state.backend_http_stats_lock:
+        http = [
+            (endpoint, list(st["buckets"]), st["sumSec"], st["count"], st["errors"], st["retries"])
+            for endpoint, st in state.backend_http_stats.items()
+        ]
+    for endpoint, buckets, sum_sec, count, _errors, _retries in sorted(http):
+        lines.extend(
+            _histogram_lines(
+                "abuts_backend_http_seconds",
+                {"endpoint": endpoint},
+                backend_client.LATENCY_BUCKETS_SEC,
+                buckets,
+                sum_sec,
+                count,
+            )
+        )
+    lines.append("# HELP abuts_backend_http_errors_total Backend/S3 HTTP calls that failed (5xx or no response).")
+    lines.append("# TYPE abuts_backend_http_errors_total counter")
+    for endpoint, _b, _s, _c, errors, _r in sorted(http):
+        lines.append(f'abuts_backend_http_errors_total{{endpoint="{_label_value(endpoint)}"}} {errors}')
+
+    counters = (
+        ("abuts_stl_jobs_processed_total", "STL jobs finished by a Rhino worker.", state.total_jobs_processed),
+        ("abuts_stl_jobs_failed_total", "STL jobs that raised in a Rhino worker.", state.total_jobs_failed),
+        ("abuts_stl_jobs_timeout_total", "STL jobs that hit the hard timeout.", state.total_jobs_timeout),
+        ("abuts_stl_jobs_stalled_total", "Rhino jobs stopped early because their log stalled.", state.total_jobs_stalled),
+        ("abuts_result_cache_hits_total", "Rhino result cache hits.", state.result_cache_hits),
+        ("abuts_result_cache_misses_total", "Rhino result cache misses.", state.result_cache_misses),
+        ("abuts_upload_outbox_uploaded_total", "Outbox uploads that succeeded.", state.upload_outbox_uploaded),
+        ("abuts_upload_outbox_dead_total", "Outbox entries given up.", state.upload_outbox_dead),
+    )
+    for name, help_text, value in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {value}")
+
+    try:
+        outbox_pending = upload_outbox.outbox_stats()["pending"]
+    except Exception:
+        outbox_pending = 0
+    with state.in_flight_lock:
+        in_flight = len(state.in_flight)
+    gauges = (
+        ("abuts_stl_queue_size", "STL jobs waiting in the queue.", state.stl_job_queue.qsize()),
+        ("abuts_stl_in_flight", "STL jobs being processed or uploaded.", in_flight),
+        ("abuts_stl_upload_queue_size", "Jobs waiting for the upload stage.", state.stl_upload_queue.qsize()),
+        ("abuts_upload_outbox_pending", "Outputs waiting in the upload outbox.", outbox_pending),
+    )
+    for name, help_text, value in gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
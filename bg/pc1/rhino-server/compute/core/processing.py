@@ -4,19 +4,41 @@
 # - bg/pc1/rhino-server/compute/scripts/align_stl_coordinate.py
 # - web/backend/controllers/bg/bg.controller.js
 import asyncio
+import concurrent.futures
 import os
 import threading
 import time
 import uuid
 from pathlib import Path
 
-import requests
-
-from . import settings, state
+from . import (
+    backend_client,
+    batch_ingest,
+    job_queue,
+    job_store,
+    metrics,
+    settings,
+    state,
+    upload_outbox,
+)
 from .logger import log
+from .result_cache import parse_metadata_from_log
 from .rhino_runner import run_rhino_python
 
 
+# Rhino 진단용 테이블(metadata 키). 결과 캐시에는 그대로 두되 register-file payload에서는 뺀다
+# (백엔드가 metadata를 그대로 저장하고 로그에 JSON 전문으로 남기므로 요청마다 배열이 붙는다).
+DIAGNOSTIC_METADATA_KEYS = ("sectionProfile", "radialProfile")
+
+
+def registration_metadata(metadata: dict | None) -> dict | None:
+    """register-file에 보낼 metadata. 진단용 키를 뺀 사본, 남는 게 없으면 None."""
+    if not isinstance(metadata, dict):
+        return None
+    out = {k: v for k, v in metadata.items() if k not in DIAGNOSTIC_METADATA_KEYS}
+    return out or None
+
+
 def notify_runtime_status(
     item: dict | None,
     *,
@@ -50,12 +72,7 @@ def notify_runtime_status(
         }
         if status == "started":
             payload["startedAt"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-        resp = requests.post(
-            f"{backend_url}/bg/runtime-status",
-            json=payload,
-            timeout=10,
-            headers=settings.bridge_headers(),
-        )
+        resp = backend_client.post("/bg/runtime-status", json=payload)
         if resp.status_code not in (200, 201, 202):
             log(
                 "runtime-status notify failed: "
@@ -73,13 +90,39 @@ def notify_runtime_status(
         return False
 
 
+def post_finish_line(request_id: str, file_name: str, finish_line: dict) -> bool:
+    """finish line을 백엔드에 등록한다(Rhino 스크립트의 _post_finish_line과 같은 API)."""
+    try:
+        backend_url = os.getenv("BACKEND_BASE", "").rstrip("/")
+        if not backend_url:
+            return False
+        resp = backend_client.post(
+            "/bg/register-finish-line",
+            json={
+                "requestId": request_id,
+                "filePath": file_name,
+                "finishLine": finish_line,
+            },
+        )
+        if resp.status_code not in (200, 201):
+            log(
+                f"finishline register failed: status={resp.status_code} "
+                f"requestId={request_id} body={resp.text[:300]}"
+            )
+            return False
+        log(f"finishline register ok: requestId={request_id}")
+        return True
+    except Exception as e:
+        log(f"finishline register failed: {e}")
+        return False
+
+
 def upload_via_presign(out_path: Path, original_name: str, item: dict) -> bool:
     try:
         backend_url = os.getenv("BACKEND_BASE", "").rstrip("/")
         if not backend_url:
             log("BACKEND_BASE not configured")
             return False
-        presign_url = f"{backend_url}/bg/presign-upload"
         req_id = item.get("requestId") or settings.extract_request_id_from_name(
             original_name
         )
@@ -89,9 +132,7 @@ def upload_via_presign(out_path: Path, original_name: str, item: dict) -> bool:
             "fileName": file_name,
             "requestId": req_id or None,
         }
-        resp = requests.post(
-            presign_url, json=payload, timeout=10, headers=settings.bridge_headers()
-        )
+        resp = backend_client.post("/bg/presign-upload", json=payload)
         if resp.status_code != 200:
             log(f"Presign failed status={resp.status_code} body={resp.text}")
             return False
@@ -106,18 +147,22 @@ def upload_via_presign(out_path: Path, original_name: str, item: dict) -> bool:
         if not presigned_url or not key:
             log("Presign response missing url/key")
             return False
-        file_size = out_path.stat().st_size
-        with open(out_path, "rb") as f:
-            put_headers = {"Content-Type": content_type}
-            put_resp = requests.put(
-                presigned_url, data=f, headers=put_headers, timeout=30
+        # 재시도 시 본문을 다시 보낼 수 있도록 파일 객체 대신 bytes로 넘긴다
+        body = out_path.read_bytes()
+        file_size = len(body)
+        with metrics.phase_timer("upload"):
+            put_resp = backend_client.put(
+                "s3:presigned-put",
+                url=presigned_url,
+                data=body,
+                headers={"Content-Type": content_type},
+                bridge_auth=False,
             )
-            if put_resp.status_code not in (200, 201):
-                log(
-                    f"Presigned PUT failed status={put_resp.status_code} body={put_resp.text}"
-                )
-                return False
-        register_url = f"{backend_url}/bg/register-file"
+        if put_resp.status_code not in (200, 201):
+            log(
+                f"Presigned PUT failed status={put_resp.status_code} body={put_resp.text}"
+            )
+            return False
         s3_url = settings.build_s3_url(bucket, key) if bucket else None
         register_payload = {
             "sourceStep": "2-filled",
@@ -130,15 +175,13 @@ def upload_via_presign(out_path: Path, original_name: str, item: dict) -> bool:
         }
         if req_id:
             register_payload["requestId"] = req_id
-        metadata = item.get("metadata") if isinstance(item, dict) else None
-        if isinstance(metadata, dict) and metadata:
-            register_payload["metadata"] = metadata
-        reg_resp = requests.post(
-            register_url,
-            json=register_payload,
-            timeout=10,
-            headers=settings.bridge_headers(),
+        metadata = registration_metadata(
+            item.get("metadata") if isinstance(item, dict) else None
         )
+        if metadata:
+            register_payload["metadata"] = metadata
+        with metrics.phase_timer("register"):
+            reg_resp = backend_client.post("/bg/register-file", json=register_payload)
         if reg_resp.status_code == 200:
             log(
                 "Presigned upload + register success: "
@@ -169,7 +212,7 @@ def fetch_pending_stl_list() -> list[dict]:
             f"backend={backend} url={url} "
             f"secret_len={len(str(headers.get('X-Bridge-Secret', '')))}"
         )
-        res = requests.get(url, timeout=10, headers=headers)
+        res = backend_client.get("/bg/pending-stl")
         if res.status_code != 200:
             log(f"pending-stl fetch failed: status={res.status_code} body={res.text}")
             return []
@@ -203,11 +246,9 @@ def download_original_to_input(item: dict) -> bool:
     if target.exists():
         return True
     params = {"requestId": request_id, "filePath": file_name}
-    url = f"{backend}/bg/original-file"
     try:
-        res = requests.get(
-            url, params=params, timeout=30, headers=settings.bridge_headers()
-        )
+        with metrics.phase_timer("download"):
+            res = backend_client.get("/bg/original-file", params=params)
         if res.status_code != 200:
             log(f"original-file fetch failed: status={res.status_code}")
             return False
@@ -283,43 +324,37 @@ def _fallback_diameter_from_case_infos(case_infos: dict) -> float | None:
     return _BRAND_DIAMETER_FALLBACK.get((manufacturer, brand, family, implant_type))
 
 
-def fetch_request_meta_case_infos(request_id: str | None) -> dict:
-    if not request_id:
-        return {}
-
+def _fetch_request_meta_case_infos_uncached(request_id: str) -> dict | None:
+    """/bg/request-meta 호출. 실패하면 None(캐시하지 않음), caseInfos가 비어 있으면 {}."""
     backend = os.getenv("BACKEND_BASE", "").rstrip("/")
     if not backend:
-        return {}
+        return None
 
     try:
-        res = requests.get(
-            f"{backend}/bg/request-meta",
-            params={"requestId": request_id},
-            timeout=10,
-            headers=settings.bridge_headers(),
+        res = backend_client.get(
+            "/bg/request-meta", params={"requestId": request_id}
         )
         if res.status_code != 200:
             log(
                 f"request-meta fetch failed: requestId={request_id} status={res.status_code}"
             )
-            return {}
+            return None
 
         payload = res.json() if res.content else {}
         return ((payload or {}).get("data") or {}).get("caseInfos") or {}
     except Exception as e:
         log(f"request-meta fetch failed: requestId={request_id} error={e}")
-        return {}
+        return None
 
 
-def fetch_connection_target_diameter(request_id: str | None) -> float | None:
-    if not request_id:
-        return None
+def _resolve_connection_target_diameter(
+    request_id: str, case_infos: dict
+) -> tuple[float | None, str | None]:
+    """(직경, 출처). 출처는 'backend' | 'brand-fallback' | None."""
+    if not case_infos:
+        return None, None
 
     try:
-        case_infos = fetch_request_meta_case_infos(request_id)
-        if not case_infos:
-            return None
-
         raw = case_infos.get("connectionTargetDiameter")
         if raw not in (None, ""):
             diameter = float(raw)
@@ -330,7 +365,7 @@ def fetch_connection_target_diameter(request_id: str | None) -> float | None:
                     f"{case_infos.get('implantManufacturer', '')}/{case_infos.get('implantBrand', '')}/"
                     f"{case_infos.get('implantFamily', '')}/{case_infos.get('implantType', '')})"
                 )
-                return diameter
+                return diameter, "backend"
 
         # 백엔드가 null 반환 → 직접 커넥션 직경을 알 수 없음 → 정적 맵으로 폴백
         manufacturer = case_infos.get("implantManufacturer", "")
@@ -351,15 +386,133 @@ def fetch_connection_target_diameter(request_id: str | None) -> float | None:
             log(
                 f"[diameter] static fallback: {manufacturer}/{brand}/{family}/{implant_type} → {fallback:.4f}mm"
             )
-            return fallback
+            return fallback, "brand-fallback"
         log(
             f"[diameter] no static fallback found for {manufacturer}/{brand}/{family}/{implant_type}; will use default 3.33"
         )
-        return None
     except Exception as e:
         log(f"request-meta diameter parse failed: requestId={request_id} error={e}")
 
-    return None
+    return None, None
+
+
+def _build_request_meta(request_id: str | None, case_infos: dict) -> dict:
+    diameter, source = (
+        _resolve_connection_target_diameter(request_id, case_infos)
+        if request_id
+        else (None, None)
+    )
+    return {
+        "requestId": request_id,
+        "caseInfos": case_infos,
+        "connectionTargetDiameter": diameter,
+        "diameterSource": source,
+        "implant": {
+            "manufacturer": str(case_infos.get("implantManufacturer") or "").strip(),
+            "brand": str(case_infos.get("implantBrand") or "").strip(),
+            "family": str(case_infos.get("implantFamily") or "").strip(),
+            "type": str(case_infos.get("implantType") or "").strip(),
+        },
+        "fetchedAt": time.time(),
+    }
+
+
+def _store_request_meta_locked(request_id: str, meta: dict) -> None:
+    cache = state.request_meta_cache
+    cache[request_id] = meta
+    if len(cache) > settings.REQUEST_META_CACHE_MAX_ENTRIES:
+        ttl = settings.REQUEST_META_TTL_SEC
+        now = time.time()
+        for rid in [r for r, m in cache.items() if now - m["fetchedAt"] > ttl]:
+            cache.pop(rid, None)
+        # 모두 유효하면 가장 오래된 것부터 제거
+        while len(cache) > settings.REQUEST_META_CACHE_MAX_ENTRIES:
+            cache.pop(next(iter(cache)), None)
+
+
+def resolve_request_meta(request_id: str | None) -> dict:
+    """requestId의 caseInfos + 커넥션 직경(정적 맵 폴백 포함) + 임플란트 프로파일.
+
+    REQUEST_META_TTL_SEC 동안 캐시하고, 같은 requestId 동시 조회는 HTTP 한 번을 공유한다
+    (single-flight). 조회 실패는 캐시하지 않는다.
+    """
+    if not request_id:
+        return _build_request_meta(None, {})
+
+    now = time.time()
+    with state.request_meta_lock:
+        cached = state.request_meta_cache.get(request_id)
+        if cached is not None and now - cached["fetchedAt"] <= settings.REQUEST_META_TTL_SEC:
+            state.request_meta_hits += 1
+            return cached
+        flight = state.request_meta_inflight.get(request_id)
+        leader = flight is None
+        if leader:
+            flight = {"event": threading.Event(), "meta": None}
+            state.request_meta_inflight[request_id] = flight
+            state.request_meta_misses += 1
+        else:
+            state.request_meta_coalesced += 1
+
+    if not leader:
+        flight["event"].wait(timeout=60.0)
+        if flight["meta"] is not None:
+            return flight["meta"]
+        return _build_request_meta(request_id, {})
+
+    meta = None
+    try:
+        with metrics.phase_timer("meta_fetch"):
+            case_infos = _fetch_request_meta_case_infos_uncached(request_id)
+        meta = _build_request_meta(request_id, case_infos or {})
+        if case_infos is not None:
+            with state.request_meta_lock:
+                _store_request_meta_locked(request_id, meta)
+    finally:
+        flight["meta"] = meta
+        with state.request_meta_lock:
+            state.request_meta_inflight.pop(request_id, None)
+        flight["event"].set()
+    return meta
+
+
+def prime_request_meta(request_id: str | None, case_infos: dict) -> dict | None:
+    """다른 경로에서 이미 받은 caseInfos로 캐시를 채운다(recalculate-metadata 등)."""
+    if not request_id or not isinstance(case_infos, dict):
+        return None
+    meta = _build_request_meta(request_id, case_infos)
+    with state.request_meta_lock:
+        _store_request_meta_locked(request_id, meta)
+    return meta
+
+
+def invalidate_request_meta(request_id: str | None) -> None:
+    if not request_id:
+        return
+    with state.request_meta_lock:
+        state.request_meta_cache.pop(request_id, None)
+
+
+def request_meta_cache_stats() -> dict:
+    with state.request_meta_lock:
+        entries = len(state.request_meta_cache)
+        inflight = len(state.request_meta_inflight)
+    return {
+        "entries": entries,
+        "inFlight": inflight,
+        "ttlSec": settings.REQUEST_META_TTL_SEC,
+        "hits": state.request_meta_hits,
+        "misses": state.request_meta_misses,
+        "coalesced": state.request_meta_coalesced,
+    }
+
+
+def fetch_request_meta_case_infos(request_id: str | None) -> dict:
+    return resolve_request_meta(request_id)["caseInfos"]
+
+
+def fetch_connection_target_diameter(request_id: str | None) -> float | None:
+    return resolve_request_meta(request_id)["connectionTargetDiameter"]
 
 
 def canonicalize_input_name(original: str) -> str:
@@ -367,13 +520,53 @@ def canonicalize_input_name(original: str) -> str:
     return settings.sanitize_filename(Path(original).name)
 
 
+def record_job_outcome(
+    file_name: str | None, status: str, error: str | None = None
+) -> None:
+    """작업 최종 결과(completed/failed)를 영속 저장소와 일괄 접수 배치에 기록한다."""
+    job_store.mark(file_name, "done" if status == "completed" else "failed", error)
+    batch_ingest.record_outcome(file_name, status, error)
+
+
+def _forward_rhino_log_lines(log_text: str) -> None:
+    """Rhino 로그 중 finishline 등록/align 관련 줄을 서버 로그로 옮긴다(중복 제거)."""
+    seen_forwarded = set()
+    for _ln in log_text.split("\n"):
+        stripped = _ln.strip()
+        if not stripped:
+            continue
+        if (
+            "[finishline] module reloaded" in stripped
+            or "Finishline failed:" in stripped
+            or "finishline post url=" in stripped
+            or "finishline post auth " in stripped
+            or "finishline post status=" in stripped
+            or "finishline post response=" in stripped
+            or "finishline post failed:" in stripped
+        ):
+            key = "F|" + stripped
+            if key not in seen_forwarded:
+                seen_forwarded.add(key)
+                log("[rhino-finishline] " + stripped)
+        if "[align]" in stripped:
+            key = "A|" + stripped
+            if key not in seen_forwarded:
+                seen_forwarded.add(key)
+                log("[rhino-align] " + stripped)
+
+
 async def process_single_stl(
-    p: Path, force_reprocess: bool = False, explicit_request_id: str | None = None
+    p: Path,
+    force_reprocess: bool = False,
+    explicit_request_id: str | None = None,
+    request_meta: dict | None = None,
 ):
+    """request_meta: 프리페치 단계에서 미리 받은 resolve_request_meta 결과(없으면 여기서 조회)."""
     if isinstance(p, str):
         p = Path(p)
     if not p.exists():
         log(f"Process failed: file not found {p}")
+        record_job_outcome(p.name, "failed", "input file not found")
         return
     async with state.processing_semaphore:
         force_fill = settings.is_force_fill_mode()
@@ -384,11 +577,19 @@ async def process_single_stl(
             prefixed_input
         )
         out_path = settings.STORE_OUT_DIR / out_name
+        if force_reprocess:
+            # 재처리 요청은 임플란트 정보가 방금 바뀐 경우가 많으므로 캐시를 쓰지 않는다
+            invalidate_request_meta(req_id)
+            request_meta = None
+        if request_meta is not None and request_meta.get("requestId") != req_id:
+            request_meta = None
         with state.in_flight_lock:
             if p.name in state.in_flight:
                 log(f"Already in flight: {p.name}")
                 return
             state.in_flight.add(p.name)
+        job_store.mark(p.name, "running")
+        handed_off = False
         try:
             log(f"Checking output path: {out_path}")
             if out_path.exists():
@@ -416,25 +617,33 @@ async def process_single_stl(
                         log(
                             f"[process_single_stl] Output exists, registering STL metadata for {req_id}"
                         )
-                        existing_target = fetch_connection_target_diameter(req_id)
-                        calculate_and_register_metadata(
+                        existing_meta = request_meta or await asyncio.to_thread(
+                            resolve_request_meta, req_id
+                        )
+                        await asyncio.to_thread(
+                            calculate_and_register_metadata,
                             out_path,
                             req_id,
                             None,  # requestMongoId는 백엔드에서 찾음
                             None,
-                            connection_target_diameter=existing_target,
+                            connection_target_diameter=existing_meta[
+                                "connectionTargetDiameter"
+                            ],
                         )
                     except Exception as e:
                         log(
                             f"[process_single_stl] Failed to register metadata from existing output: {e}"
                         )
-                    if upload_via_presign(
+                    if await asyncio.to_thread(
+                        upload_via_presign,
                         out_path,
                         prefixed_input,
                         {"requestId": req_id, "metadata": {}},
                     ):
+                        record_job_outcome(p.name, "completed")
                         return
-                    notify_runtime_status(
+                    await asyncio.to_thread(
+                        notify_runtime_status,
                         {"requestId": req_id},
                         source="rhino-server",
                         stage="request",
@@ -443,6 +652,7 @@ async def process_single_stl(
                         tone="rose",
                         metadata={"fileName": p.name, "outputName": out_name},
                     )
+                    record_job_outcome(p.name, "failed", "re-sync upload failed")
                     return
             log(f"Auto-processing starting: {p.name}")
             job_id = f"auto_{uuid.uuid4().hex[:8]}"
@@ -453,7 +663,8 @@ async def process_single_stl(
                 "inputName": p.name,
                 "outputName": out_name,
             }
-            notify_runtime_status(
+            await asyncio.to_thread(
+                notify_runtime_status,
                 {"requestId": req_id},
                 source="rhino-server",
                 stage="request",
@@ -462,14 +673,14 @@ async def process_single_stl(
                 tone="blue",
                 metadata={"fileName": p.name, "outputName": out_name},
             )
-            connection_target_diameter = fetch_connection_target_diameter(req_id)
-            case_infos = fetch_request_meta_case_infos(req_id)
-            implant_manufacturer = str(
-                case_infos.get("implantManufacturer") or ""
-            ).strip()
-            implant_brand = str(case_infos.get("implantBrand") or "").strip()
-            implant_family = str(case_infos.get("implantFamily") or "").strip()
-            implant_type = str(case_infos.get("implantType") or "").strip()
+            if request_meta is None:
+                request_meta = await asyncio.to_thread(resolve_request_meta, req_id)
+            connection_target_diameter = request_meta["connectionTargetDiameter"]
+            implant = request_meta["implant"]
+            implant_manufacturer = implant["manufacturer"]
+            implant_brand = implant["brand"]
+            implant_family = implant["family"]
+            implant_type = implant["type"]
 
             if connection_target_diameter is not None:
                 log(
@@ -495,32 +706,12 @@ async def process_single_stl(
                 implant_brand=implant_brand,
                 implant_family=implant_family,
                 implant_type=implant_type,
+                use_cache=not force_fill,
             )
             log(f"Auto-processing done: {out_name}")
             if log_text:
-                seen_forwarded = set()
-                for _ln in log_text.split("\n"):
-                    stripped = _ln.strip()
-                    if not stripped:
-                        continue
-                    if (
-                        "[finishline] module reloaded" in stripped
-                        or "Finishline failed:" in stripped
-                        or "finishline post url=" in stripped
-                        or "finishline post auth " in stripped
-                        or "finishline post status=" in stripped
-                        or "finishline post response=" in stripped
-                        or "finishline post failed:" in stripped
-                    ):
-                        key = "F|" + stripped
-                        if key not in seen_forwarded:
-                            seen_forwarded.add(key)
-                            log("[rhino-finishline] " + stripped)
-                    if "[align]" in stripped:
-                        key = "A|" + stripped
-                        if key not in seen_forwarded:
-                            seen_forwarded.add(key)
-                            log("[rhino-align] " + stripped)
+                # 로그 전문은 RHINO_CALLBACK_LOG=always(또는 구버전 스크립트)일 때만 온다
+                await asyncio.to_thread(_forward_rhino_log_lines, log_text)
             state.recent_history.append(
                 {
                     "file": p.name,
@@ -530,51 +721,23 @@ async def process_single_stl(
                 }
             )
 
-            def _parse_metadata_from_log(text: str) -> dict:
-                if not text:
-                    return {}
-                import base64
-                import json
-                import re
-
-                meta: dict = {}
-                m = re.search(r"DIAMETER_RESULT:max=([\d.]+) conn=([\d.]+)", text)
-                if m:
-                    try:
-                        meta["diameter"] = {
-                            "max": float(m.group(1)),
-                            "connection": float(m.group(2)),
-                        }
-                    except Exception:
-                        pass
-                m2 = re.search(r"FINISHLINE_RESULT:([A-Za-z0-9+/=]+)", text)
-                if m2:
-                    try:
-                        raw = base64.b64decode(m2.group(1)).decode(
-                            "utf-8", errors="ignore"
-                        )
-                        data = json.loads(raw)
-                        if isinstance(data, dict):
-                            meta["finishLine"] = data
-                    except Exception:
-                        pass
-
-                m3 = re.search(r"HEX_ROTATION_RESULT:([A-Za-z0-9+/=]+)", text)
-                if m3:
-                    try:
-                        raw = base64.b64decode(m3.group(1)).decode(
-                            "utf-8", errors="ignore"
-                        )
-                        data = json.loads(raw)
-                        if isinstance(data, dict):
-                            meta["hexRotation"] = data
-                    except Exception:
-                        pass
-                return meta
-
-            metadata = _parse_metadata_from_log(log_text)
+            metadata = (
+                output_info.get("metadata") if isinstance(output_info, dict) else None
+            )
+            if not isinstance(metadata, dict) or not metadata:
+                metadata = await asyncio.to_thread(parse_metadata_from_log, log_text)
             if not metadata.get("finishLine"):
                 log(f"[rhino-finishline] FINISHLINE_RESULT missing for {req_id}")
+            elif (
+                isinstance(output_info, dict)
+                and output_info.get("cached")
+                and req_id
+                and not force_fill
+            ):
+                # 캐시 hit이면 Rhino 스크립트가 하던 finish line 등록을 서버에서 대신 한다
+                await asyncio.to_thread(
+                    post_finish_line, req_id, p.name, metadata["finishLine"]
+                )
             output_ok = False
             if output_info and isinstance(output_info, dict):
                 exists = output_info.get("exists")
@@ -593,7 +756,8 @@ async def process_single_stl(
                     log(f"output stat fallback error ({out_path}): {e}")
             if not output_ok:
                 log(f"Output file not confirmed after processing: {out_path}")
-                notify_runtime_status(
+                await asyncio.to_thread(
+                    notify_runtime_status,
                     {"requestId": req_id},
                     source="rhino-server",
                     stage="request",
@@ -607,125 +771,36 @@ async def process_single_stl(
                     if tail:
                         tail_snippet = tail[-2000:]
                         log("[rhino-log tail]\n" + tail_snippet)
+                record_job_outcome(p.name, "failed", "output not confirmed")
                 return
 
-            from .stl_metadata import calculate_and_register_metadata
-
-            finish_line_points = None
-            if metadata.get("finishLine"):
-                finish_line_points = metadata["finishLine"].get("points")
-
-            # [정책] finish line은 현재 Rhino 실행 결과만 신뢰한다.
-            # 예전 DB finishLine을 fallback으로 재사용하면 이번 실행이 실패했는데도
-            # 메타데이터가 성공한 것처럼 보일 수 있어 상태를 숨기게 된다.
-            # 따라서 이번 run에서 finishLine이 없으면 메타데이터 계산/등록을 생략하고
-            # 실패 로그만 남긴다. (rules.md §9.2)
-            if not finish_line_points:
-                log(
-                    f"[process_single_stl] finishLine missing for {req_id}; skipping STL metadata calculation/registration"
-                )
-            else:
-                log(f"[process_single_stl] Calculating STL metadata for {req_id}")
-                try:
-                    stl_metadata = calculate_and_register_metadata(
-                        out_path,
-                        req_id,
-                        None,  # requestMongoId는 백엔드에서 찾음
-                        finish_line_points,
-                        connection_target_diameter=connection_target_diameter,
-                        hex_rotation=metadata.get("hexRotation"),
-                    )
-                    if stl_metadata:
-                        # 메타데이터를 metadata dict에 병합
-                        metadata["stlMetadata"] = stl_metadata
-
-                        # taperGuide surfacePoints 요약 로그 (케이스별 가이드 생성 여부 추적)
-                        taper_guide = (
-                            stl_metadata.get("taperGuide")
-                            if isinstance(stl_metadata, dict)
-                            else None
-                        )
-                        guides = (
-                            taper_guide.get("multiDirectionGuides")
-                            if isinstance(taper_guide, dict)
-                            else None
-                        )
-                        guides = guides if isinstance(guides, list) else []
-
-                        guide_count = len(guides)
-                        with_surface_points = 0
-                        total_surface_points = 0
-                        counts: list[int] = []
-
-                        for g in guides:
-                            if not isinstance(g, dict):
-                                counts.append(0)
-                                continue
-                            surface_points = g.get("surfacePoints")
-                            if isinstance(surface_points, list):
-                                sp_count = len(surface_points)
-                                counts.append(sp_count)
-                                if sp_count > 0:
-                                    with_surface_points += 1
-                                    total_surface_points += sp_count
-                            else:
-                                counts.append(0)
-
-                        summary = (
-                            f"taperGuide surfacePoints requestId={req_id} "
-                            f"guides={guide_count} withSurfacePoints={with_surface_points} "
-                            f"totalSurfacePoints={total_surface_points} counts={counts}"
-                        )
-
-                        log(f"[process_single_stl] {summary}")
-
-                        # 운영 로그 뷰에서 [abuts-rhino] 스트림만 보는 경우를 위해 동일 요약을 미러링
-                        try:
-                            print(f"[abuts-rhino] {summary}", flush=True)
-                        except Exception:
-                            pass
-
-                        log(
-                            f"[process_single_stl] STL metadata calculated and registered for {req_id}"
-                        )
-                except Exception as e:
-                    log(f"[process_single_stl] Failed to calculate STL metadata: {e}")
-
-            if force_fill:
+            finalize_job = {
+                "fileName": p.name,
+                "outPath": out_path,
+                "outName": out_name,
+                "prefixedInput": prefixed_input,
+                "requestId": req_id,
+                "metadata": metadata,
+                "connectionTargetDiameter": connection_target_diameter,
+                "forceFill": force_fill,
+                "enqueuedTs": time.time(),
+            }
+            # 이후 in_flight 해제와 출력 파일 삭제는 finalize_processed_stl 책임이다
+            handed_off = True
+            job_store.mark(p.name, "uploading")
+            if settings.STL_PIPELINE_ASYNC_UPLOAD:
+                # 메타데이터 계산/업로드는 업로드 단계 워커가 처리하고 이 워커는 다음 Rhino 작업으로 넘어간다
+                state.stl_upload_queue.put_nowait(finalize_job)
                 log(
-                    "Force-fill 테스트 모드: presigned 업로드와 백엔드 통지를 생략합니다."
+                    f"[pipeline] handed off to upload stage: {out_name} "
+                    f"(upload queue: {state.stl_upload_queue.qsize()})"
                 )
             else:
-                upload_ok = upload_via_presign(
-                    out_path,
-                    prefixed_input,
-                    {"requestId": req_id, "metadata": metadata},
-                )
-                if not upload_ok:
-                    log(f"[process_single_stl] upload/register failed for {req_id}")
-                    notify_runtime_status(
-                        {"requestId": req_id},
-                        source="rhino-server",
-                        stage="request",
-                        status="failed",
-                        label="Filled STL 업로드/등록 실패",
-                        tone="rose",
-                        metadata={"fileName": p.name, "outputName": out_name},
-                    )
-                    return
-                # CAM 완료 통지: 프론트에서 웹소켓으로 받아 경과시간 표시 및 다음 공정 진행
-                notify_runtime_status(
-                    {"requestId": req_id},
-                    source="rhino-server",
-                    stage="request",
-                    status="completed",
-                    label="Filled STL 생성 완료",
-                    tone="green",
-                    metadata={"fileName": p.name, "outputName": out_name},
-                )
+                await finalize_processed_stl(finalize_job)
         except Exception as e:
             log(f"Auto-processing failed for {p.name}: {e}")
-            notify_runtime_status(
+            await asyncio.to_thread(
+                notify_runtime_status,
                 {"requestId": req_id},
                 source="rhino-server",
                 stage="request",
@@ -742,12 +817,15 @@ async def process_single_stl(
                     "error": str(e),
                 }
             )
+            record_job_outcome(p.name, "failed", str(e))
         finally:
-            with state.in_flight_lock:
-                state.in_flight.discard(p.name)
+            if not handed_off:
+                with state.in_flight_lock:
+                    state.in_flight.discard(p.name)
             # [정책] 처리 완료 후 OS temp 임시 파일 즉시 삭제
             # 입력(p)은 S3 원본에서 다운로드한 캐시, 출력(out_path)은 S3에 업로드 완료
-            for _tmp in (p, out_path):
+            # (업로드 단계로 넘긴 출력은 finalize_processed_stl이 삭제한다)
+            for _tmp in (p,) if handed_off else (p, out_path):
                 try:
                     if _tmp and _tmp.exists():
                         _tmp.unlink(missing_ok=True)
@@ -756,6 +834,169 @@ async def process_single_stl(
                     log(f"[cleanup] temp file delete failed ({_tmp}): {_e}")
 
 
+async def finalize_processed_stl(job: dict) -> None:
+    """Rhino 이후 단계: STL 메타데이터 계산/등록 → presigned 업로드/등록 → 완료 통지.
+
+    파이프라인 모드(STL_PIPELINE_ASYNC_UPLOAD)에서는 stl_upload_worker가 실행하므로
+    Rhino 워커는 이 단계를 기다리지 않는다. in_flight 해제와 출력 파일 삭제도 여기서 한다.
+    """
+    file_name = job["fileName"]
+    out_path: Path = job["outPath"]
+    out_name = job["outName"]
+    prefixed_input = job["prefixedInput"]
+    req_id = job.get("requestId")
+    metadata = job.get("metadata") or {}
+    connection_target_diameter = job.get("connectionTargetDiameter")
+    force_fill = bool(job.get("forceFill"))
+    try:
+        from .stl_metadata import calculate_and_register_metadata
+
+        finish_line_points = None
+        if metadata.get("finishLine"):
+            finish_line_points = metadata["finishLine"].get("points")
+
+        # [정책] finish line은 현재 Rhino 실행 결과만 신뢰한다.
+        # 예전 DB finishLine을 fallback으로 재사용하면 이번 실행이 실패했는데도
+        # 메타데이터가 성공한 것처럼 보일 수 있어 상태를 숨기게 된다.
+        # 따라서 이번 run에서 finishLine이 없으면 메타데이터 계산/등록을 생략하고
+        # 실패 로그만 남긴다. (rules.md §9.2)
+        if not finish_line_points:
+            log(
+                f"[process_single_stl] finishLine missing for {req_id}; skipping STL metadata calculation/registration"
+            )
+        else:
+            log(f"[process_single_stl] Calculating STL metadata for {req_id}")
+            try:
+                with metrics.phase_timer("stl_metadata"):
+                    stl_metadata = await asyncio.to_thread(
+                        calculate_and_register_metadata,
+                        out_path,
+                        req_id,
+                        None,  # requestMongoId는 백엔드에서 찾음
+                        finish_line_points,
+                        connection_target_diameter=connection_target_diameter,
+                        hex_rotation=metadata.get("hexRotation"),
+                    )
+                if stl_metadata:
+                    # 메타데이터를 metadata dict에 병합
+                    metadata["stlMetadata"] = stl_metadata
+
+                    # taperGuide surfacePoints 요약 로그 (케이스별 가이드 생성 여부 추적)
+                    taper_guide = (
+                        stl_metadata.get("taperGuide")
+                        if isinstance(stl_metadata, dict)
+                        else None
+                    )
+                    guides = (
+                        taper_guide.get("multiDirectionGuides")
+                        if isinstance(taper_guide, dict)
+                        else None
+                    )
+                    guides = guides if isinstance(guides, list) else []
+
+                    guide_count = len(guides)
+                    with_surface_points = 0
+                    total_surface_points = 0
+                    counts: list[int] = []
+
+                    for g in guides:
+                        if not isinstance(g, dict):
+                            counts.append(0)
+                            continue
+                        surface_points = g.get("surfacePoints")
+                        if isinstance(surface_points, list):
+                            sp_count = len(surface_points)
+                            counts.append(sp_count)
+                            if sp_count > 0:
+                                with_surface_points += 1
+                                total_surface_points += sp_count
+                        else:
+                            counts.append(0)
+
+                    summary = (
+                        f"taperGuide surfacePoints requestId={req_id} "
+                        f"guides={guide_count} withSurfacePoints={with_surface_points} "
+                        f"totalSurfacePoints={total_surface_points} counts={counts}"
+                    )
+
+                    log(f"[process_single_stl] {summary}")
+
+                    # 운영 로그 뷰에서 [abuts-rhino] 스트림만 보는 경우를 위해 동일 요약을 미러링
+                    try:
+                        print(f"[abuts-rhino] {summary}", flush=True)
+                    except Exception:
+                        pass
+
+                    log(
+                        f"[process_single_stl] STL metadata calculated and registered for {req_id}"
+                    )
+            except Exception as e:
+                log(f"[process_single_stl] Failed to calculate STL metadata: {e}")
+
+        if force_fill:
+            log(
+                "Force-fill 테스트 모드: presigned 업로드와 백엔드 통지를 생략합니다."
+            )
+            record_job_outcome(file_name, "completed")
+        else:
+            # 업로드는 디스크 outbox를 거친다: 실패해도 재시작 후까지 재시도되며,
+            # 완료/최종 실패 통지는 upload_outbox가 한다.
+            entry_id = await asyncio.to_thread(
+                upload_outbox.enqueue,
+                out_path,
+                file_name=file_name,
+                out_name=out_name,
+                original_name=prefixed_input,
+                request_id=req_id,
+                metadata=metadata,
+            )
+            if entry_id is None:
+                log(f"[process_single_stl] upload/register failed for {req_id}")
+                await asyncio.to_thread(
+                    notify_runtime_status,
+                    {"requestId": req_id},
+                    source="rhino-server",
+                    stage="request",
+                    status="failed",
+                    label="Filled STL 업로드/등록 실패",
+                    tone="rose",
+                    metadata={"fileName": file_name, "outputName": out_name},
+                )
+                record_job_outcome(file_name, "failed", "outbox enqueue failed")
+                return
+            await upload_outbox.attempt(entry_id)
+    except Exception as e:
+        log(f"Finalize failed for {file_name}: {e}")
+        await asyncio.to_thread(
+            notify_runtime_status,
+            {"requestId": req_id},
+            source="rhino-server",
+            stage="request",
+            status="failed",
+            label="Filled STL 생성 실패",
+            tone="rose",
+            metadata={"fileName": file_name, "error": str(e)},
+        )
+        state.recent_history.append(
+            {
+                "file": file_name,
+                "timestamp": time.time(),
+                "status": "failed",
+                "error": str(e),
+            }
+        )
+        record_job_outcome(file_name, "failed", str(e))
+    finally:
+        with state.in_flight_lock:
+            state.in_flight.discard(file_name)
+        try:
+            if out_path.exists():
+                out_path.unlink(missing_ok=True)
+                log(f"[cleanup] temp file deleted: {out_path.name}")
+        except Exception as _e:
+            log(f"[cleanup] temp file delete failed ({out_path}): {_e}")
+
+
 async def recover_unprocessed_files() -> None:
     try:
         settings.ensure_dirs()
@@ -788,32 +1029,48 @@ async def recover_unprocessed_files() -> None:
                 )
                 break
             return
+        # 재시작 전 끝나지 않은 작업(job_store)을 백엔드 조회보다 먼저 다시 큐에 넣는다.
+        # 뒤이은 pending-stl 일괄 접수는 이미 큐에 든 항목을 queued_already로 건너뛴다.
+        await resume_persisted_jobs()
         # 운영 모드: SSOT(백엔드)에서 내려준 목록만 처리
         # rhino-server는 재기동 시 로컬 디렉토리를 임의 재계산하지 않는다.
         # 처리 대상의 canonical 목록은 백엔드 pending-stl 응답이며,
         # 로컬 파일은 그 목록을 실행하기 위한 임시 입력 캐시로만 사용한다.
-        pending = fetch_pending_stl_list()
+        pending = await asyncio.to_thread(fetch_pending_stl_list)
         if not pending:
             log("Pending STL from backend: 0")
             return
         log(f"Pending STL from backend: {len(pending)}")
-        for item in pending:
-            # 원본 STL을 백엔드에서 복구하여 입력 폴더에 저장
-            downloaded = download_original_to_input(item)
-            file_path = item.get("filePath") or ""
-            safe_name = (
-                settings.sanitize_filename(Path(file_path).name) if file_path else ""
-            )
-            if not downloaded or not safe_name:
-                continue
-            p = settings.STORE_IN_DIR / safe_name
-            # FIFO 큐에 추가 - 큐 워커가 순차 처리
-            result = enqueue_stl_job(p, force=False, request_id=item.get("requestId"))
-            log(f"Recover: enqueued {p.name} → {result}")
+        # 원본 다운로드(BATCH_DOWNLOAD_CONCURRENCY개 동시)/outbox 대기 확인/큐 추가(backfill)를 일괄 접수로 처리
+        result = await batch_ingest.ingest_batch(pending, source="recovery")
+        for entry in result["items"]:
+            if entry.get("status") != "enqueued":
+                log(f"Recover: {entry.get('fileName')} → {entry.get('status')}")
+        log(
+            f"Recover: {result['batchId']} {result['counts']} "
+            f"({result['elapsedMs']}ms, queue: {result['queueSize']})"
+        )
     except Exception as e:
         log(f"Recover failed: {e}")
 
 
+async def resume_persisted_jobs() -> None:
+    """job_store에 남은 queued/downloading/running/uploading 작업을 재개한다."""
+    resumable = job_store.claim_resumable()
+    if not resumable:
+        return
+    by_state: dict[str, int] = {}
+    for job in resumable:
+        by_state[job["state"]] = by_state.get(job["state"], 0) + 1
+    log(f"Resume: {len(resumable)} unfinished jobs from job store {by_state}")
+    # uploading 행은 outbox에 출력이 남아 있으면 batch_ingest가 upload_pending으로 건너뛴다
+    result = await batch_ingest.ingest_batch(resumable, source="resume")
+    log(
+        f"Resume: {result['batchId']} {result['counts']} "
+        f"({result['elapsedMs']}ms, queue: {result['queueSize']})"
+    )
+
+
 def run_recovery_in_thread():
     loop = __import__("asyncio").new_event_loop()
     __import__("asyncio").set_event_loop(loop)
@@ -828,15 +1085,178 @@ def start_recovery_thread():
 
 
 # ---------------------------------------------------------------------------
-# FIFO STL 처리 큐 (한 번에 하나씩 순차 처리)
+# STL 처리 큐 (워커별로 한 번에 하나씩 처리)
 # ---------------------------------------------------------------------------
 # 동시에 여러 /api/rhino/process-file 요청이 오더라도 기존 작업을 중단하지 않는다.
-# 요청은 stl_job_queue에 쌓이고, stl_queue_worker가 하나씩 꺼내 처리한다.
+# 요청은 stl_job_queue에 쌓이고, stl_queue_worker가 우선순위/aging/fair-share 순서로 꺼내 처리한다.
 # 중복 요청(같은 파일명이 이미 큐에 있거나 처리 중)은 무시한다.
 
 
-async def stl_queue_worker() -> None:
-    """앱 시작 시 asyncio.create_task로 한 번만 실행되는 영구 워커.
+def _item_request_id(item: dict) -> str | None:
+    p: Path = item["path"]
+    return item.get("requestId") or settings.extract_request_id_from_name(
+        canonicalize_input_name(p.name)
+    )
+
+
+async def _prefetch_item(item: dict) -> dict | None:
+    """프리페치 단계: 입력 STL 확보 + request-meta 조회. 결과는 process_single_stl에 넘긴다."""
+    p: Path = item["path"]
+    req_id = _item_request_id(item)
+    try:
+        if not p.exists():
+            job_store.mark(p.name, "downloading")
+            await asyncio.to_thread(
+                download_original_to_input, {"filePath": p.name, "requestId": req_id}
+            )
+        if item.get("force"):
+            return None
+        return await asyncio.to_thread(resolve_request_meta, req_id)
+    except Exception as e:
+        log(f"[pipeline] prefetch failed for {p.name}: {e}")
+        return None
+
+
+def schedule_prefetch() -> None:
+    """큐 앞쪽 STL_PREFETCH_DEPTH개에 대해 프리페치 태스크를 띄운다. 메인 루프에서 호출한다."""
+    depth = settings.STL_PREFETCH_DEPTH
+    if depth <= 0:
+        return
+    try:
+        upcoming = state.stl_job_queue.snapshot(limit=depth)
+    except Exception:
+        return
+    for item in upcoming:
+        if item.get("prefetch") is None:
+            item["prefetch"] = asyncio.create_task(_prefetch_item(item))
+
+
+def _prefetch_wait_cap_sec() -> float:
+    """프리페치(원본 다운로드 + request-meta 조회)를 기다릴 상한. 백엔드 클라이언트 타임아웃/재시도에서 유도한다."""
+    return (
+        backend_client.worst_case_sec("/bg/original-file")
+        + backend_client.worst_case_sec("/bg/request-meta")
+        + 5.0
+    )
+
+
+async def _await_prefetch(item: dict) -> dict | None:
+    task = item.get("prefetch")
+    if task is None:
+        return None
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout=_prefetch_wait_cap_sec())
+    except asyncio.TimeoutError:
+        log(f"[pipeline] prefetch still running after {_prefetch_wait_cap_sec():.0f}s: {item['path'].name}")
+        return None
+    except Exception:
+        return None
+
+
+def _avg_job_sec() -> float | None:
+    samples = list(state.stl_job_durations)
+    if not samples:
+        return None
+    return round(sum(samples) / len(samples), 2)
+
+
+def queue_position(file_name: str) -> dict | None:
+    """대기 중인 작업의 꺼내질 순번(1부터)과 예상 대기 시간. 큐에 없으면 None.
+
+    예상 대기 = 최근 평균 소요 * (앞선 대기 수 + 처리 중 수) / 워커 수. 표본이 없으면 etaSec=None.
+    """
+    order = state.stl_job_queue.snapshot()
+    for idx, item in enumerate(order):
+        if item["path"].name != file_name:
+            continue
+        avg = _avg_job_sec()
+        ahead = idx + len(state.active_jobs)
+        workers = max(1, settings.MAX_RHINO_CONCURRENCY)
+        return {
+            "position": idx + 1,
+            "priority": item.get("priority"),
+            "etaSec": round(avg * ahead / workers, 1) if avg is not None else None,
+            "avgJobSec": avg,
+        }
+    return None
+
+
+def pipeline_snapshot() -> dict:
+    """단계별 큐 깊이: 대기 → 프리페치 → Rhino → 업로드."""
+    queued = state.stl_job_queue.snapshot()
+    prefetching = 0
+    prefetched = 0
+    by_priority: dict[str, int] = {}
+    for item in queued:
+        cls = item.get("priority") or job_queue.DEFAULT_PRIORITY
+        by_priority[cls] = by_priority.get(cls, 0) + 1
+        task = item.get("prefetch")
+        if task is None:
+            continue
+        if task.done():
+            prefetched += 1
+        else:
+            prefetching += 1
+    return {
+        "queued": len(queued),
+        "byPriority": by_priority,
+        "avgJobSec": _avg_job_sec(),
+        "prefetchDepth": settings.STL_PREFETCH_DEPTH,
+        "prefetching": prefetching,
+        "prefetched": prefetched,
+        "rhino": len(state.active_jobs),
+        "uploadQueue": state.stl_upload_queue.qsize(),
+        "uploading": len(state.upload_active),
+        "asyncUpload": settings.STL_PIPELINE_ASYNC_UPLOAD,
+    }
+
+
+async def stl_upload_worker(worker_id: int = 0) -> None:
+    """업로드 단계 워커: Rhino가 끝난 출력을 메타데이터 계산 → 업로드/등록한다."""
+    import os as _os
+
+    hard_timeout = float(_os.getenv("RHINO_JOB_HARD_TIMEOUT_SEC", "600"))
+    tag = f"[stl-upload#{worker_id}]"
+    log(f"{tag} Worker started")
+    while True:
+        try:
+            job = await state.stl_upload_queue.get()
+            state.upload_active[worker_id] = {
+                "name": job.get("outName"),
+                "startedTs": time.time(),
+                "waitSec": round(time.time() - float(job.get("enqueuedTs") or 0), 2),
+            }
+            try:
+                await asyncio.wait_for(finalize_processed_stl(job), timeout=hard_timeout)
+            except asyncio.TimeoutError:
+                log(f"{tag} HARD TIMEOUT ({hard_timeout}s) for {job.get('outName')}")
+                record_job_outcome(
+                    job.get("fileName"), "failed", f"upload hard timeout {hard_timeout}s"
+                )
+                with state.in_flight_lock:
+                    state.in_flight.discard(job.get("fileName"))
+            except Exception as e:
+                log(f"{tag} Unexpected error for {job.get('outName')}: {e}")
+            finally:
+                state.upload_active.pop(worker_id, None)
+                state.stl_upload_queue.task_done()
+        except asyncio.CancelledError:
+            state.upload_active.pop(worker_id, None)
+            log(f"{tag} Worker cancelled")
+            break
+        except Exception as e:
+            log(f"{tag} Worker loop error: {e}")
+            try:
+                await asyncio.sleep(1.0)
+            except Exception:
+                pass
+
+
+async def stl_queue_worker(worker_id: int = 0) -> None:
+    """앱 시작 시 asyncio.create_task로 실행되는 영구 워커.
+
+    settings.MAX_RHINO_CONCURRENCY 개수만큼 띄우며, 각 워커는 같은 큐에서
+    작업을 꺼내 서로 다른 Rhino pipe를 임대해 병렬로 처리한다.
 
     [fix] per-job 하드 타임아웃(기본 10분)을 두어 한 작업이 어떤 이유로든 멈춰도
     워커가 영구 블록되지 않도록 한다. 예전에는 한 번 hang이 생기면 이후 STL이
@@ -845,7 +1265,8 @@ async def stl_queue_worker() -> None:
     import os as _os
 
     hard_timeout = float(_os.getenv("RHINO_JOB_HARD_TIMEOUT_SEC", "600"))
-    log(f"[stl-queue] Worker started (hard_timeout={hard_timeout}s)")
+    tag = f"[stl-queue#{worker_id}]"
+    log(f"{tag} Worker started (hard_timeout={hard_timeout}s)")
     while True:
         try:
             item = await state.stl_job_queue.get()
@@ -853,24 +1274,44 @@ async def stl_queue_worker() -> None:
             force: bool = item.get("force", False)
             item_request_id: str | None = item.get("requestId")
             state.last_dequeue_ts = time.time()
+            if item.get("enqueuedTs"):
+                metrics.observe_phase(
+                    "queue_wait", state.last_dequeue_ts - item["enqueuedTs"]
+                )
             state.current_processing_name = p.name
             state.current_processing_started_ts = state.last_dequeue_ts
+            state.active_jobs[worker_id] = {
+                "name": p.name,
+                "startedTs": state.last_dequeue_ts,
+            }
             log(
-                f"[stl-queue] Dequeued: {p.name} (queue remaining: {state.stl_job_queue.qsize()})"
+                f"{tag} Dequeued: {p.name} (queue remaining: {state.stl_job_queue.qsize()})"
             )
+            # 다음 작업들의 다운로드/메타 조회를 지금 시작해 두어 Rhino가 네트워크를 기다리지 않게 한다
+            schedule_prefetch()
             try:
+                request_meta = await _await_prefetch(item)
+                started_ts = time.time()
                 await asyncio.wait_for(
-                    process_single_stl(p, force, explicit_request_id=item_request_id),
+                    process_single_stl(
+                        p,
+                        force,
+                        explicit_request_id=item_request_id,
+                        request_meta=request_meta,
+                    ),
                     timeout=hard_timeout,
                 )
                 state.last_success_ts = time.time()
                 state.total_jobs_processed += 1
+                state.stl_job_durations.append(state.last_success_ts - started_ts)
+                metrics.observe_phase("process", state.last_success_ts - started_ts)
             except asyncio.TimeoutError:
                 state.last_failure_ts = time.time()
                 state.total_jobs_timeout += 1
                 log(
-                    f"[stl-queue] HARD TIMEOUT ({hard_timeout}s) for {p.name}, skipping to next"
+                    f"{tag} HARD TIMEOUT ({hard_timeout}s) for {p.name}, skipping to next"
                 )
+                record_job_outcome(p.name, "failed", f"hard timeout {hard_timeout}s")
                 # in_flight 정리 (process_single_stl 내부 finally가 못 돌았을 경우 안전망)
                 try:
                     with state.in_flight_lock:
@@ -880,10 +1321,12 @@ async def stl_queue_worker() -> None:
             except Exception as e:
                 state.last_failure_ts = time.time()
                 state.total_jobs_failed += 1
-                log(f"[stl-queue] Unexpected error for {p.name}: {e}")
+                log(f"{tag} Unexpected error for {p.name}: {e}")
             finally:
-                state.current_processing_name = None
-                state.current_processing_started_ts = None
+                state.active_jobs.pop(worker_id, None)
+                if state.current_processing_name == p.name:
+                    state.current_processing_name = None
+                    state.current_processing_started_ts = None
                 state.stl_job_queue.task_done()
                 # [fix] state.jobs 무한 증가 방지: 최근 200개만 유지
                 try:
@@ -906,10 +1349,11 @@ async def stl_queue_worker() -> None:
                 except Exception:
                     pass
         except asyncio.CancelledError:
-            log("[stl-queue] Worker cancelled")
+            state.active_jobs.pop(worker_id, None)
+            log(f"{tag} Worker cancelled")
             break
         except Exception as e:
-            log(f"[stl-queue] Worker loop error: {e}")
+            log(f"{tag} Worker loop error: {e}")
             # 루프 자체 예외 시 잠시 쉬고 계속
             try:
                 await asyncio.sleep(1.0)
@@ -917,16 +1361,77 @@ async def stl_queue_worker() -> None:
                 pass
 
 
-def enqueue_stl_job(p: Path, force: bool = False, request_id: str | None = None) -> str:
+def _offer_stl_job(item: dict) -> str:
+    """메인 루프 스레드에서 실행: 인덱스로 중복 확인 후 적재하거나 기존 대기 항목에 합친다."""
+    p: Path = item["path"]
+    result = state.stl_job_queue.offer(item)
+    if result == "queued_already":
+        log(f"[stl-queue] Skip enqueue (already queued): {p.name}")
+        return result
+    queued = state.stl_job_queue.find(p.name) or item
+    job_store.upsert(
+        p.name,
+        "queued",
+        request_id=queued.get("requestId"),
+        force=bool(queued.get("force")),
+        priority=queued.get("priority"),
+    )
+    state.last_enqueue_ts = time.time()
+    if result == "upgraded":
+        log(
+            f"[stl-queue] Upgraded queued job: {p.name} force={queued.get('force')} "
+            f"priority={queued.get('priority')}"
+        )
+    else:
+        log(
+            f"[stl-queue] Enqueued: {p.name} priority={item['priority']} "
+            f"tenant={item.get('tenant') or '-'} (queue size after: {state.stl_job_queue.qsize()})"
+        )
+    _request_prefetch()
+    return result
+
+
+def _request_prefetch() -> None:
+    """같은 루프 턴 안의 연속 적재(일괄 접수)는 프리페치 스케줄을 한 번만 돈다."""
+    global _prefetch_requested
+    if _prefetch_requested:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _prefetch_requested = True
+
+    def _run() -> None:
+        global _prefetch_requested
+        _prefetch_requested = False
+        schedule_prefetch()
+
+    loop.call_soon(_run)
+
+
+_prefetch_requested = False
+
+
+def enqueue_stl_job(
+    p: Path,
+    force: bool = False,
+    request_id: str | None = None,
+    priority: str = job_queue.DEFAULT_PRIORITY,
+    tenant: str | None = None,
+) -> str:
     """
-    STL 처리 작업을 FIFO 큐에 추가한다. Thread-safe.
-    - 이미 in_flight(처리 중)인 파일이면 'in_flight' 반환
+    STL 처리 작업을 큐에 추가한다. Thread-safe.
+    - 이미 in_flight(처리 중)인 파일이면 'in_flight' 반환 (force면 처리 후 다시 돌도록 큐에 넣는다)
     - 이미 큐에 대기 중인 파일이면 'queued_already' 반환
+    - 대기 중인 항목에 force/더 높은 priority를 합쳤으면 'upgraded' 반환 (중복 항목은 만들지 않는다)
     - 성공적으로 큐에 추가되면 'enqueued' 반환
 
-    asyncio.Queue는 thread-safe하지 않으므로, 메인 이벤트 루프에 등록해야 한다.
-    asyncio 루프 안에서 호출되면 put_nowait 직접 사용, 루프 밖(별도 스레드)이면
-    main_loop.call_soon_threadsafe를 사용한다.
+    priority: interactive | normal | backfill, tenant: fair-share 단위(요청자/치과/접수 경로).
+
+    큐 조작(중복 확인 + 적재)은 항상 메인 이벤트 루프 스레드에서 한 번에 한다.
+    다른 스레드(복구 스레드는 자체 이벤트 루프를 돌린다)에서 호출되면
+    main_loop.call_soon_threadsafe로 넘기고 결과를 기다린다.
     """
     if not force:
         with state.in_flight_lock:
@@ -934,38 +1439,31 @@ def enqueue_stl_job(p: Path, force: bool = False, request_id: str | None = None)
                 log(f"[stl-queue] Skip enqueue (in_flight): {p.name}")
                 return "in_flight"
 
-    # 이미 큐에 대기 중인지 확인 (force=False 시)
-    if not force:
-        try:
-            queued_names = {
-                item["path"].name for item in list(state.stl_job_queue._queue)
-            }
-            if p.name in queued_names:
-                log(f"[stl-queue] Skip enqueue (already queued): {p.name}")
-                return "queued_already"
-        except Exception:
-            pass
+    item = {
+        "path": p,
+        "force": force,
+        "requestId": request_id,
+        "priority": job_queue.normalize_priority(priority),
+        "tenant": tenant,
+        "enqueuedTs": time.time(),
+    }
 
-    item = {"path": p, "force": force, "requestId": request_id}
-    state.last_enqueue_ts = time.time()
-    log(
-        f"[stl-queue] Enqueued: {p.name} (queue size after: {state.stl_job_queue.qsize() + 1})"
-    )
-
-    # 현재 실행 중인 이벤트 루프가 있으면 직접 put_nowait,
-    # 별도 스레드(recovery thread)에서 호출 시 main_loop.call_soon_threadsafe 사용
+    main_loop = state.main_loop
     try:
-        import asyncio as _asyncio
-
-        running_loop = _asyncio.get_running_loop()
-        # 같은 루프 안: 직접 put_nowait
-        state.stl_job_queue.put_nowait(item)
+        running_loop = asyncio.get_running_loop()
     except RuntimeError:
-        # 이벤트 루프 밖(별도 스레드): thread-safe하게 추가
-        if state.main_loop and state.main_loop.is_running():
-            state.main_loop.call_soon_threadsafe(state.stl_job_queue.put_nowait, item)
-        else:
-            # fallback: 직접 put (main_loop 아직 미설정 시)
-            state.stl_job_queue.put_nowait(item)
+        running_loop = None
+    if main_loop is None or running_loop is main_loop or not main_loop.is_running():
+        # 메인 루프 안이거나 아직 루프가 없다(기동 전): 직접 처리
+        return _offer_stl_job(item)
+
+    done: concurrent.futures.Future = concurrent.futures.Future()
+
+    def _offer_on_main_loop() -> None:
+        try:
+            done.set_result(_offer_stl_job(item))
+        except Exception as e:
+            done.set_exception(e)
 
-    return "enqueued"
+    main_loop.call_soon_threadsafe(_offer_on_main_loop)
+    return done.result(timeout=30.0)
@@ -0,0 +1,311 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/core/rhino_runner.py
+# - bg/pc1/rhino-server/compute/core/processing.py
+"""Rhino 처리 결과 캐시 (content-addressed, 디스크, LRU).
+
+키 = sha256(입력 STL 바이트) + 커넥션 목표 직경 + 임플란트 프로파일 + scripts/*.py 버전 해시
+     + 엔진/간격 플래그(settings.RHINO_RESULT_ENV_KEYS).
+값 = filled STL + metadata(job-callback의 구조화 결과, 없으면 로그 결과 마커를 파싱한 값)와
+     로그의 결과 마커(DIAMETER_RESULT / FINISHLINE_RESULT / HEX_ROTATION_RESULT) 줄.
+
+같은 STL이 force/백엔드 재시도/store-fillhole로 다시 들어오면 Rhino를 돌리지 않고
+캐시된 결과를 output 경로로 복사한다. 스크립트가 바뀌면 버전 해시가 달라져 자동으로 miss 난다.
+"""
+import base64
+import hashlib
+import json
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from . import settings, state
+from .logger import log
+
+CACHE_FORMAT_VERSION = 1
+RESULT_MARKERS = ("DIAMETER_RESULT:", "FINISHLINE_RESULT:", "HEX_ROTATION_RESULT:")
+
+_lock = threading.Lock()
+# key -> {"size": bytes, "lastUsedTs": epoch}. 첫 사용 시 디스크에서 로드한다.
+_index: dict | None = None
+_script_hash_cache: dict = {"signature": None, "hash": None}
+
+
+def parse_metadata_from_log(text: str) -> dict:
+    """Rhino 로그의 결과 마커를 metadata dict로 파싱한다.
+
+    job-callback에 metadata가 없을 때(구버전 스크립트)와 metadata 없이 저장된 캐시 항목용 폴백.
+    """
+    if not text:
+        return {}
+
+    meta: dict = {}
+    m = re.search(r"DIAMETER_RESULT:max=([\d.]+) conn=([\d.]+)", text)
+    if m:
+        try:
+            meta["diameter"] = {
+                "max": float(m.group(1)),
+                "connection": float(m.group(2)),
+            }
+        except Exception:
+            pass
+    m2 = re.search(r"FINISHLINE_RESULT:([A-Za-z0-9+/=]+)", text)
+    if m2:
+        try:
+            raw = base64.b64decode(m2.group(1)).decode("utf-8", errors="ignore")
+            data = json.loads(raw)
+            if isinstance(data, dict):
+                meta["finishLine"] = data
+        except Exception:
+            pass
+
+    m3 = re.search(r"HEX_ROTATION_RESULT:([A-Za-z0-9+/=]+)", text)
+    if m3:
+        try:
+            raw = base64.b64decode(m3.group(1)).decode("utf-8", errors="ignore")
+            data = json.loads(raw)
+            if isinstance(data, dict):
+                meta["hexRotation"] = data
+        except Exception:
+            pass
+    return meta
+
+
+def _result_lines(log_text: str) -> list[str]:
+    out = []
+    for ln in (log_text or "").split("\n"):
+        for marker in RESULT_MARKERS:
+            idx = ln.find(marker)
+            if idx >= 0:
+                out.append(ln[idx:].strip())
+                break
+    return out
+
+
+def script_version_hash() -> str:
+    """scripts/*.py 내용 해시. (이름, mtime, 크기) 서명이 같으면 다시 읽지 않는다."""
+    files = sorted(settings.SCRIPT_DIR.glob("*.py"))
+    signature = []
+    for f in files:
+        try:
+            st = f.stat()
+            signature.append((f.name, st.st_mtime_ns, st.st_size))
+        except Exception:
+            pass
+    signature = tuple(signature)
+    with _lock:
+        if _script_hash_cache["signature"] == signature and _script_hash_cache["hash"]:
+            return _script_hash_cache["hash"]
+
+    h = hashlib.sha256()
+    for f in files:
+        try:
+            h.update(f.name.encode("utf-8"))
+            h.update(b"\0")
+            h.update(f.read_bytes())
+            h.update(b"\0")
+        except Exception:
+            pass
+    digest = h.hexdigest()
+    with _lock:
+        _script_hash_cache["signature"] = signature
+        _script_hash_cache["hash"] = digest
+    return digest
+
+
+def compute_cache_key(
+    input_stl: Path,
+    *,
+    connection_target_diameter: float | None = None,
+    implant_manufacturer: str | None = None,
+    implant_brand: str | None = None,
+    implant_family: str | None = None,
+    implant_type: str | None = None,
+) -> str | None:
+    try:
+        h = hashlib.sha256()
+        with open(input_stl, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        params = {
+            "v": CACHE_FORMAT_VERSION,
+            "input": h.hexdigest(),
+            "diameter": (
+                round(float(connection_target_diameter), 4)
+                if connection_target_diameter is not None
+                else None
+            ),
+            "implant": [
+                str(implant_manufacturer or "").strip(),
+                str(implant_brand or "").strip(),
+                str(implant_family or "").strip(),
+                str(implant_type or "").strip(),
+            ],
+            "scripts": script_version_hash(),
+            "env": settings.rhino_result_env(),
+        }
+        return hashlib.sha256(
+            json.dumps(params, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+    except Exception as e:
+        log(f"[result-cache] key failed ({input_stl}): {e}")
+        return None
+
+
+def _entry_dir(key: str) -> Path:
+    return settings.RESULT_CACHE_DIR / key[:2] / key
+
+
+def _load_index() -> dict:
+    """_lock을 잡은 상태에서 호출한다."""
+    global _index
+    if _index is not None:
+        return _index
+    _index = {}
+    root = settings.RESULT_CACHE_DIR
+    try:
+        for meta_path in root.glob("*/*/meta.json"):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                stl = meta_path.parent / "filled.stl"
+                _index[meta_path.parent.name] = {
+                    "size": stl.stat().st_size,
+                    "lastUsedTs": float(meta.get("lastUsedTs") or 0.0),
+                }
+            except Exception:
+                shutil.rmtree(meta_path.parent, ignore_errors=True)
+    except Exception:
+        pass
+    return _index
+
+
+def _evict_locked() -> None:
+    index = _load_index()
+    max_bytes = settings.RESULT_CACHE_MAX_BYTES
+    total = sum(e["size"] for e in index.values())
+    if total <= max_bytes:
+        return
+    for key, entry in sorted(index.items(), key=lambda kv: kv[1]["lastUsedTs"]):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(_entry_dir(key), ignore_errors=True)
+        total -= entry["size"]
+        index.pop(key, None)
+        state.result_cache_evictions += 1
+
+
+def lookup(key: str | None, output_stl: Path) -> tuple[str, dict] | None:
+    """캐시 hit이면 filled STL을 output_stl로 복사하고 (log_text, output_info)를 반환한다.
+
+    output_info["metadata"]는 저장 시점의 구조화 결과다.
+    """
+    if not key or not settings.RESULT_CACHE_ENABLED:
+        return None
+    with _lock:
+        index = _load_index()
+        if key not in index:
+            state.result_cache_misses += 1
+            return None
+        entry_dir = _entry_dir(key)
+        try:
+            meta_path = entry_dir / "meta.json"
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            output_stl.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(entry_dir / "filled.stl", output_stl)
+            now = time.time()
+            meta["lastUsedTs"] = now
+            meta["hits"] = int(meta.get("hits") or 0) + 1
+            meta_path.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            index[key]["lastUsedTs"] = now
+        except Exception as e:
+            log(f"[result-cache] broken entry {key[:12]}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            index.pop(key, None)
+            state.result_cache_misses += 1
+            return None
+        state.result_cache_hits += 1
+
+    log_text = "\n".join(
+        [f"[result-cache] hit key={key[:12]} createdAt={meta.get('createdAt')}"]
+        + list(meta.get("resultLines") or [])
+    )
+    size = output_stl.stat().st_size
+    metadata = meta.get("metadata")
+    if not isinstance(metadata, dict):
+        metadata = parse_metadata_from_log(log_text)
+    return log_text, {
+        "path": str(output_stl),
+        "exists": True,
+        "size": size,
+        "cached": True,
+        "metadata": metadata,
+    }
+
+
+def store(
+    key: str | None, output_stl: Path, log_text: str, metadata: dict | None = None
+) -> None:
+    if not key or not settings.RESULT_CACHE_ENABLED:
+        return
+    try:
+        if not output_stl.exists() or output_stl.stat().st_size <= 0:
+            return
+    except Exception:
+        return
+
+    entry_dir = _entry_dir(key)
+    lines = _result_lines(log_text)
+    now = time.time()
+    meta = {
+        "key": key,
+        "createdAt": now,
+        "lastUsedTs": now,
+        "hits": 0,
+        "sourceName": output_stl.name,
+        "resultLines": lines,
+        "metadata": (
+            metadata if isinstance(metadata, dict) else parse_metadata_from_log("\n".join(lines))
+        ),
+    }
+    with _lock:
+        index = _load_index()
+        try:
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            tmp_stl = entry_dir / "filled.stl.tmp"
+            shutil.copyfile(output_stl, tmp_stl)
+            tmp_stl.replace(entry_dir / "filled.stl")
+            (entry_dir / "meta.json").write_text(
+                json.dumps(meta, ensure_ascii=False), encoding="utf-8"
+            )
+            index[key] = {
+                "size": (entry_dir / "filled.stl").stat().st_size,
+                "lastUsedTs": now,
+            }
+            state.result_cache_stores += 1
+        except Exception as e:
+            log(f"[result-cache] store failed {key[:12]}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            index.pop(key, None)
+            return
+        _evict_locked()
+
+
+def cache_stats() -> dict:
+    with _lock:
+        index = _load_index() if settings.RESULT_CACHE_ENABLED else {}
+        total = sum(e["size"] for e in index.values())
+        entries = len(index)
+    lookups = state.result_cache_hits + state.result_cache_misses
+    return {
+        "enabled": settings.RESULT_CACHE_ENABLED,
+        "entries": entries,
+        "bytes": total,
+        "maxBytes": settings.RESULT_CACHE_MAX_BYTES,
+        "hits": state.result_cache_hits,
+        "misses": state.result_cache_misses,
+        "hitRate": round(state.result_cache_hits / lookups, 4) if lookups else None,
+        "stores": state.result_cache_stores,
+        "evictions": state.result_cache_evictions,
+    }
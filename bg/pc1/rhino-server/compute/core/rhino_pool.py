@@ -15,6 +15,14 @@ from . import state
 from .logger import log
 
 
+class RhinoPoolBusyError(RuntimeError):
+    """인스턴스는 발견됐지만 모두 임대/예약/cooldown 중이라 시간 내에 임대하지 못함.
+
+    이 경우 pipe 없이(--rhino 없이) 실행하면 다른 작업이 돌고 있는 인스턴스에 붙을 수 있으므로
+    호출자는 fallback하지 말고 실패/재시도로 처리해야 한다.
+    """
+
+
 def list_rhino_pipe_ids(rhinocode: str) -> list[str]:
     try:
         if not rhinocode or not os.path.exists(rhinocode):
@@ -93,9 +101,95 @@ def refresh_rhino_pool(rhinocode: str, force: bool = False) -> None:
             state.rhino_all.discard(pid)
             if pid in state.rhino_available:
                 state.rhino_available.remove(pid)
+            state.rhino_pipe_health.pop(pid, None)
+            state.rhino_runners.pop(pid, None)
             log(f"removed inactive pipeId={pid}")
 
 
+def _pipe_health(rid: str) -> dict:
+    """rhino_pool_lock을 잡은 상태에서 호출한다."""
+    h = state.rhino_pipe_health.get(rid)
+    if h is None:
+        h = {
+            "ok": 0,
+            "failed": 0,
+            "consecutiveFailures": 0,
+            "lastOkTs": None,
+            "lastFailureTs": None,
+            "lastError": None,
+            "lastPingTs": 0.0,
+            "cooldownUntil": 0.0,
+            "leasedBy": None,
+            "leasedTs": None,
+        }
+        state.rhino_pipe_health[rid] = h
+    return h
+
+
+def _is_pipe_cooling_down(rid: str, now: float) -> bool:
+    h = state.rhino_pipe_health.get(rid)
+    return bool(h) and float(h.get("cooldownUntil") or 0.0) > now
+
+
+def _is_pipe_runner_stuck(rid: str) -> bool:
+    """상주 러너가 끊긴(타임아웃/stall) 작업을 아직 실행 중이면 다시 poll할 때까지 임대하지 않는다."""
+    runner = state.rhino_runners.get(rid)
+    return bool(runner) and bool(runner.get("stuck"))
+
+
+def _pop_healthy_available(now: float) -> Optional[str]:
+    """cooldown/러너 stuck이 아닌 첫 pipeId를 꺼낸다. rhino_pool_lock을 잡은 상태에서 호출한다."""
+    for _ in range(len(state.rhino_available)):
+        pid = state.rhino_available.popleft()
+        if _is_pipe_cooling_down(pid, now) or _is_pipe_runner_stuck(pid):
+            state.rhino_available.append(pid)
+            continue
+        return pid
+    return None
+
+
+def record_rhino_result(rid: Optional[str], ok: bool, error=None) -> None:
+    """작업 결과로 pipe 헬스를 갱신한다.
+
+    - ok=True: Rhino가 callback을 보냈음(스크립트 자체 실패 포함) → 연속 실패 초기화
+    - ok=False: 타임아웃/callback 누락/프로세스 오류 → 연속 실패가 임계치를 넘으면 cooldown
+    """
+    if not rid:
+        return
+    now = time.time()
+    with state.rhino_pool_lock:
+        h = _pipe_health(rid)
+        if ok:
+            h["ok"] += 1
+            h["consecutiveFailures"] = 0
+            h["lastOkTs"] = now
+            h["cooldownUntil"] = 0.0
+            return
+        h["failed"] += 1
+        h["consecutiveFailures"] += 1
+        h["lastFailureTs"] = now
+        h["lastError"] = str(error or "")[:300] or None
+        if h["consecutiveFailures"] >= settings.RHINO_PIPE_MAX_FAILURES:
+            h["cooldownUntil"] = now + settings.RHINO_PIPE_COOLDOWN_SEC
+            log(
+                f"pipe cooldown: pipeId={rid} consecutiveFailures={h['consecutiveFailures']} "
+                f"cooldown={settings.RHINO_PIPE_COOLDOWN_SEC:.0f}s"
+            )
+
+
+def pipe_health_snapshot() -> dict:
+    now = time.time()
+    with state.rhino_pool_lock:
+        out = {}
+        for pid in sorted(state.rhino_all | set(state.rhino_pipe_health.keys())):
+            h = dict(state.rhino_pipe_health.get(pid) or {})
+            h["active"] = pid in state.rhino_all
+            h["available"] = pid in state.rhino_available
+            h["coolingDown"] = _is_pipe_cooling_down(pid, now)
+            out[pid] = h
+        return out
+
+
 def ensure_rhino_pool() -> None:
     rhinocode = settings.get_rhinocode_bin()
     if not rhinocode:
@@ -104,7 +198,19 @@ def ensure_rhino_pool() -> None:
 
 
 @asynccontextmanager
-async def acquire_rhino_id(timeout_sec: float = 60.0) -> Iterable[str]:
+async def acquire_rhino_id(
+    timeout_sec: float = 60.0,
+    busy_timeout_sec: Optional[float] = None,
+    owner: Optional[str] = None,
+    interactive: bool = False,
+) -> Iterable[str]:
+    """pipeId 하나를 배타적으로 임대한다.
+
+    - 발견된 인스턴스가 없으면 timeout_sec 후 RuntimeError
+    - 인스턴스는 있으나 모두 다른 워커에 임대 중이면 busy_timeout_sec까지 대기
+    - 연속 실패로 cooldown 중인 pipe는 건너뛴다
+    - interactive(사람이 기다리는 요청)가 대기 중이면 큐 워커는 그 수만큼 빈 pipe를 남겨 두고 양보한다
+    """
     # [fix] 이벤트 루프 블로킹 방지:
     # - subprocess.run(blocking) → run_in_executor로 스레드 풀 실행
     # - threading.Condition.wait(blocking) → await asyncio.sleep(non-blocking)
@@ -113,6 +219,7 @@ async def acquire_rhino_id(timeout_sec: float = 60.0) -> Iterable[str]:
     import asyncio as _asyncio
     loop = _asyncio.get_event_loop()
     rhinocode = settings.get_rhinocode_bin()
+    busy_limit = max(float(timeout_sec), float(busy_timeout_sec or timeout_sec))
 
     # 초기 pool 스캔을 executor에서 실행 (subprocess.run blocking 방지)
     await loop.run_in_executor(None, ensure_rhino_pool)
@@ -120,67 +227,104 @@ async def acquire_rhino_id(timeout_sec: float = 60.0) -> Iterable[str]:
     start = time.time()
     rid: Optional[str] = None
     last_rescan_ts = 0.0
-
-    while True:
-        # pool 상태를 빠르게 확인 (lock은 짧게만 잡음 - blocking wait 없음)
+    if interactive:
         with state.rhino_pool_cond:
-            if state.rhino_available:
-                rid = state.rhino_available.popleft()
+            state.rhino_interactive_waiters += 1
 
-        if rid is not None:
-            break
+    try:
+        while True:
+            # pool 상태를 빠르게 확인 (lock은 짧게만 잡음 - blocking wait 없음)
+            with state.rhino_pool_cond:
+                reserved = 0 if interactive else state.rhino_interactive_waiters
+                if len(state.rhino_available) > reserved:
+                    rid = _pop_healthy_available(time.time())
+                all_leased = bool(state.rhino_all) and len(state.rhino_available) <= reserved
 
-        if time.time() - start > timeout_sec:
-            raise RuntimeError(
-                "사용 가능한 Rhino 인스턴스가 없습니다. Rhino를 실행한 뒤 다시 시도하세요."
-            )
+            if rid is not None:
+                break
+
+            elapsed = time.time() - start
+            limit = busy_limit if all_leased else float(timeout_sec)
+            if elapsed > limit:
+                with state.rhino_pool_cond:
+                    has_instances = bool(state.rhino_all)
+                if has_instances:
+                    raise RhinoPoolBusyError(
+                        f"모든 Rhino 인스턴스가 사용 중입니다 (waited={elapsed:.1f}s)."
+                    )
+                raise RuntimeError(
+                    "사용 가능한 Rhino 인스턴스가 없습니다. Rhino를 실행한 뒤 다시 시도하세요."
+                )
 
-        # pool이 비었을 때 주기적으로 재스캔 (라이노 오래 실행 시 pipeId 변경 대응)
-        now_t = time.time()
-        if now_t - last_rescan_ts >= 2.0:
-            last_rescan_ts = now_t
-            # subprocess.run을 executor에서 실행해 이벤트 루프를 블로킹하지 않음
-            await loop.run_in_executor(None, refresh_rhino_pool, rhinocode)
+            # pool이 비었을 때 주기적으로 재스캔 (라이노 오래 실행 시 pipeId 변경 대응)
+            now_t = time.time()
+            if now_t - last_rescan_ts >= 2.0:
+                last_rescan_ts = now_t
+                # subprocess.run을 executor에서 실행해 이벤트 루프를 블로킹하지 않음
+                await loop.run_in_executor(None, refresh_rhino_pool, rhinocode)
 
-        # threading.Condition.wait 대신 asyncio.sleep 사용 (이벤트 루프 양보)
-        await _asyncio.sleep(0.5)
+            # threading.Condition.wait 대신 asyncio.sleep 사용 (이벤트 루프 양보)
+            await _asyncio.sleep(0.1 if interactive else 0.5)
+    finally:
+        if interactive:
+            with state.rhino_pool_cond:
+                state.rhino_interactive_waiters -= 1
 
     now = time.time()
-    should_ping = (now - state.last_ping_success_ts) > 30.0
+    with state.rhino_pool_lock:
+        last_ping_ts = float(_pipe_health(rid).get("lastPingTs") or 0.0)
+    should_ping = (now - last_ping_ts) > 30.0
 
     if should_ping:
         # subprocess.run을 executor에서 실행해 이벤트 루프를 블로킹하지 않음
         ping_ok = await loop.run_in_executor(None, ping_rhino_instance, rhinocode, rid)
         if ping_ok:
             state.last_ping_success_ts = now
+            with state.rhino_pool_lock:
+                _pipe_health(rid)["lastPingTs"] = now
         else:
             log(f"ping failed for pipeId={rid}, rescanning pool...")
             with state.rhino_pool_cond:
                 if rid in state.rhino_all:
                     state.rhino_all.discard(rid)
+                state.rhino_pipe_health.pop(rid, None)
                 state.rhino_pool_cond.notify_all()
             rid = None
             # ping 실패 후 즉시 강제 재스캔으로 새 pipeId 발견 (쿨다운 무시)
             await loop.run_in_executor(None, refresh_rhino_pool, rhinocode, True)
             # 재스캔 후 풀에 새로운 pipeId가 있으면 재시도 (Rhino 재시작 대응)
             with state.rhino_pool_cond:
-                if state.rhino_available:
-                    rid = state.rhino_available.popleft()
+                rid = _pop_healthy_available(time.time())
             if rid is not None:
                 log(f"acquire after rescan: pipeId={rid} (avail={len(state.rhino_available)}/{len(state.rhino_all)})")
 
     if rid is None:
+        with state.rhino_pool_cond:
+            has_instances = bool(state.rhino_all)
+        if has_instances:
+            raise RhinoPoolBusyError("Rhino 인스턴스 ping 실패 후 재스캔한 pipe가 모두 사용 중입니다.")
         raise RuntimeError("Rhino 인스턴스 ping 실패. Rhino를 재시작한 뒤 다시 시도하세요.")
 
+    with state.rhino_pool_lock:
+        h = _pipe_health(rid)
+        h["leasedBy"] = owner
+        h["leasedTs"] = time.time()
+
     log(
-        f"acquire: pipeId={rid} (avail={len(state.rhino_available)}/{len(state.rhino_all)})"
+        f"acquire: pipeId={rid} owner={owner or '-'} (avail={len(state.rhino_available)}/{len(state.rhino_all)})"
     )
 
     try:
         yield rid
     finally:
         with state.rhino_pool_cond:
-            state.rhino_available.append(rid)
+            h = state.rhino_pipe_health.get(rid)
+            if h is not None:
+                h["leasedBy"] = None
+                h["leasedTs"] = None
+            # ping 실패/재스캔으로 pool에서 빠진 pipe는 되돌리지 않는다
+            if rid in state.rhino_all and rid not in state.rhino_available:
+                state.rhino_available.append(rid)
             state.rhino_pool_cond.notify_all()
             log(
                 f"release: pipeId={rid} (avail={len(state.rhino_available)}/{len(state.rhino_all)})"
@@ -11,10 +11,99 @@ import traceback
 import uuid
 from pathlib import Path
 
-from . import settings, state
+from . import job_log, metrics, result_cache, runner_bridge, settings, state
 from .logger import log
-from .rhino_pool import acquire_rhino_id
-from .rhino_wrapper import write_wrapper_script
+from .rhino_pool import RhinoPoolBusyError, acquire_rhino_id, record_rhino_result
+from .rhino_wrapper import build_job_env, write_wrapper_script
+
+
+async def _pump_process(process, token: str) -> int:
+    """stdout/stderr를 줄 단위로 job_log에 흘려보내며 프로세스 종료를 기다린다."""
+    await asyncio.gather(
+        job_log.pump_stream(token, process.stdout, "stdout"),
+        job_log.pump_stream(token, process.stderr, "stderr"),
+    )
+    return await process.wait()
+
+
+async def _spawn_and_wait(
+    cmd_args: list[str], future: "asyncio.Future", timeout_sec: float, token: str
+) -> dict | None:
+    """rhinocode 프로세스를 띄우고 callback(future) 또는 프로세스 종료를 기다린다.
+
+    반환 전에 자식 프로세스/pending task를 항상 정리하므로,
+    호출자가 잡고 있는 pipe 임대는 이 함수가 끝난 뒤에 해제해도 안전하다.
+    job_log watchdog이 future에 예외를 넣으면 hard timeout 전에 프로세스를 끊는다.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd_args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=settings.dotnet_rollforward_env(),
+    )
+
+    process_task = asyncio.create_task(_pump_process(process, token))
+    done, pending = await asyncio.wait(
+        [future, process_task],
+        timeout=timeout_sec,
+        return_when=asyncio.FIRST_COMPLETED,
+    )
+
+    try:
+        if future.done():
+            return future.result()
+        if process_task.done():
+            try:
+                wait_sec = min(60.0, float(timeout_sec))
+                return await asyncio.wait_for(future, timeout=wait_sec)
+            except asyncio.TimeoutError:
+                rc = process_task.result()
+                raise RuntimeError(
+                    "RhinoCode 프로세스가 종료되었으나 결과(callback)를 받지 못했습니다.\n"
+                    + f"waited={wait_sec}s returncode={rc}\n"
+                    + f"output tail=\n{job_log.tail_text(state.job_log_tails.get(token))}"
+                )
+        try:
+            process.kill()
+        except Exception:
+            pass
+        await process.wait()
+        raise RuntimeError(f"Rhino 스크립트 실행 타임아웃 ({timeout_sec}s)")
+    finally:
+        # [fix] 서브프로세스 고아 누수 방지:
+        # callback이 먼저 와서 future가 set되면 process_task만 cancel하던 이전 코드는
+        # 실제 rhinocode 자식 프로세스를 죽이지 않아 시간이 지나며 파이프/FD/프로세스 leak.
+        # 하루 누적되면 RhinoCode/OS 자원이 포화되어 신규 작업이 먹통이 됨.
+        # 이제는 프로세스가 살아있다면 강제 종료 후 종료까지 대기(짧게)하고 task를 취소한다.
+        try:
+            if process.returncode is None:
+                try:
+                    process.kill()
+                except Exception:
+                    pass
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=5.0)
+                except asyncio.TimeoutError:
+                    log(
+                        f"process wait timeout after kill (pid={getattr(process, 'pid', None)})"
+                    )
+                except Exception:
+                    pass
+        except Exception:
+            pass
+        for p in pending:
+            try:
+                p.cancel()
+            except Exception:
+                pass
+        # cancel된 task가 정리될 때까지 잠깐 기다려 경고/예외가 로그로 새지 않게 함
+        for p in pending:
+            try:
+                await asyncio.wait_for(p, timeout=0.5)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                pass
+            except Exception:
+                pass
 
 
 async def run_rhino_python(
@@ -27,7 +116,36 @@ async def run_rhino_python(
     implant_family: str | None = None,
     implant_type: str | None = None,
     timeout_sec: float = settings.DEFAULT_TIMEOUT_SEC,
+    use_cache: bool = True,
+    interactive: bool = False,
 ) -> tuple[str, dict | None]:
+    """(Rhino 로그, output 정보)를 반환한다. output 정보의 metadata에 구조화 결과가 실린다.
+
+    로그는 RHINO_CALLBACK_LOG 정책에 따라 비어 있을 수 있다.
+    """
+    loop = asyncio.get_running_loop()
+
+    # 같은 입력/파라미터/스크립트 버전이면 Rhino를 돌리지 않고 캐시 결과를 쓴다
+    cache_key = None
+    if use_cache and settings.RESULT_CACHE_ENABLED:
+        cache_key = await loop.run_in_executor(
+            None,
+            lambda: result_cache.compute_cache_key(
+                input_stl,
+                connection_target_diameter=connection_target_diameter,
+                implant_manufacturer=implant_manufacturer,
+                implant_brand=implant_brand,
+                implant_family=implant_family,
+                implant_type=implant_type,
+            ),
+        )
+        cached = await loop.run_in_executor(
+            None, result_cache.lookup, cache_key, output_stl
+        )
+        if cached is not None:
+            log(f"done: result-cache hit input={input_stl.name} out={output_stl.name}")
+            return cached
+
     rhinocode = settings.get_rhinocode_bin()
     if not rhinocode:
         raise RuntimeError("rhinocode(Rhino.Code CLI)를 찾을 수 없습니다.")
@@ -46,12 +164,10 @@ async def run_rhino_python(
     else:
         log_path = settings.TMP_DIR / f"log_{token}.txt"
 
-    loop = asyncio.get_running_loop()
     future = loop.create_future()
     state.job_futures[token] = future
 
-    wrapper_path = write_wrapper_script(
-        token=token,
+    job_args = dict(
         input_stl=input_stl,
         output_stl=output_stl,
         log_path=log_path,
@@ -61,174 +177,161 @@ async def run_rhino_python(
         implant_family=implant_family,
         implant_type=implant_type,
     )
+    # 래퍼 스크립트는 subprocess 경로에서만 필요하므로 처음 필요할 때 한 번만 쓴다
+    wrapper_path: Path | None = None
 
-    try:
-        async with state.global_rhino_lock:
-            start_time = time.time()
-            rhino_id = None
-            process = None
-            process_task = None
-            done = set()
-            pending = set()
-
-            try:
-                async with acquire_rhino_id(timeout_sec=5.0) as rid:
-                    rhino_id = rid
+    def _wrapper() -> Path:
+        nonlocal wrapper_path
+        if wrapper_path is None:
+            wrapper_path = write_wrapper_script(token=token, **job_args)
+        return wrapper_path
 
-                    log(
-                        f"run: pipeId={rhino_id} input={input_stl.name} out={output_stl.name}"
-                    )
-                    state.last_rhino_subprocess_started_ts = time.time()
-
-                    process = await asyncio.create_subprocess_exec(
-                        rhinocode,
-                        "--rhino",
-                        str(rhino_id),
-                        "script",
-                        str(wrapper_path),
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        env=settings.dotnet_rollforward_env(),
-                    )
+    try:
+        start_time = time.time()
+        rhino_id = None
+        payload = None
+        leased = False
+        # 실행 중 로그 tail(job_log) entry. 실패 시 callback에 로그가 없으면 여기 남은 끝부분을 쓴다
+        live = None
 
-                    process_task = asyncio.create_task(process.communicate())
-                    done, pending = await asyncio.wait(
-                        [future, process_task],
-                        timeout=timeout_sec,
-                        return_when=asyncio.FIRST_COMPLETED,
-                    )
+        # pipe를 임대한 경로는 전역 락 없이 실행한다.
+        # (동시 실행 수는 processing_semaphore / 워커 수로 제한되고,
+        #  pipe 하나는 한 번에 한 워커에게만 임대된다)
+        acquire_started = time.time()
+        try:
+            async with acquire_rhino_id(
+                timeout_sec=5.0,
+                busy_timeout_sec=settings.RHINO_ACQUIRE_BUSY_TIMEOUT_SEC,
+                owner=input_stl.name,
+                interactive=interactive,
+            ) as rid:
+                leased = True
+                rhino_id = rid
+                leased_ts = time.time()
+                metrics.observe_phase("rhino_wait", leased_ts - acquire_started)
 
-            except Exception as e:
                 log(
-                    "no active Rhino instances found via RhinoCode list; running script without --rhino. "
-                    + f"reason={e}"
+                    f"run: pipeId={rhino_id} input={input_stl.name} out={output_stl.name}"
                 )
+                state.last_rhino_subprocess_started_ts = time.time()
 
-                process = await asyncio.create_subprocess_exec(
-                    rhinocode,
-                    "script",
-                    str(wrapper_path),
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    env=settings.dotnet_rollforward_env(),
-                )
+                try:
+                    async with job_log.track(token, input_stl.name, log_path, future) as live:
+                        if await runner_bridge.ensure_runner(rhinocode, rhino_id):
+                            log(f"run: pipeId={rhino_id} via persistent runner")
+                            payload = await runner_bridge.run_job_via_runner(
+                                rhino_id,
+                                {
+                                    "token": token,
+                                    "inputStl": str(input_stl),
+                                    "outputStl": str(output_stl),
+                                    "logPath": str(log_path),
+                                    "callbackUrl": settings.JOB_CALLBACK_URL,
+                                    "env": build_job_env(**job_args),
+                                },
+                                future,
+                                timeout_sec,
+                            )
+                        if payload is None:
+                            payload = await _spawn_and_wait(
+                                [rhinocode, "--rhino", str(rhino_id), "script", str(_wrapper())],
+                                future,
+                                timeout_sec,
+                                token,
+                            )
+                except Exception as run_err:
+                    record_rhino_result(rhino_id, False, run_err)
+                    raise
+                # callback이 왔다면 스크립트 성공 여부와 무관하게 pipe는 정상 응답한 것
+                record_rhino_result(rhino_id, payload is not None)
+                metrics.observe_phase("rhino_run", time.time() - leased_ts)
 
-                process_task = asyncio.create_task(process.communicate())
-                done, pending = await asyncio.wait(
-                    [future, process_task],
-                    timeout=timeout_sec,
-                    return_when=asyncio.FIRST_COMPLETED,
+        except Exception as e:
+            if leased:
+                raise
+            # pipe 없이 실행하는 fallback은 인스턴스를 하나도 발견하지 못했을 때만 쓴다.
+            # 인스턴스가 있는데 모두 임대/예약 중이면 --rhino 없는 실행이 다른 작업 중인
+            # 인스턴스에 붙을 수 있으므로(global_rhino_lock은 pipe 임대 워커를 막지 못함) 실패로 올린다.
+            with state.rhino_pool_cond:
+                has_instances = bool(state.rhino_all)
+            if isinstance(e, RhinoPoolBusyError) or has_instances:
+                raise
+            log(
+                "no active Rhino instances found via RhinoCode list; running script without --rhino. "
+                + f"reason={e}"
+            )
+            # pipe 없이 실행하면 어떤 인스턴스가 잡힐지 모르므로 전역 락으로 직렬화한다
+            async with state.global_rhino_lock:
+                state.last_rhino_subprocess_started_ts = time.time()
+                metrics.observe_phase(
+                    "rhino_wait", state.last_rhino_subprocess_started_ts - acquire_started
                 )
+                with metrics.phase_timer("rhino_run"):
+                    async with job_log.track(token, input_stl.name, log_path, future) as live:
+                        payload = await _spawn_and_wait(
+                            [rhinocode, "script", str(_wrapper())], future, timeout_sec, token
+                        )
 
-            if process_task is None:
-                raise RuntimeError("RhinoCode 프로세스를 시작하지 못했습니다.")
+        if not payload:
+            raise RuntimeError("Rhino 스크립트로부터 결과를 받지 못했습니다.")
 
-            try:
-                if future.done():
-                    payload = future.result()
-                elif process_task.done():
-                    try:
-                        wait_sec = min(60.0, float(timeout_sec))
-                        payload = await asyncio.wait_for(future, timeout=wait_sec)
-                    except asyncio.TimeoutError:
-                        stdout, stderr = process_task.result()
-                        rc = getattr(process, "returncode", None)
-                        out_text = (
-                            stdout.decode(errors="ignore").strip() if stdout else ""
-                        )
-                        err_text = (
-                            stderr.decode(errors="ignore").strip() if stderr else ""
-                        )
-                        raise RuntimeError(
-                            "RhinoCode 프로세스가 종료되었으나 결과(callback)를 받지 못했습니다.\n"
-                            + f"waited={wait_sec}s returncode={rc}\n"
-                            + f"stdout={out_text}\n"
-                            + f"stderr={err_text}"
-                        )
-                else:
-                    try:
-                        process.kill()
-                    except Exception:
-                        pass
-                    await process.wait()
-                    raise RuntimeError(f"Rhino 스크립트 실행 타임아웃 ({timeout_sec}s)")
-            finally:
-                # [fix] 서브프로세스 고아 누수 방지:
-                # callback이 먼저 와서 future가 set되면 process_task만 cancel하던 이전 코드는
-                # 실제 rhinocode 자식 프로세스를 죽이지 않아 시간이 지나며 파이프/FD/프로세스 leak.
-                # 하루 누적되면 RhinoCode/OS 자원이 포화되어 신규 작업이 먹통이 됨.
-                # 이제는 프로세스가 살아있다면 강제 종료 후 종료까지 대기(짧게)하고 task를 취소한다.
-                if process is not None:
-                    try:
-                        if process.returncode is None:
-                            try:
-                                process.kill()
-                            except Exception:
-                                pass
-                            try:
-                                await asyncio.wait_for(process.wait(), timeout=5.0)
-                            except asyncio.TimeoutError:
-                                log(
-                                    f"process wait timeout after kill (pid={getattr(process, 'pid', None)})"
-                                )
-                            except Exception:
-                                pass
-                    except Exception:
-                        pass
-                for p in pending:
-                    try:
-                        p.cancel()
-                    except Exception:
-                        pass
-                # cancel된 task가 정리될 때까지 잠깐 기다려 경고/예외가 로그로 새지 않게 함
-                for p in pending:
-                    try:
-                        await asyncio.wait_for(p, timeout=0.5)
-                    except (asyncio.CancelledError, asyncio.TimeoutError):
-                        pass
-                    except Exception:
-                        pass
-
-            if not payload:
-                raise RuntimeError("Rhino 스크립트로부터 결과를 받지 못했습니다.")
-
-            if not payload.get("ok"):
-                err_msg = str(payload.get("error") or "")
-                tb = str(payload.get("traceback") or "")
-                log_txt = str(payload.get("log") or "")
-
-                full_err = "Rhino 스크립트 실패\n"
-                if err_msg:
-                    full_err += f"error={err_msg}\n"
-                if tb:
-                    full_err += f"traceback=\n{tb}\n"
-                if log_txt:
-                    full_err += f"log=\n{log_txt}\n"
-                raise RuntimeError(full_err)
-
-            elapsed = time.time() - start_time
-            state.last_rhino_subprocess_done_ts = time.time()
-            if rhino_id:
-                log(f"done: pipeId={rhino_id} elapsed={elapsed:.2f}s")
-            else:
-                log(f"done: no-pipe elapsed={elapsed:.2f}s")
-
-            payload_log = str(payload.get("log") or "")
-            payload_output = payload.get("output")
-            file_log = ""
+        if not payload.get("ok"):
+            err_msg = str(payload.get("error") or "")
+            tb = str(payload.get("traceback") or "")
+            log_txt = str(payload.get("log") or "") or job_log.tail_text(live, 200)
+
+            full_err = "Rhino 스크립트 실패\n"
+            if err_msg:
+                full_err += f"error={err_msg}\n"
+            if tb:
+                full_err += f"traceback=\n{tb}\n"
+            if log_txt:
+                full_err += f"log=\n{log_txt}\n"
+            raise RuntimeError(full_err)
+
+        elapsed = time.time() - start_time
+        state.last_rhino_subprocess_done_ts = time.time()
+        if rhino_id:
+            log(f"done: pipeId={rhino_id} elapsed={elapsed:.2f}s")
+        else:
+            log(f"done: no-pipe elapsed={elapsed:.2f}s")
+
+        payload_log = str(payload.get("log") or "")
+        payload_output = payload.get("output")
+        # Rhino 스크립트 단계별 소요 시간(process_abutment_stl._perf_mark): 콜백 payload의 perf
+        metrics.observe_phases(payload.get("perf"), scope="rhino")
+        # 결과(diameter/finishLine/hexRotation)는 payload의 metadata로 온다.
+        # metadata가 없으면(reload 전 구버전 스크립트, job_result 실패) 로그 마커를 파싱해야 하므로
+        # 로그 파일을 읽는다. 성공한 작업의 빈 metadata({})도 없는 것으로 본다.
+        payload_metadata = payload.get("metadata")
+        if not isinstance(payload_metadata, dict) or not payload_metadata:
+            payload_metadata = None
+        need_file_log = payload_metadata is None or settings.RHINO_CALLBACK_LOG == "always"
+        if need_file_log and not payload_log:
+            # payload의 log는 Rhino가 같은 log_path를 읽은 것이므로 비어 있을 때만 직접 읽는다
             try:
                 if log_path.exists():
-                    file_log = log_path.read_text(encoding="utf-8", errors="ignore")
+                    payload_log = await asyncio.to_thread(
+                        log_path.read_text, encoding="utf-8", errors="ignore"
+                    )
             except Exception as e:
                 log(f"log file read failed ({log_path}): {e}")
 
-            if file_log:
-                if payload_log:
-                    payload_log = payload_log.rstrip() + "\n" + file_log
-                else:
-                    payload_log = file_log
+        if payload_metadata is not None:
+            payload_output = dict(payload_output) if isinstance(payload_output, dict) else {}
+            payload_output["metadata"] = payload_metadata
+
+        if cache_key:
+            await loop.run_in_executor(
+                None,
+                result_cache.store,
+                cache_key,
+                output_stl,
+                payload_log,
+                payload_metadata,
+            )
 
-            return payload_log, payload_output
+        return payload_log, payload_output
 
     except Exception as e:
         log(f"run exception: {e}\n{traceback.format_exc()}")
@@ -236,7 +339,7 @@ async def run_rhino_python(
     finally:
         state.job_futures.pop(token, None)
         try:
-            if wrapper_path.exists():
+            if wrapper_path is not None and wrapper_path.exists():
                 wrapper_path.unlink()
             if not env_log_path and log_path.exists():
                 log_path.unlink()
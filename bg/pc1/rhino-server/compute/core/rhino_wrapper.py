@@ -3,6 +3,7 @@
 # - bg/pc1/rhino-server/compute/scripts/process_abutment_stl.py
 # - bg/pc1/rhino-server/compute/scripts/align_stl_coordinate.py
 # - web/backend/controllers/bg/bg.controller.js
+import json
 from pathlib import Path
 from string import Template
 from typing import Union
@@ -17,6 +18,8 @@ def repr_path_for_template(path: Union[Path, str]) -> str:
 
 
 WRAPPER_TEMPLATE = Template(
+    "#! python3\n"
+    "# r: numpy\n"
     "import json\n"
     "import os\n"
     "import Rhino\n"
@@ -77,6 +80,17 @@ WRAPPER_TEMPLATE = Template(
     "  except Exception:\n"
     "    pass\n"
     "  return info\n"
+    "def _job_fields():\n"
+    "  try:\n"
+    "    r = process_abutment_stl.job_result()\n"
+    "    return {'perf': r.get('perf') or {}, 'metadata': r.get('metadata') or None}\n"
+    "  except Exception:\n"
+    "    return {'perf': {}, 'metadata': None}\n"
+    "def _callback_log(ok):\n"
+    "  mode = '${callback_log}'\n"
+    "  if mode == 'always' or (mode != 'never' and not ok):\n"
+    "    return _read_log(r\"${log_path}\")\n"
+    "  return ''\n"
     "def _send_result(data):\n"
     "  for i in range(3):\n"
     "    try:\n"
@@ -101,6 +115,8 @@ WRAPPER_TEMPLATE = Template(
     "os.environ['BACKEND_BASE'] = \"${backend_base}\"\n"
     "os.environ['RHINO_SHARED_SECRET'] = \"${rhino_shared_secret}\"\n"
     "os.environ['BRIDGE_SHARED_SECRET'] = \"${bridge_shared_secret}\"\n"
+    "os.environ['ABUTS_MODULE_RELOAD'] = '1'\n"
+    "os.environ.update(${result_env})\n"
     "import System.Diagnostics\n"
     "import sys\n"
     'sys.path.append(r"${script_dir}")\n'
@@ -110,13 +126,58 @@ WRAPPER_TEMPLATE = Template(
     "  print('JOB_PID=' + str(System.Diagnostics.Process.GetCurrentProcess().Id))\n"
     "  _cleanup_doc()\n"
     '  process_abutment_stl.main(input_path_arg=r"${input_stl}", output_path_arg=r"${output_stl}", log_path_arg=r"${log_path}")\n'
-    "  _send_result({'token': '${token}', 'ok': True, 'log': _read_log(r\"${log_path}\"), 'output': _build_output_info()})\n"
+    "  _send_result(dict({'token': '${token}', 'ok': True, 'log': _callback_log(True), 'output': _build_output_info()}, **_job_fields()))\n"
     "except Exception as e:\n"
-    "  _send_result({'token': '${token}', 'ok': False, 'error': str(e), 'traceback': traceback.format_exc(), 'log': _read_log(r\"${log_path}\"), 'output': _build_output_info()})\n"
+    "  _send_result(dict({'token': '${token}', 'ok': False, 'error': str(e), 'traceback': traceback.format_exc(), 'log': _callback_log(False), 'output': _build_output_info()}, **_job_fields()))\n"
     "  raise\n"
 )
 
 
+def _resolve_secrets() -> tuple[str, str]:
+    shared_secret = settings.os.getenv("RHINO_SHARED_SECRET", "").strip()
+    bridge_secret = settings.os.getenv("BRIDGE_SHARED_SECRET", "").strip()
+    if shared_secret and not bridge_secret:
+        bridge_secret = shared_secret
+    if bridge_secret and not shared_secret:
+        shared_secret = bridge_secret
+    return shared_secret, bridge_secret
+
+
+def build_job_env(
+    *,
+    input_stl: Path,
+    output_stl: Path,
+    log_path: Path,
+    connection_target_diameter: float | None = None,
+    implant_manufacturer: str | None = None,
+    implant_brand: str | None = None,
+    implant_family: str | None = None,
+    implant_type: str | None = None,
+) -> dict:
+    """래퍼 스크립트가 설정하는 것과 같은 환경 변수를 dict로 만든다(상주 러너 작업용)."""
+    shared_secret, bridge_secret = _resolve_secrets()
+    return {
+        "ABUTS_INPUT_STL": str(input_stl),
+        "ABUTS_OUTPUT_STL": str(output_stl),
+        "ABUTS_LOG_PATH": str(log_path),
+        "ABUTS_CONNECTION_TARGET_DIAMETER": (
+            str(connection_target_diameter)
+            if connection_target_diameter is not None
+            else ""
+        ),
+        "ABUTS_IMPLANT_MANUFACTURER": implant_manufacturer or "",
+        "ABUTS_IMPLANT_BRAND": implant_brand or "",
+        "ABUTS_IMPLANT_FAMILY": implant_family or "",
+        "ABUTS_IMPLANT_TYPE": implant_type or "",
+        "BACKEND_BASE": settings.os.getenv("BACKEND_BASE", "").strip(),
+        "RHINO_SHARED_SECRET": shared_secret,
+        "BRIDGE_SHARED_SECRET": bridge_secret,
+        "ABUTS_CALLBACK_LOG": settings.RHINO_CALLBACK_LOG,
+        # 결과 캐시 키에 들어간 엔진/간격 플래그를 Rhino 쪽에서도 같은 값으로 쓰게 한다
+        **settings.rhino_result_env(),
+    }
+
+
 def write_wrapper_script(
     *,
     token: str,
@@ -131,12 +192,7 @@ def write_wrapper_script(
 ) -> Path:
     settings.TMP_DIR.mkdir(parents=True, exist_ok=True)
     wrapper_path = settings.TMP_DIR / f"job_{token}.py"
-    shared_secret = settings.os.getenv("RHINO_SHARED_SECRET", "").strip()
-    bridge_secret = settings.os.getenv("BRIDGE_SHARED_SECRET", "").strip()
-    if shared_secret and not bridge_secret:
-        bridge_secret = shared_secret
-    if bridge_secret and not shared_secret:
-        shared_secret = bridge_secret
+    shared_secret, bridge_secret = _resolve_secrets()
     backend_base = settings.os.getenv("BACKEND_BASE", "").strip()
 
     wrapper_path.write_text(
@@ -158,6 +214,8 @@ def write_wrapper_script(
             rhino_shared_secret=repr_path_for_template(shared_secret),
             bridge_shared_secret=repr_path_for_template(bridge_secret),
             script_dir=repr_path_for_template(settings.SCRIPT_DIR),
+            callback_log=settings.RHINO_CALLBACK_LOG,
+            result_env=json.dumps(settings.rhino_result_env()),
             token=token,
         ),
         encoding="utf-8",
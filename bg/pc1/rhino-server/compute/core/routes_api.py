@@ -3,6 +3,7 @@
 # - bg/pc1/rhino-server/compute/scripts/process_abutment_stl.py
 # - bg/pc1/rhino-server/compute/scripts/align_stl_coordinate.py
 # - web/backend/controllers/bg/bg.controller.js
+import asyncio
 import base64
 import subprocess
 import uuid
@@ -15,9 +16,24 @@ from fastapi.responses import FileResponse, JSONResponse
 # NOTE: UploadFile/File 여전히 /api/rhino/fillhole/direct에서 사용 중
 from pydantic import BaseModel
 
-from . import settings, state
+from . import (
+    backend_client,
+    batch_ingest,
+    job_log,
+    job_queue,
+    job_store,
+    runner_bridge,
+    settings,
+    state,
+)
 from .logger import log
-from .processing import enqueue_stl_job, process_single_stl, upload_via_presign
+from .processing import (
+    enqueue_stl_job,
+    process_single_stl,
+    queue_position,
+    upload_via_presign,
+)
+from .result_cache import parse_metadata_from_log
 from .rhino_runner import run_rhino_python
 from .stl_metadata import calculate_and_register_metadata
 
@@ -29,6 +45,9 @@ class ProcessFileRequest(BaseModel):
     fileName: Optional[str] = None
     requestId: Optional[str] = None
     force: Optional[bool] = False
+    # interactive | normal | backfill (기본 normal), tenant: fair-share 단위(요청자/치과 id)
+    priority: Optional[str] = None
+    tenant: Optional[str] = None
 
 
 @router.post("/api/rhino/process-file")
@@ -47,10 +66,14 @@ async def process_file_api(req: ProcessFileRequest):
         # SSOT: 백엔드 DB + S3가 원본, 로컬 storage는 임시 캐시
         from .processing import download_original_to_input
 
-        downloaded = download_original_to_input(
-            {"filePath": name, "requestId": req.requestId}
+        job_store.upsert(
+            safe_name, "downloading", request_id=req.requestId, force=bool(req.force)
+        )
+        downloaded = await asyncio.to_thread(
+            download_original_to_input, {"filePath": name, "requestId": req.requestId}
         )
         if not downloaded or not p.exists():
+            job_store.mark(safe_name, "failed", "original not found")
             raise HTTPException(
                 status_code=404,
                 detail=f"File not found locally or on backend: {safe_name}",
@@ -60,17 +83,30 @@ async def process_file_api(req: ProcessFileRequest):
     # BackgroundTasks.add_task 는 사용하지 않는다: 여러 작업이 동시에 실행되어 Rhino pipe를 경쟁하는 문제가 발생함.
     force = bool(req.force or False)
     explicit_request_id = (req.requestId or "").strip() or None
-    result = enqueue_stl_job(p, force, request_id=explicit_request_id)
+    result = enqueue_stl_job(
+        p,
+        force,
+        request_id=explicit_request_id,
+        priority=job_queue.normalize_priority(req.priority),
+        tenant=(req.tenant or "").strip() or "api",
+    )
     queue_size = state.stl_job_queue.qsize()
 
     if result == "in_flight":
         return {"ok": True, "message": "Already processing", "status": "in_flight"}
-    if result == "queued_already":
+    # 꺼내질 순번과 최근 작업 소요 시간 기준 예상 대기(etaSec, 표본이 없으면 null)
+    position = queue_position(safe_name) or {}
+    if result in ("queued_already", "upgraded"):
         return {
             "ok": True,
-            "message": "Already queued",
-            "status": "queued_already",
+            "message": (
+                "Already queued"
+                if result == "queued_already"
+                else "Already queued (upgraded)"
+            ),
+            "status": result,
             "queueSize": queue_size,
+            **position,
         }
     return {
         "ok": True,
@@ -78,6 +114,71 @@ async def process_file_api(req: ProcessFileRequest):
         "status": "enqueued",
         "filePath": safe_name,
         "queueSize": queue_size,
+        **position,
+    }
+
+
+class ProcessBatchItem(BaseModel):
+    filePath: Optional[str] = None
+    fileName: Optional[str] = None
+    requestId: Optional[str] = None
+    force: Optional[bool] = False
+    priority: Optional[str] = None
+    tenant: Optional[str] = None
+
+
+class ProcessBatchRequest(BaseModel):
+    items: list[ProcessBatchItem] = []
+
+
+@router.post("/api/rhino/process-batch")
+async def process_batch_api(req: ProcessBatchRequest):
+    """여러 STL을 한 번에 큐에 넣는다. 항목별 접수 상태와 진행률 조회용 batchId를 반환한다.
+
+    중복 확인(in_flight/큐/outbox)은 한 번에, 원본 다운로드는 BATCH_DOWNLOAD_CONCURRENCY개씩 동시에 한다.
+    """
+    if not state.is_running:
+        raise HTTPException(status_code=503, detail="Service is stopped")
+    if not req.items:
+        raise HTTPException(status_code=400, detail="items is required")
+    if len(req.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items: {len(req.items)} > {settings.BATCH_MAX_ITEMS}",
+        )
+    result = await batch_ingest.ingest_batch(
+        [item.model_dump() for item in req.items], source="api"
+    )
+    return {"ok": True, **result}
+
+
+@router.get("/api/rhino/process-batch/{batch_id}")
+async def process_batch_status(batch_id: str):
+    # outbox 대기 목록(디스크 스캔)을 읽으므로 스레드에서 실행한다
+    progress = await asyncio.to_thread(batch_ingest.batch_progress, batch_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail=f"Unknown batch: {batch_id}")
+    return {"ok": True, **progress}
+
+
+@router.get("/api/rhino/live-logs")
+async def live_logs():
+    """실행 중 Rhino 작업 목록과 마지막 로그 줄/무응답 시간."""
+    return {"ok": True, "jobs": job_log.snapshot()}
+
+
+@router.get("/api/rhino/live-logs/{key}")
+async def live_log_tail(key: str, lines: int = 200):
+    """실행 중 작업(token 또는 입력 파일명)의 최근 로그 줄(ring buffer 범위 안)."""
+    entry = job_log.find(key)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No running job: {key}")
+    return {
+        "ok": True,
+        "token": entry["token"],
+        "inputName": entry["inputName"],
+        "droppedLines": entry["droppedLines"],
+        "log": job_log.tail_text(entry, max(1, min(int(lines), 5000))),
     }
 
 
@@ -87,6 +188,20 @@ async def process_file_api(req: ProcessFileRequest):
 # rhino-server가 백엔드 /bg/original-file 를 통해 S3에서 직접 다운로드함.
 
 
+@router.post("/api/rhino/runner/reload")
+async def reload_runner_modules():
+    """상주 러너의 스크립트 모듈을 다시 로드한다(코드 배포 후 호출).
+
+    러너는 작업마다 reload하지 않으므로 scripts/*.py 변경은 이 명령으로만 반영된다.
+    """
+    generation = runner_bridge.request_hot_reload()
+    return {
+        "ok": True,
+        "generation": generation,
+        "runners": runner_bridge.runner_snapshot(),
+    }
+
+
 @router.post("/api/rhino/fillhole/direct")
 async def fillhole_direct(file: UploadFile = File(...)):
     settings.ensure_dirs()
@@ -104,21 +219,19 @@ async def fillhole_direct(file: UploadFile = File(...)):
     input_path.write_bytes(data)
 
     try:
-        log_text = await run_rhino_python(
+        log_text, output_info = await run_rhino_python(
             input_stl=input_path,
             output_stl=output_path,
             timeout_sec=settings.DEFAULT_TIMEOUT_SEC,
+            interactive=True,
         )
 
-        max_diameter = 0.0
-        conn_diameter = 0.0
-
-        import re
-
-        match = re.search(r"DIAMETER_RESULT:max=([\d.]+) conn=([\d.]+)", log_text)
-        if match:
-            max_diameter = float(match.group(1))
-            conn_diameter = float(match.group(2))
+        metadata = output_info.get("metadata") if isinstance(output_info, dict) else None
+        if not isinstance(metadata, dict):
+            metadata = parse_metadata_from_log(log_text)
+        diameter = metadata.get("diameter") or {}
+        max_diameter = float(diameter.get("max") or 0.0)
+        conn_diameter = float(diameter.get("connection") or 0.0)
 
         filled_base64 = ""
         if output_path.exists():
@@ -161,7 +274,9 @@ async def store_fillhole(req: StoreFillHoleRequest):
         from .processing import download_original_to_input
 
         req_id = req.requestId or settings.extract_request_id_from_name(safe_name)
-        download_original_to_input({"filePath": req.name, "requestId": req_id})
+        await asyncio.to_thread(
+            download_original_to_input, {"filePath": req.name, "requestId": req_id}
+        )
         if not input_path.exists() or not input_path.is_file():
             raise HTTPException(
                 status_code=404,
@@ -184,17 +299,14 @@ async def store_fillhole(req: StoreFillHoleRequest):
             f"[store/fillhole] connectionTargetDiameter from request: {connection_target_diameter:.4f}mm"
         )
     elif req.requestId:
-        from .processing import (
-            fetch_connection_target_diameter,
-            fetch_request_meta_case_infos,
-        )
-
-        connection_target_diameter = fetch_connection_target_diameter(req.requestId)
-        case_infos = fetch_request_meta_case_infos(req.requestId)
-        implant_manufacturer = str(case_infos.get("implantManufacturer") or "").strip()
-        implant_brand = str(case_infos.get("implantBrand") or "").strip()
-        implant_family = str(case_infos.get("implantFamily") or "").strip()
-        implant_type = str(case_infos.get("implantType") or "").strip()
+        from .processing import resolve_request_meta
+
+        request_meta = await asyncio.to_thread(resolve_request_meta, req.requestId)
+        connection_target_diameter = request_meta["connectionTargetDiameter"]
+        implant_manufacturer = request_meta["implant"]["manufacturer"]
+        implant_brand = request_meta["implant"]["brand"]
+        implant_family = request_meta["implant"]["family"]
+        implant_type = request_meta["implant"]["type"]
         if connection_target_diameter is not None:
             log(
                 f"[store/fillhole] connectionTargetDiameter from backend: {connection_target_diameter:.4f}mm (requestId={req.requestId})"
@@ -218,6 +330,8 @@ async def store_fillhole(req: StoreFillHoleRequest):
             implant_family=implant_family,
             implant_type=implant_type,
             timeout_sec=settings.DEFAULT_TIMEOUT_SEC,
+            # 화면에서 기다리는 요청: 큐 워커보다 먼저 빈 pipe를 받는다
+            interactive=True,
         )
     except subprocess.TimeoutExpired:
         raise HTTPException(status_code=408, detail="Rhino 실행 타임아웃")
@@ -250,29 +364,21 @@ async def recalculate_metadata(
     try:
         import os
 
-        import requests
-
         # 백엔드에서 원본 STL 파일 경로 및 finish line 조회
         backend_url = os.getenv("BACKEND_BASE", "https://abuts.fit/api").rstrip("/")
 
         # Request 메타 정보 조회
         meta_url = f"{backend_url}/bg/request-meta"
-        headers = {}
-        secret = os.getenv("RHINO_SHARED_SECRET") or os.getenv(
-            "BRIDGE_SHARED_SECRET", ""
-        )
-        if secret:
-            headers["X-Bridge-Secret"] = secret
 
         log(
             f"[recalculate-metadata] Fetching meta from: {meta_url}?requestId={req.requestId}"
         )
 
-        meta_resp = requests.get(
-            meta_url,
+        meta_resp = await backend_client.arequest(
+            "GET",
+            "/bg/request-meta",
+            url=meta_url,
             params={"requestId": req.requestId},
-            headers=headers,
-            timeout=10,
         )
 
         log(f"[recalculate-metadata] Response status: {meta_resp.status_code}")
@@ -308,6 +414,10 @@ async def recalculate_metadata(
         )
 
         case_infos = meta_data.get("caseInfos") or {}
+        # 방금 받은 caseInfos로 request-meta 캐시를 갱신해 아래 직경 조회가 HTTP를 다시 타지 않게 한다
+        from .processing import prime_request_meta
+
+        prime_request_meta(req.requestId, case_infos)
         log(
             f"[recalculate-metadata] caseInfos keys: {list(case_infos.keys()) if isinstance(case_infos, dict) else 'Not a dict'}"
         )
@@ -347,8 +457,9 @@ async def recalculate_metadata(
             if not stl_path.exists():
                 from .processing import download_original_to_input
 
-                download_original_to_input(
-                    {"filePath": file_path, "requestId": req.requestId}
+                await asyncio.to_thread(
+                    download_original_to_input,
+                    {"filePath": file_path, "requestId": req.requestId},
                 )
             if not stl_path.exists():
                 raise HTTPException(
@@ -362,11 +473,11 @@ async def recalculate_metadata(
             connection_target_diameter = req.connectionTargetDiameter
             if connection_target_diameter is None or connection_target_diameter <= 0:
                 try:
-                    from .processing import fetch_connection_target_diameter
+                    from .processing import resolve_request_meta
 
-                    connection_target_diameter = fetch_connection_target_diameter(
-                        req.requestId
-                    )
+                    connection_target_diameter = resolve_request_meta(req.requestId)[
+                        "connectionTargetDiameter"
+                    ]
                 except Exception as diameter_err:
                     log(
                         f"[recalculate-metadata] Failed to resolve connection target diameter: {diameter_err}"
@@ -3,12 +3,23 @@
 # - bg/pc1/rhino-server/compute/scripts/process_abutment_stl.py
 # - bg/pc1/rhino-server/compute/scripts/align_stl_coordinate.py
 # - web/backend/controllers/bg/bg.controller.js
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse, Response
 from pathlib import Path
 
+from . import backend_client
+from . import job_log
+from . import job_store
+from . import metrics
+from . import result_cache
 from . import settings
 from . import state
+from . import upload_outbox
+from .processing import pipeline_snapshot, request_meta_cache_stats
+from .rhino_pool import pipe_health_snapshot
+from .runner_bridge import runner_snapshot
 
 
 router = APIRouter()
@@ -56,6 +67,9 @@ async def health_diag():
         qsize = state.stl_job_queue.qsize()
     except Exception:
         qsize = -1
+    # outbox 디렉토리 스캔 / 결과 캐시 인덱스 읽기는 디스크 I/O이므로 이벤트 루프 밖에서 실행한다
+    outbox_stats = await asyncio.to_thread(upload_outbox.outbox_stats)
+    result_cache_stats = await asyncio.to_thread(result_cache.cache_stats)
 
     return {
         "ok": True,
@@ -69,12 +83,33 @@ async def health_diag():
             "ok": state.total_jobs_processed,
             "failed": state.total_jobs_failed,
             "timeout": state.total_jobs_timeout,
+            "stalled": state.total_jobs_stalled,
         },
         "openFutures": len(state.job_futures),
         "current": {
             "name": state.current_processing_name,
             "durationSec": age(state.current_processing_started_ts),
         },
+        "concurrency": settings.MAX_RHINO_CONCURRENCY,
+        "active": [
+            {
+                "workerId": wid,
+                "name": job.get("name"),
+                "durationSec": age(job.get("startedTs")),
+            }
+            for wid, job in sorted(dict(state.active_jobs).items())
+        ],
+        "rhinoPipes": pipe_health_snapshot(),
+        "runners": runner_snapshot(),
+        "runnerReloadGeneration": state.runner_reload_generation,
+        "resultCache": result_cache_stats,
+        "backendHttp": backend_client.latency_snapshot(),
+        "requestMetaCache": request_meta_cache_stats(),
+        "pipeline": pipeline_snapshot(),
+        "uploadOutbox": outbox_stats,
+        "jobStore": job_store.stats(),
+        "phases": metrics.phase_snapshot(),
+        "liveJobs": job_log.snapshot(),
         "ageSec": {
             "lastEnqueue": age(state.last_enqueue_ts),
             "lastDequeue": age(state.last_dequeue_ts),
@@ -87,6 +122,15 @@ async def health_diag():
     }
 
 
+@router.get("/metrics")
+async def prometheus_metrics():
+    """단계별 소요 시간/백엔드 HTTP 지연 히스토그램 + 큐/처리 카운터(Prometheus text format)."""
+    return Response(
+        content=await asyncio.to_thread(metrics.render_prometheus),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @router.get("/")
 def root():
     return {
@@ -0,0 +1,291 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/scripts/init_instance.py
+# - bg/pc1/rhino-server/compute/core/rhino_runner.py
+"""상주 Rhino 러너(scripts/init_instance.py)와 rhino-server 사이의 작업 중계.
+
+- 러너는 pipe마다 한 번 설치되며 `/api/rhino/internal/runner/next`를 long-poll 한다.
+- pipe는 한 번에 한 작업에만 임대되므로 러너당 대기 작업 슬롯(pending)은 하나면 충분하다.
+- 결과는 기존 래퍼와 동일하게 job-callback(token)으로 돌아와 job_futures를 완료한다.
+- 모듈 reload는 작업마다 하지 않고 hot-reload 명령(generation 증가)으로만 수행한다.
+- 작업 payload에 공유 secret이 담기므로, 설치할 때마다 러너별 토큰을 만들어 bootstrap에 넣고
+  long-poll은 그 토큰(X-Runner-Token)이 맞을 때만 응답한다(loopback 제한과 별개).
+- 타임아웃/stall로 끊은 작업은 러너 스레드가 아직 실행 중일 수 있으므로, 러너가 다시 poll할 때까지
+  그 pipe를 stuck으로 표시해 임대하지 않는다(rhino_pool._pop_healthy_available).
+"""
+import asyncio
+import hmac
+import secrets
+import subprocess
+import time
+from string import Template
+
+from . import job_log, settings, state
+from .logger import log
+from .rhino_wrapper import repr_path_for_template
+
+
+RUNNER_BOOTSTRAP_TEMPLATE = Template(
+    "#! python3\n"
+    "# r: numpy\n"
+    "import os\n"
+    "import sys\n"
+    "os.environ['ABUTS_RUNNER_ID'] = \"${runner_id}\"\n"
+    "os.environ['ABUTS_RUNNER_SERVER'] = \"${server_base}\"\n"
+    "os.environ['ABUTS_RUNNER_POLL_SEC'] = \"${poll_sec}\"\n"
+    "os.environ['ABUTS_RUNNER_TOKEN'] = \"${runner_token}\"\n"
+    "os.environ['ABUTS_SCRIPT_DIR'] = r\"${script_dir}\"\n"
+    'if r"${script_dir}" not in sys.path:\n'
+    '  sys.path.append(r"${script_dir}")\n'
+    "import init_instance\n"
+    "init_instance.main()\n"
+)
+
+
+def runner_enabled() -> bool:
+    return bool(settings.RHINO_PERSISTENT_RUNNER)
+
+
+def _runner_entry(runner_id: str) -> dict:
+    entry = state.rhino_runners.get(runner_id)
+    if entry is None:
+        entry = {
+            "lastPollTs": 0.0,
+            "pid": None,
+            "generation": -1,
+            "pending": None,
+            "wakeup": asyncio.Event(),
+            "installAttemptTs": 0.0,
+            "busySince": None,
+            "stuck": False,
+            "token": None,
+            "jobs": 0,
+        }
+        state.rhino_runners[runner_id] = entry
+    return entry
+
+
+def is_runner_live(runner_id: str) -> bool:
+    """최근 poll/callback이 있었거나 지금 작업을 실행 중(busySince, stuck 아님)이면 살아 있는 것으로 본다."""
+    entry = state.rhino_runners.get(runner_id)
+    if not entry:
+        return False
+    if entry.get("stuck"):
+        return False
+    if entry.get("busySince"):
+        return True
+    return (time.time() - float(entry.get("lastPollTs") or 0.0)) <= (
+        settings.RHINO_RUNNER_POLL_SEC + 10.0
+    )
+
+
+def check_runner_token(runner_id: str, token: str | None) -> bool:
+    """long-poll 요청의 러너 토큰이 이 서버가 설치한 러너의 것인지."""
+    entry = state.rhino_runners.get(runner_id)
+    expected = entry.get("token") if entry else None
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(str(expected), str(token))
+
+
+def _install_runner_blocking(rhinocode: str, runner_id: str, runner_token: str) -> bool:
+    """rhinocode로 bootstrap 스크립트를 한 번 실행해 러너 스레드를 띄운다(blocking)."""
+    settings.TMP_DIR.mkdir(parents=True, exist_ok=True)
+    boot_path = settings.TMP_DIR / f"runner_boot_{runner_id}.py"
+    try:
+        boot_path.write_text(
+            RUNNER_BOOTSTRAP_TEMPLATE.substitute(
+                runner_id=repr_path_for_template(runner_id),
+                server_base=repr_path_for_template(settings.RHINO_RUNNER_SERVER_BASE),
+                poll_sec=str(settings.RHINO_RUNNER_POLL_SEC),
+                runner_token=runner_token,
+                script_dir=repr_path_for_template(settings.SCRIPT_DIR),
+            ),
+            encoding="utf-8",
+        )
+        proc = subprocess.run(
+            [rhinocode, "--rhino", str(runner_id), "script", str(boot_path)],
+            capture_output=True,
+            text=True,
+            timeout=60,
+            env=settings.dotnet_rollforward_env(),
+        )
+        if proc.returncode != 0:
+            log(
+                f"[runner] install failed: pipeId={runner_id} rc={proc.returncode} "
+                f"stderr={(proc.stderr or '').strip()[:300]}"
+            )
+            return False
+        return True
+    except Exception as e:
+        log(f"[runner] install error: pipeId={runner_id} {e}")
+        return False
+    finally:
+        try:
+            if boot_path.exists():
+                boot_path.unlink()
+        except Exception:
+            pass
+
+
+async def ensure_runner(rhinocode: str, runner_id: str) -> bool:
+    """임대한 pipe에 상주 러너가 살아 있으면 True. 없으면 한 번 설치를 시도한다.
+
+    설치 실패 후에는 RHINO_RUNNER_REINSTALL_SEC 동안 재시도하지 않는다(그동안은 subprocess 경로).
+    """
+    if not runner_enabled():
+        return False
+    if is_runner_live(runner_id):
+        return True
+
+    entry = _runner_entry(runner_id)
+    now = time.time()
+    if now - float(entry.get("installAttemptTs") or 0.0) < settings.RHINO_RUNNER_REINSTALL_SEC:
+        return False
+    entry["installAttemptTs"] = now
+    # 설치마다 새 토큰: 이미 떠 있던 러너 스레드도 bootstrap에서 새 토큰으로 갈아탄다
+    entry["token"] = secrets.token_urlsafe(32)
+
+    loop = asyncio.get_running_loop()
+    ok = await loop.run_in_executor(
+        None, _install_runner_blocking, rhinocode, runner_id, entry["token"]
+    )
+    if not ok:
+        return False
+
+    # bootstrap은 스레드만 띄우고 바로 끝나므로 첫 poll이 곧 들어온다
+    deadline = time.time() + 10.0
+    while time.time() < deadline:
+        if is_runner_live(runner_id):
+            log(f"[runner] installed: pipeId={runner_id} pid={entry.get('pid')}")
+            return True
+        await asyncio.sleep(0.2)
+    log(f"[runner] installed but no poll received: pipeId={runner_id}")
+    return False
+
+
+async def run_job_via_runner(
+    runner_id: str, job: dict, future: "asyncio.Future", timeout_sec: float
+) -> dict | None:
+    """러너에 작업을 넘기고 callback payload를 기다린다.
+
+    러너가 RHINO_RUNNER_PICKUP_TIMEOUT_SEC 안에 작업을 가져가지 않으면 None을 반환해
+    호출자가 subprocess 경로로 폴백하게 한다.
+    """
+    loop = asyncio.get_running_loop()
+    picked = loop.create_future()
+    entry = _runner_entry(runner_id)
+    entry["pending"] = dict(job, _picked=picked)
+    entry["wakeup"].set()
+
+    try:
+        await asyncio.wait_for(
+            asyncio.shield(picked), timeout=settings.RHINO_RUNNER_PICKUP_TIMEOUT_SEC
+        )
+    except asyncio.TimeoutError:
+        entry["pending"] = None
+        entry["lastPollTs"] = 0.0
+        log(f"[runner] job not picked up: pipeId={runner_id} token={job.get('token')}")
+        return None
+
+    try:
+        payload = await asyncio.wait_for(asyncio.shield(future), timeout=timeout_sec)
+        # callback이 왔다 = 러너가 살아 있다 (긴 작업 직후 다음 poll 전에 죽은 것으로 보지 않도록)
+        entry["lastPollTs"] = time.time()
+        return payload
+    except asyncio.TimeoutError:
+        # 러너가 작업 중 멈춘 것으로 보고, 다시 poll할 때까지 작업을 보내지 않는다
+        _mark_stuck(runner_id, entry)
+        raise RuntimeError(f"Rhino 스크립트 실행 타임아웃 ({timeout_sec}s, runner)")
+    except job_log.RhinoJobStalled:
+        # job_log watchdog이 멈춘 작업을 끊었다: 러너 스레드는 아직 그 작업 안에 있으므로 같이 취급한다
+        _mark_stuck(runner_id, entry)
+        raise
+    finally:
+        if not entry.get("stuck"):
+            entry["busySince"] = None
+        entry["jobs"] += 1
+
+
+def _mark_stuck(runner_id: str, entry: dict) -> None:
+    """러너가 끊긴 작업을 아직 실행 중: 다시 poll할 때까지 러너/pipe 모두 쓰지 않는다."""
+    entry["lastPollTs"] = 0.0
+    entry["stuck"] = True
+    log(f"[runner] pipeId={runner_id} held out of rotation until the runner polls again")
+
+
+async def next_runner_message(
+    runner_id: str, generation: int, pid: int | None, timeout_sec: float
+) -> dict:
+    """러너 long-poll 응답. job / reload / idle 중 하나를 돌려준다."""
+    entry = _runner_entry(runner_id)
+    entry["lastPollTs"] = time.time()
+    entry["pid"] = pid
+    if entry.get("stuck"):
+        # 끊겼던 작업이 끝나 러너가 돌아왔다: pipe를 다시 임대할 수 있다
+        entry["stuck"] = False
+        entry["busySince"] = None
+        log(f"[runner] pipeId={runner_id} polled again; back in rotation")
+    current = state.runner_reload_generation
+    # 새로 설치된 러너(-1)는 방금 import했으므로 현재 generation을 그대로 채택한다
+    if generation < 0:
+        generation = current
+    entry["generation"] = generation
+
+    deadline = time.time() + max(0.0, float(timeout_sec))
+    while True:
+        current = state.runner_reload_generation
+        if generation < current:
+            return {"type": "reload", "generation": current}
+
+        job = entry.get("pending")
+        if job is not None:
+            entry["pending"] = None
+            entry["busySince"] = time.time()
+            picked = job.pop("_picked", None)
+            if picked is not None and not picked.done():
+                picked.set_result(True)
+            return dict(job, type="job", generation=generation)
+
+        remain = deadline - time.time()
+        if remain <= 0:
+            return {"type": "idle", "generation": generation}
+
+        wakeup = entry["wakeup"]
+        wakeup.clear()
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=remain)
+        except asyncio.TimeoutError:
+            pass
+        entry["lastPollTs"] = time.time()
+
+
+def request_hot_reload() -> int:
+    """모든 러너에 모듈 reload를 요청한다. 러너는 다음 poll에서 reload 메시지를 받는다."""
+    state.runner_reload_generation += 1
+    for entry in state.rhino_runners.values():
+        try:
+            entry["wakeup"].set()
+        except Exception:
+            pass
+    log(f"[runner] hot-reload requested: generation={state.runner_reload_generation}")
+    return state.runner_reload_generation
+
+
+def runner_snapshot() -> dict:
+    now = time.time()
+    out = {}
+    for rid, entry in sorted(state.rhino_runners.items()):
+        busy_since = entry.get("busySince")
+        out[rid] = {
+            "live": is_runner_live(rid),
+            "pid": entry.get("pid"),
+            "generation": entry.get("generation"),
+            "lastPollAgeSec": (
+                round(now - entry["lastPollTs"], 2) if entry.get("lastPollTs") else None
+            ),
+            "busySec": round(now - busy_since, 2) if busy_since else None,
+            "stuck": bool(entry.get("stuck")),
+            "jobs": entry.get("jobs", 0),
+        }
+    return out
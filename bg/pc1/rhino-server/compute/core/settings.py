@@ -34,19 +34,153 @@ else:
 
 TMP_DIR = APP_ROOT / ".tmp"
 
+# Rhino 처리 결과 캐시(core/result_cache.py). storage TTL purge와 별개로 LRU 용량 제한만 적용한다.
+RESULT_CACHE_ENABLED = os.getenv("RHINO_RESULT_CACHE_ENABLED", "true").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+RESULT_CACHE_DIR = Path(
+    os.getenv("RHINO_RESULT_CACHE_DIR", "").strip() or (APP_ROOT / ".cache" / "results")
+)
+RESULT_CACHE_MAX_BYTES = int(
+    float(os.getenv("RHINO_RESULT_CACHE_MAX_MB", "2048")) * 1024 * 1024
+)
+
 DEFAULT_TIMEOUT_SEC = int(os.getenv("RHINO_TIMEOUT_SEC", "180"))
 OUTPUT_WAIT_TIMEOUT_SEC = float(os.getenv("ABUTS_OUTPUT_WAIT_SEC", "5"))
 OUTPUT_WAIT_POLL_SEC = float(os.getenv("ABUTS_OUTPUT_WAIT_POLL_SEC", "0.2"))
 DEFAULT_RHINOCODE_MAC = Path(
     "/Applications/Rhino 8.app/Contents/Resources/bin/rhinocode"
 )
-MAX_RHINO_CONCURRENCY = 1
+# 동시 처리 수 = STL 큐 워커 수. 워커마다 서로 다른 Rhino pipeId를 임대해 병렬 실행한다.
+# Rhino 인스턴스를 N개 띄운 PC에서는 N으로 설정 (기본 1: 단일 인스턴스 운영)
+MAX_RHINO_CONCURRENCY = max(1, int(os.getenv("RHINO_MAX_CONCURRENCY", "1")))
+# pipe 헬스: 연속 실패가 임계치를 넘으면 cooldown 동안 임대 대상에서 제외
+RHINO_PIPE_MAX_FAILURES = max(1, int(os.getenv("RHINO_PIPE_MAX_FAILURES", "3")))
+RHINO_PIPE_COOLDOWN_SEC = float(os.getenv("RHINO_PIPE_COOLDOWN_SEC", "60"))
+# 모든 pipe가 다른 워커에 임대 중일 때 기다리는 최대 시간(초)
+RHINO_ACQUIRE_BUSY_TIMEOUT_SEC = float(
+    os.getenv("RHINO_ACQUIRE_BUSY_TIMEOUT_SEC", "600")
+)
 RHINO_SERVER_PORT = int(os.getenv("RHINO_SERVER_PORT", "8000"))
 
 JOB_CALLBACK_URL = os.getenv(
     "RHINO_JOB_CALLBACK_URL",
     f"http://127.0.0.1:{RHINO_SERVER_PORT}/api/rhino/internal/job-callback",
 )
+# job-callback에 Rhino 로그 전문을 실을지: always | on_error | never.
+# 결과(diameter/finishLine/hexRotation)는 payload의 metadata 필드로 오므로 성공 시에는 로그가 필요 없다.
+RHINO_CALLBACK_LOG = os.getenv("RHINO_CALLBACK_LOG", "on_error").strip().lower()
+if RHINO_CALLBACK_LOG not in ("always", "on_error", "never"):
+    RHINO_CALLBACK_LOG = "on_error"
+# Rhino 스크립트가 실행 시 읽는, 결과를 바꾸는 엔진/간격 플래그.
+# rhino-server 환경에 설정된 값만 작업 env로 넘기고(rhino_wrapper.build_job_env) 결과 캐시 키에도 넣는다
+# (엔진을 바꿔 legacy 경로와 비교할 때 다른 엔진의 캐시 결과가 나오지 않도록).
+RHINO_RESULT_ENV_KEYS = (
+    "ABUTS_SECTION_ENGINE",
+    "ABUTS_HEX_ENGINE",
+    "ABUTS_DIAMETER_ENGINE",
+    "ABUTS_MESH_TOPOLOGY_ENGINE",
+    "FINISHLINE_EDGE_LOOPS_NUMPY",
+    "ABUTS_SECTION_PROFILE_STEP_MM",
+    "ABUTS_RADIAL_PROFILE_STEP_MM",
+    "ABUTS_UNWELD_ANGLES_DEG",
+    "ABUTS_FINISHLINE_MAX_STEP",
+    "ABUTS_FILL_TARGET_LIMIT",
+    "ABUTS_SCREWHOLE_MIN_LOOP_LENGTH",
+    "ABUTS_R_TOL",
+)
+# 실행 중 작업 로그 실시간 tail(core/job_log.py)
+# - 작업별 보관 바이트 상한(ring buffer), 로그 파일 poll 주기
+# - RHINO_LOG_FORWARD: 새 줄을 서버 로그/socket.io(rhino_log 이벤트)로 바로 내보낸다
+# - RHINO_STALL_TIMEOUT_SEC: 새 로그 줄이 이 시간 동안 없으면 hard timeout 전에 작업을 끊는다(0이면 끔, 기본 끔).
+#   FillMeshHoles/대형 boolean처럼 로그 없이 수 분 걸리는 RhinoCommon 호출이 있으므로 켤 때는 충분히 길게 둔다.
+RHINO_LOG_RING_BYTES = max(4096, int(os.getenv("RHINO_LOG_RING_KB", "256")) * 1024)
+RHINO_LOG_TAIL_POLL_SEC = max(0.05, float(os.getenv("RHINO_LOG_TAIL_POLL_SEC", "0.5")))
+RHINO_LOG_FORWARD = os.getenv("RHINO_LOG_FORWARD", "true").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+RHINO_STALL_TIMEOUT_SEC = max(0.0, float(os.getenv("RHINO_STALL_TIMEOUT_SEC", "0")))
+
+# 상주 러너(scripts/init_instance.py): pipe마다 한 번 설치해 long-poll로 작업을 받는다.
+# false면 기존처럼 작업마다 래퍼 스크립트를 쓰고 rhinocode 프로세스를 띄운다.
+RHINO_PERSISTENT_RUNNER = os.getenv("RHINO_PERSISTENT_RUNNER", "true").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+RHINO_RUNNER_SERVER_BASE = os.getenv(
+    "RHINO_RUNNER_SERVER_BASE", f"http://127.0.0.1:{RHINO_SERVER_PORT}"
+)
+# long-poll 1회 대기 시간 / 작업을 러너가 가져가기까지 기다리는 시간 / 설치 실패 후 재시도 간격
+RHINO_RUNNER_POLL_SEC = float(os.getenv("RHINO_RUNNER_POLL_SEC", "25"))
+RHINO_RUNNER_PICKUP_TIMEOUT_SEC = float(os.getenv("RHINO_RUNNER_PICKUP_TIMEOUT_SEC", "10"))
+RHINO_RUNNER_REINSTALL_SEC = float(os.getenv("RHINO_RUNNER_REINSTALL_SEC", "300"))
+
+# 백엔드 HTTP 클라이언트(core/backend_client.py): keep-alive 풀 크기 / 재시도 / 기본 타임아웃
+BACKEND_HTTP_POOL_SIZE = max(2, int(os.getenv("BACKEND_HTTP_POOL_SIZE", "16")))
+BACKEND_HTTP_MAX_RETRIES = max(0, int(os.getenv("BACKEND_HTTP_MAX_RETRIES", "2")))
+BACKEND_HTTP_BACKOFF_SEC = float(os.getenv("BACKEND_HTTP_BACKOFF_SEC", "0.5"))
+BACKEND_HTTP_TIMEOUT_SEC = float(os.getenv("BACKEND_HTTP_TIMEOUT_SEC", "10"))
+# 엔드포인트별 타임아웃(초). 파일 본문을 주고받는 호출만 길게 잡는다.
+BACKEND_HTTP_ENDPOINT_TIMEOUTS = {
+    "/bg/original-file": float(os.getenv("BACKEND_HTTP_ORIGINAL_FILE_TIMEOUT_SEC", "30")),
+    "s3:presigned-put": float(os.getenv("BACKEND_HTTP_PRESIGNED_PUT_TIMEOUT_SEC", "30")),
+}
+# /bg/request-meta 캐시(processing.resolve_request_meta): 한 작업 안의 반복 조회를 한 번으로 합친다
+REQUEST_META_TTL_SEC = float(os.getenv("REQUEST_META_TTL_SEC", "60"))
+REQUEST_META_CACHE_MAX_ENTRIES = max(16, int(os.getenv("REQUEST_META_CACHE_MAX_ENTRIES", "512")))
+# STL 파이프라인: 큐 앞쪽 K개를 미리 다운로드/메타 조회하고, Rhino 이후 메타데이터 계산·업로드는
+# 별도 업로드 워커가 처리한다. false면 기존처럼 Rhino 워커가 업로드까지 끝낸 뒤 다음 작업을 꺼낸다.
+STL_PREFETCH_DEPTH = max(0, int(os.getenv("STL_PREFETCH_DEPTH", "2")))
+STL_PIPELINE_ASYNC_UPLOAD = os.getenv("STL_PIPELINE_ASYNC_UPLOAD", "true").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+STL_UPLOAD_WORKERS = max(1, int(os.getenv("STL_UPLOAD_WORKERS", "2")))
+# 업로드 outbox(core/upload_outbox.py): 업로드 대기 출력을 디스크에 두고 재시작 후에도 재시도한다.
+UPLOAD_OUTBOX_DIR = Path(
+    os.getenv("UPLOAD_OUTBOX_DIR", "").strip() or (APP_ROOT / ".cache" / "outbox")
+)
+UPLOAD_CONCURRENCY = max(1, int(os.getenv("UPLOAD_CONCURRENCY", "2")))
+UPLOAD_MAX_ATTEMPTS = max(1, int(os.getenv("UPLOAD_MAX_ATTEMPTS", "6")))
+# n번째 실패 후 대기 = UPLOAD_RETRY_BASE_SEC * 2^(n-1) (±20% jitter, 최대 1시간)
+UPLOAD_RETRY_BASE_SEC = float(os.getenv("UPLOAD_RETRY_BASE_SEC", "30"))
+UPLOAD_OUTBOX_SCAN_SEC = float(os.getenv("UPLOAD_OUTBOX_SCAN_SEC", "15"))
+# 일괄 접수(/api/rhino/process-batch, 재시작 복구): 원본 다운로드 동시 실행 수와 요청당 최대 항목 수
+BATCH_DOWNLOAD_CONCURRENCY = max(1, int(os.getenv("BATCH_DOWNLOAD_CONCURRENCY", "8")))
+BATCH_MAX_ITEMS = max(1, int(os.getenv("BATCH_MAX_ITEMS", "500")))
+# 진행률 조회용으로 보관하는 최근 배치 수
+BATCH_HISTORY_MAX = max(1, int(os.getenv("BATCH_HISTORY_MAX", "50")))
+# 작업 상태 영속 저장소(core/job_store.py, SQLite WAL): 재시작 시 끝나지 않은 작업을 바로 재개한다
+JOB_STORE_ENABLED = os.getenv("JOB_STORE_ENABLED", "true").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+JOB_STORE_PATH = Path(
+    os.getenv("JOB_STORE_PATH", "").strip() or (APP_ROOT / ".cache" / "jobs.sqlite3")
+)
+# 완료/실패 행 보관 기간, 처리 중 크래시가 이 횟수를 넘은 작업은 재개하지 않고 failed 처리
+JOB_STORE_RETENTION_DAYS = float(os.getenv("JOB_STORE_RETENTION_DAYS", "7"))
+JOB_STORE_MAX_RESUMES = max(0, int(os.getenv("JOB_STORE_MAX_RESUMES", "2")))
+# STL 큐 스케줄링(core/job_queue.py): 우선순위 클래스 한 단계 = 대기 STL_QUEUE_AGING_SEC초,
+# 같은 tenant의 k번째 대기 작업은 k * STL_QUEUE_FAIR_SHARE_SEC초 늦게 들어온 것으로 본다
+STL_QUEUE_AGING_SEC = max(1.0, float(os.getenv("STL_QUEUE_AGING_SEC", "300")))
+STL_QUEUE_FAIR_SHARE_SEC = max(0.0, float(os.getenv("STL_QUEUE_FAIR_SHARE_SEC", "30")))
+# 대기 예상 시간(etaSec) 계산에 쓰는 최근 작업 소요 시간 표본 수
+STL_ETA_WINDOW = max(1, int(os.getenv("STL_ETA_WINDOW", "20")))
+# 단계별 소요 시간(core/metrics.py): /health/diag의 p50/p95 계산에 쓰는 단계별 최근 표본 수
+METRICS_RECENT_SAMPLES = max(10, int(os.getenv("METRICS_RECENT_SAMPLES", "200")))
 
 
 def ensure_dirs() -> None:
@@ -196,6 +330,16 @@ def dotnet_rollforward_env() -> dict:
     return env
 
 
+def rhino_result_env() -> dict:
+    """RHINO_RESULT_ENV_KEYS 중 rhino-server 환경에 설정된 값(공백 제거, 빈 값 제외)."""
+    out = {}
+    for key in RHINO_RESULT_ENV_KEYS:
+        value = os.getenv(key, "").strip()
+        if value:
+            out[key] = value
+    return out
+
+
 def bridge_headers() -> dict:
     headers = {}
     secret = os.getenv("RHINO_SHARED_SECRET", "").strip()
@@ -10,16 +10,25 @@ from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict
 
-from . import settings
+from . import job_queue, settings
 
 
+# pipeId 없이(--rhino 미지정) 실행하는 폴백 경로 전용 락.
+# pipeId를 임대한 작업은 pipe 단위로 배타적이므로 이 락을 잡지 않는다.
 global_rhino_lock = asyncio.Lock()
-processing_semaphore = asyncio.Semaphore(1)
+processing_semaphore = asyncio.Semaphore(settings.MAX_RHINO_CONCURRENCY)
 main_loop: Optional[asyncio.AbstractEventLoop] = None
 
-# FIFO STL 처리 큐 - 한 번에 하나씩 순차 처리
-# 동시에 여러 재생성 요청이 와도 앞의 작업이 끝난 뒤 다음 작업을 시작한다.
-stl_job_queue: asyncio.Queue = asyncio.Queue()
+# STL 처리 큐 - 워커 MAX_RHINO_CONCURRENCY개가 꺼내 처리
+# 워커 1개면 순차 처리, N개면 Rhino 인스턴스 N개에서 병렬 처리한다.
+# 꺼내는 순서는 우선순위 클래스/aging/fair-share로 정한다(core/job_queue.py).
+stl_job_queue: job_queue.StlJobQueue = job_queue.StlJobQueue()
+# 최근 Rhino 단계 소요 시간(초) - 큐 위치별 예상 대기 시간 계산용
+stl_job_durations: deque = deque(maxlen=settings.STL_ETA_WINDOW)
+# 업로드 단계 큐: Rhino가 끝난 작업(finalize_processed_stl 입력)을 업로드 워커가 꺼내 처리한다
+stl_upload_queue: asyncio.Queue = asyncio.Queue()
+# 업로드 워커별 처리 중 작업: {worker_id: {"name", "startedTs", "waitSec"}}
+upload_active: Dict[int, dict] = {}
 
 executor = ThreadPoolExecutor(max_workers=settings.MAX_RHINO_CONCURRENCY)
 
@@ -30,13 +39,29 @@ rhino_pool_cond = threading.Condition(rhino_pool_lock)
 rhino_all: set[str] = set()
 rhino_available: deque[str] = deque()
 rhino_last_expand_ts = 0.0
+# pipeId별 헬스: {ok, failed, consecutiveFailures, lastOkTs, lastFailureTs,
+#                 lastError, lastPingTs, cooldownUntil, leasedBy, leasedTs}
+rhino_pipe_health: Dict[str, dict] = {}
 
 last_ping_success_ts = 0.0
+# interactive 작업이 pipe를 기다리는 중이면 다른 작업은 새 pipe를 임대하지 않고 양보한다
+rhino_interactive_waiters: int = 0
+
+# 상주 러너(runnerId = pipeId): {lastPollTs, pid, generation, pending, wakeup,
+#                                installAttemptTs, busySince, jobs}
+rhino_runners: Dict[str, dict] = {}
+# hot-reload 명령마다 1 증가. 러너는 자신의 generation이 낮으면 모듈을 다시 로드한다.
+runner_reload_generation: int = 0
 
 in_flight: set[str] = set()
 in_flight_lock = threading.Lock()
 
 job_futures: Dict[str, asyncio.Future] = {}
+# 실행 중 Rhino 작업의 실시간 로그(core/job_log.py)
+# {token: {inputName, startedTs, lastLineTs, lastLine, ring(deque), bytes, droppedLines, lines, stalled}}
+job_log_tails: Dict[str, dict] = {}
+# socket.io 서버(app_factory.create_app에서 설정). 실시간 로그 줄을 클라이언트로 보낸다.
+sio = None
 
 is_running = True
 recent_history = deque(maxlen=50)
@@ -51,11 +76,44 @@ last_success_ts: Optional[float] = None
 last_failure_ts: Optional[float] = None
 current_processing_name: Optional[str] = None
 current_processing_started_ts: Optional[float] = None
+# 워커별 처리 중 작업: {worker_id: {"name", "startedTs"}}
+# current_processing_* 는 가장 최근에 시작된 작업(단일 워커 호환용)
+active_jobs: Dict[int, dict] = {}
 last_rhino_subprocess_started_ts: Optional[float] = None
 last_rhino_subprocess_done_ts: Optional[float] = None
 total_jobs_processed: int = 0
 total_jobs_failed: int = 0
 total_jobs_timeout: int = 0
+# 로그가 RHINO_STALL_TIMEOUT_SEC 동안 멈춰 조기 종료한 작업 수
+total_jobs_stalled: int = 0
+# 결과 캐시(core/result_cache.py) 카운터
+result_cache_hits: int = 0
+result_cache_misses: int = 0
+result_cache_stores: int = 0
+result_cache_evictions: int = 0
+# 백엔드 HTTP 엔드포인트별 지연 히스토그램(core/backend_client.py)
+# {endpoint: {count, errors, retries, sumSec, maxSec, buckets[], lastStatus}}
+backend_http_stats: Dict[str, dict] = {}
+backend_http_stats_lock = threading.Lock()
+# request-meta 캐시: {requestId: resolve_request_meta 결과}, 진행 중 조회: {requestId: {event, meta}}
+request_meta_cache: Dict[str, dict] = {}
+request_meta_inflight: Dict[str, dict] = {}
+request_meta_lock = threading.Lock()
+request_meta_hits: int = 0
+request_meta_misses: int = 0
+request_meta_coalesced: int = 0
+# 단계별 소요 시간 히스토그램(core/metrics.py)
+# {(scope, phase): {count, sumSec, maxSec, buckets[], recent(deque)}}
+phase_stats: Dict[tuple, dict] = {}
+# 업로드 outbox(core/upload_outbox.py) 카운터
+upload_outbox_uploaded: int = 0
+upload_outbox_retries: int = 0
+upload_outbox_dead: int = 0
+# 일괄 접수 배치(core/batch_ingest.py): {batchId: {createdAt, source, items[...]}} (삽입 순서 = 생성 순)
+# batch_file_index: {입력 파일명: batchId} — 처리 결과를 해당 배치 항목에 기록하는 역인덱스
+batches: Dict[str, dict] = {}
+batch_file_index: Dict[str, str] = {}
+batch_lock = threading.Lock()
 
 
 def set_main_loop(loop: asyncio.AbstractEventLoop) -> None:
@@ -5,17 +5,20 @@
 # - web/backend/controllers/bg/bg.controller.js
 """
 STL 메타데이터 계산 모듈
-Node.js Three.js 기반 계산 서비스를 호출하여 STL 메타데이터를 계산하고 백엔드에 등록
+STL 메타데이터를 계산하고 백엔드에 등록
+
+- 기본: in-process NumPy 계산(core/stl_metadata_calc.py, Node 출력과 동일 규칙)
+- RHINO_STL_METADATA_ENGINE=node 또는 Python 계산 실패 시: Node.js(stl-metadata/index.js) 호출
 """
 
 import json
 import os
 import subprocess
+import tempfile
+import time
 from pathlib import Path
 
-import requests
-
-from . import settings
+from . import backend_client, settings
 from .logger import log
 
 
@@ -28,7 +31,7 @@ def calculate_and_register_metadata(
     hex_rotation: dict | None = None,
 ) -> dict | None:
     """
-    Node.js STL 메타데이터 계산 서비스를 호출하고 백엔드에 등록
+    STL 메타데이터를 계산(Python 기본, Node fallback)하고 백엔드에 등록
 
     Args:
         stl_file_path: STL 파일 경로
@@ -40,8 +43,8 @@ def calculate_and_register_metadata(
         계산된 메타데이터 dict 또는 None (실패 시)
     """
     try:
-        # 1. Node.js 메타데이터 계산 서비스 호출
-        metadata = _call_nodejs_calculator(stl_file_path, finish_line_points)
+        # 1. 메타데이터 계산 (Python 기본, Node fallback)
+        metadata = _calculate_metadata(stl_file_path, finish_line_points)
 
         if not metadata:
             log(f"[stl_metadata] Failed to calculate metadata for {stl_file_path.name}")
@@ -130,6 +133,27 @@ def calculate_and_register_metadata(
         return None
 
 
+def _calculate_metadata(
+    stl_file_path: Path,
+    finish_line_points: list | None = None,
+) -> dict | None:
+    engine = os.getenv("RHINO_STL_METADATA_ENGINE", "python").strip().lower()
+    if engine != "node":
+        try:
+            from .stl_metadata_calc import calculate_stl_metadata
+
+            started = time.perf_counter()
+            metadata = calculate_stl_metadata(stl_file_path, finish_line_points)
+            log(
+                f"[stl_metadata] python engine elapsed="
+                f"{(time.perf_counter() - started) * 1000:.1f}ms file={stl_file_path.name}"
+            )
+            return metadata
+        except Exception as e:
+            log(f"[stl_metadata] python engine failed, fallback to Node.js: {e}")
+    return _call_nodejs_calculator(stl_file_path, finish_line_points)
+
+
 def _call_nodejs_calculator(
     stl_file_path: Path,
     finish_line_points: list | None = None,
@@ -144,6 +168,7 @@ def _call_nodejs_calculator(
     Returns:
         계산된 메타데이터 dict 또는 None
     """
+    points_file: Path | None = None
     try:
         # stl-metadata 디렉토리 경로
         script_dir = Path(__file__).parent.parent.parent / "stl-metadata"
@@ -157,9 +182,23 @@ def _call_nodejs_calculator(
         cmd = ["node", str(node_script), str(stl_file_path)]
 
         # Finish line points가 있으면 JSON으로 전달
+        # (Windows 명령줄 길이 제한을 피하기 위해 긴 JSON은 임시 파일 '@경로'로 전달)
         if finish_line_points:
             finish_line_json = json.dumps(finish_line_points)
-            cmd.append(finish_line_json)
+            if len(finish_line_json) > 4000:
+                settings.TMP_DIR.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile(
+                    "w",
+                    suffix=".json",
+                    dir=str(settings.TMP_DIR),
+                    delete=False,
+                    encoding="utf-8",
+                ) as f:
+                    f.write(finish_line_json)
+                    points_file = Path(f.name)
+                cmd.append("@" + str(points_file))
+            else:
+                cmd.append(finish_line_json)
 
         # Node.js 실행 (UTF-8 인코딩 명시)
         result = subprocess.run(
@@ -198,6 +237,12 @@ def _call_nodejs_calculator(
     except Exception as e:
         log(f"[stl_metadata] Node.js calculation error: {e}")
         return None
+    finally:
+        if points_file is not None:
+            try:
+                points_file.unlink()
+            except Exception:
+                pass
 
 
 def _register_metadata_to_backend(
@@ -239,11 +284,8 @@ def _register_metadata_to_backend(
             else None,
         }
 
-        response = requests.post(
-            register_url,
-            json=payload,
-            timeout=10,
-            headers=settings.bridge_headers(),
+        response = backend_client.post(
+            "/bg/register-stl-metadata", url=register_url, json=payload
         )
 
         if response.status_code == 200:
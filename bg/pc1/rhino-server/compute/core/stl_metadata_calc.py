@@ -0,0 +1,702 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/stl-metadata/index.js
+# - bg/pc1/rhino-server/compute/core/stl_metadata.py
+# - bg/pc1/rhino-server/compute/scripts/mesh_kernel.py
+"""
+STL 메타데이터 계산 (NumPy, in-process)
+
+stl-metadata/index.js(Three.js)와 같은 출력을 같은 규칙으로 계산한다.
+- maxDiameter / connectionDiameter / totalLength / l1
+- taperAngle / tiltAxisVector / frontPoint / taperGuide(multiDirectionGuides)
+- bbox / coordinateValidation
+
+JS와 값을 맞추기 위한 규칙:
+- STLLoader처럼 좌표를 float32로 읽는다(ASCII도 float32로 반올림).
+- mergeVertices는 결과 값에 영향을 주지 않으므로(삼각형 순서/좌표 동일) 생략한다.
+- 합계/회귀처럼 순서에 민감한 소량 계산은 JS와 같은 순서의 Python 루프로 계산한다.
+
+패리티 확인:
+    python -m core.stl_metadata_calc <file.stl> [--finish-line points.json] [--parity]
+"""
+
+import importlib.util
+import json
+import math
+import sys
+import time
+from decimal import ROUND_HALF_UP, Decimal
+from pathlib import Path
+
+import numpy as np
+
+from . import settings
+from .logger import log
+
+TAPER_ANGLES = [0, 30, 60, 90, 120, 150, 180, 210, 240, 270, 300, 330]
+TAPER_SLICE_COUNT = 40
+
+_mesh_kernel_module = None
+
+
+def _mesh_kernel():
+    """scripts/mesh_kernel.py를 sys.path 변경 없이 로드한다(Rhino 비의존 모듈)."""
+    global _mesh_kernel_module
+    if _mesh_kernel_module is None:
+        path = settings.SCRIPT_DIR / "mesh_kernel.py"
+        spec = importlib.util.spec_from_file_location("abuts_mesh_kernel", str(path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _mesh_kernel_module = module
+    return _mesh_kernel_module
+
+
+def _js_to_fixed(value: float, digits: int) -> str:
+    """Number.prototype.toFixed와 같은 반올림(정확한 이진값 기준, 동률은 0에서 먼 쪽)."""
+    q = Decimal(1).scaleb(-digits)
+    d = Decimal(float(value)).quantize(q, rounding=ROUND_HALF_UP)
+    if d == 0 and not float(value) < 0:
+        d = abs(d)
+    return f"{d:.{digits}f}"
+
+
+def _js_round2(value: float) -> float:
+    """Math.round(x * 100) / 100"""
+    return math.floor(value * 100 + 0.5) / 100
+
+
+def _to_float(v) -> float:
+    try:
+        return float(v)
+    except Exception:
+        return float("nan")
+
+
+def load_triangles(stl_path) -> np.ndarray:
+    """(F, 3, 3) float64 — float32로 반올림된 좌표(STLLoader와 동일)."""
+    tri = _mesh_kernel().read_stl_triangles(stl_path)
+    return np.asarray(tri, dtype=np.float32).astype(np.float64)
+
+
+def _validate_coordinate_system(bbox_min, bbox_max, max_r) -> dict:
+    x_range = bbox_max[0] - bbox_min[0]
+    y_range = bbox_max[1] - bbox_min[1]
+    z_range = bbox_max[2] - bbox_min[2]
+    x_center = (bbox_max[0] + bbox_min[0]) / 2
+    y_center = (bbox_max[1] + bbox_min[1]) / 2
+    center_offset = math.sqrt(x_center * x_center + y_center * y_center)
+    xy_max_diameter = max_r * 2
+
+    log(
+        f"[stl_metadata][coordValidation] xyDiameter={_js_to_fixed(xy_max_diameter, 2)}mm "
+        f"centerOffset={_js_to_fixed(center_offset, 2)}mm "
+        f"ranges=X{_js_to_fixed(x_range, 2)}/Y{_js_to_fixed(y_range, 2)}/Z{_js_to_fixed(z_range, 2)}"
+    )
+
+    if xy_max_diameter > 15.0:
+        return {
+            "valid": False,
+            "error": f"COORDINATE_ERROR: XY 평면 최대 직경이 {_js_to_fixed(xy_max_diameter, 2)}mm로 15mm를 초과합니다. 모델을 원점(0,0) 중심으로 이동시켜주세요.",
+            "xyMaxDiameter": xy_max_diameter,
+            "centerOffset": center_offset,
+        }
+    if center_offset > 10.0:
+        return {
+            "valid": False,
+            "error": f"COORDINATE_WARNING: 모델 중심이 원점에서 {_js_to_fixed(center_offset, 2)}mm 떨어져 있습니다. 원점(0,0) 중심으로 이동시켜주세요.",
+            "xyMaxDiameter": xy_max_diameter,
+            "centerOffset": center_offset,
+        }
+    return {
+        "valid": True,
+        "error": None,
+        "xyMaxDiameter": xy_max_diameter,
+        "centerOffset": center_offset,
+    }
+
+
+def _directed_edges(tri: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """삼각형마다 (v0,v1), (v1,v2), (v2,v0) 순서의 방향 엣지 (3F, 3)."""
+    a = tri[:, [0, 1, 2], :].reshape(-1, 3)
+    b = tri[:, [1, 2, 0], :].reshape(-1, 3)
+    return a, b
+
+
+def _connection_max_r(edge_a: np.ndarray, edge_b: np.ndarray) -> tuple[float, int]:
+    # diameter_analysis(Rhino 쪽 DIAMETER_RESULT)와 같은 교차 규칙을 mesh_kernel에서 공유한다
+    r = _mesh_kernel().edge_plane_crossing_r(edge_a, edge_b, 0.0)
+    if r.shape[0] == 0:
+        return 0.0, 0
+    return float(max(0.0, r.max())), int(r.shape[0])
+
+
+def _direction_samples(
+    points: np.ndarray,
+    edge_a: np.ndarray,
+    edge_b: np.ndarray,
+    center: tuple[float, float, float],
+    dx: float,
+    dy: float,
+    post_start: float,
+    post_height: float,
+) -> list[dict]:
+    """한 방향에 대해 41개 z 슬라이스의 최대 투영 반경을 구한다(JS 이중 루프와 동일 조건)."""
+    n = TAPER_SLICE_COUNT
+    s = np.arange(n + 1, dtype=np.float64)
+    targets = post_start + (post_height * s) / n
+    tol = post_height / (n * 4)
+    z_lo = float(targets[0]) - tol - 1e-6
+    z_hi = float(targets[-1]) + tol + 1e-6
+
+    best = np.full(n + 1, -np.inf)
+
+    # 정점: 밴드 안의 정점만 골라 |z - targetZ| <= tol 검사
+    pz = points[:, 2]
+    vmask = (pz >= z_lo) & (pz <= z_hi)
+    if np.any(vmask):
+        vp = points[vmask]
+        proj = (vp[:, 0] - center[0]) * dx + (vp[:, 1] - center[1]) * dy
+        hit = np.abs(vp[:, 2][None, :] - targets[:, None]) <= tol
+        cand = np.where(hit, proj[None, :], -np.inf)
+        best = np.maximum(best, cand.max(axis=1))
+
+    # 엣지 교차: 슬라이스 구간과 겹치는 엣지만 골라 교차점 투영
+    za = edge_a[:, 2]
+    zb = edge_b[:, 2]
+    emask = (np.minimum(za, zb) <= z_hi) & (np.maximum(za, zb) >= z_lo)
+    emask &= np.abs(za - zb) >= 1e-9
+    if np.any(emask):
+        a = edge_a[emask]
+        b = edge_b[emask]
+        az = a[:, 2][None, :]
+        bz = b[:, 2][None, :]
+        tz = targets[:, None]
+        outside = ((az < tz) & (bz < tz)) | ((az > tz) & (bz > tz))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (tz - az) / (bz - az)
+        ok = (~outside) & (t >= 0) & (t <= 1)
+        ix = a[:, 0][None, :] + t * (b[:, 0] - a[:, 0])[None, :]
+        iy = a[:, 1][None, :] + t * (b[:, 1] - a[:, 1])[None, :]
+        proj = (ix - center[0]) * dx + (iy - center[1]) * dy
+        cand = np.where(ok, proj, -np.inf)
+        best = np.maximum(best, cand.max(axis=1))
+
+    return [
+        {"z": float(targets[i]), "radius": float(best[i])}
+        for i in range(n + 1)
+        if best[i] > -10
+    ]
+
+
+def _fit_direction(samples: list[dict]) -> tuple[float, float, float] | None:
+    """JS reduce/for 순서를 그대로 따른 최소제곱 회귀. (slope, intercept, rSquared)"""
+    n = len(samples)
+    sum_z = 0.0
+    sum_r = 0.0
+    for smp in samples:
+        sum_z += smp["z"]
+    for smp in samples:
+        sum_r += smp["radius"]
+    mean_z = sum_z / n
+    mean_r = sum_r / n
+
+    num = 0.0
+    denom = 0.0
+    for smp in samples:
+        dz = smp["z"] - mean_z
+        num += dz * (smp["radius"] - mean_r)
+        denom += dz * dz
+    if not denom > 1e-8:
+        return None
+
+    slope = num / denom
+    intercept = mean_r - slope * mean_z
+    ss_res = 0.0
+    ss_tot = 0.0
+    for smp in samples:
+        predicted = slope * smp["z"] + intercept
+        residual = smp["radius"] - predicted
+        ss_res += residual * residual
+        total_dev = smp["radius"] - mean_r
+        ss_tot += total_dev * total_dev
+    r_squared = 1 - ss_res / ss_tot if ss_tot > 1e-8 else 0
+    return slope, intercept, r_squared
+
+
+def _vertex_hash_codes(v: np.ndarray) -> np.ndarray:
+    """toFixed(4) 문자열과 1:1인 정수 코드.
+
+    float32 좌표 * 1e4는 float64에서 정확하므로 0에서 먼 쪽 반올림을 그대로 재현할 수 있다.
+    "-0.0000"(작은 음수)과 "0.0000"을 구분하기 위해 2n(-1) 형태로 인코딩한다.
+    """
+    scaled = v * 10000.0
+    n = np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)
+    neg_zero = (n == 0) & (v < 0)
+    return (2 * n.astype(np.int64)) - neg_zero.astype(np.int64)
+
+
+def _select_min_z_point(pool: list[tuple], dir_x, dir_y, lat_x, lat_y):
+    best = None
+    best_z = math.inf
+    best_lateral = math.inf
+    best_along = -math.inf
+    for c in pool:
+        vz = c[2]
+        cdx = c[3]
+        cdy = c[4]
+        along_abs = abs(cdx * dir_x + cdy * dir_y)
+        lateral_abs = abs(cdx * lat_x + cdy * lat_y)
+
+        is_lower_z = vz < best_z - 1e-6
+        is_same_z = abs(vz - best_z) <= 1e-6
+        is_better_line = lateral_abs < best_lateral - 1e-6
+        is_same_line = abs(lateral_abs - best_lateral) <= 1e-6
+        is_further = along_abs > best_along + 1e-6
+
+        if (
+            is_lower_z
+            or (is_same_z and is_better_line)
+            or (is_same_z and is_same_line and is_further)
+        ):
+            best = c
+            best_z = vz
+            best_lateral = lateral_abs
+            best_along = along_abs
+    return best
+
+
+def _calculate_taper_with_finish_line(
+    tri: np.ndarray,
+    points: np.ndarray,
+    edge_a: np.ndarray,
+    edge_b: np.ndarray,
+    finish_line_points: list,
+    bbox_min: np.ndarray,
+    bbox_max: np.ndarray,
+) -> dict | None:
+    fl_zs = []
+    for p in finish_line_points:
+        if isinstance(p, (list, tuple)) and len(p) >= 3:
+            z = _to_float(p[2])
+            if math.isfinite(z):
+                fl_zs.append(z)
+    if not fl_zs:
+        return None
+
+    finish_line_top_z = max(fl_zs)
+    max_z = float(bbox_max[2])
+    if not (max_z - finish_line_top_z) > 0:
+        return None
+
+    center = (
+        (float(bbox_min[0]) + float(bbox_max[0])) / 2,
+        (float(bbox_min[1]) + float(bbox_max[1])) / 2,
+        (float(bbox_min[2]) + float(bbox_max[2])) / 2,
+    )
+
+    fl_xyz = [
+        (_to_float(p[0]), _to_float(p[1]), _to_float(p[2]))
+        for p in finish_line_points
+        if isinstance(p, (list, tuple)) and len(p) >= 3
+    ]
+
+    # 1. Taper (12방향)
+    directions: list[dict] = []
+    for angle_deg in TAPER_ANGLES:
+        angle_rad = (angle_deg * math.pi) / 180
+        dx = math.cos(angle_rad)
+        dy = math.sin(angle_rad)
+
+        dir_finish_z = finish_line_top_z
+        min_diff = math.inf
+        for px, py, pz in fl_xyz:
+            pt_angle = math.atan2(py - center[1], px - center[0]) * (180 / math.pi)
+            if pt_angle < 0:
+                pt_angle += 360
+            diff = abs(pt_angle - angle_deg)
+            if diff > 180:
+                diff = 360 - diff
+            if diff < min_diff:
+                min_diff = diff
+                dir_finish_z = pz
+
+        dir_available = max_z - dir_finish_z
+        post_start = dir_finish_z + dir_available * 0.3
+        post_end = dir_finish_z + dir_available * 0.4
+        post_height = post_end - post_start
+        if not post_height > 0.1:
+            continue
+
+        samples = _direction_samples(
+            points, edge_a, edge_b, center, dx, dy, post_start, post_height
+        )
+        if len(samples) < 6:
+            continue
+        fit = _fit_direction(samples)
+        if fit is None:
+            continue
+        slope, intercept, r_squared = fit
+        if r_squared > 0.92:
+            directions.append(
+                {
+                    "angle": angle_deg,
+                    "slope": slope,
+                    "intercept": intercept,
+                    "taperAngle": math.atan(slope) * (180 / math.pi),
+                    "rSquared": r_squared,
+                    "dirFinishLineZ": dir_finish_z,
+                    "dirAvailableHeight": dir_available,
+                }
+            )
+
+    if len(directions) < 6:
+        return None
+
+    by_angle = {}
+    for g in directions:
+        by_angle.setdefault(g["angle"], g)
+
+    # 2. Tilt axis (180도 쌍)
+    taper_angle = 0
+    tilt_axis = None
+    paired = []
+    for base in range(0, 180, 30):
+        bg = by_angle.get(base)
+        og = by_angle.get(base + 180)
+        if bg and og:
+            true_tilt = (bg["taperAngle"] - og["taperAngle"]) / 2
+            paired.append(abs(true_tilt))
+            bg["taperAngle"] = true_tilt
+            og["taperAngle"] = -true_tilt
+
+    if paired:
+        taper_angle = max(paired)
+        local_max_value = -1
+        local_max_angle = -1
+        best_true_tilt = 0
+        for base in range(0, 180, 30):
+            bg = by_angle.get(base)
+            og = by_angle.get(base + 180)
+            if bg and og:
+                tilt = abs(bg["taperAngle"])
+                if tilt > local_max_value:
+                    local_max_value = tilt
+                    local_max_angle = base
+                    best_true_tilt = bg["taperAngle"]
+        if local_max_angle != -1:
+            rad = local_max_angle * (math.pi / 180)
+            tilt_rad = abs(best_true_tilt) * (math.pi / 180)
+            direction_angle = rad if best_true_tilt >= 0 else rad + math.pi
+            tilt_axis = {
+                "x": math.sin(tilt_rad) * math.cos(direction_angle),
+                "y": math.sin(tilt_rad) * math.sin(direction_angle),
+                "z": math.cos(tilt_rad),
+            }
+
+    # 3. FrontPoint (Top/Side 교점)
+    if not tilt_axis:
+        tilt_axis = {"x": 0, "y": 0, "z": 1}
+    t_len = math.sqrt(
+        tilt_axis["x"] * tilt_axis["x"]
+        + tilt_axis["y"] * tilt_axis["y"]
+        + tilt_axis["z"] * tilt_axis["z"]
+    )
+    tx = tilt_axis["x"] / t_len
+    ty = tilt_axis["y"] / t_len
+    tz = tilt_axis["z"] / t_len
+    xy_len = math.sqrt(tx * tx + ty * ty)
+    front_x, front_y = (tx / xy_len, ty / xy_len) if xy_len > 1e-6 else (1.0, 0.0)
+
+    proj_all = points[:, 0] * tx + points[:, 1] * ty + points[:, 2] * tz
+    max_proj = float(proj_all.max())
+
+    total_length = float(bbox_max[2] - bbox_min[2])
+    top_thr = max_proj - min(2.0, total_length * 0.2)
+
+    v0 = tri[:, 0, :]
+    v1 = tri[:, 1, :]
+    v2 = tri[:, 2, :]
+    avg_proj = (
+        (v0[:, 0] + v1[:, 0] + v2[:, 0]) * tx
+        + (v0[:, 1] + v1[:, 1] + v2[:, 1]) * ty
+        + (v0[:, 2] + v1[:, 2] + v2[:, 2]) * tz
+    ) / 3
+    near = avg_proj > top_thr - 2.0
+
+    face_idx = np.nonzero(near)[0]
+    e1 = v1[face_idx] - v0[face_idx]
+    e2 = v2[face_idx] - v0[face_idx]
+    normal = np.stack(
+        [
+            e1[:, 1] * e2[:, 2] - e1[:, 2] * e2[:, 1],
+            e1[:, 2] * e2[:, 0] - e1[:, 0] * e2[:, 2],
+            e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0],
+        ],
+        axis=1,
+    )
+    n_len = np.sqrt(
+        normal[:, 0] * normal[:, 0] + normal[:, 1] * normal[:, 1] + normal[:, 2] * normal[:, 2]
+    )
+    scale = np.where(n_len > 1e-9, n_len, 1.0)
+    normal = normal / scale[:, None]
+    dot = normal[:, 0] * tx + normal[:, 1] * ty + normal[:, 2] * tz
+    is_top = (dot > 0.5) & (avg_proj[face_idx] > top_thr)
+    is_side = ~(dot > 0.5)
+    classified = is_top | is_side
+
+    face_idx = face_idx[classified]
+    is_top = is_top[classified]
+
+    # 정점 해시(toFixed(4)) 기준으로 top/side 양쪽에 속한 정점을 찾는다. 순서는 첫 등장 순서(Map 삽입 순서).
+    inst_v = tri[face_idx].reshape(-1, 3)
+    inst_top = np.repeat(is_top, 3)
+    codes = _vertex_hash_codes(inst_v)
+    if codes.shape[0]:
+        _, first_idx, inverse = np.unique(
+            codes, axis=0, return_index=True, return_inverse=True
+        )
+        inverse = inverse.reshape(-1)
+        group_count = first_idx.shape[0]
+        has_top = np.bincount(inverse, weights=inst_top.astype(np.float64), minlength=group_count) > 0
+        has_side = np.bincount(inverse, weights=(~inst_top).astype(np.float64), minlength=group_count) > 0
+        both = np.nonzero(has_top & has_side)[0]
+        both_first = np.sort(first_idx[both])
+        cand_v = inst_v[both_first]
+    else:
+        cand_v = np.zeros((0, 3), dtype=np.float64)
+
+    max_r = float(np.sqrt(points[:, 0] * points[:, 0] + points[:, 1] * points[:, 1]).max())
+    max_diameter = max_r * 2
+    min_radius = max(1.0, max_diameter * 0.15)
+    strict_proj_min = max_proj - min(1.2, total_length * 0.12)
+
+    cdx = cand_v[:, 0] - center[0]
+    cdy = cand_v[:, 1] - center[1]
+    dist = np.sqrt(cdx * cdx + cdy * cdy)
+    keep = ~(dist <= min_radius)
+    cand_proj = cand_v[:, 0] * tx + cand_v[:, 1] * ty + cand_v[:, 2] * tz
+    # (x, y, z, dx, dy, distToAxis)
+    relaxed = [
+        (float(v[0]), float(v[1]), float(v[2]), float(a), float(b), float(d))
+        for v, a, b, d in zip(cand_v[keep], cdx[keep], cdy[keep], dist[keep])
+    ]
+    strict_count = int(np.count_nonzero(cand_proj[keep] >= strict_proj_min))
+
+    max_tilt = 0.0
+    for g in directions:
+        max_tilt = max(max_tilt, abs(float(g["taperAngle"] or 0)))
+    purple_angles = [
+        float(g["angle"])
+        for g in directions
+        if abs(abs(float(g["taperAngle"] or 0)) - max_tilt) <= 0.05
+    ]
+
+    line_band = max(0.2, max_diameter * 0.03)
+    max_dist_in_pool = 0.0
+    for c in relaxed:
+        max_dist_in_pool = max(max_dist_in_pool, c[5])
+    outer_min_tight = max(min_radius, max_dist_in_pool * 0.82)
+    outer_min_relaxed = max(min_radius * 0.7, max_dist_in_pool * 0.62)
+
+    def make_radial_angles(count):
+        base_angle = math.atan2(front_y, front_x)
+        out = []
+        for i in range(count):
+            deg = ((base_angle + (math.pi * 2 * i) / count) * 180) / math.pi
+            deg = math.fmod(deg, 360)
+            if deg < 0:
+                deg += 360
+            out.append(deg)
+        return out
+
+    def pick_intersections(angles, band, outer_min):
+        hits = []
+        outer_pool = [c for c in relaxed if c[5] >= outer_min]
+        for guide_deg in angles:
+            rad = (guide_deg * math.pi) / 180
+            dir_x, dir_y = math.cos(rad), math.sin(rad)
+            lat_x, lat_y = -dir_y, dir_x
+            in_band = [c for c in outer_pool if abs(c[3] * lat_x + c[4] * lat_y) <= band]
+            best = _select_min_z_point(
+                in_band, dir_x, dir_y, lat_x, lat_y
+            ) or _select_min_z_point(outer_pool, dir_x, dir_y, lat_x, lat_y)
+            if best:
+                hits.append(best)
+        return hits
+
+    hits20 = pick_intersections(make_radial_angles(20), line_band * 2.5, outer_min_relaxed)
+    intersections = list(hits20)
+    hits36 = []
+    if len(intersections) < 20:
+        hits36 = pick_intersections(make_radial_angles(36), line_band * 2.5, outer_min_relaxed)
+        intersections.extend(hits36)
+    if not intersections and purple_angles:
+        intersections = pick_intersections(purple_angles, line_band, outer_min_tight)
+    if not intersections and purple_angles:
+        intersections = pick_intersections(purple_angles, line_band * 2.2, outer_min_relaxed)
+
+    front_point = None
+    if intersections:
+        min_pt = intersections[0]
+        for c in intersections:
+            if c[2] < min_pt[2]:
+                min_pt = c
+        front_point = {
+            "x": _js_round2(min_pt[0]),
+            "y": _js_round2(min_pt[1]),
+            "z": _js_round2(min_pt[2]),
+        }
+
+    log(
+        f"[stl_metadata][frontPoint] candidates strict={strict_count} relaxed={len(relaxed)} "
+        f"purpleGuides={len(purple_angles)} hits={len(intersections)} "
+        f"hits20={len(hits20)} hits36={len(hits36)}"
+    )
+
+    return {
+        "taperAngle": taper_angle,
+        "tiltAxisVector": tilt_axis,
+        "frontPoint": front_point,
+        "taperGuide": {
+            "zStart": finish_line_top_z,
+            "zEnd": max_z,
+            "multiDirectionGuides": directions,
+        },
+    }
+
+
+def calculate_stl_metadata(stl_file_path, finish_line_points: list | None = None) -> dict:
+    """index.js calculateStlMetadata와 같은 구조의 dict를 반환한다. 실패 시 예외."""
+    tri = load_triangles(stl_file_path)
+    if tri.shape[0] == 0:
+        raise ValueError("Invalid STL geometry")
+
+    points = tri.reshape(-1, 3)
+    bbox_min = points.min(axis=0)
+    bbox_max = points.max(axis=0)
+    max_r = float(np.sqrt(points[:, 0] * points[:, 0] + points[:, 1] * points[:, 1]).max())
+    max_diameter = max_r * 2
+
+    validation = _validate_coordinate_system(bbox_min, bbox_max, max_r)
+
+    edge_a, edge_b = _directed_edges(tri)
+    conn_max_r, edge_points = _connection_max_r(edge_a, edge_b)
+    connection_diameter = conn_max_r * 2 if conn_max_r > 0 else max_diameter
+    log(
+        f"[stl_metadata][connectionDiameter] Z=0: maxR={_js_to_fixed(conn_max_r, 6)}mm, "
+        f"d={_js_to_fixed(connection_diameter, 6)}mm ({edge_points} edge points)"
+    )
+
+    total_length = float(bbox_max[2] - bbox_min[2])
+    l1 = float(bbox_max[2])
+
+    taper_angle = 0
+    tilt_axis = None
+    front_point = None
+    taper_guide = None
+    if finish_line_points and len(finish_line_points) >= 3:
+        result = _calculate_taper_with_finish_line(
+            tri, points, edge_a, edge_b, finish_line_points, bbox_min, bbox_max
+        )
+        if result:
+            taper_angle = result["taperAngle"]
+            tilt_axis = result["tiltAxisVector"]
+            front_point = result["frontPoint"]
+            taper_guide = result["taperGuide"]
+
+    return {
+        "maxDiameter": max_diameter,
+        "connectionDiameter": connection_diameter,
+        "totalLength": total_length,
+        "l1": l1,
+        "taperAngle": taper_angle,
+        "tiltAxisVector": tilt_axis,
+        "frontPoint": front_point,
+        "taperGuide": taper_guide,
+        "bbox": {
+            "min": {"x": float(bbox_min[0]), "y": float(bbox_min[1]), "z": float(bbox_min[2])},
+            "max": {"x": float(bbox_max[0]), "y": float(bbox_max[1]), "z": float(bbox_max[2])},
+        },
+        "coordinateValidation": validation,
+    }
+
+
+# -----------------------------
+# 패리티 하네스 (Node 출력과 비교)
+# -----------------------------
+def _diff_values(a, b, path: str, tol: float, out: list) -> None:
+    if isinstance(a, dict) and isinstance(b, dict):
+        for k in sorted(set(a) | set(b)):
+            if k not in a or k not in b:
+                out.append(f"{path}.{k}: missing in {'python' if k not in a else 'node'}")
+                continue
+            _diff_values(a[k], b[k], f"{path}.{k}", tol, out)
+        return
+    if isinstance(a, list) and isinstance(b, list):
+        if len(a) != len(b):
+            out.append(f"{path}: length python={len(a)} node={len(b)}")
+        for i, (x, y) in enumerate(zip(a, b)):
+            _diff_values(x, y, f"{path}[{i}]", tol, out)
+        return
+    if isinstance(a, bool) or isinstance(b, bool) or a is None or b is None:
+        if a != b:
+            out.append(f"{path}: python={a!r} node={b!r}")
+        return
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        if not (abs(float(a) - float(b)) <= tol * max(1.0, abs(float(b)))):
+            out.append(f"{path}: python={a!r} node={b!r}")
+        return
+    if a != b:
+        out.append(f"{path}: python={a!r} node={b!r}")
+
+
+def _run_parity(stl_path: Path, finish_line_points: list | None, tol: float) -> bool:
+    from .stl_metadata import _call_nodejs_calculator
+
+    t0 = time.perf_counter()
+    py = calculate_stl_metadata(stl_path, finish_line_points)
+    t_py = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    node = _call_nodejs_calculator(stl_path, finish_line_points)
+    t_node = time.perf_counter() - t0
+    if node is None:
+        print(f"{stl_path.name}: node calculation failed")
+        return False
+    diffs: list = []
+    _diff_values(py, node, "$", tol, diffs)
+    status = "OK" if not diffs else f"DIFF({len(diffs)})"
+    print(f"{stl_path.name}: {status} python={t_py * 1000:.1f}ms node={t_node * 1000:.1f}ms")
+    for d in diffs[:50]:
+        print("  " + d)
+    return not diffs
+
+
+def _main(argv: list[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m core.stl_metadata_calc",
+        description="STL 메타데이터(NumPy) 계산 / Node(stl-metadata/index.js) 패리티 확인",
+    )
+    parser.add_argument("stl", nargs="+", help="STL 파일 경로")
+    parser.add_argument("--finish-line", help="finish line points JSON 파일 ([[x,y,z], ...])")
+    parser.add_argument("--parity", action="store_true", help="Node 출력과 비교")
+    parser.add_argument("--tol", type=float, default=1e-6, help="상대 허용오차")
+    args = parser.parse_args(argv)
+
+    finish_line_points = None
+    if args.finish_line:
+        finish_line_points = json.loads(Path(args.finish_line).read_text(encoding="utf-8"))
+
+    all_ok = True
+    for p in args.stl:
+        stl_path = Path(p)
+        if args.parity:
+            all_ok = _run_parity(stl_path, finish_line_points, args.tol) and all_ok
+        else:
+            print(json.dumps(calculate_stl_metadata(stl_path, finish_line_points), indent=2, ensure_ascii=False))
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,309 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/core/processing.py
+# - web/backend/controllers/bg/bg.controller.js
+"""filled STL 업로드 outbox (디스크 영속 + 재시도).
+
+finalize_processed_stl이 업로드할 출력을 UPLOAD_OUTBOX_DIR/<outName>/ 로 옮기고
+(filled.stl + job.json) 바로 한 번 업로드를 시도한다. 실패하면 지수 backoff로
+nextAttemptTs를 잡아 두고 outbox_retry_loop가 다시 시도한다. 서버가 재시작돼도
+디렉토리가 남아 있으므로 기동 직후 루프가 이어서 올린다.
+
+- 업로드 동시 실행 수는 UPLOAD_CONCURRENCY로 제한한다(Rhino/업로드 워커 수와 별개).
+- 같은 outName의 새 출력이 들어오면 이전 항목을 덮어쓴다(최신 결과만 올린다).
+- UPLOAD_MAX_ATTEMPTS를 넘기면 dead/ 로 옮기고 실패를 통지한다.
+- 완료/최종 실패는 기존처럼 notify_runtime_status로 통지한다.
+"""
+import asyncio
+import json
+import random
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from . import settings, state
+from .logger import log
+
+JOB_FILE = "job.json"
+STL_FILE = "filled.stl"
+
+_lock = threading.Lock()
+# 지금 업로드 중인 entry id (재시도 루프와 finalize가 같은 항목을 동시에 올리지 않게)
+_attempting: set[str] = set()
+_upload_slots: asyncio.Semaphore | None = None
+
+
+def _slots() -> asyncio.Semaphore:
+    global _upload_slots
+    if _upload_slots is None:
+        _upload_slots = asyncio.Semaphore(settings.UPLOAD_CONCURRENCY)
+    return _upload_slots
+
+
+def _root() -> Path:
+    return settings.UPLOAD_OUTBOX_DIR
+
+
+def _dead_root() -> Path:
+    return settings.UPLOAD_OUTBOX_DIR / "dead"
+
+
+def _entry_id(out_name: str) -> str:
+    return Path(settings.sanitize_filename(out_name)).stem
+
+
+def _read_job(entry_dir: Path) -> dict | None:
+    try:
+        return json.loads((entry_dir / JOB_FILE).read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
+def _write_job(entry_dir: Path, job: dict) -> None:
+    tmp = entry_dir / (JOB_FILE + ".tmp")
+    tmp.write_text(json.dumps(job, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(entry_dir / JOB_FILE)
+
+
+def enqueue(
+    out_path: Path,
+    *,
+    file_name: str,
+    out_name: str,
+    original_name: str,
+    request_id: str | None,
+    metadata: dict,
+) -> str | None:
+    """출력 파일을 outbox로 옮기고 entry id를 반환한다(blocking). 실패하면 None."""
+    entry_id = _entry_id(out_name)
+    entry_dir = _root() / entry_id
+    now = time.time()
+    job = {
+        "id": entry_id,
+        "fileName": file_name,
+        "outName": out_name,
+        "originalName": original_name,
+        "requestId": request_id,
+        "metadata": metadata or {},
+        "attempts": 0,
+        "createdAt": now,
+        "nextAttemptTs": now,
+        "lastError": None,
+    }
+    with _lock:
+        try:
+            if entry_dir.exists() and entry_id not in _attempting:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            tmp_stl = entry_dir / (STL_FILE + ".tmp")
+            shutil.move(str(out_path), str(tmp_stl))
+            tmp_stl.replace(entry_dir / STL_FILE)
+            _write_job(entry_dir, job)
+        except Exception as e:
+            log(f"[outbox] enqueue failed ({out_name}): {e}")
+            return None
+    log(f"[outbox] queued: {entry_id} requestId={request_id}")
+    return entry_id
+
+
+def pending_file_names() -> set[str]:
+    """outbox에 업로드 대기 중인 입력 파일명 집합(일괄 중복 확인용, 디렉토리 1회 스캔)."""
+    names: set[str] = set()
+    for entry_dir in _pending_dirs():
+        job = _read_job(entry_dir)
+        if job and job.get("fileName"):
+            names.add(job["fileName"])
+    return names
+
+
+def has_pending(file_name: str) -> bool:
+    """재시작 복구 시 outbox에 이미 업로드 대기 중인 입력인지 확인한다.
+
+    outbox 디렉토리를 스캔하므로 async 코드에서는 asyncio.to_thread로 호출한다(outbox_stats도 동일).
+    """
+    return file_name in pending_file_names()
+
+
+def _pending_dirs() -> list[Path]:
+    root = _root()
+    try:
+        return [
+            d
+            for d in root.iterdir()
+            if d.is_dir() and d.name != "dead" and (d / JOB_FILE).exists()
+        ]
+    except Exception:
+        return []
+
+
+def _backoff_sec(attempts: int) -> float:
+    base = settings.UPLOAD_RETRY_BASE_SEC * (2 ** max(0, attempts - 1))
+    return min(3600.0, base) * random.uniform(0.8, 1.2)
+
+
+async def _notify(job: dict, status: str, label: str, tone: str) -> None:
+    from .processing import notify_runtime_status
+
+    await asyncio.to_thread(
+        notify_runtime_status,
+        {"requestId": job.get("requestId")},
+        source="rhino-server",
+        stage="request",
+        status=status,
+        label=label,
+        tone=tone,
+        metadata={"fileName": job.get("fileName"), "outputName": job.get("outName")},
+    )
+
+
+async def attempt(entry_id: str) -> bool:
+    """outbox 항목 하나를 업로드한다. 성공 시 항목을 지우고 완료를 통지한다."""
+    from .processing import record_job_outcome, upload_via_presign
+
+    with _lock:
+        if entry_id in _attempting:
+            return False
+        _attempting.add(entry_id)
+    entry_dir = _root() / entry_id
+    try:
+        job = _read_job(entry_dir)
+        stl_path = entry_dir / STL_FILE
+        if not job or not stl_path.exists():
+            log(f"[outbox] broken entry removed: {entry_id}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return False
+
+        async with _slots():
+            # presigned 업로드는 outbox 파일명이 아니라 원래 출력 이름으로 올린다
+            upload_path = entry_dir / job["outName"]
+            try:
+                stl_path.replace(upload_path)
+                ok = await asyncio.to_thread(
+                    upload_via_presign,
+                    upload_path,
+                    job.get("originalName") or job["fileName"],
+                    {
+                        "requestId": job.get("requestId"),
+                        "metadata": job.get("metadata") or {},
+                    },
+                )
+            except Exception as e:
+                log(f"[outbox] upload error {entry_id}: {e}")
+                job["lastError"] = str(e)
+                ok = False
+            finally:
+                if upload_path.exists():
+                    if stl_path.exists():
+                        # 업로드 중에 같은 outName의 새 출력이 들어왔다 → 새 것을 유지
+                        upload_path.unlink(missing_ok=True)
+                    else:
+                        upload_path.replace(stl_path)
+
+        current = _read_job(entry_dir)
+        if current and current.get("createdAt") != job.get("createdAt"):
+            # 새 출력으로 교체된 항목은 다음 스캔에서 따로 올린다
+            return ok
+
+        if ok:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            state.upload_outbox_uploaded += 1
+            log(f"[outbox] uploaded: {entry_id} attempts={job['attempts'] + 1}")
+            # CAM 완료 통지: 프론트에서 웹소켓으로 받아 경과시간 표시 및 다음 공정 진행
+            await _notify(job, "completed", "Filled STL 생성 완료", "green")
+            record_job_outcome(job.get("fileName"), "completed")
+            return True
+
+        job["attempts"] = int(job.get("attempts") or 0) + 1
+        job["lastError"] = job.get("lastError") or "upload/register failed"
+        if job["attempts"] >= settings.UPLOAD_MAX_ATTEMPTS:
+            dead_dir = _dead_root() / entry_id
+            try:
+                _write_job(entry_dir, job)
+                shutil.rmtree(dead_dir, ignore_errors=True)
+                dead_dir.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(entry_dir), str(dead_dir))
+            except Exception as e:
+                log(f"[outbox] move to dead failed {entry_id}: {e}")
+            state.upload_outbox_dead += 1
+            log(
+                f"[outbox] giving up: {entry_id} attempts={job['attempts']} "
+                f"requestId={job.get('requestId')}"
+            )
+            await _notify(job, "failed", "Filled STL 업로드/등록 실패", "rose")
+            record_job_outcome(job.get("fileName"), "failed", job.get("lastError"))
+            return False
+
+        wait = _backoff_sec(job["attempts"])
+        job["nextAttemptTs"] = time.time() + wait
+        _write_job(entry_dir, job)
+        state.upload_outbox_retries += 1
+        log(
+            f"[outbox] upload failed: {entry_id} attempt={job['attempts']}/"
+            f"{settings.UPLOAD_MAX_ATTEMPTS} retry in {wait:.0f}s"
+        )
+        return False
+    finally:
+        with _lock:
+            _attempting.discard(entry_id)
+
+
+def _due_entry_ids(now: float) -> list[str]:
+    """재시도 기한이 된(업로드 중이 아닌) outbox 항목 id. 디렉터리 목록 + job.json 읽기(blocking)."""
+    due = []
+    for entry_dir in _pending_dirs():
+        with _lock:
+            if entry_dir.name in _attempting:
+                continue
+        job = _read_job(entry_dir)
+        if job is None:
+            continue
+        if float(job.get("nextAttemptTs") or 0.0) <= now:
+            due.append(entry_dir.name)
+    return due
+
+
+async def outbox_retry_loop() -> None:
+    """기한이 된 outbox 항목을 다시 올린다. 기동 직후 첫 스캔이 재시작 전 잔여분을 처리한다."""
+    log(f"[outbox] retry loop started: dir={_root()}")
+    while True:
+        try:
+            # 스캔(디렉터리 목록 + JSON 읽기)은 스레드에서 해 이벤트 루프를 막지 않는다
+            due = await asyncio.to_thread(_due_entry_ids, time.time())
+            for entry_id in due:
+                if entry_id in _attempting:
+                    continue
+                asyncio.create_task(attempt(entry_id))
+            await asyncio.sleep(settings.UPLOAD_OUTBOX_SCAN_SEC)
+        except asyncio.CancelledError:
+            log("[outbox] retry loop cancelled")
+            break
+        except Exception as e:
+            log(f"[outbox] retry loop error: {e}")
+            await asyncio.sleep(5.0)
+
+
+def outbox_stats() -> dict:
+    pending = 0
+    oldest = None
+    for entry_dir in _pending_dirs():
+        job = _read_job(entry_dir)
+        if job is None:
+            continue
+        pending += 1
+        created = float(job.get("createdAt") or 0.0)
+        oldest = created if oldest is None else min(oldest, created)
+    try:
+        dead = sum(1 for d in _dead_root().iterdir() if d.is_dir())
+    except Exception:
+        dead = 0
+    return {
+        "pending": pending,
+        "uploading": len(_attempting),
+        "concurrency": settings.UPLOAD_CONCURRENCY,
+        "oldestAgeSec": round(time.time() - oldest, 1) if oldest else None,
+        "dead": dead,
+        "uploaded": state.upload_outbox_uploaded,
+        "retries": state.upload_outbox_retries,
+        "gaveUp": state.upload_outbox_dead,
+    }
@@ -29,9 +29,23 @@ STL 좌표계 자동 정렬 스크립트 (Rhino 내부 실행/라이브러리 
 import math
 import os
 import sys
+import time
+from collections import OrderedDict
 
 import Rhino.Geometry as rg
 
+# NumPy 단면/헥스 엔진(선택). Rhino 환경에 numpy가 없으면 기존 MeshPlane/면 루프 경로만 사용한다.
+try:
+    import mesh_kernel
+    import mesh_section
+    import mesh_hex
+    import mesh_moments
+except Exception:
+    mesh_kernel = None
+    mesh_section = None
+    mesh_hex = None
+    mesh_moments = None
+
 ALIGN_MODULE_VERSION = "2026-08-18.connection-z-origin-v1"
 DEFAULT_TARGET_DIAMETER = 3.33
 HEX_RESIDUAL_TARGET_DEG = 0.01
@@ -59,6 +73,23 @@ HOLE_AXIS_ORIGIN_SECTION_OFFSETS_MM = [
 ]
 SCREW_HOLE_DIAMETER_HINT_MM = 2.0
 
+# 외곽 단면 지표 계산 엔진: "numpy"(기본, 배치 Z 슬라이싱) | "rhino"(Z마다 MeshPlane)
+SECTION_ENGINE_ENV = "ABUTS_SECTION_ENGINE"
+
+# align 1회(잡) 동안 공유하는 단면 캐시 상한(Z 단면 항목 수, LRU)
+SECTION_CACHE_MAX_ENTRIES = 1024
+
+# 커넥션 Z 탐색용 외곽 단면 지표 테이블 간격(mm). 메시 Z 전 구간을 1회 sweep하고 보간해 답한다.
+# 0이면 끄고 Z마다 단면을 계산한다(numpy 엔진에서만 사용).
+SECTION_PROFILE_STEP_ENV = "ABUTS_SECTION_PROFILE_STEP_MM"
+DEFAULT_SECTION_PROFILE_STEP_MM = 0.05
+
+# 헥스 side-face 법선 관측치 엔진: "numpy"(기본, 전체 면 벡터 연산) | "rhino"(면 루프 + stride)
+HEX_ENGINE_ENV = "ABUTS_HEX_ENGINE"
+
+# align 1회 동안의 단면 엔진 누적 통계 (align_mesh_to_origin에서 초기화/요약 로그)
+SECTION_ENGINE_STATS = {}
+
 # target_diameter Z 탐색 성능 튜닝
 DIAMETER_SAMPLING_COARSE_COUNT = 56
 DIAMETER_SAMPLING_FINE_COUNT = 24
@@ -299,7 +330,322 @@ def _estimate_section_metrics_from_polyline(polyline):
     }
 
 
-def _outer_section_metrics_at_z(mesh, z_height, section_cache=None):
+def _section_engine():
+    if mesh_section is None or mesh_kernel is None:
+        return "rhino"
+    raw = os.environ.get(SECTION_ENGINE_ENV, "numpy").strip().lower()
+    return "rhino" if raw == "rhino" else "numpy"
+
+
+def _reset_section_engine_stats():
+    global SECTION_ENGINE_STATS
+    SECTION_ENGINE_STATS = {
+        "engine": _section_engine(),
+        "numpy_calls": 0,
+        "numpy_z": 0,
+        "numpy_sec": {},
+        "rhino_calls": 0,
+        "rhino_z": 0,
+        "rhino_sec": 0.0,
+        "cache_hits": 0,
+    }
+
+
+def _accumulate_section_stats(engine, z_count, timings=None, elapsed=0.0):
+    stats = SECTION_ENGINE_STATS
+    if not stats:
+        return
+    if engine == "numpy":
+        stats["numpy_calls"] += 1
+        stats["numpy_z"] += int(z_count)
+        acc = stats["numpy_sec"]
+        for k, v in (timings or {}).items():
+            acc[k] = acc.get(k, 0.0) + float(v)
+    else:
+        stats["rhino_calls"] += 1
+        stats["rhino_z"] += int(z_count)
+        stats["rhino_sec"] += float(elapsed)
+
+
+def _format_section_engine_stats():
+    stats = SECTION_ENGINE_STATS
+    if not stats:
+        return "unavailable"
+    numpy_part = "numpy_calls={} numpy_z={}".format(
+        stats["numpy_calls"], stats["numpy_z"]
+    )
+    if stats["numpy_sec"] and mesh_section is not None:
+        numpy_part += " " + mesh_section.format_timings(stats["numpy_sec"])
+    return "engine={} {} rhino_calls={} rhino_z={} rhino_sec={:.4f} cache_hits={}".format(
+        stats["engine"],
+        numpy_part,
+        stats["rhino_calls"],
+        stats["rhino_z"],
+        stats["rhino_sec"],
+        stats["cache_hits"],
+    )
+
+
+# -----------------------------------------------------------------------------
+# 단면 캐시 (align 단계 간 공유)
+#
+# section_cache는 dict 하나로, 단계 사이에 메시가 강체 변환돼도 버리지 않는다.
+# - entries: 단면 프레임 기준 Z 키 -> 폴리라인/외곽 지표 (LRU, SECTION_CACHE_MAX_ENTRIES)
+# - section_xf: 단면 프레임 -> 현재 메시 좌표 affine(3x4)
+#   Z 평면을 Z 평면으로 보내는 변환(Z 이동, XY 이동, Z축 회전, X축 180도 뒤집기)이면
+#   z_ref = (z - m23) / m22 로 캐시를 찾고 결과를 현재 좌표로 옮긴다.
+#   기울기 회전(스크류홀 축 정렬 등)이면 entries를 비우고 현재 좌표를 새 단면 프레임으로 삼는다.
+# - arrays: numpy 엔진용 (vertices, faces) 원본 프레임 배열 + xf(원본 -> 현재)
+#   어떤 강체 변환이든 배열은 변환만 하면 되므로 Rhino 메시 변환은 잡당 1회.
+#
+# 메시를 변환하는 단계는 반드시 _section_cache_note_transform/_translation으로 알려야 한다.
+# -----------------------------------------------------------------------------
+_AFFINE_IDENTITY = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+_AFFINE_EPS = 1e-9
+
+
+def _new_section_cache():
+    return _section_cache_init({})
+
+
+def _section_cache_init(cache):
+    # 예전처럼 빈 dict({})를 넘겨도 첫 사용 시 구조를 채운다.
+    if "entries" not in cache:
+        cache.update(
+            {
+                "entries": OrderedDict(),
+                "section_xf": _AFFINE_IDENTITY,
+                "xf": _AFFINE_IDENTITY,
+                "arrays": None,
+                "arrays_current": None,
+                "profile": None,
+                "stats": {
+                    "hits": 0,
+                    "mapped_hits": 0,
+                    "misses": 0,
+                    "meshplane_calls": 0,
+                    "meshplane_saved": 0,
+                    "outer_hits": 0,
+                    "arrays_built": 0,
+                    "arrays_mapped": 0,
+                    "transforms": 0,
+                    "invalidations": 0,
+                    "evictions": 0,
+                    "profile_builds": 0,
+                    "profile_queries": 0,
+                    "profile_planes": 0,
+                    "profile_sec": 0.0,
+                },
+            }
+        )
+    return cache
+
+
+def _affine_from_transform(xf):
+    return (
+        float(xf.M00), float(xf.M01), float(xf.M02), float(xf.M03),
+        float(xf.M10), float(xf.M11), float(xf.M12), float(xf.M13),
+        float(xf.M20), float(xf.M21), float(xf.M22), float(xf.M23),
+    )
+
+
+def _affine_compose(a, b):
+    """a ∘ b (b를 먼저 적용)."""
+    out = []
+    for r in range(3):
+        row = a[r * 4 : r * 4 + 4]
+        for c in range(4):
+            v = row[0] * b[c] + row[1] * b[4 + c] + row[2] * b[8 + c]
+            if c == 3:
+                v += row[3]
+            out.append(v)
+    return tuple(out)
+
+
+def _affine_is_identity(a):
+    return all(abs(x - y) <= _AFFINE_EPS for x, y in zip(a, _AFFINE_IDENTITY))
+
+
+def _affine_is_plane_preserving(a):
+    # Z 평면 -> Z 평면: 선형부가 Z축을 ±Z로, XY를 XY로 보낸다.
+    return (
+        abs(a[8]) <= 1e-7
+        and abs(a[9]) <= 1e-7
+        and abs(a[2]) <= 1e-7
+        and abs(a[6]) <= 1e-7
+        and abs(abs(a[10]) - 1.0) <= 1e-7
+    )
+
+
+def _affine_to_rhino(a):
+    xf = rg.Transform.Identity
+    xf.M00, xf.M01, xf.M02, xf.M03 = a[0], a[1], a[2], a[3]
+    xf.M10, xf.M11, xf.M12, xf.M13 = a[4], a[5], a[6], a[7]
+    xf.M20, xf.M21, xf.M22, xf.M23 = a[8], a[9], a[10], a[11]
+    return xf
+
+
+def _section_cache_note_affine(cache, step):
+    if cache is None:
+        return
+    _section_cache_init(cache)
+    stats = cache["stats"]
+    stats["transforms"] += 1
+    cache["xf"] = _affine_compose(step, cache["xf"])
+    cache["arrays_current"] = None
+    section_xf = _affine_compose(step, cache["section_xf"])
+    if _affine_is_plane_preserving(section_xf):
+        cache["section_xf"] = section_xf
+        return
+    if cache["entries"] or cache["profile"] is not None:
+        stats["invalidations"] += 1
+    cache["entries"].clear()
+    cache["profile"] = None
+    cache["section_xf"] = _AFFINE_IDENTITY
+
+
+def _section_cache_note_transform(cache, xf):
+    """mesh.Transform(xf) 직후 호출."""
+    if cache is None:
+        return
+    _section_cache_note_affine(cache, _affine_from_transform(xf))
+
+
+def _section_cache_note_translation(cache, dx, dy, dz):
+    """mesh.Translate(...) 직후 호출."""
+    _section_cache_note_affine(
+        cache,
+        (1.0, 0.0, 0.0, float(dx), 0.0, 1.0, 0.0, float(dy), 0.0, 0.0, 1.0, float(dz)),
+    )
+
+
+def _section_cache_ref_key(cache, z_height):
+    a = cache["section_xf"]
+    return _z_cache_key((float(z_height) - a[11]) / a[10])
+
+
+def _map_section_value(kind, value, a):
+    """단면 프레임 값을 현재 좌표로 옮긴다 (a = section_xf, 평면 보존)."""
+    if value is None:
+        return None
+    if kind == "outer":
+        cx = float(value["cx"])
+        cy = float(value["cy"])
+        mapped = dict(value)
+        mapped["cx"] = a[0] * cx + a[1] * cy + a[3]
+        mapped["cy"] = a[4] * cx + a[5] * cy + a[7]
+        return mapped
+    xf = _affine_to_rhino(a)
+    out = []
+    for pl in value:
+        dup = rg.Polyline(pl)
+        dup.Transform(xf)
+        out.append(dup)
+    return out
+
+
+def _section_cache_get(cache, kind, z_height):
+    """(hit, value). 단면 프레임과 현재 좌표가 다르면 변환한 값을 돌려준다."""
+    _section_cache_init(cache)
+    key = (kind, _section_cache_ref_key(cache, z_height))
+    entries = cache["entries"]
+    stats = cache["stats"]
+    if key not in entries:
+        stats["misses"] += 1
+        return False, None
+    entries.move_to_end(key)
+    value = entries[key]
+    stats["hits"] += 1
+    if kind == "poly":
+        stats["meshplane_saved"] += 1
+    else:
+        stats["outer_hits"] += 1
+    a = cache["section_xf"]
+    if _affine_is_identity(a):
+        return True, value
+    stats["mapped_hits"] += 1
+    return True, _map_section_value(kind, value, a)
+
+
+def _section_cache_put(cache, kind, z_height, value):
+    """현재 좌표 값을 단면 프레임으로 되돌려 저장한다."""
+    _section_cache_init(cache)
+    a = cache["section_xf"]
+    if not _affine_is_identity(a) and value is not None:
+        value = _map_section_value(kind, value, _affine_invert_rigid(a))
+    entries = cache["entries"]
+    key = (kind, _section_cache_ref_key(cache, z_height))
+    entries[key] = value
+    entries.move_to_end(key)
+    while len(entries) > SECTION_CACHE_MAX_ENTRIES:
+        entries.popitem(last=False)
+        cache["stats"]["evictions"] += 1
+
+
+def _affine_invert_rigid(a):
+    # 강체 변환: 선형부 R은 직교 -> R^-1 = R^T, t' = -R^T t
+    r = (a[0], a[1], a[2], a[4], a[5], a[6], a[8], a[9], a[10])
+    t = (a[3], a[7], a[11])
+    rt = (r[0], r[3], r[6], r[1], r[4], r[7], r[2], r[5], r[8])
+    return (
+        rt[0], rt[1], rt[2], -(rt[0] * t[0] + rt[1] * t[1] + rt[2] * t[2]),
+        rt[3], rt[4], rt[5], -(rt[3] * t[0] + rt[4] * t[1] + rt[5] * t[2]),
+        rt[6], rt[7], rt[8], -(rt[6] * t[0] + rt[7] * t[1] + rt[8] * t[2]),
+    )
+
+
+def _section_cache_stats(cache):
+    if not cache or "stats" not in cache:
+        return {}
+    out = dict(cache["stats"])
+    out["entries"] = len(cache["entries"])
+    return out
+
+
+def _format_section_cache_stats(cache):
+    stats = _section_cache_stats(cache)
+    if not stats:
+        return "unavailable"
+    return (
+        "hits={hits} mapped_hits={mapped_hits} misses={misses} outer_hits={outer_hits} "
+        "meshplane_calls={meshplane_calls} meshplane_saved={meshplane_saved} "
+        "arrays_built={arrays_built} arrays_mapped={arrays_mapped} transforms={transforms} "
+        "invalidations={invalidations} evictions={evictions} entries={entries} "
+        "profile_builds={profile_builds} profile_planes={profile_planes} "
+        "profile_queries={profile_queries} profile_sec={profile_sec:.4f}"
+    ).format(**stats)
+
+
+def _mesh_arrays_for_sections(mesh, section_cache=None):
+    """
+    단면 엔진용 (vertices, faces) 배열(현재 좌표).
+    Rhino 메시 변환은 캐시당 1회만 하고, 이후 단계는 누적 변환(xf)을 배열에 적용한다.
+    """
+    if section_cache is None:
+        return mesh_kernel.from_rhino_mesh(mesh)
+    _section_cache_init(section_cache)
+    current = section_cache.get("arrays_current")
+    if current is not None:
+        return current
+    base = section_cache.get("arrays")
+    if base is None:
+        vertices, faces = mesh_kernel.from_rhino_mesh(mesh)
+        section_cache["arrays"] = (vertices, faces)
+        section_cache["xf"] = _AFFINE_IDENTITY
+        section_cache["stats"]["arrays_built"] += 1
+        current = (vertices, faces)
+    else:
+        vertices, faces = base
+        a = section_cache["xf"]
+        if not _affine_is_identity(a):
+            vertices = mesh_kernel.apply_affine(vertices, a)
+            section_cache["stats"]["arrays_mapped"] += 1
+        current = (vertices, faces)
+    section_cache["arrays_current"] = current
+    return current
+
+
+def _outer_section_metrics_at_z_rhino(mesh, z_height, section_cache=None):
     polylines = _mesh_plane_polylines(mesh, z_height, cache=section_cache)
     if not polylines:
         return None
@@ -314,6 +660,170 @@ def _outer_section_metrics_at_z(mesh, z_height, section_cache=None):
     return best
 
 
+def _outer_section_metrics_batch(mesh, z_values, section_cache=None):
+    """
+    여러 Z의 외곽 단면 지표를 한 번에 계산한다.
+    numpy 엔진이면 삼각형 배열 1회 순회로 모든 Z를 슬라이스하고,
+    아니면 Z마다 MeshPlane을 호출한다. 결과는 section_cache에 ("outer", z_key)로 저장
+    (단계 간 평면 보존 변환이면 다음 단계에서 변환해 재사용).
+    """
+    zs = [float(z) for z in z_values]
+    out = [None] * len(zs)
+    missing = []
+    for i, z in enumerate(zs):
+        if section_cache is not None:
+            hit, value = _section_cache_get(section_cache, "outer", z)
+            if hit:
+                out[i] = value
+                if SECTION_ENGINE_STATS:
+                    SECTION_ENGINE_STATS["cache_hits"] += 1
+                continue
+        missing.append(i)
+    if not missing:
+        return out
+
+    computed = None
+    if _section_engine() == "numpy":
+        try:
+            vertices, faces = _mesh_arrays_for_sections(mesh, section_cache)
+            computed, timings = mesh_section.outer_section_metrics(
+                vertices, faces, [zs[i] for i in missing]
+            )
+            _accumulate_section_stats("numpy", len(missing), timings=timings)
+        except Exception as e:
+            _log_error("numpy section engine failed; fallback to MeshPlane: {}".format(e))
+            computed = None
+
+    if computed is None:
+        started = time.perf_counter()
+        computed = [
+            _outer_section_metrics_at_z_rhino(mesh, zs[i], section_cache=section_cache)
+            for i in missing
+        ]
+        _accumulate_section_stats(
+            "rhino", len(missing), elapsed=time.perf_counter() - started
+        )
+
+    for i, metrics in zip(missing, computed):
+        out[i] = metrics
+        if section_cache is not None:
+            _section_cache_put(section_cache, "outer", zs[i], metrics)
+    return out
+
+
+def _outer_section_metrics_at_z(mesh, z_height, section_cache=None):
+    return _outer_section_metrics_batch(mesh, [z_height], section_cache=section_cache)[0]
+
+
+def _section_profile_step():
+    try:
+        return float(
+            os.environ.get(SECTION_PROFILE_STEP_ENV, DEFAULT_SECTION_PROFILE_STEP_MM)
+        )
+    except Exception:
+        return DEFAULT_SECTION_PROFILE_STEP_MM
+
+
+def _section_profile(mesh, section_cache):
+    """
+    단면 프레임 기준 외곽 단면 지표 테이블. 없으면 메시 Z 전 구간을 1회 sweep해 만든다.
+    numpy 엔진이 아니거나 끈 경우(간격 0), 생성 실패 시 None.
+    """
+    if section_cache is None or _section_engine() != "numpy":
+        return None
+    step = _section_profile_step()
+    if step <= 0:
+        return None
+    _section_cache_init(section_cache)
+    profile = section_cache.get("profile")
+    if profile is not None:
+        return profile or None
+
+    started = time.perf_counter()
+    try:
+        vertices, faces = _mesh_arrays_for_sections(mesh, section_cache)
+        if faces.shape[0] == 0:
+            section_cache["profile"] = {}
+            return None
+        vz = vertices[faces.reshape(-1), 2]
+        profile, timings = mesh_section.build_section_profile(
+            vertices, faces, float(vz.min()), float(vz.max()), step
+        )
+    except Exception as e:
+        _log_error("section profile build failed; per-Z sections: {}".format(e))
+        section_cache["profile"] = {}
+        return None
+    _accumulate_section_stats("numpy", profile["z"].shape[0], timings=timings)
+
+    # 현재 좌표 -> 단면 프레임 (Z 뒤집기면 Z 오름차순이 되도록 행을 뒤집는다)
+    a = section_cache["section_xf"]
+    if not _affine_is_identity(a):
+        inv = _affine_invert_rigid(a)
+        z_ref = (profile["z"] - a[11]) / a[10]
+        table = profile["table"].copy()
+        cx = table[:, 0].copy()
+        cy = table[:, 1].copy()
+        table[:, 0] = inv[0] * cx + inv[1] * cy + inv[3]
+        table[:, 1] = inv[4] * cx + inv[5] * cy + inv[7]
+        if a[10] < 0:
+            z_ref = z_ref[::-1].copy()
+            table = table[::-1].copy()
+        profile = {"z": z_ref, "table": table, "z_step": profile["z_step"]}
+
+    stats = section_cache["stats"]
+    stats["profile_builds"] += 1
+    stats["profile_planes"] += int(profile["z"].shape[0])
+    stats["profile_sec"] += time.perf_counter() - started
+    section_cache["profile"] = profile
+    return profile
+
+
+def _outer_section_metrics_profiled(mesh, z_values, section_cache=None):
+    """
+    외곽 단면 지표를 테이블 보간으로 답한다(커넥션 Z 탐색용 근사).
+    테이블을 쓸 수 없으면 _outer_section_metrics_batch로 정확히 계산한다.
+    """
+    zs = [float(z) for z in z_values]
+    profile = _section_profile(mesh, section_cache)
+    if profile is None:
+        return _outer_section_metrics_batch(mesh, zs, section_cache=section_cache)
+    a = section_cache["section_xf"]
+    out = mesh_section.query_section_profile(
+        profile, [(z - a[11]) / a[10] for z in zs]
+    )
+    section_cache["stats"]["profile_queries"] += len(zs)
+    if not _affine_is_identity(a):
+        out = [_map_section_value("outer", m, a) for m in out]
+    return out
+
+
+def _section_profile_diagnostics(section_cache, digits=4):
+    """job 결과 진단용: 현재 좌표 기준 테이블(Z 오름차순). 테이블이 없으면 None."""
+    if not section_cache or not section_cache.get("profile"):
+        return None
+    profile = section_cache["profile"]
+    a = section_cache["section_xf"]
+    z = profile["z"] * a[10] + a[11]
+    table = profile["table"]
+    order = list(range(len(z)))
+    if a[10] < 0:
+        order.reverse()
+
+    def _col(values):
+        return [
+            None if values[i] != values[i] else round(float(values[i]), digits)
+            for i in order
+        ]
+
+    return {
+        "zStart": round(float(z[order[0]]), digits),
+        "zStep": round(float(profile["z_step"]), digits),
+        "d": _col(table[:, 3]),
+        "circularity": _col(table[:, 4]),
+        "hexRatio": _col(table[:, 5]),
+    }
+
+
 def _score_connection_z_candidate(z, metrics, target_diameter, z_min, z_max):
     """
     커넥션 Z 후보 점수(낮을수록 좋음).
@@ -519,11 +1029,10 @@ def _z_cache_key(z_height, q=1e-5):
 
 
 def _mesh_plane_polylines(mesh, z_height, cache=None):
-    key = None
     if cache is not None:
-        key = _z_cache_key(z_height)
-        if key in cache:
-            return cache[key]
+        hit, polylines = _section_cache_get(cache, "poly", z_height)
+        if hit:
+            return polylines
 
     plane = rg.Plane(rg.Point3d(0, 0, z_height), rg.Vector3d(0, 0, 1))
     polylines = rg.Intersect.Intersection.MeshPlane(mesh, plane)
@@ -532,7 +1041,8 @@ def _mesh_plane_polylines(mesh, z_height, cache=None):
         polylines = []
 
     if cache is not None:
-        cache[key] = polylines
+        cache["stats"]["meshplane_calls"] += 1
+        _section_cache_put(cache, "poly", z_height, list(polylines))
 
     return polylines
 
@@ -569,10 +1079,10 @@ def find_circle_at_z(mesh, z_height, section_cache=None):
     """
     기존 호환 API: 해당 Z 단면에서 가장 바깥 원(최대 반지름)을 반환
     """
-    circles = find_all_circles_at_z(mesh, z_height, section_cache=section_cache)
-    if not circles:
+    metrics = _outer_section_metrics_at_z(mesh, z_height, section_cache=section_cache)
+    if metrics is None:
         return None
-    return max(circles, key=lambda c: c[2])
+    return (metrics["cx"], metrics["cy"], metrics["r"])
 
 
 def _wrap_angle_deg(value, period=360.0):
@@ -795,9 +1305,63 @@ def _filter_hex_observations_to_outer_planar_flats(raw_entries, target_r=None):
     return seed_observations
 
 
+def _hex_engine():
+    if mesh_hex is None or mesh_kernel is None:
+        return "rhino"
+    raw = os.environ.get(HEX_ENGINE_ENV, "numpy").strip().lower()
+    return "rhino" if raw == "rhino" else "numpy"
+
+
+def _has_hex_observations(observations):
+    # numpy 엔진은 (N, 2) 배열을 반환하므로 truthiness 대신 길이로 판단한다.
+    return observations is not None and len(observations) > 0
+
+
+def _is_hex_observation_array(observations):
+    return mesh_hex is not None and hasattr(observations, "shape")
+
+
 def _collect_hex_face_normal_observations(mesh):
     """
     헥스 구간 side-face 법선 관측치 수집.
+    반환: numpy 엔진이면 (N, 2) 배열 [angle_deg, weight], rhino 엔진이면 [(angle_deg, weight), ...]
+
+    numpy 엔진은 전체 면을 한 번에 처리하므로 대형 메시에서도 face_stride를 쓰지 않는다.
+    numpy 경로가 실패하면 기존 면 루프로 폴백한다.
+    """
+    if _hex_engine() == "numpy":
+        try:
+            t0 = time.perf_counter()
+            vertices, faces = mesh_kernel.from_rhino_mesh(mesh)
+            t1 = time.perf_counter()
+            observations = mesh_hex.collect_face_normal_observations(
+                vertices,
+                faces,
+                target_diameter=os.environ.get("ABUTS_CONNECTION_TARGET_DIAMETER", "").strip() or None,
+            )
+            t2 = time.perf_counter()
+            _log(
+                "Hex face normals: engine=numpy faces={} samples={} convert={:.4f}s collect={:.4f}s".format(
+                    int(faces.shape[0]), int(observations.shape[0]), t1 - t0, t2 - t1
+                )
+            )
+            return observations
+        except Exception as e:
+            _log_error("Hex face normals numpy engine failed, fallback to rhino: {}".format(e))
+
+    t0 = time.perf_counter()
+    observations = _collect_hex_face_normal_observations_rhino(mesh)
+    _log(
+        "Hex face normals: engine=rhino faces={} samples={} collect={:.4f}s".format(
+            int(mesh.Faces.Count), len(observations), time.perf_counter() - t0
+        )
+    )
+    return observations
+
+
+def _collect_hex_face_normal_observations_rhino(mesh):
+    """
+    헥스 구간 side-face 법선 관측치 수집 (Rhino 면 루프).
     반환: [(angle_deg, weight), ...]
 
     one-shot 정렬 정확도를 위해:
@@ -930,8 +1494,10 @@ def _cluster_hex_face_normals(observations):
     6방향(60도 주기)으로 법선 각도를 클러스터링.
     반환: {phase_deg, clusters:[{angle_deg,weight,count}], samples}
     """
-    if not observations:
+    if not _has_hex_observations(observations):
         return None
+    if _is_hex_observation_array(observations):
+        return mesh_hex.cluster_hex_face_normals(observations)
 
     sx = 0.0
     cx6 = 0.0
@@ -993,8 +1559,10 @@ def _compute_hex_phase_from_face_normal_observations(observations):
     관측된 side-face 법선 각도들로 60도 주기 위상을 계산.
     반환: {phase_deg, coherence, sum_w}
     """
-    if not observations:
+    if not _has_hex_observations(observations):
         return None
+    if _is_hex_observation_array(observations):
+        return mesh_hex.compute_hex_phase(observations)
 
     sum_w = 0.0
     sx = 0.0
@@ -1036,6 +1604,11 @@ def _compute_hex_phase_from_face_normal_observations_robust(observations):
     1) 전체 샘플로 초기 위상 계산
     2) 60도 격자 인라이어만 재가중해서 위상 재계산
     """
+    if _is_hex_observation_array(observations):
+        return mesh_hex.compute_hex_phase_robust(
+            observations, inlier_deg=float(HEX_ROBUST_INLIER_DEG)
+        )
+
     base = _compute_hex_phase_from_face_normal_observations(observations)
     if base is None:
         return None
@@ -1088,7 +1661,7 @@ def _estimate_hex_rotation_delta_deg_from_face_normals(mesh):
     계산된 delta를 한 번만 적용하도록 Z회전량을 산출.
     """
     observations = _collect_hex_face_normal_observations(mesh)
-    if not observations:
+    if not _has_hex_observations(observations):
         return None
 
     solved = _compute_hex_phase_from_face_normal_observations_robust(observations)
@@ -1122,7 +1695,7 @@ def _estimate_hex_rotation_delta_deg_from_dominant_cluster(mesh):
     평균 phase가 흔들리는 케이스에서 더 안정적으로 동작한다.
     """
     observations = _collect_hex_face_normal_observations(mesh)
-    if not observations:
+    if not _has_hex_observations(observations):
         return None
 
     cluster_info = _cluster_hex_face_normals(observations)
@@ -1238,7 +1811,7 @@ def _estimate_hex_rotation_delta_deg(mesh):
     # 단순화: 6개 헥스 면 각도 클러스터를 만들고,
     # 가장 강한 면 법선을 ±X(0/180deg)로 맞추는 회전량을 사용한다.
     observations = _collect_hex_face_normal_observations(mesh)
-    if not observations:
+    if not _has_hex_observations(observations):
         return None
 
     cluster_info = _cluster_hex_face_normals(observations)
@@ -1273,7 +1846,7 @@ def _measure_hex_residual_to_x_deg_from_observations(observations):
     60도 격자 위상(phase mod 60)을 직접 residual로 사용한다.
     -> 한 면의 각인/국소 노이즈가 dominant를 오염시켜도 잔차가 과소평가되지 않도록 개선.
     """
-    if not observations:
+    if not _has_hex_observations(observations):
         return None
 
     solved = _compute_hex_phase_from_face_normal_observations_robust(observations)
@@ -1390,15 +1963,44 @@ def _bbox_axis_lengths(mesh):
     return bbox, lx, ly, lz
 
 
-def _estimate_principal_axis(mesh, max_iters=24):
+def _estimate_principal_axis(mesh, max_iters=24, section_cache=None):
     """
-    정점 분포의 공분산에서 주축(최대 고유벡터)을 power iteration으로 근사.
+    정점 분포의 공분산에서 주축(최대 고유벡터)을 구한다.
+    numpy가 있으면 mesh_moments(공분산 + eigh, 정점 배열은 section_cache와 공유),
+    없으면 정점 루프 + power iteration으로 근사.
     반환: rg.Vector3d 또는 None
     """
     n = int(mesh.Vertices.Count)
     if n < 3:
         return None
 
+    # 초기벡터/부호 기준은 bbox 최장축 방향(수렴 안정성)
+    bbox, lx, ly, lz = _bbox_axis_lengths(mesh)
+    if lx >= ly and lx >= lz:
+        hint = (1.0, 0.0, 0.0)
+    elif ly >= lx and ly >= lz:
+        hint = (0.0, 1.0, 0.0)
+    else:
+        hint = (0.0, 0.0, 1.0)
+
+    if mesh_moments is not None and mesh_kernel is not None:
+        try:
+            if section_cache is not None:
+                vertices = _mesh_arrays_for_sections(mesh, section_cache)[0]
+            else:
+                vertices = mesh_moments.vertices_from_rhino_mesh(mesh)
+            axis = mesh_moments.major_axis(
+                mesh_moments.weighted_moments(vertices), hint=hint
+            )
+            if axis is None:
+                return None
+            out = rg.Vector3d(float(axis[0]), float(axis[1]), float(axis[2]))
+            if out.IsTiny(1e-10) or not out.Unitize():
+                return None
+            return out
+        except Exception as e:
+            _log_error("numpy principal axis failed; power iteration: {}".format(e))
+
     mx = my = mz = 0.0
     for i in range(n):
         v = mesh.Vertices[i]
@@ -1422,15 +2024,7 @@ def _estimate_principal_axis(mesh, max_iters=24):
         cyz += dy * dz
         czz += dz * dz
 
-    # 초기벡터는 bbox 최장축 방향으로 시작(수렴 안정성)
-    bbox, lx, ly, lz = _bbox_axis_lengths(mesh)
-    if lx >= ly and lx >= lz:
-        vx, vy, vz = 1.0, 0.0, 0.0
-    elif ly >= lx and ly >= lz:
-        vx, vy, vz = 0.0, 1.0, 0.0
-    else:
-        vx, vy, vz = 0.0, 0.0, 1.0
-
+    vx, vy, vz = hint
     for _ in range(int(max(4, max_iters))):
         nx = cxx * vx + cxy * vy + cxz * vz
         ny = cxy * vx + cyy * vy + cyz * vz
@@ -1451,7 +2045,7 @@ def _estimate_principal_axis(mesh, max_iters=24):
     return out
 
 
-def _rotate_longest_axis_to_z(mesh):
+def _rotate_longest_axis_to_z(mesh, section_cache=None):
     bbox, lx, ly, lz = _bbox_axis_lengths(mesh)
     center = bbox.Center
 
@@ -1466,7 +2060,7 @@ def _rotate_longest_axis_to_z(mesh):
         _log("BBox longest axis already Z; skip principal-axis rotation")
         return False
 
-    principal = _estimate_principal_axis(mesh)
+    principal = _estimate_principal_axis(mesh, section_cache=section_cache)
     if principal is None:
         # 폴백: 기존 월드축 기반 판단
         axis = "Z"
@@ -1484,6 +2078,7 @@ def _rotate_longest_axis_to_z(mesh):
 
         rot = rg.Transform.Rotation(from_vec, rg.Vector3d(0, 0, 1), center)
         if mesh.Transform(rot):
+            _section_cache_note_transform(section_cache, rot)
             _log("Rotated longest axis {} -> Z (fallback)".format(axis))
             return True
 
@@ -1514,6 +2109,7 @@ def _rotate_longest_axis_to_z(mesh):
 
     rot = rg.Transform.Rotation(principal, to_vec, center)
     if mesh.Transform(rot):
+        _section_cache_note_transform(section_cache, rot)
         _log("Rotated principal longest axis -> Z")
         return True
 
@@ -2071,6 +2667,7 @@ def _align_screw_hole_axis_to_z(
     target_diameter=None,
     prefer_origin=False,
     hole_diameter_hint=SCREW_HOLE_DIAMETER_HINT_MM,
+    section_cache=None,
 ):
     """
     스크류 홀 축을 추정해 Z축 정렬 + XY 중심 원점 이동.
@@ -2081,7 +2678,11 @@ def _align_screw_hole_axis_to_z(
 
     동작 보장:
     - tilt가 작아도 XY 중심 보정은 1회 이상 수행
+
+    section_cache를 주면 XY 이동 전후 단면을 공유한다(축 회전 시에는 캐시가 스스로 비워진다).
     """
+    if section_cache is None:
+        section_cache = _new_section_cache()
 
     def _refit(prefer_refine=False):
         return _fit_hole_axis_preferred(
@@ -2092,7 +2693,7 @@ def _align_screw_hole_axis_to_z(
                 else HOLE_AXIS_BASE_SAMPLE_COUNT
             ),
             target_diameter=target_diameter,
-            section_cache={},
+            section_cache=section_cache,
             prefer_origin=prefer_origin,
             hole_diameter_hint=hole_diameter_hint,
         )
@@ -2112,6 +2713,7 @@ def _align_screw_hole_axis_to_z(
             dx = -float(p0.X)
             dy = -float(p0.Y)
             mesh.Translate(rg.Vector3d(dx, dy, 0))
+            _section_cache_note_translation(section_cache, dx, dy, 0.0)
             total_xy_dx += dx
             total_xy_dy += dy
             _log("Screw hole axis XY translated by ({:.5f}, {:.5f})".format(dx, dy))
@@ -2144,6 +2746,7 @@ def _align_screw_hole_axis_to_z(
         rot = rg.Transform.Rotation(axis_dir, z_axis, axis_point)
         if not mesh.Transform(rot):
             return (False, "Failed to rotate screw hole axis to Z")
+        _section_cache_note_transform(section_cache, rot)
 
         info2 = _refit(prefer_refine=True)
         if info2 is None:
@@ -2173,7 +2776,7 @@ def _align_screw_hole_axis_to_z(
     )
 
 
-def _enforce_longer_side_to_plus_z(mesh, eps=0.03):
+def _enforce_longer_side_to_plus_z(mesh, eps=0.03, section_cache=None):
     """
     방향 강제 규칙:
     z=0 기준으로 +Z 방향 모델 길이와 -Z 방향 모델 길이를 비교해,
@@ -2202,6 +2805,7 @@ def _enforce_longer_side_to_plus_z(mesh, eps=0.03):
             rg.Point3d(0, 0, 0),
         )
         if mesh.Transform(rot):
+            _section_cache_note_transform(section_cache, rot)
             _log("Flipped mesh 180° around X: enforced longer side to +Z")
             return True
         _log_error("Failed to flip mesh for length-probe orientation")
@@ -2216,34 +2820,50 @@ def find_z_for_diameter(
 ):
     """
     외부 직경이 target_diameter가 되는 Z 높이를 이진 탐색으로 찾기
+    (외곽 반경은 단면 지표 테이블 보간으로 좁히고, 결과 Z는 실제 단면으로 다시 확인한다)
     """
     target_radius = target_diameter / 2.0
-    iterations = 0
     max_iterations = 50
 
-    while iterations < max_iterations and (z_max - z_min) > 0.001:
-        z_mid = (z_min + z_max) / 2.0
-        result = find_circle_at_z(mesh, z_mid, section_cache=section_cache)
+    def _profiled(z):
+        return _outer_section_metrics_profiled(mesh, [z], section_cache=section_cache)[0]
+
+    def _exact(z):
+        return _outer_section_metrics_at_z(mesh, z, section_cache=section_cache)
 
-        if result is None:
-            z_max = z_mid
+    def _bisect(lo, hi, metrics_at):
+        iterations = 0
+        while iterations < max_iterations and (hi - lo) > 0.001:
+            z_mid = (lo + hi) / 2.0
+            metrics = metrics_at(z_mid)
             iterations += 1
-            continue
 
-        _, _, radius = result
-        diff = abs(radius - target_radius)
+            if metrics is None:
+                hi = z_mid
+                continue
 
-        if diff < tolerance:
-            return z_mid
+            radius = metrics["r"]
+            if abs(radius - target_radius) < tolerance:
+                return z_mid
 
-        if radius > target_radius:
-            z_min = z_mid
-        else:
-            z_max = z_mid
+            if radius > target_radius:
+                lo = z_mid
+            else:
+                hi = z_mid
 
-        iterations += 1
+        return (lo + hi) / 2.0
 
-    return (z_min + z_max) / 2.0
+    z_hit = _bisect(z_min, z_max, _profiled)
+    exact = _exact(z_hit)
+    if exact is not None and abs(exact["r"] - target_radius) < tolerance:
+        return z_hit
+
+    # 보간 오차로 허용치를 벗어났으면 테이블 몇 칸 안에서 실제 단면으로 다시 이분 탐색한다
+    profile = section_cache.get("profile") if section_cache else None
+    window = 2.0 * float(profile["z_step"]) if profile else 0.0
+    if window <= 0.0:
+        return z_hit
+    return _bisect(max(z_min, z_hit - window), min(z_max, z_hit + window), _exact)
 
 
 def _find_best_z_for_diameter_by_sampling(
@@ -2260,6 +2880,7 @@ def _find_best_z_for_diameter_by_sampling(
 
     직경 오차만 쓰면 교합면 개구·헥스 외접원이 이긴다.
     원형성/헥스비/메시 상단 여부를 함께 채점한다.
+    후보 채점은 단면 지표 테이블 보간으로 하고, 고른 Z만 실제 단면으로 다시 계산한다.
 
     Returns:
         (z_best, best_err, circle_info) or (None, None, None)
@@ -2274,26 +2895,29 @@ def _find_best_z_for_diameter_by_sampling(
 
     best = None  # (score, diameter_err, z, metrics)
 
-    def _consider(z):
+    def _consider_batch(z_list):
         nonlocal best
-        metrics = _outer_section_metrics_at_z(
-            mesh, z, section_cache=section_cache
+        batch = _outer_section_metrics_profiled(
+            mesh, z_list, section_cache=section_cache
         )
-        if metrics is None:
-            return
-        diameter_err = abs(float(metrics["d"]) - float(target_diameter))
-        score = _score_connection_z_candidate(
-            z, metrics, target_diameter, z_min, z_max
-        )
-        cand = (score, diameter_err, z, metrics)
-        if best is None or cand[0] < best[0]:
-            best = cand
-
-    # 1) coarse
-    for i in range(coarse_n):
-        t = (i + 0.5) / float(coarse_n)
-        z = z_min + (z_max - z_min) * t
-        _consider(z)
+        for z, metrics in zip(z_list, batch):
+            if metrics is None:
+                continue
+            diameter_err = abs(float(metrics["d"]) - float(target_diameter))
+            score = _score_connection_z_candidate(
+                z, metrics, target_diameter, z_min, z_max
+            )
+            cand = (score, diameter_err, z, metrics)
+            if best is None or cand[0] < best[0]:
+                best = cand
+
+    # 1) coarse (배치 슬라이스 1회)
+    _consider_batch(
+        [
+            z_min + (z_max - z_min) * ((i + 0.5) / float(coarse_n))
+            for i in range(coarse_n)
+        ]
+    )
 
     if best is None:
         return (None, None, None)
@@ -2308,12 +2932,18 @@ def _find_best_z_for_diameter_by_sampling(
     f_max = min(z_max, z_best + z_window)
 
     if f_max - f_min > 1e-6 and fine_n > 0:
-        for i in range(fine_n):
-            t = (i + 0.5) / float(fine_n)
-            z = f_min + (f_max - f_min) * t
-            _consider(z)
+        _consider_batch(
+            [
+                f_min + (f_max - f_min) * ((i + 0.5) / float(fine_n))
+                for i in range(fine_n)
+            ]
+        )
 
     score, diameter_err, z_hit, metrics = best
+    exact = _outer_section_metrics_at_z(mesh, z_hit, section_cache=section_cache)
+    if exact is not None:
+        metrics = exact
+        diameter_err = abs(float(metrics["d"]) - float(target_diameter))
     circle = (metrics["cx"], metrics["cy"], metrics["r"])
     _log(
         "Diameter sample pick: z={:.3f} d={:.3f} err={:.4f} score={:.4f} "
@@ -2334,6 +2964,7 @@ def _translate_z_to_target_diameter_zero(
     target_diameter,
     stage_label="",
     prefer_negative_side=False,
+    section_cache=None,
 ):
     """
     현재 메시에서 target_diameter 단면의 Z를 찾아, 해당 단면이 Z=0이 되도록 Z축 평행이동.
@@ -2341,6 +2972,8 @@ def _translate_z_to_target_diameter_zero(
     Args:
         prefer_negative_side:
             True면 -Z(임플란트/포스트) 측 구간에서 먼저 직경 매칭을 시도한다.
+        section_cache:
+            align 단계 간 공유 단면 캐시. 이전 단계 단면을 Z 이동만큼 옮겨 재사용한다.
 
     Returns:
         (ok, message, translation_vec)
@@ -2355,7 +2988,8 @@ def _translate_z_to_target_diameter_zero(
 
     z_target = None
 
-    section_cache = {}
+    if section_cache is None:
+        section_cache = _new_section_cache()
 
     # 전 구간 샘플링이 기본. 이진탐색은 교합면 개구의 허위 직경에 수렴한다.
     z_full, err_full, _circle_full = _find_best_z_for_diameter_by_sampling(
@@ -2456,6 +3090,7 @@ def _translate_z_to_target_diameter_zero(
     # (구버전 로직 유지) Z만 평행이동
     translation = rg.Vector3d(0, 0, -z_target)
     mesh.Translate(translation)
+    _section_cache_note_translation(section_cache, 0.0, 0.0, -z_target)
     _log("{}Applied Z translation: {:.3f}".format(prefix, translation.Z))
 
     return (True, "ok", translation)
@@ -2481,9 +3116,14 @@ def align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
         return (False, "Invalid mesh", None)
 
     _log("align module version={}".format(ALIGN_MODULE_VERSION))
+    _reset_section_engine_stats()
+
+    # 이후 단계(Z-1 ~ Z-3, 홀축)가 공유하는 단면 캐시. 각 단계의 메시 변환을 누적 추적한다.
+    # (주축 추정에서 만든 정점 배열도 여기에 두고 이후 단계가 변환만 해 재사용한다)
+    section_cache = _new_section_cache()
 
     # 0) BBox 최장축을 Z로 정렬
-    _rotate_longest_axis_to_z(mesh)
+    _rotate_longest_axis_to_z(mesh, section_cache=section_cache)
 
     # 1) 임플란트 정보/명시값으로 목표 직경 결정
     #    (홀축 추정의 반경 가중치 힌트로도 사용)
@@ -2504,6 +3144,7 @@ def align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
         resolved_diameter,
         stage_label="[Z-1]",
         prefer_negative_side=False,
+        section_cache=section_cache,
     )
     if not ok_z1 or translation_1 is None:
         return (False, z1_msg or "Z-1 alignment failed", None)
@@ -2516,6 +3157,7 @@ def align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
         resolved_diameter,
         stage_label="[Z-2]",
         prefer_negative_side=True,
+        section_cache=section_cache,
     )
     if not ok_z2 or translation_2 is None:
         return (False, z2_msg or "Z-2 alignment failed", None)
@@ -2527,7 +3169,7 @@ def align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
 
     # 4) 방향 보정(사용자 지정):
     #    Z-2 기준 원점에서 +Z/-Z 길이를 비교해 긴 쪽이 +Z가 되도록 강제
-    flipped = _enforce_longer_side_to_plus_z(mesh)
+    flipped = _enforce_longer_side_to_plus_z(mesh, section_cache=section_cache)
 
     #    flip이 발생하면 target_diameter 단면을 다시 Z=0으로 재고정
     if flipped:
@@ -2536,6 +3178,7 @@ def align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
             resolved_diameter,
             stage_label="[Z-2b]",
             prefer_negative_side=True,
+            section_cache=section_cache,
         )
         if not ok_z2b or translation_2b is None:
             return (False, z2b_msg or "Z-2b alignment failed", None)
@@ -2551,6 +3194,7 @@ def align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
         target_diameter=resolved_diameter,
         prefer_origin=True,
         hole_diameter_hint=SCREW_HOLE_DIAMETER_HINT_MM,
+        section_cache=section_cache,
     )
     if ok_hole:
         _log("{}".format(hole_msg))
@@ -2563,6 +3207,7 @@ def align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
         resolved_diameter,
         stage_label="[Z-3]",
         prefer_negative_side=True,
+        section_cache=section_cache,
     )
     if not ok_z3 or translation_3 is None:
         return (False, z3_msg or "Z-3 alignment failed", None)
@@ -2607,10 +3252,15 @@ def align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
             "aligned": bool(ok_hex),
             "message": hex_msg,
         },
+        "sectionEngine": dict(SECTION_ENGINE_STATS),
+        "sectionCache": _section_cache_stats(section_cache),
+        "sectionProfile": _section_profile_diagnostics(section_cache),
     }
 
     _log("Final Z translation(last stage): {:.3f}".format(translation_3.Z))
     _log("Final Z translation(total): {:.3f}".format(total_translation.Z))
+    _log("section-engine summary: {}".format(_format_section_engine_stats()))
+    _log("section-cache summary: {}".format(_format_section_cache_stats(section_cache)))
 
     final_bbox = mesh.GetBoundingBox(True)
     _log(
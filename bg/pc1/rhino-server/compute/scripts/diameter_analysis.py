@@ -2,46 +2,151 @@
 # - bg/pc1/rhino-server/rules.md
 # - bg/pc1/rhino-server/compute/scripts/process_abutment_stl.py
 # - bg/pc1/rhino-server/compute/scripts/align_stl_coordinate.py
+# - bg/pc1/rhino-server/compute/scripts/mesh_kernel.py
 # - web/backend/controllers/bg/bg.controller.js
+import os
+
 import Rhino
 
+# NumPy 엔진(선택). Rhino 환경에 numpy가 없으면 기존 정점/면 루프만 사용한다.
+try:
+    import mesh_kernel
+except Exception:
+    mesh_kernel = None
 
-def analyze_diameters(doc):
-    max_r = 0.0
-    conn_r = 0.0
+# 직경 계산 엔진: "numpy"(기본, 정점/엣지 배열 1회 순회 + 반경 프로파일) | "rhino"(정점/면 루프)
+DIAMETER_ENGINE_ENV = "ABUTS_DIAMETER_ENGINE"
+# 반경 프로파일 r_max(z) Z 간격(mm). 0이면 프로파일을 만들지 않는다.
+PROFILE_STEP_ENV = "ABUTS_RADIAL_PROFILE_STEP_MM"
+DEFAULT_PROFILE_STEP_MM = 0.1
+
+
+def _diameter_engine():
+    if mesh_kernel is None:
+        return "rhino"
+    raw = os.environ.get(DIAMETER_ENGINE_ENV, "numpy").strip().lower()
+    return "rhino" if raw == "rhino" else "numpy"
+
+
+def _profile_step():
+    try:
+        return float(os.environ.get(PROFILE_STEP_ENV, DEFAULT_PROFILE_STEP_MM))
+    except Exception:
+        return DEFAULT_PROFILE_STEP_MM
 
+
+def _doc_meshes(doc):
+    out = []
     for o in doc.Objects:
         if o.ObjectType == Rhino.DocObjects.ObjectType.Mesh:
             g = o.Geometry
             if g and g.Vertices:
-                for v in g.Vertices:
-                    r = (v.X * v.X + v.Y * v.Y) ** 0.5
-                    if r > max_r:
-                        max_r = r
+                out.append(g)
+    return out
 
-    for o in doc.Objects:
-        if o.ObjectType == Rhino.DocObjects.ObjectType.Mesh:
-            g = o.Geometry
-            if not g:
-                continue
-            for face in g.Faces:
-                v1 = g.Vertices[face.A]
-                v2 = g.Vertices[face.B]
-                v3 = g.Vertices[face.C]
-
-                for pa, pb in ((v1, v2), (v2, v3), (v3, v1)):
-                    if (pa.Z > 0 and pb.Z < 0) or (pa.Z < 0 and pb.Z > 0):
-                        denom = abs(pa.Z - pb.Z)
-                        if denom == 0:
-                            continue
-                        t = abs(pa.Z) / denom
-                        ix = pa.X + t * (pb.X - pa.X)
-                        iy = pa.Y + t * (pb.Y - pa.Y)
-                        ir = (ix * ix + iy * iy) ** 0.5
-                        if ir > conn_r:
-                            conn_r = ir
 
+def _analyze_rhino(meshes):
+    max_r = 0.0
+    conn_r = 0.0
+
+    for g in meshes:
+        for v in g.Vertices:
+            r = (v.X * v.X + v.Y * v.Y) ** 0.5
+            if r > max_r:
+                max_r = r
+
+    for g in meshes:
+        for face in g.Faces:
+            v1 = g.Vertices[face.A]
+            v2 = g.Vertices[face.B]
+            v3 = g.Vertices[face.C]
+
+            for pa, pb in ((v1, v2), (v2, v3), (v3, v1)):
+                if (pa.Z > 0 and pb.Z < 0) or (pa.Z < 0 and pb.Z > 0):
+                    denom = abs(pa.Z - pb.Z)
+                    if denom == 0:
+                        continue
+                    t = abs(pa.Z) / denom
+                    ix = pa.X + t * (pb.X - pa.X)
+                    iy = pa.Y + t * (pb.Y - pa.Y)
+                    ir = (ix * ix + iy * iy) ** 0.5
+                    if ir > conn_r:
+                        conn_r = ir
+
+    return max_r, conn_r, None
+
+
+def _round_list(values, digits=4):
+    return [
+        None if v != v else round(float(v), digits)
+        for v in values.tolist()
+    ]
+
+
+def _analyze_numpy(meshes, z_step):
+    """문서의 메시를 하나의 (vertices, faces) 배열로 합쳐 mesh_kernel.diameter_profile 1회로 계산."""
+    np = mesh_kernel.np
+    v_parts = []
+    f_parts = []
+    offset = 0
+    for g in meshes:
+        v, f = mesh_kernel.from_rhino_mesh(g)
+        v_parts.append(v)
+        f_parts.append(f + offset)
+        offset += v.shape[0]
+    vertices = np.concatenate(v_parts, axis=0)
+    faces = np.concatenate(f_parts, axis=0)
+
+    res = mesh_kernel.diameter_profile(vertices, faces, z_step=z_step)
+    profile = None
+    prof = res.get("profile")
+    if prof is not None:
+        profile = {
+            "zStart": round(float(prof["z"][0]), 4),
+            "zStep": round(float(prof["z_step"]), 4),
+            "rSection": _round_list(prof["r_section"]),
+            "rBand": _round_list(prof["r_band"]),
+        }
+    return res["max_r"], res["connection_r"], profile
+
+
+def analyze_diameter_profile(doc, z_step=None):
+    """
+    최대 직경 / 커넥션(Z=0) 직경 / 반경 프로파일.
+
+    Returns:
+        {"max", "connection", "engine", "profile"}
+        profile은 numpy 엔진에서만 채운다:
+        {"zStart", "zStep", "rSection"(평면 단면 최대 반경), "rBand"(구간 최대 반경)}
+    """
+    meshes = _doc_meshes(doc)
+    engine = _diameter_engine()
+    if z_step is None:
+        z_step = _profile_step()
+
+    result = None
+    if engine == "numpy" and meshes:
+        try:
+            result = _analyze_numpy(meshes, z_step)
+        except Exception:
+            engine = "rhino"
+            result = None
+    if result is None:
+        engine = "rhino"
+        result = _analyze_rhino(meshes)
+
+    max_r, conn_r, profile = result
     if conn_r == 0.0:
         conn_r = max_r
 
-    return round(max_r * 2, 2), round(conn_r * 2, 2)
+    return {
+        "max": round(max_r * 2, 2),
+        "connection": round(conn_r * 2, 2),
+        "engine": engine,
+        "profile": profile,
+    }
+
+
+def analyze_diameters(doc):
+    res = analyze_diameter_profile(doc)
+    return res["max"], res["connection"]
@@ -14,6 +14,8 @@ fill_screwholes.py (axis/cylinder based)
 4) 스크류홀 개구는 상/하 2개이며, 메워야 할 대상은 상부 개구이다.
 
 로직 요약:
+- (LOOP_SOURCE="boundary"일 때) 메쉬 경계(naked) 루프 중 규격(직경/동축성)에 맞는 가장 높은 루프를
+  상부 개구로 먼저 사용하고, 찾지 못하면 아래 project 방식으로 대체 (기본은 project만 사용)
 - 직경 2.5mm, XY평면과 평행한 원을 메쉬 상단(z_max + margin)에 배치
 - 원을 -Z 방향으로 project하여 상부 개구 loop를 얻음
 - loop 메트릭(직경/동축성)을 평가해 상부 홀 1개를 선택
@@ -42,6 +44,12 @@ try:
 except Exception:
     sc = None
 
+# NumPy 메시 커널(선택). 없으면 project 방식만 사용한다.
+try:
+    import mesh_kernel
+except Exception:
+    mesh_kernel = None
+
 # ----------------- 설정값 -----------------
 MODE = "auto"
 
@@ -72,6 +80,14 @@ PROBE_DIAMETER = 2.5
 # 원을 배치할 상단 높이 여유(mm)
 PROBE_Z_MARGIN = 1.0
 
+# 상부 개구 루프 소스
+# - "project": 상부 원 project만 사용 (기본)
+# - "boundary": 메쉬 하프엣지 경계 루프에서 먼저 찾고, 없으면 project
+LOOP_SOURCE = "project"
+
+# 경계 루프 탐색 전 정점 용접 허용치(mm): 좌표만 같은 unweld 이음새를 경계로 보지 않기 위함
+BOUNDARY_WELD_TOL = 1e-5
+
 
 # MODE = "fill"일 때 수동 인덱스
 LOOP_INDICES_TO_FILL = {0: [0]}
@@ -351,6 +367,58 @@ def _build_upper_loop_by_projected_circle(mesh, tolerance=0.001, logger=None):
     return candidates[0][0], probe_curve
 
 
+def _build_upper_loop_by_boundary(mesh, min_loop_length=3.0, logger=None):
+    """
+    메쉬 경계(naked) 루프 중 스크류홀 규격에 맞는 가장 높은 루프를 폴리라인으로 반환.
+
+    하프엣지 맵으로 정렬된 경계 루프와 루프별 통계(원점 Z축 기준 반경/Z)를 한 번에 얻고,
+    _is_screwhole_candidate와 같은 기준으로 거른다. numpy가 없거나 후보가 없으면 None.
+    """
+    if mesh_kernel is None or mesh is None:
+        return None
+
+    try:
+        vertices, faces = mesh_kernel.from_rhino_mesh(mesh)
+        vertices, faces, _ = mesh_kernel.weld_vertices(
+            vertices, faces, tol=float(BOUNDARY_WELD_TOL)
+        )
+        loops = mesh_kernel.boundary_loops(vertices, faces)
+    except Exception as e:
+        _log("boundary-loop failed: {}".format(str(e)), logger)
+        return None
+
+    candidates = []
+    for loop in loops:
+        dia = 2.0 * _safe_float(loop.get("r_mean"))
+        if not loop.get("closed") or int(loop.get("count", 0)) < 3:
+            continue
+        if _safe_float(loop.get("length")) < float(min_loop_length):
+            continue
+        if dia < float(MIN_DIAMETER) or dia > float(MAX_DIAMETER):
+            continue
+        if _safe_float(loop.get("r_std")) > float(MAX_RADIAL_STD):
+            continue
+        candidates.append(loop)
+
+    _log(
+        "boundary-loop: loops={}, candidates={}".format(len(loops), len(candidates)),
+        logger,
+    )
+    if not candidates:
+        return None
+
+    # project 방식과 같은 우선순위: z가 높고(주), 축에 더 잘 맞는(r_std가 작은) 루프
+    best = max(
+        candidates,
+        key=lambda lp: (_safe_float(lp.get("z_mean")), -_safe_float(lp.get("r_std"))),
+    )
+    pl = rg.Polyline()
+    for x, y, z in vertices[best["indices"]].tolist():
+        pl.Add(float(x), float(y), float(z))
+    pl.Add(pl[0])
+    return pl
+
+
 def _make_obj_attrs(name=None):
     if not name:
         return None
@@ -732,21 +800,30 @@ def fill_mesh_object(
                 logger=logger,
             )
 
-    # 1) 상부 원(project) 기반 상부 루프 생성
-    proj_loop, probe_curve = _build_upper_loop_by_projected_circle(
-        work_mesh, tolerance=tol, logger=logger
-    )
+    # 1) 경계(naked) 루프 -> 실패 시 상부 원(project) 기반 상부 루프 생성
+    upper_loop = None
+    probe_curve = None
+    loop_source = str(LOOP_SOURCE).strip().lower()
+    if loop_source == "boundary":
+        upper_loop = _build_upper_loop_by_boundary(
+            work_mesh, min_loop_length=min_loop_length, logger=logger
+        )
+    if upper_loop is None:
+        loop_source = "project"
+        upper_loop, probe_curve = _build_upper_loop_by_projected_circle(
+            work_mesh, tolerance=tol, logger=logger
+        )
 
-    loop_source = "project"
-    if proj_loop is None:
+    if upper_loop is None:
         result["ok"] = True
         result["reason"] = "no loops (project)"
         _log("obj {} : project-loop 실패".format(obj_index), logger)
         return result
 
-    loops = [proj_loop]
+    loops = [upper_loop]
     result["loop_count"] = 1
-    _log("obj {} : project-loop 추출 성공".format(obj_index), logger)
+    result["loop_source"] = loop_source
+    _log("obj {} : {}-loop 추출 성공".format(obj_index, loop_source), logger)
 
     if debug_mode:
         if probe_curve is not None:
@@ -759,8 +836,8 @@ def fill_mesh_object(
         try:
             _debug_add_curve(
                 doc,
-                proj_loop.ToPolylineCurve(),
-                name="fill_screwhole_dbg_obj{}_project_loop".format(obj_index),
+                upper_loop.ToPolylineCurve(),
+                name="fill_screwhole_dbg_obj{}_{}_loop".format(obj_index, loop_source),
                 logger=logger,
             )
         except Exception:
@@ -19,13 +19,20 @@
 """
 
 import math
+import time
 from statistics import median
-from typing import List, Optional, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import Rhino
 import Rhino.DocObjects as rdo
 import Rhino.Geometry as rg
 
+# NumPy(선택): 컬럼형 face 캐시 + Z 버킷 인덱스. 없으면 기존 리스트 캐시/선형 스캔을 쓴다.
+try:
+    import numpy as np
+except Exception:
+    np = None
+
 # -----------------------------
 # 판별 / 탐색 파라미터
 # -----------------------------
@@ -64,8 +71,17 @@ _LOFT_DEGREE = 3
 _LOFT_REBUILD_POINT_COUNT = 100
 
 
+# face 캐시 Z 버킷 폭(mm). 질의 z는 해당 버킷에 걸친 face만 검사한다.
+_FACE_INDEX_BUCKET_MM = 0.05
+# 버킷 수 상한(아주 긴 메시에서 버킷 폭을 넓힌다)
+_FACE_INDEX_MAX_BUCKETS = 4096
+
+
 # Face cache row: (min_z, max_z, radius_xy, k)
 FaceCacheRow = Tuple[float, float, float, float]
+# NumPy 경로 face 캐시: 컬럼 배열 {min_z, max_z, r, k} + Z 버킷 인덱스(CSR)
+# {z0, bucket, offsets, members}. numpy가 없으면 List[FaceCacheRow]를 그대로 쓴다.
+FaceCache = Dict[str, object]
 
 
 def _log(msg: str) -> None:
@@ -142,7 +158,7 @@ def _compute_face_k(mesh: rg.Mesh, fi: int) -> Optional[float]:
     return abs(nz) / h
 
 
-def _build_face_cache(mesh: rg.Mesh) -> List[FaceCacheRow]:
+def _build_face_cache_rows(mesh: rg.Mesh) -> List[FaceCacheRow]:
     """
     성능 최적화 핵심:
     - z별 교차선 계산을 매번 하지 않고,
@@ -175,7 +191,129 @@ def _build_face_cache(mesh: rg.Mesh) -> List[FaceCacheRow]:
     return out
 
 
-def _local_k_at_z(
+def _mesh_face_arrays(mesh: rg.Mesh):
+    """
+    (vertices (V,3), quads (F,4), normals (F,3)) 벌크 변환.
+    quads는 삼각형이면 D == C. ToFloatArray/ToIntArray 실패 시 요소 루프로 폴백.
+    """
+    try:
+        vertices = np.array(list(mesh.Vertices.ToFloatArray()), dtype=np.float64)
+        quads = np.array(list(mesh.Faces.ToIntArray(False)), dtype=np.int64)
+        normals = np.array(list(mesh.FaceNormals.ToFloatArray()), dtype=np.float64)
+        vertices = vertices.reshape(-1, 3)
+        quads = quads.reshape(-1, 4)
+        normals = normals.reshape(-1, 3)
+        if normals.shape[0] == quads.shape[0]:
+            return vertices, quads, normals
+    except Exception:
+        pass
+
+    vcount = int(mesh.Vertices.Count)
+    fcount = int(mesh.Faces.Count)
+    vertices = np.zeros((vcount, 3), dtype=np.float64)
+    for i in range(vcount):
+        v = mesh.Vertices[i]
+        vertices[i] = (v.X, v.Y, v.Z)
+    quads = np.zeros((fcount, 4), dtype=np.int64)
+    normals = np.zeros((fcount, 3), dtype=np.float64)
+    for fi in range(fcount):
+        f = mesh.Faces[fi]
+        quads[fi] = (f.A, f.B, f.C, f.D if f.IsQuad else f.C)
+        n = mesh.FaceNormals[fi]
+        normals[fi] = (n.X, n.Y, n.Z)
+    return vertices, quads, normals
+
+
+def _build_z_bucket_index(min_z, max_z) -> FaceCache:
+    """face Z 구간을 고정 폭 버킷에 펼친 CSR 인덱스. 버킷 안 face 순서는 원래 순서."""
+    z0 = float(min_z.min())
+    span = max(float(max_z.max()) - z0, 1e-9)
+    bucket = max(_FACE_INDEX_BUCKET_MM, span / float(_FACE_INDEX_MAX_BUCKETS))
+    nb = int(span // bucket) + 1
+
+    b_lo = np.clip(((min_z - z0) // bucket).astype(np.int64), 0, nb - 1)
+    b_hi = np.clip(((max_z - z0) // bucket).astype(np.int64), 0, nb - 1)
+    spans = b_hi - b_lo + 1
+    face_ids = np.repeat(np.arange(min_z.shape[0], dtype=np.int64), spans)
+    first = np.cumsum(spans) - spans
+    buckets = b_lo[face_ids] + (np.arange(face_ids.shape[0], dtype=np.int64) - first[face_ids])
+
+    order = np.argsort(buckets, kind="stable")
+    counts = np.bincount(buckets, minlength=nb)
+    offsets = np.zeros(nb + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return {
+        "z0": z0,
+        "bucket": bucket,
+        "offsets": offsets,
+        "members": face_ids[order],
+    }
+
+
+def _build_face_cache(mesh: rg.Mesh):
+    """
+    face별 (z 범위, xy 반경, k) 전처리.
+    numpy가 있으면 컬럼 배열 + Z 버킷 인덱스(FaceCache), 없으면 List[FaceCacheRow].
+    """
+    if np is None:
+        return _build_face_cache_rows(mesh)
+
+    vertices, quads, normals = _mesh_face_arrays(mesh)
+    if quads.shape[0] == 0:
+        return _empty_face_cache()
+
+    corners = vertices[quads]  # (F, 4, 3); 삼각형은 C가 두 번 들어있다
+    is_quad = quads[:, 3] != quads[:, 2]
+    z_vals = corners[:, :, 2]
+    min_z = z_vals.min(axis=1)
+    max_z = z_vals.max(axis=1)
+
+    # 중심은 실제 꼭짓점(삼각형 3개 / quad 4개) 평균
+    xy_sum = corners[:, :3, :2].sum(axis=1)
+    xy_sum[is_quad] += corners[is_quad, 3, :2]
+    xy = xy_sum / np.where(is_quad, 4.0, 3.0)[:, None]
+    rr = np.hypot(xy[:, 0], xy[:, 1])
+
+    h = np.hypot(normals[:, 0], normals[:, 1])
+    ok = h >= 1e-12
+    k = np.abs(normals[ok, 2]) / h[ok]
+
+    cache: FaceCache = {
+        "min_z": min_z[ok],
+        "max_z": max_z[ok],
+        "r": rr[ok],
+        "k": k,
+    }
+    if cache["k"].shape[0] > 0:
+        cache.update(_build_z_bucket_index(cache["min_z"], cache["max_z"]))
+    return cache
+
+
+def _empty_face_cache() -> FaceCache:
+    empty = np.zeros(0, dtype=np.float64)
+    return {"min_z": empty, "max_z": empty, "r": empty, "k": empty}
+
+
+def _face_cache_size(face_cache) -> int:
+    if isinstance(face_cache, dict):
+        return int(face_cache["k"].shape[0])
+    return len(face_cache)
+
+
+def _faces_at_z(face_cache: FaceCache, z: float):
+    """z를 통과하는 face 인덱스 (버킷 후보만 검사)."""
+    offsets = face_cache.get("offsets")
+    if offsets is None:
+        return np.zeros(0, dtype=np.int64)
+    b = int((z - face_cache["z0"]) // face_cache["bucket"])
+    if b < 0 or b >= offsets.shape[0] - 1:
+        return np.zeros(0, dtype=np.int64)
+    cand = face_cache["members"][offsets[b] : offsets[b + 1]]
+    hit = (face_cache["min_z"][cand] <= z) & (face_cache["max_z"][cand] >= z)
+    return cand[hit]
+
+
+def _local_k_at_z_rows(
     face_cache: Sequence[FaceCacheRow], z: float
 ) -> Optional[Tuple[float, int]]:
     # z를 통과하는 face 후보를 빠르게 수집
@@ -199,8 +337,29 @@ def _local_k_at_z(
     return float(median(ks)), len(ks)
 
 
+def _local_k_at_z(face_cache, z: float) -> Optional[Tuple[float, int]]:
+    if not isinstance(face_cache, dict):
+        return _local_k_at_z_rows(face_cache, z)
+
+    idx = _faces_at_z(face_cache, float(z))
+    n = int(idx.shape[0])
+    if n < _MIN_FACE_SAMPLES:
+        return None
+
+    rs = face_cache["r"][idx]
+    # _percentile과 같은 nearest-rank (round는 둘 다 half-to-even)
+    rank = int(np.round((n - 1) * _OUTER_RADIUS_PERCENTILE))
+    cut = np.partition(rs, rank)[rank]
+
+    ks = face_cache["k"][idx[rs >= cut]]
+    if ks.shape[0] < _MIN_FACE_SAMPLES:
+        return None
+
+    return float(np.median(ks)), int(ks.shape[0])
+
+
 def _classify_at_zero(
-    face_cache: Sequence[FaceCacheRow], z_min: float, z_max: float
+    face_cache, z_min: float, z_max: float
 ) -> Tuple[str, float]:
     probes = [0.0, -0.05, 0.05, -0.10, 0.10]
     k_samples: List[float] = []
@@ -225,7 +384,7 @@ def _classify_at_zero(
 
 
 def _march_bound(
-    face_cache: Sequence[FaceCacheRow],
+    face_cache,
     z_start: float,
     z_limit: float,
     direction: int,
@@ -265,7 +424,7 @@ def _march_bound(
 
 
 def _find_vertical_bounds(
-    face_cache: Sequence[FaceCacheRow], z_min: float, z_max: float
+    face_cache, z_min: float, z_max: float
 ) -> Optional[Tuple[float, float]]:
     z0 = min(max(0.0, z_min), z_max)
 
@@ -602,10 +761,16 @@ def detect_and_draw_vertical_band_planes(doc: Optional[Rhino.RhinoDoc] = None) -
     z_max = float(bbox.Max.Z)
 
     # 전처리 캐시 구성 (성능)
+    t0 = time.perf_counter()
     face_cache = _build_face_cache(mesh)
-    if len(face_cache) < _MIN_FACE_SAMPLES:
+    cache_size = _face_cache_size(face_cache)
+    if cache_size < _MIN_FACE_SAMPLES:
         raise RuntimeError("face 캐시 샘플이 부족합니다.")
-    _log(f"face cache prepared: {len(face_cache)} faces")
+    _log(
+        f"face cache prepared: {cache_size} faces "
+        f"engine={'numpy' if isinstance(face_cache, dict) else 'list'} "
+        f"({(time.perf_counter() - t0) * 1000.0:.1f}ms)"
+    )
 
     # 1) Z=0 교차부 수직/테이퍼 판별
     cls, k0 = _classify_at_zero(face_cache, z_min, z_max)
@@ -622,7 +787,9 @@ def detect_and_draw_vertical_band_planes(doc: Optional[Rhino.RhinoDoc] = None) -
         }
 
     # 2) 수직이면 경계 찾기
+    t0 = time.perf_counter()
     bounds = _find_vertical_bounds(face_cache, z_min, z_max)
+    _log(f"vertical bound march: {(time.perf_counter() - t0) * 1000.0:.1f}ms")
     if bounds is None:
         _log("수직 판별은 되었으나 경계 탐색 실패. 조치 없이 종료")
         return {
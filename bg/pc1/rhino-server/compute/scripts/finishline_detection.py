@@ -13,6 +13,13 @@ import Rhino.Geometry as rg
 import Rhino.Geometry.Intersect as intersect
 import System
 import System.Drawing as drawing
+# NumPy 모멘트/메시 커널(선택). Rhino 환경에 numpy가 없으면 정점 루프/Explode 경로를 쓴다.
+try:
+    import mesh_kernel
+    import mesh_moments
+except Exception:
+    mesh_kernel = None
+    mesh_moments = None
 _SECTION_COUNT = 40  # section plane count
 _SECTION_STEP_DEG = 4.5  # 180/40 = 4.5 degrees (unique section planes)
 _TILT_AXIS_BAND_LOW = 0.15
@@ -44,6 +51,8 @@ _DEBUG_KEEP_TEMP_OBJECTS = _env_true(
 )
 _DEBUG_ADD_POLYLINE_CURVE = _env_true("FINISHLINE_DEBUG_CURVE_DOC", _GLOBAL_DEBUG)
 _SHOW_ALL_SECTION_CURVES = _env_true("FINISHLINE_SHOW_ALL_SECTIONS", _GLOBAL_DEBUG)
+# 엣지 루프 추출: 기본은 ExtractMeshEdges 명령(실패 시 GetNakedEdges), 1이면 numpy 하프엣지 경계 루프 우선
+_EDGE_LOOPS_USE_NUMPY = _env_true("FINISHLINE_EDGE_LOOPS_NUMPY", False)
 _EDGE_MIN_Z_VALID_THRESHOLD_MM = 0.2
 _EDGE_MIN_RADIUS_TO_PT0_RATIO = 0.45
 _EDGE_MIN_RADIUS_TO_MESH_BAND_RATIO = 0.55
@@ -128,35 +137,66 @@ def _detect_finishline_points_edge(
     doc: Rhino.RhinoDoc,
     mesh: rg.Mesh,
 ) -> Tuple[Optional[List[rg.Point3d]], str]:
-    candidates = _explode_components_sorted_by_max_z(mesh)
-    if not candidates:
-        candidates = [mesh]
-    raw_candidate_count = len(candidates)
-    try:
-        max_verts = max(
-            (int(m.Vertices.Count) for m in candidates if m is not None), default=0
+    # numpy: 성분 통계로 걸러낸 뒤 남은 후보만 메시로 만든다 (실패 시 Explode 경로)
+    comp = _component_stats_sorted_by_max_z(mesh)
+    if comp is not None and comp[3]:
+        c_vertices, c_faces, c_labels, c_stats = comp
+        raw_candidate_count = len(c_stats)
+        max_verts = max(int(st["vertices"]) for st in c_stats)
+        min_keep_verts = max(
+            _EDGE_CANDIDATE_MIN_VERT_ABS,
+            int(float(max_verts) * _EDGE_CANDIDATE_MIN_VERT_RATIO),
         )
-    except Exception:
-        max_verts = 0
-    min_keep_verts = max(
-        _EDGE_CANDIDATE_MIN_VERT_ABS,
-        int(float(max_verts) * _EDGE_CANDIDATE_MIN_VERT_RATIO),
-    )
-    filtered_candidates = [
-        m
-        for m in candidates
-        if m is not None and int(m.Vertices.Count) >= int(min_keep_verts)
-    ]
-    if not filtered_candidates:
-        _trace_log(
-            "[detect-edge] candidate_filter produced 0; fallback to unfiltered candidates"
+        filtered_stats = [
+            st for st in c_stats if int(st["vertices"]) >= int(min_keep_verts)
+        ]
+        if not filtered_stats:
+            _trace_log(
+                "[detect-edge] candidate_filter produced 0; fallback to unfiltered candidates"
+            )
+            filtered_stats = c_stats[:]
+        filtered_count = len(filtered_stats)
+        if len(c_stats) == 1:
+            # 분리되는 성분이 없으면 원본 복사본을 그대로 쓴다(삼각형 재구성 불필요)
+            candidates = [mesh.DuplicateMesh() or mesh]
+        else:
+            candidates = [
+                mesh_kernel.rhino_mesh_from_arrays(
+                    rg.Mesh, *mesh_kernel.submesh(c_vertices, c_faces, c_labels == st["label"])
+                )
+                for st in filtered_stats[:_EDGE_CANDIDATE_MAX_COUNT]
+            ]
+    else:
+        candidates = _explode_components_sorted_by_max_z(mesh)
+        if not candidates:
+            candidates = [mesh]
+        raw_candidate_count = len(candidates)
+        try:
+            max_verts = max(
+                (int(m.Vertices.Count) for m in candidates if m is not None), default=0
+            )
+        except Exception:
+            max_verts = 0
+        min_keep_verts = max(
+            _EDGE_CANDIDATE_MIN_VERT_ABS,
+            int(float(max_verts) * _EDGE_CANDIDATE_MIN_VERT_RATIO),
         )
-        filtered_candidates = candidates[:]
-    candidates = filtered_candidates[:_EDGE_CANDIDATE_MAX_COUNT]
+        filtered_candidates = [
+            m
+            for m in candidates
+            if m is not None and int(m.Vertices.Count) >= int(min_keep_verts)
+        ]
+        if not filtered_candidates:
+            _trace_log(
+                "[detect-edge] candidate_filter produced 0; fallback to unfiltered candidates"
+            )
+            filtered_candidates = candidates[:]
+        filtered_count = len(filtered_candidates)
+        candidates = filtered_candidates[:_EDGE_CANDIDATE_MAX_COUNT]
     _trace_log(
         "[detect-edge] candidate_filter total={} filtered={} kept={} min_keep_verts={} max_count={}".format(
             raw_candidate_count,
-            len(filtered_candidates),
+            filtered_count,
             len(candidates),
             int(min_keep_verts),
             int(_EDGE_CANDIDATE_MAX_COUNT),
@@ -196,6 +236,24 @@ def _detect_finishline_points_edge(
         if counters.get("rejected_below_band", 0) > 0:
             return "C_EDGE_REJECTED_BELOW_BAND"
         return "C_EDGE_FAILED"
+    # 후보별 엣지 루프 소스는 한 번만 만들고 strict/relaxed 패스가 함께 쓴다
+    edge_sources: Dict[int, Tuple[Optional[list], Optional[List[rg.Curve]], str]] = {}
+    def _edge_source(idx: int, target_mesh: rg.Mesh):
+        cached = edge_sources.get(idx)
+        if cached is not None:
+            return cached
+        loop_records = _boundary_loop_records(target_mesh) if _EDGE_LOOPS_USE_NUMPY else None
+        edge_curves = None
+        if loop_records is not None:
+            strategy_used = "C_NUMPY_BOUNDARY_LOOPS"
+        else:
+            edge_curves = _extract_mesh_edges_with_command(doc, target_mesh)
+            strategy_used = "C_EXTRACT_MESH_EDGES_UNWELDED"
+            if not edge_curves:
+                edge_curves = _extract_naked_edges_fallback(target_mesh)
+                strategy_used = "C_FALLBACK_NAKED_EDGES"
+        edge_sources[idx] = (loop_records, edge_curves, strategy_used)
+        return edge_sources[idx]
     def _run_edge_pass(
         pass_name: str,
         z_ref_pt0,
@@ -222,16 +280,14 @@ def _detect_finishline_points_edge(
                     _mesh_z_key(target_mesh),
                 )
             )
-            edge_curves = _extract_mesh_edges_with_command(doc, target_mesh)
-            strategy_used = "C_EXTRACT_MESH_EDGES_UNWELDED"
-            if not edge_curves:
-                edge_curves = _extract_naked_edges_fallback(target_mesh)
-                strategy_used = "C_FALLBACK_NAKED_EDGES"
+            loop_records, edge_curves, strategy_used = _edge_source(idx, target_mesh)
             _trace_log(
-                "[detect-edge:{}] candidate[{}] edge_curves_count={}".format(
+                "[detect-edge:{}] candidate[{}] edge_curves_count={} loop_records={} source={}".format(
                     pass_name,
                     idx,
                     len(edge_curves) if edge_curves else 0,
+                    len(loop_records) if loop_records else 0,
+                    strategy_used,
                 )
             )
             mesh_band_max_r = _mesh_max_radius_in_z_band(target_mesh)
@@ -243,6 +299,7 @@ def _detect_finishline_points_edge(
                 mesh_band_max_radius=mesh_band_max_r,
                 strict_filters=True,
                 debug_tag="{}#candidate{}#strict".format(pass_name, idx),
+                loop_records=loop_records,
             )
             if not traced_points or len(traced_points) < 3:
                 traced_points = _pick_best_edge_loop_points(
@@ -253,6 +310,7 @@ def _detect_finishline_points_edge(
                     mesh_band_max_radius=mesh_band_max_r,
                     strict_filters=False,
                     debug_tag="{}#candidate{}#relaxed_select".format(pass_name, idx),
+                    loop_records=loop_records,
                 )
                 if traced_points and len(traced_points) >= 3:
                     _trace_log(
@@ -633,6 +691,32 @@ def _pick_primary_mesh(
     if geom is None:
         raise RuntimeError("선택된 Mesh 객체에서 Geometry를 읽을 수 없습니다")
     return target, geom
+def _component_stats_sorted_by_max_z(mesh: rg.Mesh):
+    """
+    Explode + SplitDisjointPieces와 같은 성분을 면 배열에서 라벨링하고 성분별 통계만 계산한다.
+    Returns: (vertices, faces, face_labels, stats) — stats는 _mesh_z_key 순서 내림차순. numpy가 없거나 실패하면 None.
+    """
+    if mesh_kernel is None:
+        return None
+    try:
+        vertices, faces = mesh_kernel.from_rhino_mesh(mesh)
+        labels, count = mesh_kernel.edge_connected_components(faces)
+        stats = mesh_kernel.component_stats(vertices, faces, labels, count)
+    except Exception as e:
+        _trace_log("[mesh] numpy components failed, fallback=explode err={}".format(e))
+        return None
+    stats = [st for st in stats if int(st["vertices"]) > 0]
+    stats.sort(
+        key=lambda st: (
+            float(st["max_z"]),
+            float(st["min_z"]),
+            float(st["vertices"]),
+            float(st["diagonal"]),
+        ),
+        reverse=True,
+    )
+    _trace_log("[mesh] ordered_components={} engine=numpy".format(len(stats)))
+    return vertices, faces, labels, stats
 def _explode_components_sorted_by_max_z(mesh: rg.Mesh) -> List[rg.Mesh]:
     mesh_copy = mesh.DuplicateMesh()
     if mesh_copy is None:
@@ -770,6 +854,34 @@ def _extract_naked_edges_fallback(mesh: rg.Mesh) -> List[rg.Curve]:
         except Exception:
             continue
     return curves
+def _boundary_loop_records(mesh: rg.Mesh) -> Optional[list]:
+    """
+    메시 하프엣지 맵에서 경계 루프를 정렬된 정점 인덱스 + Z/반경/방위 통계로 바로 얻는다
+    (ExtractMeshEdges 명령 + JoinCurves 대체). numpy가 없거나 실패하면 None.
+    """
+    if mesh_kernel is None or mesh is None:
+        return None
+    try:
+        vertices, faces = mesh_kernel.from_rhino_mesh(mesh)
+        loops = mesh_kernel.boundary_loops(vertices, faces)
+    except Exception as e:
+        _trace_log("[edge-loop] numpy boundary loops failed, fallback=command err={}".format(e))
+        return None
+    for rec in loops:
+        rec["vertices"] = vertices
+        idx = rec["indices"]
+        if rec["closed"] or idx.shape[0] < 2:
+            rec["gap"] = 0.0
+        else:
+            rec["gap"] = float(mesh_kernel.np.linalg.norm(vertices[idx[0]] - vertices[idx[-1]]))
+    _trace_log("[edge-loop] numpy boundary loops={}".format(len(loops)))
+    return loops
+def _loop_record_points(rec) -> List[rg.Point3d]:
+    """경계 루프 레코드 -> 닫힌 점 목록(첫 점 반복)."""
+    pts = [rg.Point3d(float(x), float(y), float(z)) for x, y, z in rec["vertices"][rec["indices"]].tolist()]
+    if pts:
+        pts.append(rg.Point3d(pts[0]))
+    return pts
 def _curve_to_closed_points(curve: rg.Curve) -> Optional[List[rg.Point3d]]:
     if curve is None:
         return None
@@ -812,24 +924,39 @@ def _pick_best_edge_loop_points(
     mesh_band_max_radius: Optional[float] = None,
     strict_filters: bool = True,
     debug_tag: str = "edge",
+    loop_records: Optional[list] = None,
 ) -> Optional[List[rg.Point3d]]:
-    if not curves:
-        return None
-    try:
-        joined = rg.Curve.JoinCurves(list(curves), tolerance)
-    except Exception:
-        joined = None
-    source = list(joined) if joined else list(curves)
-    _trace_log(
-        "[edge-loop:{}] input_curves={} joined_curves={} tol={:.6f} strict_filters={}".format(
-            debug_tag,
-            len(curves),
-            len(source),
-            float(tolerance),
-            bool(strict_filters),
+    """
+    curves(JoinCurves로 이은 엣지 커브) 또는 loop_records(_boundary_loop_records: 이미 정렬된
+    경계 루프 + 통계) 중 필터를 통과한 루프를 (min_z, -median_r, -z_score, -length) 순으로 고른다.
+    """
+    if loop_records:
+        source = list(loop_records)
+        _trace_log(
+            "[edge-loop:{}] input_loops={} strict_filters={}".format(
+                debug_tag,
+                len(source),
+                bool(strict_filters),
+            )
         )
-    )
-    loop_infos: List[Tuple[float, float, float, float, List[rg.Point3d]]] = []
+    else:
+        if not curves:
+            return None
+        try:
+            joined = rg.Curve.JoinCurves(list(curves), tolerance)
+        except Exception:
+            joined = None
+        source = list(joined) if joined else list(curves)
+        _trace_log(
+            "[edge-loop:{}] input_curves={} joined_curves={} tol={:.6f} strict_filters={}".format(
+                debug_tag,
+                len(curves),
+                len(source),
+                float(tolerance),
+                bool(strict_filters),
+            )
+        )
+    loop_infos: List[Tuple[float, float, float, float, object]] = []
     inspected = 0
     accepted = 0
     reject_counts = {
@@ -843,28 +970,44 @@ def _pick_best_edge_loop_points(
     }
     for cv_idx, cv in enumerate(source):
         inspected += 1
-        pts = _curve_to_closed_points(cv)
-        if not pts or len(pts) < 3:
-            reject_counts["open_or_invalid"] += 1
-            _trace_log(
-                "[edge-loop:{}] curve[{}] rejected reason=open_or_invalid".format(
-                    debug_tag, cv_idx
+        if loop_records:
+            if int(cv["count"]) < 3 or float(cv["gap"]) > _EDGE_CLOSE_GAP_TOL_MM:
+                reject_counts["open_or_invalid"] += 1
+                _trace_log(
+                    "[edge-loop:{}] curve[{}] rejected reason=open_or_invalid".format(
+                        debug_tag, cv_idx
+                    )
                 )
-            )
-            continue
-        min_z = _points_min_z(pts)
-        max_z = _points_max_z(pts)
+                continue
+            pts = cv
+            min_z = float(cv["z_min"])
+            max_z = float(cv["z_max"])
+            median_r = float(cv["r_median"])
+            az_coverage = float(cv["azimuth_coverage"])
+            length = float(cv["length"])
+        else:
+            pts = _curve_to_closed_points(cv)
+            if not pts or len(pts) < 3:
+                reject_counts["open_or_invalid"] += 1
+                _trace_log(
+                    "[edge-loop:{}] curve[{}] rejected reason=open_or_invalid".format(
+                        debug_tag, cv_idx
+                    )
+                )
+                continue
+            min_z = _points_min_z(pts)
+            max_z = _points_max_z(pts)
+            median_r = _points_median_radius(pts)
+            az_coverage = _loop_azimuth_coverage(pts)
+            try:
+                length = float(cv.GetLength())
+            except Exception:
+                length = float(len(pts))
         z_span = (
             float(max_z - min_z)
             if (min_z is not None and max_z is not None)
             else float("nan")
         )
-        median_r = _points_median_radius(pts)
-        az_coverage = _loop_azimuth_coverage(pts)
-        try:
-            length = float(cv.GetLength())
-        except Exception:
-            length = float(len(pts))
         if strict_filters:
             if min_z is not None and min_z <= _EDGE_MIN_Z_VALID_THRESHOLD_MM:
                 reject_counts["low_z"] += 1
@@ -982,6 +1125,7 @@ def _pick_best_edge_loop_points(
         return None
     loop_infos.sort(key=lambda item: (item[3], -item[0], -item[1], -item[2]))
     selected = loop_infos[0]
+    selected_pts = _loop_record_points(selected[4]) if loop_records else selected[4]
     _trace_log(
         "[finishline] edge loops={} selected median_r={:.6f} z_score={:.6f} min_z={:.6f} len={:.3f} pts={} tag={}".format(
             len(loop_infos),
@@ -989,11 +1133,11 @@ def _pick_best_edge_loop_points(
             selected[1],
             selected[3],
             selected[2],
-            len(selected[4]),
+            len(selected_pts),
             debug_tag,
         )
     )
-    return selected[4]
+    return selected_pts
 def _points_min_z(points: Sequence[rg.Point3d]) -> Optional[float]:
     if not points:
         return None
@@ -1188,8 +1332,9 @@ def _extract_lowest_boundary_loop_points(
     ref_pt0: Optional[rg.Point3d] = None,
     ref_pt0_radius: Optional[float] = None,
 ) -> Optional[List[rg.Point3d]]:
-    loops = _extract_naked_edges_fallback(mesh)
-    if not loops:
+    loop_records = _boundary_loop_records(mesh) if _EDGE_LOOPS_USE_NUMPY else None
+    loops = None if loop_records else _extract_naked_edges_fallback(mesh)
+    if not loop_records and not loops:
         _trace_log("[legacy] no naked edge loops")
         return None
     mesh_band_max_r = _mesh_max_radius_in_z_band(mesh)
@@ -1199,6 +1344,7 @@ def _extract_lowest_boundary_loop_points(
         ref_pt0,
         ref_pt0_radius,
         mesh_band_max_radius=mesh_band_max_r,
+        loop_records=loop_records,
     )
     if not points or len(points) < 3:
         _trace_log("[legacy] no valid loop after edge-like filtering")
@@ -1390,15 +1536,49 @@ def _estimate_tilt_axis(mesh: rg.Mesh) -> rg.Vector3d:
         if float(axis_local.Z) < 0.0:
             axis_local = rg.Vector3d(-axis_local.X, -axis_local.Y, -axis_local.Z)
         return axis_local
-    band_stats = _accumulate(use_band=True)
-    n_band = int(band_stats[0])
+    def _axis_from_np(moments):
+        if moments is None or moments["sw"] <= _DIST_TOL:
+            return None
+        a = mesh_moments.major_axis(moments, hint=(0.0, 0.0, 1.0))
+        if a is None:
+            return None
+        axis_local = rg.Vector3d(float(a[0]), float(a[1]), float(a[2]))
+        if not axis_local.IsValid or axis_local.IsZero:
+            return None
+        return axis_local
+    # 밴드/전체 모멘트를 정점 배열 1회로 함께 계산 (실패 시 정점 루프)
+    np_moments = None
+    if mesh_moments is not None:
+        try:
+            np_moments = mesh_moments.z_band_tilt_moments(
+                mesh_moments.vertices_from_rhino_mesh(mesh),
+                z_min,
+                z_max,
+                _TILT_AXIS_BAND_LOW,
+                _TILT_AXIS_BAND_HIGH,
+            )
+        except Exception as e:
+            _trace_log("[axis] numpy moments failed, fallback=vertex_loop err={}".format(e))
+            np_moments = None
+    if np_moments is not None:
+        band_m, full_m = np_moments
+        n_band = int(band_m["n"]) if band_m else 0
+    else:
+        band_stats = _accumulate(use_band=True)
+        n_band = int(band_stats[0])
     axis = None
     source = "band"
     if n_band >= _TILT_AXIS_MIN_VERTS:
-        axis = _axis_from_moments(band_stats)
+        if np_moments is not None:
+            axis = _axis_from_np(band_m)
+        else:
+            axis = _axis_from_moments(band_stats)
     if axis is None:
-        full_stats = _accumulate(use_band=False)
-        n_full = int(full_stats[0])
+        if np_moments is not None:
+            n_full = int(full_m["n"]) if full_m else 0
+        else:
+            full_stats = _accumulate(use_band=False)
+            n_full = int(full_stats[0])
         source = "full"
         if n_band < _TILT_AXIS_MIN_VERTS:
             _trace_log(
@@ -1408,7 +1588,10 @@ def _estimate_tilt_axis(mesh: rg.Mesh) -> rg.Vector3d:
                     n_full,
                 )
             )
-        axis = _axis_from_moments(full_stats)
+        if np_moments is not None:
+            axis = _axis_from_np(full_m)
+        else:
+            axis = _axis_from_moments(full_stats)
         n_used = n_full
     else:
         n_used = n_band
@@ -2319,7 +2502,11 @@ def _run_section_strategy(
     )
 def _build_detect_failure_message(mesh: rg.Mesh, bbox) -> str:
     try:
-        comp_count = len(_explode_components_sorted_by_max_z(mesh))
+        comp = _component_stats_sorted_by_max_z(mesh)
+        if comp is not None:
+            comp_count = len(comp[3])
+        else:
+            comp_count = len(_explode_components_sorted_by_max_z(mesh))
     except Exception:
         comp_count = -1
     return (
@@ -2,14 +2,346 @@
 # - bg/pc1/rhino-server/rules.md
 # - bg/pc1/rhino-server/compute/scripts/process_abutment_stl.py
 # - bg/pc1/rhino-server/compute/scripts/align_stl_coordinate.py
+# - bg/pc1/rhino-server/compute/core/runner_bridge.py
 # - web/backend/controllers/bg/bg.controller.js
-import Rhino
+"""Rhino 인스턴스 초기화 + 상주 작업 러너.
+
+rhino-server(core/runner_bridge.py)가 pipe마다 한 번 bootstrap 스크립트로 main()을 호출한다.
+- 백그라운드 스레드가 `/api/rhino/internal/runner/next`를 long-poll 해 작업을 받는다.
+- 작업은 UI 스레드에서 process_abutment_stl.main()으로 실행하고, 결과는 job-callback으로 보낸다.
+- 모듈은 warm 상태로 유지한다(ABUTS_MODULE_RELOAD=0). reload는 서버의 hot-reload 명령으로만 한다.
+
+ABUTS_RUNNER_SERVER가 없으면(수동 실행) 기존처럼 인스턴스만 초기화하고 끝난다.
+"""
+import importlib
+import json
 import os
+import sys
+import threading
+import time
+import traceback
+
+import Rhino
+
+# Rhino CPython 엔진은 스크립트 실행 간 모듈을 유지하므로, 재호출 시 같은 러너 상태를 재사용한다.
+_RUNNER = {
+    "thread": None,
+    "stop": False,
+    "generation": -1,
+    "jobs": 0,
+    "lastError": None,
+    # 서버가 설치할 때마다 새로 발급하는 long-poll 토큰 (X-Runner-Token)
+    "token": "",
+}
+
+
+def log(msg):
+    try:
+        print("[abuts-runner] " + str(msg))
+    except Exception:
+        pass
+
+
+def _http_client(timeout_sec):
+    import System
+    import System.Net.Http
+
+    client = System.Net.Http.HttpClient()
+    client.Timeout = System.TimeSpan.FromSeconds(float(timeout_sec))
+    return client
+
+
+def _poll(server, runner_id, generation, poll_sec):
+    import System
+
+    url = "{}/api/rhino/internal/runner/next?runnerId={}&generation={}&pid={}&timeout={}".format(
+        server.rstrip("/"),
+        System.Uri.EscapeDataString(str(runner_id)),
+        int(generation),
+        int(System.Diagnostics.Process.GetCurrentProcess().Id),
+        float(poll_sec),
+    )
+    client = _http_client(poll_sec + 15.0)
+    try:
+        client.DefaultRequestHeaders.Add("X-Runner-Token", str(_RUNNER.get("token") or ""))
+        resp = client.GetAsync(url).Result
+        if not resp.IsSuccessStatusCode:
+            raise RuntimeError("poll status={}".format(int(resp.StatusCode)))
+        return json.loads(resp.Content.ReadAsStringAsync().Result or "{}")
+    finally:
+        try:
+            client.Dispose()
+        except Exception:
+            pass
+
+
+def _send_result(callback_url, data):
+    import System.Net.Http
+    import System.Text
+
+    for i in range(3):
+        try:
+            client = _http_client(30.0)
+            content = System.Net.Http.StringContent(
+                json.dumps(data), System.Text.Encoding.UTF8, "application/json"
+            )
+            response = client.PostAsync(callback_url, content).Result
+            if response.IsSuccessStatusCode:
+                return
+            time.sleep(0.5)
+        except Exception as e:
+            if i == 2:
+                log("callback failed after 3 retries: " + str(e))
+            time.sleep(0.5)
+
+
+def _cleanup_doc():
+    try:
+        doc = Rhino.RhinoDoc.ActiveDoc
+        if doc is None:
+            log("[cleanup] no ActiveDoc")
+            return
+
+        def _count():
+            try:
+                return len(list(doc.Objects))
+            except Exception:
+                return -1
+
+        for attempt in range(3):
+            try:
+                doc.Objects.UnselectAll()
+            except Exception:
+                pass
+            try:
+                Rhino.RhinoApp.RunScript("!_-SelAll _Delete _Enter", False)
+            except Exception:
+                pass
+            try:
+                ids = [o.Id for o in list(doc.Objects)]
+            except Exception:
+                ids = []
+            for oid in ids:
+                try:
+                    doc.Objects.Delete(oid, True)
+                except Exception:
+                    pass
+            remain = _count()
+            if remain == 0:
+                break
+        log("[cleanup] remain=" + str(_count()))
+    except Exception:
+        pass
+
+
+def _read_log(p):
+    try:
+        with open(p, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
+    except Exception:
+        return ""
+
+
+def _build_output_info(path):
+    info = {"path": path, "exists": False, "size": 0}
+    try:
+        if os.path.exists(path):
+            info["exists"] = True
+            info["size"] = os.path.getsize(path)
+    except Exception:
+        pass
+    return info
+
+
+def _job_fields():
+    """process_abutment_stl.main의 구조화 결과(perf, metadata). 실패한 작업도 그때까지 값은 나간다.
+
+    metadata를 얻지 못하면(빈 값/예외) None으로 보내 서버가 로그 파일의 *_RESULT 마커를 읽게 한다.
+    """
+    try:
+        import process_abutment_stl
+
+        result = process_abutment_stl.job_result()
+        return {"perf": result.get("perf") or {}, "metadata": result.get("metadata") or None}
+    except Exception:
+        return {"perf": {}, "metadata": None}
+
+
+def _callback_log(log_path, ok):
+    """ABUTS_CALLBACK_LOG: always | on_error(기본) | never. 결과는 metadata로 가므로 성공 시 로그는 생략한다."""
+    mode = str(os.environ.get("ABUTS_CALLBACK_LOG") or "on_error").strip().lower()
+    if mode == "always" or (mode != "never" and not ok):
+        return _read_log(log_path)
+    return ""
+
+
+def _script_modules():
+    """scripts 디렉토리에서 로드된 모듈 목록. process_abutment_stl은 마지막에 reload한다."""
+    script_dir = os.path.normcase(
+        os.path.abspath(os.environ.get("ABUTS_SCRIPT_DIR") or os.path.dirname(__file__))
+    )
+    mods = []
+    for name, mod in list(sys.modules.items()):
+        if name in ("__main__", __name__) or mod is None:
+            continue
+        path = getattr(mod, "__file__", None)
+        if not path:
+            continue
+        if os.path.normcase(os.path.dirname(os.path.abspath(path))) != script_dir:
+            continue
+        mods.append(mod)
+    mods.sort(key=lambda m: 1 if m.__name__ == "process_abutment_stl" else 0)
+    return mods
+
+
+def hot_reload():
+    """scripts/*.py 변경을 반영한다. 실패한 모듈은 캐시된 버전을 계속 쓴다."""
+    reloaded = []
+    for mod in _script_modules():
+        try:
+            importlib.reload(mod)
+            reloaded.append(mod.__name__)
+        except Exception as e:
+            log("hot-reload failed: {} {}".format(mod.__name__, e))
+    log("hot-reload done: " + ",".join(reloaded))
+    return reloaded
+
+
+def _run_job(job):
+    token = job.get("token")
+    input_stl = job.get("inputStl")
+    output_stl = job.get("outputStl")
+    log_path = job.get("logPath")
+    callback_url = job.get("callbackUrl")
+    # 상주 Rhino 프로세스의 환경 변수는 이후 rhinocode script(래퍼) 작업도 보므로
+    # 작업 동안만 바꾸고 끝나면 되돌린다 (ABUTS_MODULE_RELOAD=0이 남으면 래퍼 작업이 구버전 하위 모듈을 씀)
+    job_env = dict((str(k), str(v)) for k, v in (job.get("env") or {}).items())
+    job_env["ABUTS_MODULE_RELOAD"] = "0"
+    env_snapshot = dict((k, os.environ.get(k)) for k in job_env)
+    os.environ.update(job_env)
+
+    try:
+        import process_abutment_stl
+
+        # 래퍼 경로에서는 reload마다 logs.txt가 초기화되므로 같은 동작을 유지한다
+        process_abutment_stl._log_initialized = False
+        _cleanup_doc()
+        process_abutment_stl.main(
+            input_path_arg=input_stl, output_path_arg=output_stl, log_path_arg=log_path
+        )
+        result = {
+            "token": token,
+            "ok": True,
+            "log": _callback_log(log_path, True),
+            "output": _build_output_info(output_stl),
+        }
+    except BaseException as e:
+        result = {
+            "token": token,
+            "ok": False,
+            "error": str(e),
+            "traceback": traceback.format_exc(),
+            "log": _callback_log(log_path, False),
+            "output": _build_output_info(output_stl),
+        }
+    finally:
+        for k, v in env_snapshot.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    result.update(_job_fields())
+    _send_result(callback_url, result)
+
+
+def _run_on_ui_thread(fn, *args):
+    """Rhino 문서 조작은 UI 스레드에서 실행하고 끝날 때까지 기다린다."""
+    import System
+
+    done = threading.Event()
+    box = {}
+
+    def _invoke():
+        try:
+            box["result"] = fn(*args)
+        except BaseException as e:
+            box["error"] = e
+        finally:
+            done.set()
+
+    Rhino.RhinoApp.InvokeOnUiThread(System.Action(_invoke))
+    done.wait()
+    if "error" in box:
+        raise box["error"]
+    return box.get("result")
+
+
+def _loop(server, runner_id, poll_sec):
+    log("runner started: runnerId={} server={}".format(runner_id, server))
+    backoff = 1.0
+    while not _RUNNER["stop"]:
+        try:
+            msg = _poll(server, runner_id, _RUNNER["generation"], poll_sec)
+            backoff = 1.0
+        except Exception as e:
+            _RUNNER["lastError"] = str(e)
+            time.sleep(backoff)
+            backoff = min(30.0, backoff * 2.0)
+            continue
+
+        kind = msg.get("type")
+        generation = int(msg.get("generation", _RUNNER["generation"]))
+        if kind == "reload":
+            _run_on_ui_thread(hot_reload)
+            _RUNNER["generation"] = generation
+        elif kind == "job":
+            if _RUNNER["generation"] < 0:
+                _RUNNER["generation"] = generation
+            try:
+                _run_on_ui_thread(_run_job, msg)
+            except Exception as e:
+                _RUNNER["lastError"] = str(e)
+                log("job dispatch failed: " + str(e))
+            _RUNNER["jobs"] += 1
+        elif _RUNNER["generation"] < 0:
+            _RUNNER["generation"] = generation
+    log("runner stopped: runnerId={}".format(runner_id))
+
+
+def stop():
+    _RUNNER["stop"] = True
+
 
 def main():
     print("Rhino instance initializing for abuts.fit pipe...")
     print(f"Rhino version: {Rhino.RhinoApp.Version}")
-    # This script does nothing but keep the instance alive and visible to RhinoCode list
-    
+
+    server = os.environ.get("ABUTS_RUNNER_SERVER", "").strip()
+    runner_id = os.environ.get("ABUTS_RUNNER_ID", "").strip()
+    if not server or not runner_id:
+        # 수동 실행: 인스턴스를 살려 RhinoCode list에 보이게만 한다
+        return
+
+    # 재설치(서버 재시작 등)면 이미 떠 있는 스레드도 다음 poll부터 새 토큰을 쓴다
+    _RUNNER["token"] = os.environ.get("ABUTS_RUNNER_TOKEN", "").strip()
+
+    t = _RUNNER.get("thread")
+    if t is not None and t.is_alive():
+        log("runner already running: runnerId={}".format(runner_id))
+        return
+
+    try:
+        poll_sec = float(os.environ.get("ABUTS_RUNNER_POLL_SEC", "25"))
+    except Exception:
+        poll_sec = 25.0
+
+    _RUNNER["stop"] = False
+    t = threading.Thread(
+        target=_loop, args=(server, runner_id, poll_sec), name="abuts-runner", daemon=True
+    )
+    _RUNNER["thread"] = t
+    t.start()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,315 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/scripts/mesh_kernel.py
+# - bg/pc1/rhino-server/compute/scripts/align_stl_coordinate.py
+"""
+NumPy 기반 헥스 위상(side-face 법선) 추정
+
+`align_stl_coordinate._collect_hex_face_normal_observations`는 면마다 Python 루프로
+법선/중심/면적을 꺼내고, 대형 메시에서는 face_stride(2~3)로 샘플을 버렸다.
+이 모듈은 전체 삼각형 배열에 대해 한 번의 벡터 연산으로 같은 관측치를 만든다.
+
+관측치는 (N, 2) float64 배열 [angle_deg, weight] 이다.
+- side-face 필터(|n.Z| <= 0.12), Z 밴드, 반경 윈도우, area×(1-|n.Z|) 가중
+- 타겟 반경 타이트닝/가중, 외곽 플랫 필터(각인 바닥면 배제)
+- 60도 주기 위상(raw/robust), 6방향 클러스터링
+
+정의/상수는 align_stl_coordinate의 Python 경로와 동일하다. 차이는 quad가 삼각형 2개로
+분할돼 각 삼각형이 따로 관측치가 된다는 점뿐이다(STL 입력은 원래 삼각형).
+
+이 모듈은 Rhino를 import하지 않는다.
+"""
+
+import numpy as np
+
+# side-face 판정: 수직 면일수록 |n.Z|≈0
+SIDE_FACE_MAX_ABS_NZ = 0.12
+# 고정 + 동적 Z 밴드 (align_stl_coordinate와 동일)
+FIXED_Z_BANDS = ((-2.8, -1.2), (1.2, 2.8))
+DYNAMIC_BAND_MIN = 0.5
+MIN_BAND_WIDTH = 0.05
+# 외곽 플랫 필터
+OUTER_FLAT_INLIER_DEG = 7.5
+# 6방향 클러스터 반폭
+CLUSTER_HALF_WIDTH_DEG = 18.0
+# robust 위상 최소 인라이어 수
+ROBUST_MIN_INLIERS = 12
+
+_HEX_OFFSETS_DEG = 60.0 * np.arange(6, dtype=np.float64)
+
+
+def _empty_observations():
+    return np.zeros((0, 2), dtype=np.float64)
+
+
+def _angle_distance_deg(a, b):
+    d = np.asarray(a, dtype=np.float64) - b
+    return np.abs(np.mod(d + 180.0, 360.0) - 180.0)
+
+
+def _lattice_errors(angles, phase_deg):
+    """(N, 6) 각 관측치와 phase + 60k 사이 각도 오차."""
+    return _angle_distance_deg(angles[:, None], phase_deg + _HEX_OFFSETS_DEG[None, :])
+
+
+def _z_bands(z_min, z_max):
+    z_span = max(0.0, float(z_max - z_min))
+    dyn_max = min(4.5, max(1.8, z_span * 0.36))
+    bands = list(FIXED_Z_BANDS) + [
+        (-dyn_max, -DYNAMIC_BAND_MIN),
+        (DYNAMIC_BAND_MIN, dyn_max),
+    ]
+    out = []
+    for z0, z1 in bands:
+        z_from = max(min(z0, z1), float(z_min))
+        z_to = min(max(z0, z1), float(z_max))
+        if z_to - z_from < MIN_BAND_WIDTH:
+            continue
+        out.append((z_from, z_to))
+    return out
+
+
+def _radial_window(target_r):
+    # connection/hex 근처 반경만 사용해 크라운 외형(큰 반경) 오염을 줄인다.
+    if target_r is None:
+        return 0.45, 4.2
+    return max(0.45, target_r * 0.50), min(4.0, target_r * 1.95)
+
+
+def _target_radius(target_diameter):
+    try:
+        td = float(target_diameter)
+    except Exception:
+        return None
+    if not np.isfinite(td) or td <= 0:
+        return None
+    return td * 0.5
+
+
+def collect_raw_observations(vertices, faces, target_diameter=None):
+    """
+    side-face 필터 + Z 밴드 + 반경 윈도우를 통과한 면의 (angle, weight, radial).
+    반환: ((N, 3) 배열, target_r)
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    target_r = _target_radius(target_diameter)
+    if vertices.shape[0] == 0 or faces.shape[0] == 0:
+        return np.zeros((0, 3), dtype=np.float64), target_r
+
+    tri = vertices[faces]
+    cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    length = np.linalg.norm(cross, axis=1)
+    normals = np.zeros_like(cross)
+    ok = length > 1e-20
+    normals[ok] = cross[ok] / length[ok, None]
+
+    abs_nz = np.abs(normals[:, 2])
+    mask = abs_nz <= SIDE_FACE_MAX_ABS_NZ
+
+    centroid = tri.mean(axis=1)
+    cz = centroid[:, 2]
+    bands = _z_bands(vertices[:, 2].min(), vertices[:, 2].max())
+    in_band = np.zeros(faces.shape[0], dtype=bool)
+    for z_from, z_to in bands:
+        in_band |= (cz >= z_from) & (cz <= z_to)
+    mask &= in_band
+
+    radial = np.hypot(centroid[:, 0], centroid[:, 1])
+    radial_min, radial_max = _radial_window(target_r)
+    mask &= (radial >= radial_min) & (radial <= radial_max)
+
+    idx = np.nonzero(mask)[0]
+    if idx.shape[0] == 0:
+        return np.zeros((0, 3), dtype=np.float64), target_r
+
+    angle = np.degrees(np.arctan2(normals[idx, 1], normals[idx, 0]))
+    area = 0.5 * length[idx]
+    weight = np.maximum(area * np.maximum(0.0, 1.0 - abs_nz[idx]), 1e-6)
+    raw = np.column_stack([angle, weight, radial[idx]])
+    return raw, target_r
+
+
+def _tighten_and_weight(raw, target_r):
+    """타겟 반경 근처 관측치 우선 + 반경 근접도 가중."""
+    if target_r is None:
+        return raw
+    radial = raw[:, 2]
+    tight_min = max(0.55, target_r * 0.62)
+    tight_max = min(2.9, target_r * 1.45)
+    tight_mask = (radial >= tight_min) & (radial <= tight_max)
+    if int(tight_mask.sum()) >= max(18, int(raw.shape[0] * 0.18)):
+        raw = raw[tight_mask]
+    if target_r <= 1e-6:
+        return raw
+    band = max(0.35, target_r * 0.55)
+    radial_weight = np.maximum(0.20, 1.0 - np.abs(raw[:, 2] - target_r) / band)
+    out = raw.copy()
+    out[:, 1] = np.maximum(raw[:, 1] * radial_weight, 1e-9)
+    return out
+
+
+def filter_outer_planar_flats(raw, target_r=None):
+    """
+    외곽 플랫(상위 반경) 샘플만 남긴다. 입력 (N, 3) [angle, weight, radial], 출력 (M, 2).
+    6면 분포가 부족하거나 남는 샘플이 12개 미만이면 원본 (angle, weight)를 반환한다.
+    """
+    if raw.shape[0] == 0:
+        return _empty_observations()
+
+    seed_observations = raw[:, :2]
+    seed = compute_hex_phase_robust(seed_observations)
+    if seed is None:
+        return seed_observations
+
+    phase_deg = float(seed["phase_deg"])
+    errors = _lattice_errors(raw[:, 0], phase_deg)
+    best_k = np.argmin(errors, axis=1)
+    best_err = errors[np.arange(raw.shape[0]), best_k]
+    inlier = best_err <= OUTER_FLAT_INLIER_DEG
+
+    counts = np.bincount(best_k[inlier], minlength=6)
+    if int((counts >= 3).sum()) < 4:
+        return seed_observations
+
+    radial_tol = 0.12
+    if target_r is not None and target_r > 1e-6:
+        radial_tol = max(0.06, min(0.24, target_r * 0.10))
+
+    parts = []
+    for k in range(6):
+        if counts[k] < 2:
+            continue
+        sel = np.nonzero(inlier & (best_k == k))[0]
+        radial = raw[sel, 2]
+        r_hi = float(np.percentile(radial, 90.0))
+        keep = radial >= (r_hi - radial_tol)
+        sel = sel[keep]
+        err = best_err[sel]
+        angle_closeness = np.maximum(0.20, 1.0 - err / max(OUTER_FLAT_INLIER_DEG, 1e-6))
+        outerness = np.maximum(
+            0.25, 1.0 - np.maximum(0.0, r_hi - raw[sel, 2]) / max(radial_tol, 1e-6)
+        )
+        ww = np.maximum(raw[sel, 1] * angle_closeness * outerness, 1e-9)
+        parts.append(np.column_stack([raw[sel, 0], ww]))
+
+    filtered = np.vstack(parts) if parts else _empty_observations()
+    if filtered.shape[0] >= 12:
+        return filtered
+    return seed_observations
+
+
+def collect_face_normal_observations(vertices, faces, target_diameter=None):
+    """
+    헥스 구간 side-face 법선 관측치 (stride 없이 전체 면).
+    반환: (N, 2) [angle_deg, weight]
+    """
+    raw, target_r = collect_raw_observations(vertices, faces, target_diameter)
+    if raw.shape[0] == 0:
+        return _empty_observations()
+    weighted = _tighten_and_weight(raw, target_r)
+    return filter_outer_planar_flats(weighted, target_r=target_r)
+
+
+def compute_hex_phase(observations):
+    """60도 주기 위상. 반환: {phase_deg, coherence, sum_w} 또는 None."""
+    obs = np.asarray(observations, dtype=np.float64).reshape(-1, 2)
+    if obs.shape[0] == 0:
+        return None
+    ww = np.maximum(obs[:, 1], 1e-9)
+    a6 = np.radians(6.0 * obs[:, 0])
+    sx = float(np.dot(ww, np.sin(a6)))
+    cx6 = float(np.dot(ww, np.cos(a6)))
+    sum_w = float(ww.sum())
+    if sum_w <= 1e-12 or (abs(sx) <= 1e-9 and abs(cx6) <= 1e-9):
+        return None
+    return {
+        "phase_deg": float(np.degrees(np.arctan2(sx, cx6)) / 6.0),
+        "coherence": float(np.hypot(sx, cx6) / max(sum_w, 1e-12)),
+        "sum_w": sum_w,
+    }
+
+
+def compute_hex_phase_robust(observations, inlier_deg=6.5):
+    """
+    2-pass robust 위상: 전체 샘플 위상 -> 60도 격자 인라이어만 재가중해 재계산.
+    반환 형식은 align_stl_coordinate._compute_hex_phase_from_face_normal_observations_robust와 같다.
+    """
+    obs = np.asarray(observations, dtype=np.float64).reshape(-1, 2)
+    base = compute_hex_phase(obs)
+    if base is None:
+        return None
+
+    raw_result = {
+        "phase_deg": base["phase_deg"],
+        "coherence": base["coherence"],
+        "sum_w": base["sum_w"],
+        "inlier_count": 0,
+        "method": "face_normals_raw",
+    }
+
+    inlier_deg = float(inlier_deg)
+    err = _lattice_errors(obs[:, 0], float(base["phase_deg"])).min(axis=1)
+    mask = err <= inlier_deg
+    inlier_count = int(mask.sum())
+    if inlier_count < ROBUST_MIN_INLIERS:
+        return raw_result
+
+    closeness = np.maximum(0.05, 1.0 - err[mask] / max(inlier_deg, 1e-6))
+    inliers = np.column_stack(
+        [obs[mask, 0], np.maximum(obs[mask, 1], 1e-9) * closeness]
+    )
+    refined = compute_hex_phase(inliers)
+    if refined is None:
+        return raw_result
+
+    return {
+        "phase_deg": refined["phase_deg"],
+        "coherence": refined["coherence"],
+        "sum_w": refined["sum_w"],
+        "inlier_count": inlier_count,
+        "method": "face_normals_robust",
+    }
+
+
+def cluster_hex_face_normals(observations):
+    """
+    6방향(60도 주기) 클러스터링.
+    반환: {phase_deg, clusters:[{angle_deg,weight,count}], samples} 또는 None
+    """
+    obs = np.asarray(observations, dtype=np.float64).reshape(-1, 2)
+    if obs.shape[0] == 0:
+        return None
+
+    angles = obs[:, 0]
+    w = obs[:, 1]
+    a6 = np.radians(6.0 * angles)
+    sx = float(np.dot(w, np.sin(a6)))
+    cx6 = float(np.dot(w, np.cos(a6)))
+    if abs(sx) <= 1e-9 and abs(cx6) <= 1e-9:
+        return None
+
+    phase_deg = float(np.degrees(np.arctan2(sx, cx6)) / 6.0)
+    rad = np.radians(angles)
+    w_sin = w * np.sin(rad)
+    w_cos = w * np.cos(rad)
+    within = _lattice_errors(angles, phase_deg) <= CLUSTER_HALF_WIDTH_DEG
+
+    clusters = []
+    for k in range(6):
+        m = within[:, k]
+        cnt = int(m.sum())
+        sum_w = float(w[m].sum())
+        if cnt == 0 or sum_w <= 1e-9:
+            continue
+        mean_ang = float(np.degrees(np.arctan2(w_sin[m].sum(), w_cos[m].sum())))
+        clusters.append({"angle_deg": mean_ang, "weight": sum_w, "count": cnt})
+
+    if not clusters:
+        return None
+
+    return {
+        "phase_deg": phase_deg,
+        "clusters": clusters,
+        "samples": int(obs.shape[0]),
+    }
@@ -0,0 +1,1033 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/scripts/process_abutment_stl.py
+# - bg/pc1/rhino-server/compute/scripts/align_stl_coordinate.py
+# - web/backend/controllers/bg/bg.controller.js
+"""
+NumPy 기반 STL 메시 커널 (Rhino 비의존)
+
+목적:
+- align / finishline / fill / diameter 단계의 CPU 연산을 Rhino 밖(일반 Python 워커)에서도
+  돌릴 수 있도록 메시를 (vertices, faces) 배열로 다룬다.
+- `mesh.Vertices[i]`를 한 개씩 꺼내는 루프 대신 배열 연산으로 한 번에 계산한다.
+
+표현:
+- vertices: float64 (V, 3)
+- faces: int64 (F, 3)  — 삼각형만 사용 (Rhino quad는 변환 시 2개 삼각형으로 분할)
+
+이 모듈은 Rhino를 import하지 않는다. Rhino 메시 변환(from_rhino_mesh)은 duck-typing으로 처리하고,
+fill_rhino_mesh의 벌크 경로만 Rhino 프로세스 안에서 호출될 때 RhinoCommon 타입을 지연 import한다.
+"""
+
+import os
+import re
+
+import numpy as np
+
+STL_BINARY_HEADER_SIZE = 80
+STL_BINARY_RECORD_SIZE = 50
+
+_STL_BINARY_RECORD_DTYPE = np.dtype(
+    [
+        ("normal", "<f4", (3,)),
+        ("v", "<f4", (3, 3)),
+        ("attr", "<u2"),
+    ]
+)
+assert _STL_BINARY_RECORD_DTYPE.itemsize == STL_BINARY_RECORD_SIZE
+
+_ASCII_VERTEX_RE = re.compile(
+    rb"vertex\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)"
+)
+
+
+# -----------------------------
+# STL 읽기/쓰기
+# -----------------------------
+def _is_binary_stl(data):
+    """
+    바이너리 STL 판별.
+    일부 exporter가 바이너리 헤더를 'solid'로 시작하므로 헤더 문자열이 아니라
+    '선언된 삼각형 수와 파일 크기 일치' 여부로 판단한다.
+    """
+    if len(data) < STL_BINARY_HEADER_SIZE + 4:
+        return False
+    count = int(np.frombuffer(data, dtype="<u4", count=1, offset=STL_BINARY_HEADER_SIZE)[0])
+    expected = STL_BINARY_HEADER_SIZE + 4 + count * STL_BINARY_RECORD_SIZE
+    if len(data) == expected:
+        return True
+    return not data[:5].lower() == b"solid"
+
+
+def _parse_binary_triangles(data):
+    count = int(np.frombuffer(data, dtype="<u4", count=1, offset=STL_BINARY_HEADER_SIZE)[0])
+    available = (len(data) - STL_BINARY_HEADER_SIZE - 4) // STL_BINARY_RECORD_SIZE
+    count = min(count, max(available, 0))
+    records = np.frombuffer(
+        data,
+        dtype=_STL_BINARY_RECORD_DTYPE,
+        count=count,
+        offset=STL_BINARY_HEADER_SIZE + 4,
+    )
+    return records["v"].astype(np.float64)
+
+
+def _parse_ascii_triangles(data):
+    coords = _ASCII_VERTEX_RE.findall(data)
+    if not coords:
+        return np.zeros((0, 3, 3), dtype=np.float64)
+    arr = np.array(coords, dtype=np.float64)
+    usable = (arr.shape[0] // 3) * 3
+    return arr[:usable].reshape(-1, 3, 3)
+
+
+def read_stl_triangles(path):
+    """STL(바이너리/ASCII)을 (F, 3, 3) 삼각형 좌표 배열로 읽는다."""
+    with open(str(path), "rb") as f:
+        data = f.read()
+    if _is_binary_stl(data):
+        return _parse_binary_triangles(data)
+    return _parse_ascii_triangles(data)
+
+
+def weld_triangles(triangles, drop_degenerate=True):
+    """
+    삼각형 soup를 정확히 같은 좌표끼리 합쳐 (vertices, faces)로 변환.
+    STL은 면마다 꼭짓점을 중복 저장하므로 위상(인접/경계) 계산 전에 반드시 필요하다.
+    허용오차 기반 용접은 weld_vertices를 사용한다.
+    """
+    tri = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    if tri.shape[0] == 0:
+        return np.zeros((0, 3), dtype=np.float64), np.zeros((0, 3), dtype=np.int64)
+    flat = tri.reshape(-1, 3)
+    vertices, inverse = np.unique(flat, axis=0, return_inverse=True)
+    faces = inverse.reshape(-1).astype(np.int64).reshape(-1, 3)
+    if drop_degenerate:
+        faces = _drop_degenerate_faces(faces)
+    return vertices, faces
+
+
+def _drop_degenerate_faces(faces):
+    if faces.shape[0] == 0:
+        return faces
+    ok = (
+        (faces[:, 0] != faces[:, 1])
+        & (faces[:, 1] != faces[:, 2])
+        & (faces[:, 2] != faces[:, 0])
+    )
+    return faces[ok]
+
+
+def read_stl(path, drop_degenerate=True):
+    """STL을 읽어 용접된 (vertices, faces)를 반환."""
+    return weld_triangles(read_stl_triangles(path), drop_degenerate=drop_degenerate)
+
+
+def write_stl(path, vertices, faces, binary=True, name="abuts"):
+    """(vertices, faces)를 STL로 저장. 법선은 면 기하로부터 다시 계산한다."""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    tri = vertices[faces] if faces.shape[0] else np.zeros((0, 3, 3))
+    normals = face_normals(vertices, faces) if faces.shape[0] else np.zeros((0, 3))
+
+    out_dir = os.path.dirname(str(path))
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    if binary:
+        records = np.zeros(faces.shape[0], dtype=_STL_BINARY_RECORD_DTYPE)
+        records["normal"] = normals
+        records["v"] = tri
+        header = str(name).encode("ascii", errors="ignore")[:STL_BINARY_HEADER_SIZE]
+        header = header.ljust(STL_BINARY_HEADER_SIZE, b" ")
+        with open(str(path), "wb") as f:
+            f.write(header)
+            f.write(np.array([faces.shape[0]], dtype="<u4").tobytes())
+            f.write(records.tobytes())
+        return
+
+    lines = ["solid {}".format(name)]
+    for n, t in zip(normals, tri):
+        lines.append("  facet normal {:.6e} {:.6e} {:.6e}".format(n[0], n[1], n[2]))
+        lines.append("    outer loop")
+        for p in t:
+            lines.append("      vertex {:.6e} {:.6e} {:.6e}".format(p[0], p[1], p[2]))
+        lines.append("    endloop")
+        lines.append("  endfacet")
+    lines.append("endsolid {}".format(name))
+    with open(str(path), "w", encoding="ascii") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+# -----------------------------
+# Rhino 메시 변환
+# -----------------------------
+def from_rhino_mesh(mesh):
+    """
+    RhinoCommon Mesh -> (vertices, faces).
+    ToFloatArray/ToIntArray(True) 벌크 변환을 우선 사용하고(quad는 삼각형 분할),
+    실패 시에만 요소 단위 루프로 폴백한다.
+    """
+    try:
+        vertices = np.array(list(mesh.Vertices.ToFloatArray()), dtype=np.float64)
+        vertices = vertices.reshape(-1, 3)
+        faces = np.array(list(mesh.Faces.ToIntArray(True)), dtype=np.int64)
+        faces = faces.reshape(-1, 3)
+        return vertices, faces
+    except Exception:
+        pass
+
+    vcount = int(mesh.Vertices.Count)
+    vertices = np.zeros((vcount, 3), dtype=np.float64)
+    for i in range(vcount):
+        v = mesh.Vertices[i]
+        vertices[i] = (v.X, v.Y, v.Z)
+    rows = []
+    for i in range(int(mesh.Faces.Count)):
+        f = mesh.Faces[i]
+        rows.append((f.A, f.B, f.C))
+        if f.IsQuad:
+            rows.append((f.A, f.C, f.D))
+    faces = np.array(rows, dtype=np.int64).reshape(-1, 3)
+    return vertices, faces
+
+
+def apply_affine(vertices, affine):
+    """
+    3x4 affine(행 우선 12개 float: m00..m03, m10..m13, m20..m23)을 정점에 적용.
+    Rhino Transform의 상위 3행과 같은 배치다.
+    """
+    m = np.asarray(affine, dtype=np.float64).reshape(3, 4)
+    return np.asarray(vertices, dtype=np.float64).dot(m[:, :3].T) + m[:, 3]
+
+
+def fill_rhino_mesh(mesh, vertices, faces):
+    """
+    빈 RhinoCommon Mesh에 (vertices, faces)를 채운다(from_rhino_mesh의 역방향).
+    AddVertices/AddFaces 벌크 호출을 우선 사용하고(RhinoCommon 타입은 호출 시점에만 import),
+    실패 시에만 요소 단위 Add 루프로 폴백한다. 보통은 rhino_mesh_from_arrays를 쓴다.
+    """
+    vertex_rows = np.asarray(vertices, dtype=np.float64).tolist()
+    face_rows = np.asarray(faces, dtype=np.int64).tolist()
+    vertices_added = False
+    try:
+        import System
+        from Rhino.Geometry import MeshFace, Point3d
+
+        mesh.Vertices.AddVertices(System.Array[Point3d]([Point3d(x, y, z) for x, y, z in vertex_rows]))
+        vertices_added = True
+        mesh.Faces.AddFaces(System.Array[MeshFace]([MeshFace(a, b, c) for a, b, c in face_rows]))
+        return mesh
+    except Exception:
+        pass
+
+    if not vertices_added:
+        add_vertex = mesh.Vertices.Add
+        for x, y, z in vertex_rows:
+            add_vertex(x, y, z)
+    if int(mesh.Faces.Count) == 0:
+        add_face = mesh.Faces.AddFace
+        for a, b, c in face_rows:
+            add_face(a, b, c)
+    return mesh
+
+
+def rhino_mesh_from_arrays(mesh_type, vertices, faces):
+    """
+    (vertices, faces) -> 새 RhinoCommon Mesh (fill_rhino_mesh + 법선 계산 + Compact).
+    mesh_type은 호출 측의 Rhino.Geometry.Mesh 클래스 (모듈 로드 시 Rhino를 import하지 않도록 주입받는다).
+    """
+    mesh = mesh_type()
+    fill_rhino_mesh(mesh, vertices, faces)
+    try:
+        mesh.Normals.ComputeNormals()
+    except Exception:
+        pass
+    try:
+        mesh.Compact()
+    except Exception:
+        pass
+    return mesh
+
+
+# -----------------------------
+# 면 단위 기하
+# -----------------------------
+def triangle_corners(vertices, faces):
+    """(F, 3, 3) 삼각형 꼭짓점 좌표."""
+    return np.asarray(vertices, dtype=np.float64)[np.asarray(faces, dtype=np.int64)]
+
+
+def _face_cross(vertices, faces):
+    tri = triangle_corners(vertices, faces)
+    return np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+
+
+def face_normals(vertices, faces, normalize=True):
+    """면 법선. normalize=False면 길이가 2×면적인 외적 벡터를 그대로 반환."""
+    cross = _face_cross(vertices, faces)
+    if not normalize:
+        return cross
+    length = np.linalg.norm(cross, axis=1)
+    out = np.zeros_like(cross)
+    ok = length > 1e-20
+    out[ok] = cross[ok] / length[ok, None]
+    return out
+
+
+def face_areas(vertices, faces):
+    return 0.5 * np.linalg.norm(_face_cross(vertices, faces), axis=1)
+
+
+def face_centroids(vertices, faces):
+    return triangle_corners(vertices, faces).mean(axis=1)
+
+
+def bounding_box(vertices):
+    """(min_xyz, max_xyz). 빈 메시는 (None, None)."""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    if vertices.shape[0] == 0:
+        return None, None
+    return vertices.min(axis=0), vertices.max(axis=0)
+
+
+def surface_area(vertices, faces):
+    return float(face_areas(vertices, faces).sum())
+
+
+# -----------------------------
+# 위상: 엣지 / 컴포넌트 / 경계
+# -----------------------------
+def unique_edges(faces):
+    """
+    무방향 엣지 목록.
+
+    Returns:
+        edges: (E, 2) 정렬된 정점 인덱스 쌍 (edges[:, 0] < edges[:, 1])
+        face_count: (E,) 엣지를 공유하는 면 수 (1이면 naked, 3 이상이면 non-manifold)
+        face_edge: (F, 3) 면의 (0-1, 1-2, 2-0) 엣지가 edges의 몇 번째인지
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    if faces.shape[0] == 0:
+        empty = np.zeros((0, 2), dtype=np.int64)
+        return empty, np.zeros(0, dtype=np.int64), np.zeros((0, 3), dtype=np.int64)
+    # (lo, hi) 쌍을 lo * V + hi 1차원 int64 키로 묶는다 (np.unique(axis=0)보다 수십 배 빠름)
+    vcount = np.int64(int(faces.max()) + 1)
+    nxt = faces[:, [1, 2, 0]]
+    key = (np.minimum(faces, nxt) * vcount + np.maximum(faces, nxt)).reshape(-1)
+    uniq, inverse, counts = np.unique(key, return_inverse=True, return_counts=True)
+    edges = np.stack([uniq // vcount, uniq % vcount], axis=1)
+    return edges, counts, inverse.reshape(-1, 3)
+
+
+def naked_edges(faces):
+    """한 면에만 속한 엣지(경계)를 면 방향(a->b) 그대로 반환."""
+    faces = np.asarray(faces, dtype=np.int64)
+    if faces.shape[0] == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    _, counts, face_edge = unique_edges(faces)
+    directed = np.stack(
+        [faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]], axis=1
+    )
+    mask = counts[face_edge] == 1
+    return directed[mask].reshape(-1, 2)
+
+
+def _union_find_labels(pairs_a, pairs_b, count):
+    """
+    (a, b) 연결 쌍으로 0..count-1 노드의 연결 성분 대표값을 계산.
+    hook(최소 라벨로 연결) + pointer jumping을 배열 연산으로 반복한다.
+    """
+    parent = np.arange(count, dtype=np.int64)
+    if count == 0 or len(pairs_a) == 0:
+        return parent
+    a = np.asarray(pairs_a, dtype=np.int64)
+    b = np.asarray(pairs_b, dtype=np.int64)
+    while True:
+        pa = parent[a]
+        pb = parent[b]
+        differ = pa != pb
+        if not np.any(differ):
+            break
+        pa = pa[differ]
+        pb = pb[differ]
+        lo = np.minimum(pa, pb)
+        hi = np.maximum(pa, pb)
+        np.minimum.at(parent, hi, lo)
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent
+
+
+def connected_components(faces, vertex_count=None):
+    """
+    정점 공유 기준 면 연결 성분.
+
+    Returns:
+        face_labels: (F,) 0..n-1 성분 번호 (면 수가 많은 성분부터 0)
+        n: 성분 수
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    if faces.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64), 0
+    if vertex_count is None:
+        vertex_count = int(faces.max()) + 1
+    a = np.concatenate([faces[:, 0], faces[:, 1]])
+    b = np.concatenate([faces[:, 1], faces[:, 2]])
+    roots = _union_find_labels(a, b, int(vertex_count))
+    face_roots = roots[faces[:, 0]]
+    uniq, inverse, counts = np.unique(face_roots, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    # 면 수 내림차순으로 번호 재부여 (동률은 대표 정점 순)
+    order = np.lexsort((uniq, -counts))
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.shape[0])
+    return rank[inverse], int(uniq.shape[0])
+
+
+def split_components(vertices, faces):
+    """성분별 (vertices, faces) 리스트. 정점 인덱스는 성분 내부 기준으로 재매핑한다."""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    labels, n = connected_components(faces, vertices.shape[0])
+    out = []
+    for k in range(n):
+        sub = faces[labels == k]
+        used, remap = np.unique(sub.reshape(-1), return_inverse=True)
+        out.append((vertices[used], remap.reshape(-1).reshape(-1, 3)))
+    return out
+
+
+# -----------------------------
+# 정점 weld / 면 성분 라벨 + 성분 통계
+# -----------------------------
+# 1차원 키로 합칠 수 있는 값 범위 (int64 양수)
+_INT64_KEY_LIMIT = 1 << 62
+
+
+def _int_row_keys(rows):
+    """
+    (N, K) 정수 행(격자 셀 좌표, 정렬된 면 인덱스 등) -> 사전순을 보존하는 1차원 키 목록.
+    앞 열부터 범위 곱이 int64에 들어가는 만큼 mixed-radix로 합친다
+    (np.unique(axis=0)의 void 비교 대신 1차원 정렬을 쓰기 위함, 보통 키 1개).
+    """
+    rows = rows - rows.min(axis=0)
+    spans = [int(x) + 1 for x in rows.max(axis=0)]
+    keys = []
+    key = rows[:, 0]
+    width = spans[0]
+    for k in range(1, rows.shape[1]):
+        if width * spans[k] < _INT64_KEY_LIMIT:
+            key = key * spans[k] + rows[:, k]
+            width *= spans[k]
+        else:
+            keys.append(key)
+            key = rows[:, k]
+            width = spans[k]
+    keys.append(key)
+    return keys
+
+
+def _sorted_runs(keys):
+    """
+    키 목록(앞이 우선)으로 안정 정렬한 순서와 같은 값 구간의 시작 표시.
+
+    Returns:
+        (order, starts) — starts[i]: 정렬 후 i번째가 새 구간의 첫 원소인지 (bool)
+    """
+    if len(keys) == 1:
+        order = np.argsort(keys[0], kind="stable")
+    else:
+        order = np.lexsort(keys[::-1])
+    starts = np.zeros(order.shape[0], dtype=bool)
+    starts[:1] = True
+    for key in keys:
+        ordered = key[order]
+        starts[1:] |= ordered[1:] != ordered[:-1]
+    return order, starts
+
+
+def _run_first_index(order, starts):
+    """_sorted_runs 구간마다 가장 작은 원래 인덱스(안정 정렬이므로 구간 첫 원소)를 원래 순서로 펼친다."""
+    head = order[np.maximum.accumulate(np.where(starts, np.arange(order.shape[0]), 0))]
+    out = np.empty_like(order)
+    out[order] = head
+    return out
+
+
+def weld_vertices(vertices, faces, tol=1e-5, drop_degenerate=True, drop_duplicate_faces=True):
+    """
+    허용오차 기반 정점 weld (grid hash).
+
+    셀 크기 2*tol 격자를 축마다 0 / tol 만큼 밀어 8벌 만들고, 어느 격자에서든 같은 셀에 든
+    정점을 union-find로 묶는다. 축별 거리가 tol 이하인 정점은 반드시 합쳐지고,
+    한 셀 안이면 최대 2*tol(축별)까지 합쳐질 수 있다. tol <= 0이면 좌표가 정확히 같은 정점만 합친다.
+    합친 정점 좌표는 그룹의 가장 작은 원래 인덱스 정점을 쓴다.
+    셀 좌표는 1차원 int64 키로 합쳐 정렬하므로 메시 폭에 관계없이 np.unique(axis=0)를 쓰지 않는다.
+
+    Returns:
+        (vertices, faces, vertex_map) — vertex_map: 원래 정점 -> 새 정점 인덱스 (V,)
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    count = vertices.shape[0]
+    if count == 0:
+        return vertices, faces, np.zeros(0, dtype=np.int64)
+
+    ids = np.arange(count, dtype=np.int64)
+    if tol is None or tol <= 0:
+        key_sets = [[vertices[:, 0], vertices[:, 1], vertices[:, 2]]]
+    else:
+        cell = 2.0 * float(tol)
+        key_sets = []
+        for sx in (0.0, tol):
+            for sy in (0.0, tol):
+                for sz in (0.0, tol):
+                    shifted = vertices + np.array([sx, sy, sz], dtype=np.float64)
+                    key_sets.append(_int_row_keys(np.floor(shifted / cell).astype(np.int64)))
+
+    pairs_a = []
+    pairs_b = []
+    for keys in key_sets:
+        rep = _run_first_index(*_sorted_runs(keys))
+        moved = rep != ids
+        pairs_a.append(ids[moved])
+        pairs_b.append(rep[moved])
+    roots = _union_find_labels(np.concatenate(pairs_a), np.concatenate(pairs_b), count)
+
+    # union-find 대표는 성분 최소 인덱스이므로 대표 순번이 곧 새 정점 번호
+    is_root = roots == ids
+    vertex_map = (np.cumsum(is_root) - 1)[roots]
+    out_vertices = vertices[is_root]
+    out_faces = vertex_map[faces] if faces.shape[0] else faces
+    if drop_degenerate:
+        out_faces = _drop_degenerate_faces(out_faces)
+    if drop_duplicate_faces and out_faces.shape[0]:
+        order, starts = _sorted_runs(_int_row_keys(np.sort(out_faces, axis=1)))
+        out_faces = out_faces[np.sort(order[starts])]
+    return out_vertices, out_faces, vertex_map
+
+
+def face_edge_links(faces):
+    """
+    같은 무방향 엣지(정점 인덱스 기준)를 공유하는 면 쌍 (a, b).
+    한 엣지를 쓰는 면들은 그 엣지의 첫 면에 잇는다. 메시당 1회 만들어 각도별 라벨링에 재사용한다.
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    face_count = faces.shape[0]
+    if face_count == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    _, _, face_edge = unique_edges(faces)
+    flat_edge = face_edge.reshape(-1)
+    flat_face = np.repeat(np.arange(face_count, dtype=np.int64), 3)
+    order = np.argsort(flat_edge, kind="stable")
+    e_sorted = flat_edge[order]
+    f_sorted = flat_face[order]
+    starts = np.ones(e_sorted.shape[0], dtype=bool)
+    starts[1:] = e_sorted[1:] != e_sorted[:-1]
+    head = f_sorted[np.maximum.accumulate(np.where(starts, np.arange(e_sorted.shape[0]), 0))]
+    link = ~starts
+    return f_sorted[link], head[link]
+
+
+def link_cosines(vertices, faces, a, b):
+    """face_edge_links 쌍마다 두 면 법선 사이 cos. crease 각도 마스크는 cos >= cos(angle)."""
+    normals = face_normals(vertices, faces)
+    return np.einsum("ij,ij->i", normals[a], normals[b])
+
+
+def link_components(a, b, face_count, keep=None):
+    """
+    면 연결 쌍(a, b)으로 면 성분 라벨을 만든다. keep(bool 마스크)을 주면 그 쌍만 잇는다.
+
+    Returns:
+        face_labels: (F,) 0..n-1 성분 번호 (면 수가 많은 성분부터 0)
+        n: 성분 수
+    """
+    face_count = int(face_count)
+    if face_count == 0:
+        return np.zeros(0, dtype=np.int64), 0
+    if keep is not None:
+        a = a[keep]
+        b = b[keep]
+    roots = _union_find_labels(a, b, face_count)
+    uniq, inverse, counts = np.unique(roots, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    order = np.lexsort((uniq, -counts))
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.shape[0])
+    return rank[inverse], int(uniq.shape[0])
+
+
+def edge_connected_components(faces, vertices=None, crease_angle_deg=None):
+    """
+    엣지 공유 기준 면 연결 성분 (Rhino ExplodeAtUnweldedEdges + SplitDisjointPieces 대응).
+
+    정점 인덱스가 같은 엣지를 공유하는 면끼리 잇는다(인덱스가 다른 unweld 엣지는 끊긴다).
+    crease_angle_deg를 주면 면 법선 사이 각이 그보다 큰 엣지도 끊는다(Unweld(angle) 후 explode 대응,
+    vertices 필요). 여러 각도를 시도할 때는 face_edge_links/link_cosines를 1회 만들고
+    link_components에 각도 마스크만 바꿔 넘긴다.
+
+    Returns:
+        face_labels: (F,) 0..n-1 성분 번호 (면 수가 많은 성분부터 0)
+        n: 성분 수
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    a, b = face_edge_links(faces)
+    keep = None
+    if crease_angle_deg is not None and a.shape[0]:
+        cos_limit = np.cos(np.radians(float(crease_angle_deg)))
+        keep = link_cosines(vertices, faces, a, b) >= cos_limit
+    return link_components(a, b, faces.shape[0], keep)
+
+
+def component_stats(vertices, faces, face_labels, n):
+    """
+    성분별 통계를 배열 연산 1회로 계산 (성분 서브메시를 만들지 않는다).
+
+    정점 수/naked 엣지 수는 성분 안에서 센다(성분 경계에서 끊긴 엣지는 각 성분의 naked 엣지).
+
+    Returns:
+        성분 번호 순 dict 리스트:
+        {"label", "faces", "vertices", "naked_edges", "min"(3,), "max"(3,), "max_z", "min_z", "diagonal"}
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    labels = np.asarray(face_labels, dtype=np.int64)
+    n = int(n)
+    if n == 0 or faces.shape[0] == 0:
+        return []
+    vcount = np.int64(max(vertices.shape[0], 1))
+
+    # (성분, 정점) 쌍
+    pair_key = np.unique(np.repeat(labels, 3) * vcount + faces.reshape(-1))
+    pair_label = pair_key // vcount
+    pair_vertex = pair_key % vcount
+    vert_counts = np.bincount(pair_label, minlength=n)
+    pts = vertices[pair_vertex]
+    bb_min = np.full((n, 3), np.inf)
+    bb_max = np.full((n, 3), -np.inf)
+    np.minimum.at(bb_min, pair_label, pts)
+    np.maximum.at(bb_max, pair_label, pts)
+
+    # (성분, 엣지) 쌍 중 면 1개만 쓰는 것 = 성분 안의 naked 엣지
+    edges, _, face_edge = unique_edges(faces)
+    ecount = np.int64(max(edges.shape[0], 1))
+    edge_key = np.repeat(labels, 3) * ecount + face_edge.reshape(-1)
+    uniq_key, key_counts = np.unique(edge_key, return_counts=True)
+    naked = np.bincount(uniq_key[key_counts == 1] // ecount, minlength=n)
+    face_counts = np.bincount(labels, minlength=n)
+
+    out = []
+    for k in range(n):
+        lo = bb_min[k]
+        hi = bb_max[k]
+        out.append(
+            {
+                "label": k,
+                "faces": int(face_counts[k]),
+                "vertices": int(vert_counts[k]),
+                "naked_edges": int(naked[k]),
+                "min": lo.tolist(),
+                "max": hi.tolist(),
+                "max_z": float(hi[2]),
+                "min_z": float(lo[2]),
+                "diagonal": float(np.linalg.norm(hi - lo)),
+            }
+        )
+    return out
+
+
+def submesh(vertices, faces, face_mask):
+    """face_mask 면만 남긴 (vertices, faces). 정점은 쓰이는 것만 남겨 재번호한다."""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    sub = np.asarray(faces, dtype=np.int64)[np.asarray(face_mask, dtype=bool)]
+    used, remap = np.unique(sub.reshape(-1), return_inverse=True)
+    return vertices[used], remap.reshape(-1, 3)
+
+
+def naked_edge_loops(faces):
+    """
+    naked 엣지를 이어 붙인 경계 루프 목록(정점 인덱스 배열).
+    닫힌 루프는 첫 정점을 끝에 반복하지 않는다. 분기(non-manifold) 정점에서는
+    남은 엣지로 새 루프를 시작한다.
+    """
+    edges = naked_edges(faces)
+    if edges.shape[0] == 0:
+        return []
+    outgoing = {}
+    for idx, (a, _) in enumerate(edges.tolist()):
+        outgoing.setdefault(a, []).append(idx)
+    used = np.zeros(edges.shape[0], dtype=bool)
+    loops = []
+    for start in range(edges.shape[0]):
+        if used[start]:
+            continue
+        used[start] = True
+        first = int(edges[start, 0])
+        chain = [first]
+        cur = int(edges[start, 1])
+        while cur != first:
+            chain.append(cur)
+            nxt = None
+            for cand in outgoing.get(cur, ()):
+                if not used[cand]:
+                    nxt = cand
+                    break
+            if nxt is None:
+                break
+            used[nxt] = True
+            cur = int(edges[nxt, 1])
+        loops.append(np.array(chain, dtype=np.int64))
+    return loops
+
+
+# -----------------------------
+# 하프엣지 / 경계 루프
+# -----------------------------
+def half_edge_map(faces):
+    """
+    배열 기반 하프엣지 / 엣지-면 맵 (메시당 1회 생성해 경계 루프/인접 질의에 재사용).
+
+    하프엣지 h = 3 * face + k 는 면의 k번째 방향 엣지(v_k -> v_{k+1})이다.
+
+    Returns:
+        {
+          "origin", "target", "face": (3F,) 하프엣지 시작/끝 정점, 소속 면
+          "edge": (3F,) 무방향 엣지 번호 (unique_edges 순서)
+          "twin": (3F,) 같은 엣지를 쓰는 반대쪽 하프엣지, 경계/non-manifold는 -1
+          "edges": (E, 2), "edge_face_count": (E,), "edge_faces": (E, 2) 앞의 두 면(없으면 -1)
+          "boundary": 경계(면 1개) 하프엣지 번호, 오름차순
+        }
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    face_count = faces.shape[0]
+    edges, counts, face_edge = unique_edges(faces)
+    origin = faces.reshape(-1)
+    target = faces[:, [1, 2, 0]].reshape(-1)
+    he_face = np.repeat(np.arange(face_count, dtype=np.int64), 3)
+    he_edge = face_edge.reshape(-1)
+
+    order = np.argsort(he_edge, kind="stable")
+    e_sorted = he_edge[order]
+    starts = np.ones(e_sorted.shape[0], dtype=bool)
+    starts[1:] = e_sorted[1:] != e_sorted[:-1]
+    first = order[starts]
+    second = np.full(edges.shape[0], -1, dtype=np.int64)
+    has_second = np.zeros(e_sorted.shape[0], dtype=bool)
+    has_second[:-1] = starts[:-1] & ~starts[1:]
+    second[e_sorted[has_second]] = order[np.nonzero(has_second)[0] + 1]
+
+    twin = np.full(origin.shape[0], -1, dtype=np.int64)
+    manifold = (counts == 2).nonzero()[0]
+    twin[first[manifold]] = second[manifold]
+    twin[second[manifold]] = first[manifold]
+
+    edge_faces = np.full((edges.shape[0], 2), -1, dtype=np.int64)
+    edge_faces[:, 0] = he_face[first]
+    paired = second >= 0
+    edge_faces[paired, 1] = he_face[second[paired]]
+
+    return {
+        "origin": origin,
+        "target": target,
+        "face": he_face,
+        "edge": he_edge,
+        "twin": twin,
+        "edges": edges,
+        "edge_face_count": counts,
+        "edge_faces": edge_faces,
+        "boundary": (counts[he_edge] == 1).nonzero()[0],
+    }
+
+
+def _boundary_cycles(half_edges, vertex_count):
+    """
+    경계 하프엣지를 다음 경계 하프엣지로 잇는 순열의 사이클을 배열 연산으로 정렬.
+
+    Returns:
+        (ordered_he, loop_starts) 또는 None (분기/열린 경계가 있어 순열이 아닐 때)
+    """
+    bnd = half_edges["boundary"]
+    m = bnd.shape[0]
+    origin = half_edges["origin"][bnd]
+    target = half_edges["target"][bnd]
+    out_count = np.bincount(origin, minlength=vertex_count)
+    if np.any(out_count > 1):
+        return None
+    local = np.full(vertex_count, -1, dtype=np.int64)
+    local[origin] = np.arange(m, dtype=np.int64)
+    nxt = local[target]
+    if np.any(nxt < 0) or np.any(np.bincount(nxt, minlength=m) != 1):
+        return None
+
+    idx = np.arange(m, dtype=np.int64)
+    root = _union_find_labels(idx, nxt, m)
+    # 사이클마다 최소 번호 하프엣지에서 끊고, 이전 포인터 doubling으로 시작점부터의 거리 계산
+    prev = np.empty(m, dtype=np.int64)
+    prev[nxt] = idx
+    is_root = root == idx
+    prev[is_root] = idx[is_root]
+    rank = (~is_root).astype(np.int64)
+    while True:
+        grand = prev[prev]
+        if np.array_equal(grand, prev):
+            break
+        rank = rank + rank[prev]
+        prev = grand
+    order = np.lexsort((rank, root))
+    loop_starts = np.ones(m, dtype=bool)
+    loop_starts[1:] = root[order][1:] != root[order][:-1]
+    return bnd[order], np.nonzero(loop_starts)[0]
+
+
+def boundary_loops(vertices, faces, half_edges=None):
+    """
+    naked 경계 루프를 순서대로 정렬한 정점 인덱스 배열 + 루프별 Z / 반경 / 방위 통계.
+
+    반경/방위는 원점 Z축 기준(XY 거리, atan2(y, x))이다. 분기(non-manifold) 경계가 있으면
+    naked_edge_loops 순회로 루프를 만들고 통계는 같은 방식으로 계산한다.
+
+    Returns:
+        루프 dict 리스트:
+        {"indices": (n,) 정점 인덱스(닫힌 루프도 첫 정점을 반복하지 않음), "closed", "count",
+         "length", "z_min", "z_max", "z_mean", "r_median", "r_mean", "r_std",
+         "azimuth_coverage"(2π - 최대 방위 간격, rad)}
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    if faces.shape[0] == 0:
+        return []
+    if half_edges is None:
+        half_edges = half_edge_map(faces)
+    if half_edges["boundary"].shape[0] == 0:
+        return []
+
+    cycles = _boundary_cycles(half_edges, max(int(vertices.shape[0]), int(faces.max()) + 1))
+    if cycles is not None:
+        ordered_he, starts = cycles
+        flat = half_edges["origin"][ordered_he]
+        closed = np.ones(starts.shape[0], dtype=bool)
+    else:
+        chains = naked_edge_loops(faces)
+        bnd = half_edges["boundary"]
+        vcount = np.int64(max(int(vertices.shape[0]), int(faces.max()) + 1))
+        bnd_keys = half_edges["origin"][bnd] * vcount + half_edges["target"][bnd]
+        lens = np.array([c.shape[0] for c in chains], dtype=np.int64)
+        flat = np.concatenate(chains)
+        starts = np.concatenate([[0], np.cumsum(lens)[:-1]]).astype(np.int64)
+        wrap_keys = flat[starts + lens - 1] * vcount + flat[starts]
+        closed = np.isin(wrap_keys, bnd_keys) & (lens >= 3)
+
+    n_loops = starts.shape[0]
+    total = flat.shape[0]
+    counts = np.diff(np.append(starts, total))
+    loop_id = np.repeat(np.arange(n_loops, dtype=np.int64), counts)
+    pts = vertices[flat]
+    z = pts[:, 2]
+    r = np.hypot(pts[:, 0], pts[:, 1])
+
+    z_min = np.minimum.reduceat(z, starts)
+    z_max = np.maximum.reduceat(z, starts)
+    z_mean = np.add.reduceat(z, starts) / counts
+    r_mean = np.add.reduceat(r, starts) / counts
+    r_std = np.sqrt(np.maximum(np.add.reduceat(r * r, starts) / counts - r_mean * r_mean, 0.0))
+
+    r_sorted = r[np.lexsort((r, loop_id))]
+    r_median = 0.5 * (r_sorted[starts + (counts - 1) // 2] + r_sorted[starts + counts // 2])
+
+    # 최대 방위 간격: 루프별 정렬 각도의 차, 루프 첫 원소는 마지막 원소에서 2π 감아 돈 간격
+    ang = np.arctan2(pts[:, 1], pts[:, 0])
+    ang_sorted = ang[np.lexsort((ang, loop_id))]
+    prev = np.arange(total, dtype=np.int64) - 1
+    prev[starts] = starts + counts - 1
+    gap = ang_sorted - ang_sorted[prev]
+    gap[starts] += 2.0 * np.pi
+    coverage = np.clip(2.0 * np.pi - np.maximum.reduceat(gap, starts), 0.0, 2.0 * np.pi)
+    coverage[counts < 3] = 0.0
+
+    nxt = np.arange(total, dtype=np.int64) + 1
+    nxt[starts + counts - 1] = starts
+    seg = np.linalg.norm(pts[nxt] - pts, axis=1)
+    seg[(starts + counts - 1)[~closed]] = 0.0
+    length = np.add.reduceat(seg, starts)
+
+    out = []
+    for k in range(n_loops):
+        s = int(starts[k])
+        c = int(counts[k])
+        out.append(
+            {
+                "indices": flat[s : s + c],
+                "closed": bool(closed[k]),
+                "count": c,
+                "length": float(length[k]),
+                "z_min": float(z_min[k]),
+                "z_max": float(z_max[k]),
+                "z_mean": float(z_mean[k]),
+                "r_median": float(r_median[k]),
+                "r_mean": float(r_mean[k]),
+                "r_std": float(r_std[k]),
+                "azimuth_coverage": float(coverage[k]),
+            }
+        )
+    return out
+
+
+# -----------------------------
+# 반경(직경) 프로파일
+# -----------------------------
+# 프로파일 평면 수 상한. 높이/간격이 이보다 많으면 간격을 넓힌다.
+RADIAL_PROFILE_MAX_PLANES = 4000
+
+
+def directed_edge_points(vertices, faces):
+    """면마다 (v0,v1), (v1,v2), (v2,v0) 순서의 방향 엣지 끝점 좌표 (3F, 3) 두 개."""
+    tri = triangle_corners(vertices, faces)
+    return tri[:, [0, 1, 2], :].reshape(-1, 3), tri[:, [1, 2, 0], :].reshape(-1, 3)
+
+
+def edge_plane_crossing_r(edge_a, edge_b, z=0.0):
+    """
+    z 평면을 엄격히 가로지르는(끝점 부호가 반대인) 엣지의 교점 XY 반경 배열.
+    끝점이 평면 위에 정확히 있는 엣지는 제외한다(diameter_analysis / stl_metadata 규칙).
+    """
+    za = edge_a[:, 2] - z
+    zb = edge_b[:, 2] - z
+    cross = ((za > 0) & (zb < 0)) | ((za < 0) & (zb > 0))
+    denom = np.abs(za - zb)
+    cross &= denom >= 1e-10
+    if not np.any(cross):
+        return np.zeros(0, dtype=np.float64)
+    a = edge_a[cross]
+    b = edge_b[cross]
+    t = np.abs(za[cross]) / denom[cross]
+    ix = a[:, 0] + t * (b[:, 0] - a[:, 0])
+    iy = a[:, 1] + t * (b[:, 1] - a[:, 1])
+    return np.sqrt(ix * ix + iy * iy)
+
+
+def _profile_grid(z_lo, z_hi, z_step):
+    step = float(z_step)
+    span = float(z_hi) - float(z_lo)
+    if span <= 0:
+        return np.array([float(z_lo)], dtype=np.float64), step
+    if span / step > RADIAL_PROFILE_MAX_PLANES:
+        step = span / RADIAL_PROFILE_MAX_PLANES
+    count = int(np.floor(span / step + 1e-9)) + 1
+    return float(z_lo) + step * np.arange(count, dtype=np.float64), step
+
+
+def _edge_plane_pairs(za, zb, z_grid):
+    """정렬된 z_grid에서 엣지가 엄격히 가로지르는 (edge_index, z_index) 쌍."""
+    lo = np.minimum(za, zb)
+    hi = np.maximum(za, zb)
+    first = np.searchsorted(z_grid, lo, side="right")
+    last = np.searchsorted(z_grid, hi, side="left")
+    counts = np.maximum(last - first, 0)
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    edge_ids = np.repeat(np.arange(za.shape[0], dtype=np.int64), counts)
+    offsets = np.cumsum(counts) - counts
+    z_index = first[edge_ids] + (np.arange(total, dtype=np.int64) - offsets[edge_ids])
+    return edge_ids, z_index
+
+
+def diameter_profile(vertices, faces, z_step=0.1, connection_z=0.0):
+    """
+    최대 반경 / 커넥션 평면 반경 / 반경 프로파일 r_max(z)를 정점·엣지 배열 1회 순회로 계산.
+
+    - max_r: 전체 정점의 최대 XY 반경
+    - connection_r: z=connection_z 평면을 가로지르는 엣지 교점의 최대 반경(없으면 0)
+    - profile.z: z_min부터 z_step 간격 평면
+    - profile.r_section: 각 평면 단면의 최대 반경(교차 엣지가 없으면 nan)
+    - profile.r_band: 구간 [z_k, z_k+1]의 표면 최대 반경(양 끝 단면 + 구간 안 정점)
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    out = {
+        "max_r": 0.0,
+        "connection_r": 0.0,
+        "connection_edges": 0,
+        "profile": None,
+    }
+    if vertices.shape[0] == 0:
+        return out
+
+    vr = np.sqrt(vertices[:, 0] * vertices[:, 0] + vertices[:, 1] * vertices[:, 1])
+    out["max_r"] = float(vr.max())
+    if faces.shape[0] == 0:
+        return out
+
+    edge_a, edge_b = directed_edge_points(vertices, faces)
+    conn = edge_plane_crossing_r(edge_a, edge_b, connection_z)
+    if conn.shape[0]:
+        out["connection_r"] = float(max(0.0, conn.max()))
+        out["connection_edges"] = int(conn.shape[0])
+
+    if not z_step or z_step <= 0:
+        return out
+
+    used = np.unique(faces)
+    vz = vertices[used, 2]
+    z_grid, step = _profile_grid(vz.min(), vz.max(), z_step)
+    k = z_grid.shape[0]
+
+    za = edge_a[:, 2]
+    zb = edge_b[:, 2]
+    edge_ids, z_index = _edge_plane_pairs(za, zb, z_grid)
+    r_section = np.full(k, -np.inf, dtype=np.float64)
+    if edge_ids.shape[0]:
+        a = edge_a[edge_ids]
+        b = edge_b[edge_ids]
+        t = (z_grid[z_index] - a[:, 2]) / (b[:, 2] - a[:, 2])
+        ix = a[:, 0] + t * (b[:, 0] - a[:, 0])
+        iy = a[:, 1] + t * (b[:, 1] - a[:, 1])
+        np.maximum.at(r_section, z_index, np.sqrt(ix * ix + iy * iy))
+
+    # 평면 위에 정확히 놓인 정점은 엄격 교차에서 빠지므로 단면에 직접 반영
+    on_plane = np.searchsorted(z_grid, vz)
+    on_plane_ok = on_plane < k
+    on_plane_ok[on_plane_ok] &= z_grid[on_plane[on_plane_ok]] == vz[on_plane_ok]
+    if np.any(on_plane_ok):
+        np.maximum.at(r_section, on_plane[on_plane_ok], vr[used][on_plane_ok])
+
+    if k > 1:
+        bins = np.clip(((vz - z_grid[0]) / step).astype(np.int64), 0, k - 2)
+        r_band = np.full(k - 1, -np.inf, dtype=np.float64)
+        np.maximum.at(r_band, bins, vr[used])
+        r_band = np.maximum(r_band, np.maximum(r_section[:-1], r_section[1:]))
+    else:
+        r_band = np.zeros(0, dtype=np.float64)
+
+    r_section[~np.isfinite(r_section)] = np.nan
+    r_band[~np.isfinite(r_band)] = np.nan
+    out["profile"] = {
+        "z": z_grid,
+        "z_step": step,
+        "r_section": r_section,
+        "r_band": r_band,
+    }
+    return out
+
+
+def mesh_summary(vertices, faces):
+    """로그/진단용 요약 dict."""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    bb_min, bb_max = bounding_box(vertices)
+    _, n_components = connected_components(faces, vertices.shape[0])
+    return {
+        "vertices": int(vertices.shape[0]),
+        "faces": int(faces.shape[0]),
+        "components": n_components,
+        "naked_edges": int(naked_edges(faces).shape[0]),
+        "area": surface_area(vertices, faces),
+        "bbox_min": bb_min.tolist() if bb_min is not None else None,
+        "bbox_max": bb_max.tolist() if bb_max is not None else None,
+    }
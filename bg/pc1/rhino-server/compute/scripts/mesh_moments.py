@@ -0,0 +1,150 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/scripts/mesh_kernel.py
+# - bg/pc1/rhino-server/compute/scripts/align_stl_coordinate.py
+# - bg/pc1/rhino-server/compute/scripts/finishline_detection.py
+"""
+정점 분포의 가중 2차 모멘트 / 주축 (NumPy, Rhino 비의존)
+
+align_stl_coordinate._estimate_principal_axis(전체 정점 공분산)와
+finishline_detection._estimate_tilt_axis(Z 밴드 + t² 가중 공분산)가 함께 쓴다.
+정점마다 합을 누적하고 power iteration을 돌리는 대신, 배열 연산으로 공분산을 만들고
+eigh로 세 고유벡터를 한 번에 구한다.
+
+Rhino 메시 정점 배열은 (메시, 정점 수, bbox, 표본 정점 좌표) 서명으로 잠깐 기억해 같은 변환
+상태에서 여러 번 추정해도 변환은 1회만 한다. 상주 러너에서는 id()가 작업 사이에 재사용되므로
+작업 시작마다 clear_vertex_memo()로 비운다(process_abutment_stl.main).
+"""
+
+import numpy as np
+
+# 정점 배열 메모 (서명 -> (V, 3)). 메시 변환 후에는 bbox/표본 정점이 달라져 자동으로 다시 만든다.
+_VERTEX_MEMO_MAX = 4
+_vertex_memo = []
+
+
+def clear_vertex_memo():
+    """정점 배열 메모를 비운다. 작업 경계(상주 러너의 다음 작업)마다 호출한다."""
+    del _vertex_memo[:]
+
+
+def _mesh_signature(mesh):
+    try:
+        bbox = mesh.GetBoundingBox(True)
+        count = int(mesh.Vertices.Count)
+        sig = [
+            id(mesh),
+            count,
+            float(bbox.Min.X), float(bbox.Min.Y), float(bbox.Min.Z),
+            float(bbox.Max.X), float(bbox.Max.Y), float(bbox.Max.Z),
+        ]
+        # bbox를 유지하는 변환(bbox 중심 기준 180° Z 회전 등)도 구분하도록 정점 몇 개 좌표를 넣는다
+        for i in sorted(set((0, count // 3, (2 * count) // 3, count - 1))):
+            if 0 <= i < count:
+                v = mesh.Vertices[i]
+                sig.extend((float(v.X), float(v.Y), float(v.Z)))
+        return tuple(sig)
+    except Exception:
+        return None
+
+
+def vertices_from_rhino_mesh(mesh):
+    """RhinoCommon Mesh 정점 (V, 3). ToFloatArray 벌크 변환, 실패 시 요소 단위 루프."""
+    sig = _mesh_signature(mesh)
+    if sig is not None:
+        for key, value in _vertex_memo:
+            if key == sig:
+                return value
+    try:
+        vertices = np.array(list(mesh.Vertices.ToFloatArray()), dtype=np.float64)
+        vertices = vertices.reshape(-1, 3)
+    except Exception:
+        vcount = int(mesh.Vertices.Count)
+        vertices = np.zeros((vcount, 3), dtype=np.float64)
+        for i in range(vcount):
+            v = mesh.Vertices[i]
+            vertices[i] = (v.X, v.Y, v.Z)
+    if sig is not None:
+        _vertex_memo.append((sig, vertices))
+        del _vertex_memo[:-_VERTEX_MEMO_MAX]
+    return vertices
+
+
+def weighted_moments(points, weights=None, mask=None):
+    """
+    가중 평균/공분산.
+
+    Returns:
+        {"n": 사용한 점 수, "sw": 가중치 합, "mean": (3,), "cov": (3, 3)} 또는 None(점 없음)
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if mask is not None:
+        points = points[mask]
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)[mask]
+    n = int(points.shape[0])
+    if n == 0:
+        return None
+    if weights is None:
+        sw = float(n)
+        mean = points.mean(axis=0)
+        d = points - mean
+        cov = d.T.dot(d) / sw
+    else:
+        weights = np.asarray(weights, dtype=np.float64)
+        sw = float(weights.sum())
+        if sw <= 0.0:
+            return None
+        mean = weights.dot(points) / sw
+        d = points - mean
+        cov = (d * weights[:, None]).T.dot(d) / sw
+    return {"n": n, "sw": sw, "mean": mean, "cov": cov}
+
+
+def principal_axes(cov):
+    """
+    대칭 공분산의 고유값/고유벡터(고유값 내림차순).
+
+    Returns:
+        (eigenvalues (3,), eigenvectors (3, 3) — 열 k가 k번째 축)
+    """
+    values, vectors = np.linalg.eigh(np.asarray(cov, dtype=np.float64))
+    order = np.argsort(values)[::-1]
+    return values[order], vectors[:, order]
+
+
+def major_axis(moments, hint=None):
+    """
+    최대 고유벡터(단위). hint가 있으면 hint와 같은 쪽(내적 >= 0)으로 부호를 맞춘다.
+    공분산이 0이면 None.
+    """
+    if moments is None:
+        return None
+    values, vectors = principal_axes(moments["cov"])
+    if not np.isfinite(values[0]) or values[0] <= 1e-12:
+        return None
+    axis = vectors[:, 0]
+    if hint is not None and float(np.dot(axis, hint)) < 0.0:
+        axis = -axis
+    return axis
+
+
+def z_band_tilt_moments(points, z_min, z_max, band_low, band_high, base=0.2, gain=0.8):
+    """
+    Z 밴드 / 전체 정점의 t² 가중 모멘트를 함께 계산 (finishline tilt 축용).
+
+    t = (z - z_min) / (z_max - z_min) 를 [0, 1]로 자른 값, 가중치 w = base + gain * t².
+    밴드는 z_min + band_low * height <= z <= z_min + band_high * height.
+
+    Returns:
+        (band_moments, full_moments) — 점이 없으면 해당 항목은 None
+    """
+    points = np.asarray(points, dtype=np.float64)
+    height = max(1e-6, float(z_max) - float(z_min))
+    z = points[:, 2]
+    t = np.clip((z - float(z_min)) / height, 0.0, 1.0)
+    w = base + gain * (t * t)
+    low = float(z_min) + band_low * height
+    high = float(z_min) + band_high * height
+    band = (z >= low) & (z <= high)
+    return weighted_moments(points, w, band), weighted_moments(points, w)
@@ -0,0 +1,472 @@
+# related files:
+# - bg/pc1/rhino-server/rules.md
+# - bg/pc1/rhino-server/compute/scripts/mesh_kernel.py
+# - bg/pc1/rhino-server/compute/scripts/align_stl_coordinate.py
+"""
+NumPy 기반 Z 단면(mesh/plane intersection) 엔진
+
+`Intersection.MeshPlane`을 Z마다 한 번씩 부르는 대신, N개의 Z 높이를 한 번에 받아
+삼각형 배열 전체에 대해 한 번의 벡터 연산으로 교차 선분을 만들고 루프로 잇는다.
+
+단계(timings 키):
+- bin: 면 Z 범위 -> 교차하는 (face, z) 쌍 생성
+- crossings: 쌍마다 평면과 만나는 두 엣지의 교점(선분) 계산
+- stitch: 엣지 키 기준으로 선분을 이어 polyline 루프 구성
+- metrics: 루프별 외곽 원/원형성/헥스비 (align_stl_coordinate 단면 지표와 동일 정의)
+
+평면 위에 정확히 놓인 정점은 '위(>= z)'로 취급한다. 따라서 면은 z가 (z_min, z_max]에
+있을 때만 교차하며, 이웃 면과 같은 엣지 키를 공유해 루프가 끊기지 않는다.
+그 정점 자체가 교점이면 엣지 대신 정점 키를 써서 루프에 한 번만 들어가게 한다.
+"""
+
+import time
+
+import numpy as np
+
+# 외곽 루프 원형성 평가용 반경 컷 (align_stl_coordinate._estimate_section_metrics_from_polyline 와 동일)
+OUTER_RADIUS_CUT_RATIO = 0.80
+
+_EDGE_SLOTS = np.array([[0, 1], [1, 2], [2, 0]], dtype=np.int64)
+
+
+def _empty_segments():
+    return {
+        "z_index": np.zeros(0, dtype=np.int64),
+        "p": np.zeros((0, 3), dtype=np.float64),
+        "q": np.zeros((0, 3), dtype=np.float64),
+        "key_p": np.zeros(0, dtype=np.int64),
+        "key_q": np.zeros(0, dtype=np.int64),
+    }
+
+
+def _bin_face_z_pairs(vertices, faces, z_sorted):
+    """정렬된 z 배열에 대해 교차하는 (face_index, z_index) 쌍을 만든다."""
+    fz = vertices[faces, 2]
+    z_lo = fz.min(axis=1)
+    z_hi = fz.max(axis=1)
+    lo = np.searchsorted(z_sorted, z_lo, side="right")
+    hi = np.searchsorted(z_sorted, z_hi, side="right")
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    face_ids = np.repeat(np.arange(faces.shape[0], dtype=np.int64), counts)
+    offsets = np.cumsum(counts) - counts
+    z_index = lo[face_ids] + (np.arange(total, dtype=np.int64) - offsets[face_ids])
+    return face_ids, z_index
+
+
+def _crossing_segments(vertices, faces, z_sorted, face_ids, z_index):
+    """(face, z) 쌍마다 평면 교차 선분 [p, q]와 엣지 키를 계산."""
+    if face_ids.shape[0] == 0:
+        return _empty_segments()
+
+    vcount = np.int64(vertices.shape[0])
+    fv = faces[face_ids]  # (P, 3)
+    z = z_sorted[z_index]  # (P,)
+    above = vertices[fv, 2] >= z[:, None]  # (P, 3)
+
+    # 엣지 (0-1, 1-2, 2-0) 중 부호가 바뀌는 엣지는 정확히 2개
+    crosses = above[:, _EDGE_SLOTS[:, 0]] != above[:, _EDGE_SLOTS[:, 1]]
+    first = np.argmax(crosses, axis=1)
+    second = 2 - np.argmax(crosses[:, ::-1], axis=1)
+
+    def _edge_point(slot):
+        a = fv[np.arange(fv.shape[0]), _EDGE_SLOTS[slot, 0]]
+        b = fv[np.arange(fv.shape[0]), _EDGE_SLOTS[slot, 1]]
+        lo_idx = np.minimum(a, b)
+        hi_idx = np.maximum(a, b)
+        # 같은 엣지를 공유하는 이웃 면에서 동일 좌표가 나오도록 정점 순서를 고정
+        va = vertices[lo_idx]
+        vb = vertices[hi_idx]
+        dz = vb[:, 2] - va[:, 2]
+        safe = np.where(np.abs(dz) > 1e-300, dz, 1.0)
+        t = np.clip((z - va[:, 2]) / safe, 0.0, 1.0)
+        pt = va + (vb - va) * t[:, None]
+        pt[:, 2] = z
+        key = lo_idx * vcount + hi_idx
+        # 평면 위에 정확히 놓인 정점(t=0/1)은 엣지가 아니라 정점 키(v*V+v)로 묶는다.
+        # 그 정점을 지나는 여러 엣지가 같은 노드가 되어, 한 면 안의 길이 0 선분은 stitch에서 빠진다.
+        at_lo = va[:, 2] == z
+        at_hi = vb[:, 2] == z
+        pt[at_lo] = va[at_lo]
+        pt[at_hi] = vb[at_hi]
+        key = np.where(at_lo, lo_idx * vcount + lo_idx, key)
+        key = np.where(at_hi, hi_idx * vcount + hi_idx, key)
+        return pt, key
+
+    p, key_p = _edge_point(first)
+    q, key_q = _edge_point(second)
+
+    # 면 법선 기준으로 방향 통일(외측 법선이면 +Z에서 볼 때 반시계)
+    tri = vertices[fv]
+    n = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    tangent_dot = (q[:, 0] - p[:, 0]) * (-n[:, 1]) + (q[:, 1] - p[:, 1]) * n[:, 0]
+    flip = tangent_dot < 0
+    p[flip], q[flip] = q[flip].copy(), p[flip].copy()
+    key_p[flip], key_q[flip] = key_q[flip].copy(), key_p[flip].copy()
+
+    return {
+        "z_index": z_index,
+        "p": p,
+        "q": q,
+        "key_p": key_p,
+        "key_q": key_q,
+    }
+
+
+def _stitch_segments(segments, vcount, z_count, include_open):
+    """
+    선분을 엣지 키로 이어 루프를 만든다.
+
+    Returns:
+        per_z: 길이 z_count 리스트. 각 원소는 [(points(K,3), closed), ...]
+    """
+    per_z = [[] for _ in range(z_count)]
+    seg_count = segments["z_index"].shape[0]
+    if seg_count == 0:
+        return per_z
+
+    span = np.int64(vcount) * np.int64(vcount)
+    z_idx = segments["z_index"]
+    node_keys = np.concatenate(
+        [z_idx * span + segments["key_p"], z_idx * span + segments["key_q"]]
+    )
+    node_pts_raw = np.concatenate([segments["p"], segments["q"]])
+    uniq, first_pos, node_of = np.unique(
+        node_keys, return_index=True, return_inverse=True
+    )
+    node_of = node_of.reshape(-1)
+    node_count = uniq.shape[0]
+    node_pts = node_pts_raw[first_pos]
+    node_z = (uniq // span).astype(np.int64)
+
+    u = node_of[:seg_count]
+    v = node_of[seg_count:]
+    keep = u != v
+    u = u[keep]
+    v = v[keep]
+
+    ends = np.concatenate([u, v])
+    others = np.concatenate([v, u])
+    order = np.argsort(ends, kind="stable")
+    ends_sorted = ends[order]
+    others_sorted = others[order]
+    deg = np.bincount(ends, minlength=node_count)
+    start_at = np.searchsorted(ends_sorted, np.arange(node_count), side="left")
+
+    nbr0 = np.full(node_count, -1, dtype=np.int64)
+    nbr1 = np.full(node_count, -1, dtype=np.int64)
+    has0 = deg >= 1
+    has1 = deg >= 2
+    nbr0[has0] = others_sorted[start_at[has0]]
+    nbr1[has1] = others_sorted[start_at[has1] + 1]
+
+    nbr0_l = nbr0.tolist()
+    nbr1_l = nbr1.tolist()
+    visited_l = [False] * node_count
+
+    def _walk(start):
+        chain = [start]
+        visited_l[start] = True
+        prev = -1
+        cur = start
+        closed = False
+        while True:
+            a = nbr0_l[cur]
+            b = nbr1_l[cur]
+            nxt = a if a != prev else b
+            if nxt == prev and a == b:
+                nxt = -1
+            if nxt < 0:
+                break
+            if nxt == start:
+                closed = len(chain) >= 3
+                break
+            if visited_l[nxt]:
+                break
+            visited_l[nxt] = True
+            chain.append(nxt)
+            prev, cur = cur, nxt
+        return chain, closed
+
+    # 끝점(차수 1)에서 먼저 출발해야 열린 체인이 중간에서 잘리지 않는다
+    starts = np.concatenate([np.nonzero(deg == 1)[0], np.nonzero(deg != 1)[0]])
+    for s in starts.tolist():
+        if visited_l[s] or deg[s] == 0:
+            continue
+        chain, closed = _walk(s)
+        if not closed and not include_open:
+            continue
+        if len(chain) < 2:
+            continue
+        idx = np.asarray(chain, dtype=np.int64)
+        per_z[int(node_z[s])].append((node_pts[idx], closed))
+    return per_z
+
+
+def slice_mesh(vertices, faces, z_values, include_open=False):
+    """
+    여러 Z 높이의 단면을 한 번에 계산.
+
+    Args:
+        vertices: (V, 3)
+        faces: (F, 3)
+        z_values: Z 높이 목록 (순서 유지, 중복 허용)
+        include_open: True면 닫히지 않은 체인도 포함
+
+    Returns:
+        {
+          "z": [...],                     # 입력 순서
+          "loops": [[(K,3) ndarray, ...]],  # z별 루프 (닫힌 루프는 끝점 반복 없음)
+          "closed": [[bool, ...]],
+          "timings": {"bin": s, "crossings": s, "stitch": s, "total": s},
+          "pairs": 교차 (face, z) 쌍 수,
+        }
+    """
+    t0 = time.perf_counter()
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    z_in = np.asarray(list(z_values), dtype=np.float64).reshape(-1)
+
+    z_sorted, z_pos = np.unique(z_in, return_inverse=True)
+    z_pos = z_pos.reshape(-1)
+
+    timings = {}
+    if faces.shape[0] == 0 or z_sorted.shape[0] == 0:
+        face_ids = z_index = np.zeros(0, dtype=np.int64)
+    else:
+        face_ids, z_index = _bin_face_z_pairs(vertices, faces, z_sorted)
+    t1 = time.perf_counter()
+    timings["bin"] = t1 - t0
+
+    segments = _crossing_segments(vertices, faces, z_sorted, face_ids, z_index)
+    t2 = time.perf_counter()
+    timings["crossings"] = t2 - t1
+
+    per_z = _stitch_segments(
+        segments, vertices.shape[0], z_sorted.shape[0], include_open
+    )
+    t3 = time.perf_counter()
+    timings["stitch"] = t3 - t2
+    timings["total"] = t3 - t0
+
+    loops = []
+    closed = []
+    for pos in z_pos.tolist():
+        entries = per_z[pos]
+        loops.append([e[0] for e in entries])
+        closed.append([e[1] for e in entries])
+
+    return {
+        "z": z_in.tolist(),
+        "loops": loops,
+        "closed": closed,
+        "timings": timings,
+        "pairs": int(face_ids.shape[0]),
+    }
+
+
+def loop_metrics(loops):
+    """
+    루프 목록의 외곽 원 근사 + 원형성(벡터화).
+    `_estimate_section_metrics_from_polyline`과 같은 정의:
+    centroid 기준 최대 반경 r, 외곽(r >= 0.8 r_max) 점의 상대표준편차(circularity),
+    외곽 r_max/r_min(hex_ratio).
+
+    Returns:
+        loops와 같은 길이의 리스트. 각 원소는 dict 또는 None(점 3개 미만/퇴화)
+    """
+    out = [None] * len(loops)
+    pts_list = []
+    ids = []
+    for i, pts in enumerate(loops):
+        pts = np.asarray(pts, dtype=np.float64)
+        if pts.shape[0] >= 2:
+            # 같은 좌표가 연달아 나오면(닫는 점 반복 포함) 한 번만 세어 centroid가 치우치지 않게 한다
+            step = np.hypot(*(pts[:, :2] - np.roll(pts[:, :2], 1, axis=0)).T)
+            pts = pts[step > 1e-6]
+        if pts.shape[0] < 3:
+            continue
+        pts_list.append(pts[:, :2])
+        ids.append(i)
+    if not pts_list:
+        return out
+
+    xy = np.concatenate(pts_list)
+    lens = np.array([p.shape[0] for p in pts_list], dtype=np.int64)
+    loop_of = np.repeat(np.arange(len(pts_list)), lens)
+    n = lens.astype(np.float64)
+
+    cx = np.bincount(loop_of, weights=xy[:, 0]) / n
+    cy = np.bincount(loop_of, weights=xy[:, 1]) / n
+    r = np.hypot(xy[:, 0] - cx[loop_of], xy[:, 1] - cy[loop_of])
+    starts = np.cumsum(lens) - lens
+    r_max = np.maximum.reduceat(r, starts)
+
+    outer = r >= (r_max * OUTER_RADIUS_CUT_RATIO)[loop_of]
+    outer_n = np.bincount(loop_of, weights=outer.astype(np.float64))
+    r_mean = np.bincount(loop_of, weights=np.where(outer, r, 0.0)) / np.maximum(
+        outer_n, 1.0
+    )
+    dev = np.where(outer, r - r_mean[loop_of], 0.0)
+    var = np.bincount(loop_of, weights=dev * dev) / np.maximum(outer_n, 1.0)
+    r_std = np.sqrt(np.maximum(var, 0.0))
+    r_min_outer = np.minimum.reduceat(np.where(outer, r, np.inf), starts)
+
+    for k, i in enumerate(ids):
+        if r_max[k] <= 1e-8:
+            continue
+        out[i] = {
+            "cx": float(cx[k]),
+            "cy": float(cy[k]),
+            "r": float(r_max[k]),
+            "d": float(r_max[k] * 2.0),
+            "circularity": float(r_std[k] / max(r_mean[k], 1e-9)),
+            "hex_ratio": float(r_max[k] / max(r_min_outer[k], 1e-9)),
+            "r_std": float(r_std[k]),
+        }
+    return out
+
+
+def outer_section_metrics(vertices, faces, z_values):
+    """
+    Z별 가장 바깥(최대 r) 단면 지표. `_outer_section_metrics_at_z`의 배치 버전.
+
+    Returns:
+        (metrics_list, timings) — metrics_list는 z_values 순서, 단면이 없으면 None
+    """
+    result = slice_mesh(vertices, faces, z_values, include_open=True)
+    t0 = time.perf_counter()
+    flat = []
+    owner = []
+    for zi, loops in enumerate(result["loops"]):
+        for pts in loops:
+            flat.append(pts)
+            owner.append(zi)
+    metrics = loop_metrics(flat)
+    best = [None] * len(result["loops"])
+    for zi, m in zip(owner, metrics):
+        if m is None:
+            continue
+        if best[zi] is None or m["r"] > best[zi]["r"]:
+            best[zi] = m
+    timings = dict(result["timings"])
+    timings["metrics"] = time.perf_counter() - t0
+    timings["total"] = timings.get("total", 0.0) + timings["metrics"]
+    return best, timings
+
+
+# -----------------------------
+# Z별 외곽 단면 지표 테이블 (1회 sweep + 보간)
+# -----------------------------
+PROFILE_METRIC_KEYS = ("cx", "cy", "r", "d", "circularity", "hex_ratio", "r_std")
+# 테이블 평면 수 상한. 높이/간격이 이보다 많으면(높거나 정렬 전 메시) 간격을 넓힌다.
+SECTION_PROFILE_MAX_PLANES = 1000
+
+
+def build_section_profile(vertices, faces, z_min, z_max, z_step):
+    """
+    [z_min, z_max]를 z_step 간격 평면으로 한 번에 슬라이스해 외곽 단면 지표 테이블을 만든다.
+    평면 수가 SECTION_PROFILE_MAX_PLANES를 넘으면 간격을 넓힌다(실제 간격은 "z_step").
+
+    Returns:
+        ({"z": (K,), "table": (K, len(PROFILE_METRIC_KEYS)) — 단면 없으면 nan 행,
+          "z_step": 실제 간격}, timings)
+    """
+    z_min = float(z_min)
+    z_max = float(z_max)
+    step = max(float(z_step), 1e-6)
+    if (z_max - z_min) / step > SECTION_PROFILE_MAX_PLANES:
+        step = (z_max - z_min) / SECTION_PROFILE_MAX_PLANES
+    count = int(np.floor((z_max - z_min) / step + 1e-9)) + 1
+    count = max(count, 1)
+    z_grid = z_min + step * np.arange(count, dtype=np.float64)
+    metrics, timings = outer_section_metrics(vertices, faces, z_grid.tolist())
+    table = np.full((count, len(PROFILE_METRIC_KEYS)), np.nan, dtype=np.float64)
+    for i, m in enumerate(metrics):
+        if m is not None:
+            table[i] = [m[k] for k in PROFILE_METRIC_KEYS]
+    return {"z": z_grid, "table": table, "z_step": step}, timings
+
+
+def query_section_profile(profile, z_values):
+    """
+    테이블에서 임의 Z의 외곽 단면 지표를 선형 보간한다.
+
+    양쪽 이웃 평면에 단면이 있으면 보간, 한쪽만 있으면 가까운 쪽이 그 평면일 때만 그 값을 쓴다.
+    테이블 범위 밖이거나 단면이 없으면 None.
+    """
+    z_grid = profile["z"]
+    table = profile["table"]
+    k = z_grid.shape[0]
+    zs = np.asarray(list(z_values), dtype=np.float64).reshape(-1)
+    out = [None] * zs.shape[0]
+    if k == 0 or zs.shape[0] == 0:
+        return out
+    step = float(profile["z_step"])
+    pos = (zs - z_grid[0]) / step
+    i0 = np.clip(np.floor(pos).astype(np.int64), 0, max(k - 2, 0))
+    i1 = np.minimum(i0 + 1, k - 1)
+    w = np.clip(pos - i0, 0.0, 1.0)
+    inside = (pos >= -1e-9) & (pos <= (k - 1) + 1e-9)
+    ok0 = ~np.isnan(table[i0, 2])
+    ok1 = ~np.isnan(table[i1, 2])
+    for j in range(zs.shape[0]):
+        if not inside[j]:
+            continue
+        if ok0[j] and ok1[j]:
+            row = table[i0[j]] * (1.0 - w[j]) + table[i1[j]] * w[j]
+        elif ok0[j] and w[j] <= 0.5:
+            row = table[i0[j]]
+        elif ok1[j] and w[j] >= 0.5:
+            row = table[i1[j]]
+        else:
+            continue
+        out[j] = dict(zip(PROFILE_METRIC_KEYS, (float(x) for x in row)))
+    return out
+
+
+def format_timings(timings):
+    """로그용 'bin=0.0012 crossings=...' 문자열 (초)."""
+    keys = ["bin", "crossings", "stitch", "metrics", "total"]
+    return " ".join(
+        "{}={:.4f}".format(k, float(timings[k])) for k in keys if k in timings
+    )
+
+
+def _self_check():
+    """
+    회귀 점검: 정점 링을 정확히 지나는 평면 단면 (python mesh_section.py).
+    원뿔 r = 2 + 0.1 z 를 링 높이 z=0에서 자르면 중심 (0, 0), 지름 4.0이어야 한다.
+    """
+    seg = 128
+    rings = np.array([-1.0, 0.0, 1.0])
+    ang = np.linspace(0.0, 2.0 * np.pi, seg, endpoint=False)
+    vertices = np.array(
+        [[(2.0 + 0.1 * z) * np.cos(a), (2.0 + 0.1 * z) * np.sin(a), z] for z in rings for a in ang]
+    )
+    faces = []
+    for ring in range(rings.shape[0] - 1):
+        for i in range(seg):
+            a = ring * seg + i
+            b = ring * seg + (i + 1) % seg
+            faces.append((a, b, b + seg))
+            faces.append((a, b + seg, a + seg))
+    faces = np.array(faces, dtype=np.int64)
+    # z=0: 링 정점 seg개, z=0.5: 사각형마다 변 + 대각선 2개 엣지를 지나므로 2*seg개
+    for z, expected_points in ((0.0, seg), (0.5, 2 * seg)):
+        metrics, _ = outer_section_metrics(vertices, faces, [z])
+        m = metrics[0]
+        r_ring = 2.0 + 0.1 * z
+        assert m is not None, z
+        assert abs(m["cx"]) < 1e-9 and abs(m["cy"]) < 1e-9, (z, m)
+        # 정128각형의 꼭짓점/변 중점 거리 차 이내
+        assert abs(m["d"] - 2.0 * r_ring) < 1e-9 + 2.0 * r_ring * (1.0 - np.cos(np.pi / seg)), (z, m)
+        loops = slice_mesh(vertices, faces, [z], include_open=True)["loops"][0]
+        assert len(loops) == 1 and loops[0].shape[0] == expected_points, (z, [lp.shape for lp in loops])
+    print("mesh_section self-check ok")
+
+
+if __name__ == "__main__":
+    _self_check()
@@ -15,7 +15,23 @@ import finishline_detection as finishline_detection_module
 # Rhino Python 환경에서 실행된다고 가정
 import Rhino
 import Rhino.FileIO
-from diameter_analysis import analyze_diameters
+from diameter_analysis import analyze_diameter_profile
+
+# NumPy 메시 커널(선택). 없으면 explode는 RhinoCommon 경로만 사용한다.
+try:
+    import mesh_kernel
+except Exception:
+    mesh_kernel = None
+
+# 정점 배열 메모(선택). 상주 러너에서 이전 작업의 메모가 남지 않도록 작업 시작마다 비운다.
+try:
+    import mesh_moments
+except Exception:
+    mesh_moments = None
+
+# explode 위상 엔진: "numpy"(기본, 면 배열 성분 라벨) | "rhino"(Unweld + ExplodeAtUnweldedEdges)
+# join은 엔진과 무관하게 RhinoCommon CreateFromMerge를 쓴다.
+MESH_TOPOLOGY_ENGINE_ENV = "ABUTS_MESH_TOPOLOGY_ENGINE"
 
 _log_initialized = False
 
@@ -30,6 +46,26 @@ def _is_env_true(name, default=False):
     return s in ("1", "true", "yes", "y", "on")
 
 
+def _latest_module(module, tag):
+    """작업마다 하위 모듈을 reload한다(기존 subprocess 래퍼 경로).
+
+    상주 러너(init_instance.py)는 ABUTS_MODULE_RELOAD=0으로 실행해 모듈을 warm 상태로 두고,
+    코드 반영은 명시적 hot-reload 명령으로만 수행한다.
+    """
+    if not _is_env_true("ABUTS_MODULE_RELOAD", True):
+        return module
+    try:
+        module = importlib.reload(module)
+        log(
+            "[{}] module reloaded path={}".format(
+                tag, getattr(module, "__file__", "unknown")
+            )
+        )
+    except Exception as e:
+        log("[{}] module reload failed; using cached module: {}".format(tag, str(e)))
+    return module
+
+
 def log(msg):
     global _log_initialized
     import datetime
@@ -145,18 +181,7 @@ def _extract_finishline_z_extrema(points):
 
 
 def _detect_finish_line_latest(doc, visualize=False, mesh_id=None):
-    import importlib
-
-    module = finishline_detection_module
-    try:
-        module = importlib.reload(finishline_detection_module)
-        log(
-            "[finishline] module reloaded path={}".format(
-                getattr(module, "__file__", "unknown")
-            )
-        )
-    except Exception as e:
-        log("[finishline] module reload failed; using cached module: " + str(e))
+    module = _latest_module(finishline_detection_module, "finishline")
 
     keep_debug_objects = _is_env_true(
         "ABUTS_FINISHLINE_KEEP_DEBUG_OBJECTS", _DEBUG_KEEP_INTERMEDIATE_OBJECTS
@@ -221,19 +246,8 @@ def _detect_finish_line_latest(doc, visualize=False, mesh_id=None):
 
 
 def _run_fill_steps_latest(doc):
-    try:
-        import importlib
-
-        module = importlib.reload(fill_steps_module)
-        log(
-            "[fill-steps] module reloaded path={}".format(
-                getattr(module, "__file__", "unknown")
-            )
-        )
-        return module.detect_and_draw_vertical_band_planes(doc=doc)
-    except Exception as e:
-        log("[fill-steps] module reload failed, fallback cached module: " + str(e))
-        return fill_steps_module.detect_and_draw_vertical_band_planes(doc=doc)
+    module = _latest_module(fill_steps_module, "fill-steps")
+    return module.detect_and_draw_vertical_band_planes(doc=doc)
 
 
 def _post_finish_line(request_id: str, input_file_name: str, finish_line: dict):
@@ -742,10 +756,66 @@ def _calc_top_xy_radius(mesh, top_band_height=0.3):
     return max_r
 
 
+def _mesh_topology_engine():
+    if mesh_kernel is None:
+        return "rhino"
+    raw = os.environ.get(MESH_TOPOLOGY_ENGINE_ENV, "numpy").strip().lower()
+    return "rhino" if raw == "rhino" else "numpy"
+
+
+def _unweld_angles_deg():
+    raw = os.environ.get("ABUTS_UNWELD_ANGLES_DEG", "25,40,55,70")
+    angles = []
+    for tok in str(raw).split(","):
+        tok = tok.strip()
+        if not tok:
+            continue
+        try:
+            v = float(tok)
+            if v > 0:
+                angles.append(v)
+        except Exception:
+            pass
+    if not angles:
+        angles = [25.0, 40.0, 55.0, 70.0]
+    return angles
+
+
+def _explode_pieces_numpy(mesh, angles):
+    """
+    면 배열에서 성분 라벨만 계산해 분리 여부를 판단하고, 분리되는 단계의 조각만 메시로 만든다.
+    (원본 unweld 엣지 -> 각도별 crease 엣지 순서, Rhino 경로와 같은 우선순위)
+    면 인접(face_edge_links)과 법선 cos는 1회만 만들고 각도마다 crease 마스크만 바꾼다.
+    """
+    vertices, faces = mesh_kernel.from_rhino_mesh(mesh)
+    face_count = faces.shape[0]
+    link_a, link_b = mesh_kernel.face_edge_links(faces)
+    link_cos = None
+    for deg in [None] + list(angles):
+        if deg is None:
+            labels, count = mesh_kernel.link_components(link_a, link_b, face_count)
+            log("[explode] numpy base components={}".format(count))
+        else:
+            if link_cos is None:
+                link_cos = mesh_kernel.link_cosines(vertices, faces, link_a, link_b)
+            keep = link_cos >= mesh_kernel.np.cos(mesh_kernel.np.radians(float(deg)))
+            labels, count = mesh_kernel.link_components(link_a, link_b, face_count, keep)
+            log("[explode] numpy crease({}deg) -> pieces={}".format(deg, count))
+        if count > 1:
+            return [
+                mesh_kernel.rhino_mesh_from_arrays(
+                    Rhino.Geometry.Mesh, *mesh_kernel.submesh(vertices, faces, labels == k)
+                )
+                for k in range(count)
+            ]
+    return None
+
+
 def _explode_mesh_piece_candidates(mesh, doc=None):
     """
     메시가 weld 상태로 붙어 있는 경우를 대비해,
     Unweld(각도 기반) -> ExplodeAtUnweldedEdges 를 단계적으로 시도한다.
+    numpy 엔진이면 각도별 분리 결과를 면 성분 라벨로만 세고, 채택한 단계의 조각만 만든다.
     """
     if mesh is None:
         return []
@@ -755,6 +825,17 @@ def _explode_mesh_piece_candidates(mesh, doc=None):
     except Exception:
         base = mesh
 
+    angles = _unweld_angles_deg()
+
+    if _mesh_topology_engine() == "numpy":
+        try:
+            pieces = _explode_pieces_numpy(base, angles)
+            if pieces:
+                return pieces
+            return [base]
+        except Exception as e:
+            log("[explode] numpy components failed; Rhino explode: {}".format(str(e)))
+
     # 0) 원본 상태 explode 먼저
     try:
         pieces = base.ExplodeAtUnweldedEdges()
@@ -764,21 +845,6 @@ def _explode_mesh_piece_candidates(mesh, doc=None):
     except Exception as e:
         log("[explode] base explode failed: {}".format(str(e)))
 
-    raw = os.environ.get("ABUTS_UNWELD_ANGLES_DEG", "25,40,55,70")
-    angles = []
-    for tok in str(raw).split(","):
-        tok = tok.strip()
-        if not tok:
-            continue
-        try:
-            v = float(tok)
-            if v > 0:
-                angles.append(v)
-        except Exception:
-            pass
-    if not angles:
-        angles = [25.0, 40.0, 55.0, 70.0]
-
     # 1) 각도별 unweld 후 explode 재시도
     for deg in angles:
         try:
@@ -819,6 +885,27 @@ def fail(msg):
     raise Exception(msg)
 
 
+# 직전 main() 실행의 구조화 결과. 콜백 payload(init_instance._run_job, rhino_wrapper)에 실린다.
+# - perf: 단계별 소요 시간
+# - metadata: diameter / finishLine / hexRotation (로그의 *_RESULT 마커와 같은 값)
+_job_result = {}
+
+
+def _set_result_metadata(key, value):
+    _job_result.setdefault("metadata", {})[key] = value
+
+
+def job_result():
+    """직전 작업 결과 사본. perf는 단계별 소요 시간(초, 소수 3자리)."""
+    out = dict(_job_result)
+    if isinstance(out.get("metadata"), dict):
+        out["metadata"] = dict(out["metadata"])
+    perf = out.get("perf")
+    if isinstance(perf, dict):
+        out["perf"] = {k: round(float(v), 3) for k, v in perf.items()}
+    return out
+
+
 def _align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
     """
     공용 정렬 모듈(`align_stl_coordinate.py`)을 사용해 메시를 원점 정렬한다.
@@ -830,17 +917,12 @@ def _align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
     Returns:
         (center_x, center_y, z_target) 또는 False
     """
-    module = align_stl_coordinate_module
-    try:
-        module = importlib.reload(align_stl_coordinate_module)
-        log(
-            "[align] module reloaded path={} version={}".format(
-                getattr(module, "__file__", "unknown"),
-                getattr(module, "ALIGN_MODULE_VERSION", "unknown"),
-            )
+    module = _latest_module(align_stl_coordinate_module, "align")
+    log(
+        "[align] module version={}".format(
+            getattr(module, "ALIGN_MODULE_VERSION", "unknown")
         )
-    except Exception as e:
-        log("[align] module reload failed; using cached module: {}".format(str(e)))
+    )
 
     success, message, translation = module.align_mesh_to_origin(
         mesh,
@@ -883,9 +965,21 @@ def _align_mesh_to_origin(mesh, target_diameter=None, implant_profile=None):
                 json.dumps(payload, ensure_ascii=False).encode("utf-8")
             ).decode("ascii")
             log("HEX_ROTATION_RESULT:" + encoded)
+            _set_result_metadata("hexRotation", payload)
     except Exception as telemetry_err:
         log("[align] Hex telemetry encode failed: {}".format(str(telemetry_err)))
 
+    # 커넥션 Z 탐색에 쓴 외곽 단면 지표 테이블(진단용, 최종 좌표 기준)
+    try:
+        telemetry = getattr(module, "LAST_ALIGNMENT_TELEMETRY", None)
+        section_profile = (
+            telemetry.get("sectionProfile") if isinstance(telemetry, dict) else None
+        )
+        if isinstance(section_profile, dict):
+            _set_result_metadata("sectionProfile", section_profile)
+    except Exception:
+        pass
+
     if not success or translation is None:
         if not message:
             log("[align] alignment failed")
@@ -1242,22 +1336,7 @@ def _parse_args(argv, input_path_arg=None, output_path_arg=None):
 
 
 def _run_fill_screwholes_latest(doc, target_id):
-    try:
-        import importlib
-
-        module = importlib.reload(fill_screwholes_module)
-        log(
-            "[screwhole-fill] module reloaded path={}".format(
-                getattr(module, "__file__", "unknown")
-            )
-        )
-    except Exception as e:
-        module = fill_screwholes_module
-        log(
-            "[screwhole-fill] module reload failed; using cached module: {}".format(
-                str(e)
-            )
-        )
+    module = _latest_module(fill_screwholes_module, "screwhole-fill")
 
     if not hasattr(module, "fill_mesh_object"):
         log("[screwhole-fill] fill_mesh_object API not found")
@@ -1345,6 +1424,40 @@ def _run_fill_mesh_holes(doc, target_id):
     )
 
 
+def _merge_meshes(meshes, doc, label):
+    """
+    여러 메시를 하나로 합치고 같은 위치 정점/중복 면을 정리한다.
+    CreateFromMerge + CombineIdentical + RedundantFaces (메시 1개면 복제 없이 그대로 정리).
+    join은 RhinoCommon 네이티브 병합을 그대로 쓴다. numpy 배열 왕복(from_rhino_mesh -> weld ->
+    fill_rhino_mesh)은 Rhino 안에서 측정 전까지 기본 경로로 쓰지 않는다.
+    """
+    if not meshes:
+        return None
+    merged = None
+    try:
+        if len(meshes) == 1:
+            merged = meshes[0]
+        elif hasattr(Rhino.Geometry.Mesh, "CreateFromMerge"):
+            tol = doc.ModelAbsoluteTolerance if doc else 0.01
+            merged = Rhino.Geometry.Mesh.CreateFromMerge(meshes, tol or 0.01, True)
+        else:
+            log("[join:{}] skipped: CreateFromMerge unavailable".format(label))
+    except Exception as e:
+        log("[join:{}] RhinoCommon merge error: {}".format(label, str(e)))
+
+    if merged is not None and merged.Faces.Count > 0:
+        try:
+            merged.Vertices.CombineIdentical(True, True)
+        except Exception:
+            pass
+        try:
+            if hasattr(merged.Faces, "RedundantFaces"):
+                merged.Faces.RedundantFaces()
+        except Exception:
+            pass
+    return merged
+
+
 def _join_all_meshes(doc, label="final"):
     if doc is None:
         return 0
@@ -1371,27 +1484,9 @@ def _join_all_meshes(doc, label="final"):
         except Exception:
             pass
 
-    merged = None
-    try:
-        if len(meshes) == 1:
-            merged = meshes[0]
-        elif len(meshes) > 1 and hasattr(Rhino.Geometry.Mesh, "CreateFromMerge"):
-            tol = doc.ModelAbsoluteTolerance if doc else 0.01
-            merged = Rhino.Geometry.Mesh.CreateFromMerge(meshes, tol or 0.01, True)
-    except Exception as e:
-        log("[join:{}] RhinoCommon merge error: {}".format(label, str(e)))
+    merged = _merge_meshes(meshes, doc, label)
 
     if merged is not None and merged.Faces.Count > 0:
-        try:
-            merged.Vertices.CombineIdentical(True, True)
-        except Exception:
-            pass
-        try:
-            if hasattr(merged.Faces, "RedundantFaces"):
-                merged.Faces.RedundantFaces()
-        except Exception:
-            pass
-
         deleted = 0
         for oid in mesh_ids:
             try:
@@ -1585,6 +1680,15 @@ def _export_doc_to_stl(doc, output_path, mesh_ids_to_export=None):
 
 def main(input_path_arg=None, output_path_arg=None, log_path_arg=None):
     perf_sections = {}
+    # 실패해도 그때까지 잰 단계는 콜백으로 나가도록 같은 dict를 물려 둔다
+    _job_result.clear()
+    _job_result["perf"] = perf_sections
+    _job_result["metadata"] = {}
+    if mesh_moments is not None:
+        try:
+            mesh_moments.clear_vertex_memo()
+        except Exception:
+            pass
 
     def _perf_mark(name, started_at, extra=None):
         try:
@@ -1862,6 +1966,7 @@ def main(input_path_arg=None, output_path_arg=None, log_path_arg=None):
                     log("FINISHLINE_RESULT:" + encoded_finish_line)
                 except Exception as encode_err:
                     log("Finishline encode failed: " + str(encode_err))
+                _set_result_metadata("finishLine", finish_line_payload)
 
                 req_id = _extract_request_id_from_path(input_path)
                 if req_id:
@@ -1953,30 +2058,10 @@ def main(input_path_arg=None, output_path_arg=None, log_path_arg=None):
                     except Exception:
                         pass
 
-            merged = None
-            if len(meshes) == 1:
-                merged = meshes[0]
-            elif len(meshes) > 1:
-                tol = doc.ModelAbsoluteTolerance if doc else 0.01
-                if hasattr(Rhino.Geometry.Mesh, "CreateFromMerge"):
-                    merged = Rhino.Geometry.Mesh.CreateFromMerge(
-                        meshes, tol or 0.01, True
-                    )
-                else:
-                    log("Join (RhinoCommon) skipped: CreateFromMerge unavailable")
+            merged = _merge_meshes(meshes, doc, "main")
 
             joined_with_rhinocommon = False
             if merged and merged.Faces.Count > 0:
-                try:
-                    merged.Vertices.CombineIdentical(True, True)
-                except Exception:
-                    pass
-                try:
-                    if hasattr(merged.Faces, "RedundantFaces"):
-                        merged.Faces.RedundantFaces()
-                except Exception:
-                    pass
-
                 # 기존 메시 제거 후 병합 메시 추가
                 for oid in piece_ids:
                     try:
@@ -2043,8 +2128,21 @@ def main(input_path_arg=None, output_path_arg=None, log_path_arg=None):
 
         stage_started_at = time.perf_counter()
         try:
-            max_d, conn_d = analyze_diameters(doc)
+            diameter_result = analyze_diameter_profile(doc)
+            max_d = diameter_result["max"]
+            conn_d = diameter_result["connection"]
             log("DIAMETER_RESULT:max={} conn={}".format(max_d, conn_d))
+            _set_result_metadata(
+                "diameter", {"max": float(max_d), "connection": float(conn_d)}
+            )
+            if diameter_result.get("profile"):
+                _set_result_metadata("radialProfile", diameter_result["profile"])
+            log(
+                "[diameter] engine={} profile_planes={}".format(
+                    diameter_result.get("engine"),
+                    len((diameter_result.get("profile") or {}).get("rSection") or []),
+                )
+            )
         except Exception as e:
             log("Analysis failed: " + str(e))
         _perf_mark("diameter_analysis", stage_started_at)
@@ -7,7 +7,9 @@
  * STL 메타데이터 계산 서비스
  * Three.js를 사용하여 STL 파일의 메타데이터(직경, 길이, 각도 등)를 계산
  *
- * Usage: node index.js <stl-file-path> [finish-line-points-json]
+ * Usage: node index.js <stl-file-path> [finish-line-points-json | @points-json-file]
+ *
+ * finish line 점이 많으면 Windows 명령줄 길이 제한에 걸리므로 '@파일경로'로도 받는다.
  */
 
 import * as fs from "fs";
@@ -39,7 +41,11 @@ if (!fs.existsSync(stlFilePath)) {
 let finishLinePoints = null;
 if (finishLinePointsJson) {
   try {
-    finishLinePoints = JSON.parse(finishLinePointsJson);
+    finishLinePoints = JSON.parse(
+      finishLinePointsJson.startsWith("@")
+        ? fs.readFileSync(finishLinePointsJson.slice(1), "utf-8")
+        : finishLinePointsJson,
+    );
   } catch (e) {
     console.error("Invalid finish line points JSON:", e.message);
     process.exit(1);